@@ -0,0 +1,348 @@
+"""baseline schema (기존 Base.metadata.create_all 결과와 동일)
+
+기존 운영 DB는 create_all로 이미 테이블이 존재하므로
+테이블이 없을 때만 생성합니다. (신규 DB / 로컬 개발용)
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def _create_table_if_missing(name: str, *columns, **kw):
+    """이미 존재하는 테이블은 건너뜀 (create_all 시절 생성된 운영 DB 대응)"""
+    if sa.inspect(op.get_bind()).has_table(name):
+        return
+    op.create_table(name, *columns, **kw)
+
+
+def _ts(name: str = "created_at", server_default: bool = True):
+    return sa.Column(
+        name,
+        sa.DateTime(timezone=True),
+        server_default=sa.func.now() if server_default else None,
+        nullable=True,
+    )
+
+
+def _fk_user(name: str, nullable: bool = True):
+    return sa.Column(name, sa.String(100), sa.ForeignKey("users.id"), nullable=nullable)
+
+
+def upgrade() -> None:
+    _create_table_if_missing(
+        "surveys",
+        sa.Column("id", sa.Integer, primary_key=True, index=True),
+        sa.Column("name", sa.String(100), nullable=False),
+        sa.Column("phone", sa.String(20), nullable=False),
+        sa.Column("email", sa.String(100), nullable=True),
+        sa.Column("business_type", sa.String(50), nullable=False),
+        sa.Column("industry", sa.String(100), nullable=False),
+        sa.Column("years_in_business", sa.Integer, nullable=False),
+        sa.Column("revenue_range", sa.String(50), nullable=False),
+        sa.Column("team_size", sa.Integer, nullable=False),
+        sa.Column("responses", sa.JSON, nullable=False),
+        _ts(),
+        _ts("updated_at", server_default=False),
+    )
+
+    _create_table_if_missing(
+        "users",
+        sa.Column("id", sa.String(100), primary_key=True),
+        sa.Column("name", sa.String(100), nullable=False),
+        sa.Column("phone", sa.String(50), unique=True, nullable=True),
+        sa.Column("email", sa.String(100), unique=True, nullable=True, index=True),
+        sa.Column("role", sa.String(20), nullable=True),
+        sa.Column("tier", sa.String(50)),
+        sa.Column("subscription_status", sa.String(50)),
+        sa.Column("trial_start_date", sa.DateTime(timezone=True)),
+        sa.Column("trial_end_date", sa.DateTime(timezone=True)),
+        sa.Column("subscription_start_date", sa.DateTime(timezone=True)),
+        sa.Column("subscription_end_date", sa.DateTime(timezone=True)),
+        sa.Column("vip_limit", sa.Integer),
+        sa.Column("vip_current_count", sa.Integer),
+        sa.Column("grace_period_end_date", sa.DateTime(timezone=True)),
+        sa.Column("notification_sent_2days", sa.Boolean),
+        sa.Column("notification_sent_today", sa.Boolean),
+        sa.Column("last_payment_date", sa.DateTime(timezone=True)),
+        sa.Column("payment_method", sa.String(50)),
+        sa.Column("billing_key", sa.String(100)),
+        sa.Column("memo", sa.Text),
+        sa.Column("status", sa.String(50)),
+        sa.Column("invitation_sent_at", sa.DateTime(timezone=True)),
+        sa.Column("auth_id", sa.String(100)),
+        sa.Column("last_login_at", sa.DateTime(timezone=True)),
+        _fk_user("created_by"),
+        sa.Column("onboarding_completed", sa.Boolean),
+        sa.Column("company_name", sa.String(100)),
+        sa.Column("job_title", sa.String(100)),
+        sa.Column("website", sa.String(200)),
+        sa.Column("specialty", sa.String(100)),
+        sa.Column("intro", sa.Text),
+        sa.Column("birth_date", sa.Date),
+        sa.Column("gender", sa.String(20)),
+        sa.Column("address", sa.String(200)),
+        sa.Column("bank_name", sa.String(50)),
+        sa.Column("account_number", sa.String(100)),
+        sa.Column("account_holder", sa.String(50)),
+        _ts(),
+        _ts("updated_at", server_default=False),
+    )
+
+    _create_table_if_missing(
+        "admin_actions",
+        sa.Column("id", sa.String(100), primary_key=True),
+        _fk_user("admin_id", nullable=False),
+        sa.Column("action_type", sa.String(50), nullable=False),
+        _fk_user("target_agent_id", nullable=False),
+        sa.Column("old_value", sa.Text),
+        sa.Column("new_value", sa.Text),
+        _ts(),
+    )
+
+    _create_table_if_missing(
+        "reports",
+        sa.Column("id", sa.Integer, primary_key=True, index=True),
+        sa.Column("survey_id", sa.Integer, nullable=False, index=True),
+        sa.Column("user_id", sa.String(100), nullable=False, index=True),
+        _fk_user("agent_id"),
+        sa.Column("title", sa.String(200)),
+        sa.Column("content", sa.Text),
+        sa.Column("template", sa.String(100)),
+        sa.Column("persona_type", sa.String(50), nullable=False),
+        sa.Column("bottlenecks", sa.JSON, nullable=False),
+        sa.Column("insights", sa.JSON, nullable=False),
+        sa.Column("recommendations", sa.JSON, nullable=False),
+        sa.Column("narrative_text", sa.Text, nullable=False),
+        sa.Column("monthly_time_loss", sa.Integer, nullable=False),
+        sa.Column("monthly_cost_loss", sa.Integer, nullable=False),
+        sa.Column("growth_delay_months", sa.Integer, nullable=False),
+        sa.Column("urgency_score", sa.Integer, nullable=False),
+        sa.Column("html_url", sa.String(500)),
+        sa.Column("pdf_url", sa.String(500)),
+        sa.Column("kakao_sent", sa.Integer),
+        sa.Column("kakao_sent_at", sa.DateTime(timezone=True)),
+        _ts(),
+        _ts("updated_at", server_default=False),
+    )
+
+    _create_table_if_missing(
+        "notifications",
+        sa.Column("id", sa.String(100), primary_key=True),
+        sa.Column("title", sa.String(200), nullable=False),
+        sa.Column("content", sa.Text),
+        sa.Column("target", sa.String(20)),
+        _fk_user("created_by"),
+        _ts(),
+    )
+
+    _create_table_if_missing(
+        "agent_notes",
+        sa.Column("id", sa.String(100), primary_key=True),
+        _fk_user("agent_id"),
+        _fk_user("vip_id"),
+        sa.Column("content", sa.Text, nullable=False),
+        _ts(),
+    )
+
+    _create_table_if_missing(
+        "user_notifications",
+        sa.Column("id", sa.String(100), primary_key=True),
+        _fk_user("user_id"),
+        sa.Column("notification_id", sa.String(100), sa.ForeignKey("notifications.id")),
+        sa.Column("read_at", sa.DateTime(timezone=True)),
+        _ts(),
+    )
+
+    _create_table_if_missing(
+        "agent_applications",
+        sa.Column("id", sa.String(100), primary_key=True),
+        sa.Column("name", sa.String(100), nullable=False),
+        sa.Column("email", sa.String(100), nullable=False),
+        sa.Column("experience", sa.Text),
+        sa.Column("status", sa.String(20)),
+        _ts(),
+    )
+
+    _create_table_if_missing(
+        "solution_requests",
+        sa.Column("id", sa.String(100), primary_key=True),
+        _fk_user("vip_id"),
+        _fk_user("agent_id"),
+        sa.Column("service_type", sa.String(100)),
+        sa.Column("content", sa.Text),
+        sa.Column("preferred_time", sa.String(100)),
+        sa.Column("status", sa.String(20)),
+        sa.Column("processing_memo", sa.Text),
+        sa.Column("processing_type", sa.String(50)),
+        _ts(),
+    )
+
+    _create_table_if_missing(
+        "solution_histories",
+        sa.Column("id", sa.String(100), primary_key=True),
+        sa.Column("request_id", sa.String(100), sa.ForeignKey("solution_requests.id")),
+        sa.Column("status", sa.String(50), nullable=False),
+        sa.Column("memo", sa.Text),
+        _fk_user("created_by"),
+        _ts(),
+    )
+
+    _create_table_if_missing(
+        "synergy_services",
+        sa.Column("id", sa.String(100), primary_key=True),
+        sa.Column("name", sa.String(100), nullable=False),
+        sa.Column("description", sa.Text),
+        sa.Column("price", sa.Integer),
+        _ts(),
+    )
+
+    _create_table_if_missing(
+        "invitations",
+        sa.Column("id", sa.String(100), primary_key=True),
+        sa.Column("name", sa.String(100), nullable=False),
+        sa.Column("email", sa.String(100), nullable=False),
+        sa.Column("token", sa.String(100), unique=True, nullable=False),
+        sa.Column("role", sa.String(20)),
+        _fk_user("invited_by"),
+        sa.Column("used", sa.Boolean),
+        sa.Column("expires_at", sa.DateTime(timezone=True), nullable=False),
+        _ts(),
+    )
+
+    _create_table_if_missing(
+        "synergy_applications",
+        sa.Column("id", sa.String(100), primary_key=True),
+        sa.Column("service_id", sa.String(100), sa.ForeignKey("synergy_services.id")),
+        _fk_user("agent_id"),
+        _fk_user("vip_id"),
+        sa.Column("status", sa.String(20)),
+        _ts(),
+    )
+
+    _create_table_if_missing(
+        "lounge_posts",
+        sa.Column("id", sa.String(100), primary_key=True),
+        _fk_user("user_id"),
+        sa.Column("title", sa.String(200), nullable=False),
+        sa.Column("content", sa.Text),
+        sa.Column("category", sa.String(50)),
+        sa.Column("is_hidden", sa.Boolean),
+        sa.Column("report_count", sa.Integer),
+        sa.Column("view_count", sa.Integer),
+        _ts(),
+    )
+
+    _create_table_if_missing(
+        "referral_rewards",
+        sa.Column("id", sa.String(100), primary_key=True),
+        _fk_user("user_id"),
+        _fk_user("referred_user_id"),
+        sa.Column("points", sa.Integer),
+        _ts(),
+    )
+
+    _create_table_if_missing(
+        "withdrawal_requests",
+        sa.Column("id", sa.String(100), primary_key=True),
+        _fk_user("user_id"),
+        sa.Column("amount", sa.Integer, nullable=False),
+        sa.Column("bank_name", sa.String(100)),
+        sa.Column("account_number", sa.String(100)),
+        sa.Column("account_holder", sa.String(100)),
+        sa.Column("status", sa.String(20)),
+        sa.Column("memo", sa.Text),
+        sa.Column("processed_at", sa.DateTime(timezone=True)),
+        _ts(),
+    )
+
+    _create_table_if_missing(
+        "quests",
+        sa.Column("id", sa.String(100), primary_key=True),
+        _fk_user("vip_id"),
+        _fk_user("agent_id"),
+        sa.Column("title", sa.String(200), nullable=False),
+        sa.Column("category", sa.String(100)),
+        sa.Column("description", sa.Text),
+        sa.Column("status", sa.String(20)),
+        sa.Column("due_date", sa.DateTime(timezone=True)),
+        sa.Column("completed_at", sa.DateTime(timezone=True)),
+        _ts(),
+        sa.Column("quest_order", sa.Integer),
+        sa.Column("is_locked", sa.Boolean),
+        sa.Column("ai_questions", sa.JSON),
+        sa.Column("user_answers", sa.JSON),
+        sa.Column("ai_evaluation", sa.JSON),
+        sa.Column("checked_count", sa.Integer),
+    )
+
+    _create_table_if_missing(
+        "health_index",
+        sa.Column("id", sa.String(100), primary_key=True),
+        _fk_user("vip_id"),
+        _fk_user("agent_id"),
+        sa.Column("asset_stability", sa.Integer),
+        sa.Column("time_independence", sa.Integer),
+        sa.Column("physical_condition", sa.Integer),
+        sa.Column("emotional_balance", sa.Integer),
+        sa.Column("network_power", sa.Integer),
+        sa.Column("system_leverage", sa.Integer),
+        sa.Column("overall_score", sa.Integer),
+        _ts(),
+    )
+
+    _create_table_if_missing(
+        "point_transactions",
+        sa.Column("id", sa.String(100), primary_key=True),
+        _fk_user("user_id"),
+        sa.Column("amount", sa.Integer, nullable=False),
+        sa.Column("type", sa.String(20), nullable=False),
+        sa.Column("reason", sa.String(200)),
+        _ts(),
+    )
+
+    _create_table_if_missing(
+        "community_comments",
+        sa.Column("id", sa.String(100), primary_key=True),
+        sa.Column("post_id", sa.String(100), sa.ForeignKey("lounge_posts.id")),
+        _fk_user("user_id"),
+        sa.Column("content", sa.Text, nullable=False),
+        _ts(),
+    )
+
+    _create_table_if_missing(
+        "session_payments",
+        sa.Column("id", sa.String(100), primary_key=True),
+        sa.Column("name", sa.String(100), nullable=False),
+        sa.Column("email", sa.String(100), nullable=False),
+        sa.Column("phone", sa.String(50), nullable=False),
+        sa.Column("payment_amount", sa.Integer),
+        sa.Column("payment_status", sa.String(20)),
+        sa.Column("session_date", sa.DateTime(timezone=True)),
+        _ts(),
+    )
+
+    _create_table_if_missing(
+        "invitation_tokens",
+        sa.Column("id", sa.String(100), primary_key=True),
+        sa.Column("token", sa.String(100), unique=True, nullable=False, index=True),
+        _fk_user("user_id"),
+        sa.Column("email", sa.String(100), nullable=False),
+        sa.Column("expires_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("used", sa.Boolean),
+        sa.Column("used_at", sa.DateTime(timezone=True)),
+        sa.Column("expired", sa.Boolean),
+        _ts(),
+    )
+
+
+def downgrade() -> None:
+    # 운영 데이터 보호: baseline은 되돌리지 않음
+    pass
@@ -0,0 +1,49 @@
+"""hot query 조건절용 복합 인덱스
+
+- users(role, created_by)                                : 에이전트별 VIP 목록/카운트
+- users(role, subscription_status, trial_end_date)       : 체험 만료 스케줄러 / 만료 임박 목록
+- users(role, subscription_status, subscription_end_date): 유료 갱신 스케줄러 / 만료 임박 목록
+- health_index(vip_id, created_at DESC)                  : 최신 건강 지표 조회
+- quests(vip_id, quest_order)                            : 퀘스트 목록 / 다음 단계 해제
+- community_comments(post_id)                            : 댓글 수 / 댓글 목록
+- lounge_posts(is_hidden, category, created_at)          : 커뮤니티 목록
+- withdrawal_requests(status)                            : 정산 목록
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+INDEXES = [
+    ("ix_users_role_created_by", "users", ["role", "created_by"]),
+    ("ix_users_role_status_trial_end", "users", ["role", "subscription_status", "trial_end_date"]),
+    ("ix_users_role_status_sub_end", "users", ["role", "subscription_status", "subscription_end_date"]),
+    ("ix_health_index_vip_id_created_at", "health_index", ["vip_id", sa.text("created_at DESC")]),
+    ("ix_quests_vip_id_quest_order", "quests", ["vip_id", "quest_order"]),
+    ("ix_community_comments_post_id", "community_comments", ["post_id"]),
+    ("ix_lounge_posts_hidden_category_created", "lounge_posts", ["is_hidden", "category", "created_at"]),
+    ("ix_withdrawal_requests_status", "withdrawal_requests", ["status"]),
+]
+
+
+def upgrade() -> None:
+    # role 컬럼은 Supabase 쪽에서 먼저 추가된 운영 DB가 있으므로 없을 때만 추가
+    columns = {c["name"] for c in sa.inspect(op.get_bind()).get_columns("users")}
+    if "role" not in columns:
+        op.add_column("users", sa.Column("role", sa.String(20), nullable=True))
+
+    for name, table, cols in INDEXES:
+        op.create_index(name, table, cols, if_not_exists=True)
+
+
+def downgrade() -> None:
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table, if_exists=True)
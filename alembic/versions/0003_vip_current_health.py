@@ -0,0 +1,93 @@
+"""VIP 최신 건강 지표 프로젝션 테이블 (vip_current_health)
+
+- health_index 최신 1건을 VIP당 1행으로 유지 (health_index_id = 원본 행, created_at = 원본 측정 시각)
+- PostgreSQL: health_index INSERT/UPDATE 트리거로 동기화
+  (Supabase REST upsert 경로도 ORM을 거치지 않으므로 트리거로 보장)
+  - INSERT: 측정 시각이 프로젝션보다 같거나 늦을 때만 반영 (오래된 측정이 늦게 들어와도 덮지 않음)
+  - UPDATE: 프로젝션의 원본 행을 수정한 경우 측정 시각과 무관하게 반영
+    (재진단 on_conflict=vip_id upsert / 재채점 백필은 행을 제자리 수정하므로 created_at이 그대로임)
+- 기존 health_index 데이터로 초기 백필
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+SCORE_COLUMNS = [
+    "asset_stability",
+    "time_independence",
+    "physical_condition",
+    "emotional_balance",
+    "network_power",
+    "system_leverage",
+    "overall_score",
+]
+
+
+def upgrade() -> None:
+    op.create_table(
+        "vip_current_health",
+        sa.Column("vip_id", sa.String(100), sa.ForeignKey("users.id"), primary_key=True),
+        sa.Column("agent_id", sa.String(100), sa.ForeignKey("users.id"), nullable=True, index=True),
+        sa.Column("health_index_id", sa.String(100), nullable=True),
+        *[sa.Column(c, sa.Integer) for c in SCORE_COLUMNS],
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+
+    if op.get_bind().dialect.name != "postgresql":
+        return
+
+    cols = ", ".join(SCORE_COLUMNS)
+    new_cols = ", ".join(f"NEW.{c}" for c in SCORE_COLUMNS)
+    set_cols = ",\n            ".join(f"{c} = EXCLUDED.{c}" for c in SCORE_COLUMNS)
+
+    op.execute(f"""
+        CREATE OR REPLACE FUNCTION sync_vip_current_health() RETURNS trigger AS $$
+        BEGIN
+            INSERT INTO vip_current_health (vip_id, agent_id, health_index_id, {cols}, created_at, updated_at)
+            VALUES (NEW.vip_id, NEW.agent_id, NEW.id, {new_cols}, COALESCE(NEW.created_at, now()), now())
+            ON CONFLICT (vip_id) DO UPDATE SET
+                agent_id = COALESCE(EXCLUDED.agent_id, vip_current_health.agent_id),
+                health_index_id = EXCLUDED.health_index_id,
+                {set_cols},
+                created_at = EXCLUDED.created_at,
+                updated_at = now()
+            WHERE vip_current_health.created_at <= EXCLUDED.created_at
+               OR (TG_OP = 'UPDATE' AND (vip_current_health.health_index_id IS NULL
+                                         OR vip_current_health.health_index_id = EXCLUDED.health_index_id));
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql;
+    """)
+    op.execute("""
+        CREATE TRIGGER trg_health_index_current
+        AFTER INSERT OR UPDATE ON health_index
+        FOR EACH ROW WHEN (NEW.vip_id IS NOT NULL)
+        EXECUTE FUNCTION sync_vip_current_health();
+    """)
+
+    # 초기 백필: VIP별 최신 health_index 1건
+    op.execute(f"""
+        INSERT INTO vip_current_health (vip_id, agent_id, health_index_id, {cols}, created_at, updated_at)
+        SELECT DISTINCT ON (vip_id) vip_id, agent_id, id, {cols}, COALESCE(created_at, now()), now()
+        FROM health_index
+        WHERE vip_id IS NOT NULL
+        ORDER BY vip_id, created_at DESC NULLS LAST
+        ON CONFLICT (vip_id) DO NOTHING;
+    """)
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == "postgresql":
+        op.execute("DROP TRIGGER IF EXISTS trg_health_index_current ON health_index")
+        op.execute("DROP FUNCTION IF EXISTS sync_vip_current_health()")
+    op.drop_table("vip_current_health")
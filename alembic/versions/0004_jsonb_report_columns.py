@@ -0,0 +1,57 @@
+"""surveys.responses / reports JSON 컬럼 → JSONB + GIN 인덱스
+
+- surveys.responses                : jsonb_ops (키 존재 ? / 포함 @>)
+- reports.bottlenecks/insights/recommendations : jsonb_path_ops (포함 @>)
+- PostgreSQL 전용 (그 외 DB는 변경 없음)
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+JSONB_COLUMNS = [
+    ("surveys", "responses"),
+    ("reports", "bottlenecks"),
+    ("reports", "insights"),
+    ("reports", "recommendations"),
+]
+
+GIN_INDEXES = [
+    ("ix_surveys_responses_gin", "surveys", "responses", None),
+    ("ix_reports_bottlenecks_gin", "reports", "bottlenecks", "jsonb_path_ops"),
+    ("ix_reports_insights_gin", "reports", "insights", "jsonb_path_ops"),
+    ("ix_reports_recommendations_gin", "reports", "recommendations", "jsonb_path_ops"),
+]
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+
+    for table, column in JSONB_COLUMNS:
+        op.execute(f"ALTER TABLE {table} ALTER COLUMN {column} TYPE jsonb USING {column}::jsonb")
+
+    for name, table, column, opclass in GIN_INDEXES:
+        ops = {column: opclass} if opclass else {}
+        op.create_index(
+            name, table, [column],
+            postgresql_using="gin", postgresql_ops=ops, if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+
+    for name, table, _, _ in GIN_INDEXES:
+        op.drop_index(name, table_name=table, if_exists=True)
+
+    for table, column in JSONB_COLUMNS:
+        op.execute(f"ALTER TABLE {table} ALTER COLUMN {column} TYPE json USING {column}::json")
@@ -0,0 +1,26 @@
+"""users.points 컬럼 추가
+
+에이전트 포인트 증감(admin.adjust_agent_points)이 참조하지만 모델/스키마에 없던 컬럼.
+운영 DB에 이미 수동으로 추가된 경우가 있으므로 없을 때만 추가.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    columns = {c["name"] for c in sa.inspect(op.get_bind()).get_columns("users")}
+    if "points" not in columns:
+        op.add_column("users", sa.Column("points", sa.Integer(), nullable=True, server_default="0"))
+
+
+def downgrade() -> None:
+    op.drop_column("users", "points")
@@ -0,0 +1,39 @@
+"""스케줄러 작업 실행 이력 테이블 (job_runs)
+
+- (job_name, scheduled_for) 유니크 → 여러 인스턴스가 같은 슬롯을 중복 실행하지 않음
+- 실행별 소요 시간 / 결과 / 오류 기록
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "job_runs",
+        sa.Column("id", sa.String(100), primary_key=True),
+        sa.Column("job_name", sa.String(100), nullable=False),
+        sa.Column("scheduled_for", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("trigger", sa.String(20)),
+        sa.Column("status", sa.String(20)),
+        sa.Column("instance", sa.String(100), nullable=True),
+        sa.Column("started_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("finished_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("duration_ms", sa.Integer, nullable=True),
+        sa.Column("error", sa.Text, nullable=True),
+        sa.UniqueConstraint("job_name", "scheduled_for", name="uq_job_runs_job_name_scheduled_for"),
+    )
+    op.create_index("ix_job_runs_job_name_started_at", "job_runs", ["job_name", "started_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_job_runs_job_name_started_at", table_name="job_runs")
+    op.drop_table("job_runs")
@@ -0,0 +1,32 @@
+"""배치 작업 체크포인트 테이블 (batch_checkpoints)
+
+- check_subscriptions 단계별 마지막 처리 users.id 기록
+- 청크 commit과 같은 트랜잭션으로 갱신 → 중단된 실행을 같은 날 재실행하면 이어서 처리
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "batch_checkpoints",
+        sa.Column("job_name", sa.String(100), primary_key=True),
+        sa.Column("step", sa.String(100), primary_key=True),
+        sa.Column("run_key", sa.String(50), nullable=True),
+        sa.Column("last_id", sa.String(100), nullable=True),
+        sa.Column("completed", sa.Boolean, server_default=sa.false()),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("batch_checkpoints")
@@ -0,0 +1,37 @@
+"""자동갱신 결제 시도 이력 테이블 (renewal_attempts)
+
+- 시도마다 1행 (같은 결제 주기는 결정적 order_id를 공유)
+- 결과 반영(users 갱신)과 같은 트랜잭션으로 기록
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0008"
+down_revision = "0007"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "renewal_attempts",
+        sa.Column("id", sa.String(100), primary_key=True),
+        sa.Column("agent_id", sa.String(100), sa.ForeignKey("users.id"), index=True),
+        sa.Column("order_id", sa.String(100), nullable=False, index=True),
+        sa.Column("attempt", sa.Integer),
+        sa.Column("amount", sa.Integer),
+        sa.Column("status", sa.String(20), nullable=False),
+        sa.Column("http_status", sa.Integer, nullable=True),
+        sa.Column("error_code", sa.String(100), nullable=True),
+        sa.Column("error_message", sa.Text, nullable=True),
+        sa.Column("payment_key", sa.String(200), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("renewal_attempts")
@@ -0,0 +1,37 @@
+"""결제 원장 테이블 (payment_events)
+
+- order_id / payment_key 유니크 → confirm / 웹훅 / 자동갱신 결제를 1회만 반영
+- INSERT ... ON CONFLICT DO NOTHING으로 중복 이벤트 판정
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import JSONB
+
+revision = "0009"
+down_revision = "0008"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "payment_events",
+        sa.Column("id", sa.String(100), primary_key=True),
+        sa.Column("order_id", sa.String(100), nullable=False, unique=True),
+        sa.Column("payment_key", sa.String(200), nullable=True, unique=True),
+        sa.Column("agent_id", sa.String(100), sa.ForeignKey("users.id"), nullable=True, index=True),
+        sa.Column("source", sa.String(20), nullable=False),
+        sa.Column("tier", sa.String(50), nullable=True),
+        sa.Column("billing_cycle", sa.String(20), nullable=True),
+        sa.Column("amount", sa.Integer, nullable=True),
+        sa.Column("payload", sa.JSON().with_variant(JSONB(), "postgresql"), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("payment_events")
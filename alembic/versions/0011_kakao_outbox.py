@@ -0,0 +1,41 @@
+"""알림톡 발송 대기열 테이블 (kakao_outbox)
+
+- 수신자당 1행, 발송기가 템플릿 코드별로 최대 500명씩 묶어 알리고 1회 요청으로 발송
+- batch_mid: 알리고 요청 mid (수신자별 최종 결과는 알리고 이력에서 조회)
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0011"
+down_revision = "0010"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "kakao_outbox",
+        sa.Column("id", sa.String(100), primary_key=True),
+        sa.Column("tpl_code", sa.String(50), nullable=False),
+        sa.Column("phone", sa.String(20), nullable=False),
+        sa.Column("subject", sa.String(100)),
+        sa.Column("message", sa.Text, nullable=False),
+        sa.Column("fail_sms", sa.Boolean, server_default=sa.true()),
+        sa.Column("status", sa.String(20)),
+        sa.Column("attempts", sa.Integer),
+        sa.Column("next_attempt_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("batch_mid", sa.String(100), nullable=True),
+        sa.Column("error", sa.Text, nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("sent_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index("ix_kakao_outbox_status_next_attempt_at", "kakao_outbox", ["status", "next_attempt_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_kakao_outbox_status_next_attempt_at", table_name="kakao_outbox")
+    op.drop_table("kakao_outbox")
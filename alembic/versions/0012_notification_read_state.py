@@ -0,0 +1,52 @@
+"""알림 읽음 상태 지연 계산 (notification_watermarks + 인덱스)
+
+- 읽음 상태는 notifications 1행 + 워터마크 / 영수증으로 계산
+- notification_watermarks: 사용자별 '모두 읽음' 시각
+- user_notifications: (user_id, notification_id) 유니크
+  기존 행은 유지 (프론트엔드가 Supabase로 직접 읽는 받은 알림함, read_at IS NULL 행은 읽음 판정에 영향 없음)
+  유니크 제약 전에 같은 (user_id, notification_id) 중복만 정리 (읽음 기록이 있는 행 → 먼저 생성된 행 1개 유지)
+- 안 읽은 알림 조회용 (target, created_at) 인덱스
+
+Revision ID: 0012
+Revises: 0011
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0012"
+down_revision = "0011"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "notification_watermarks",
+        sa.Column("user_id", sa.String(100), sa.ForeignKey("users.id"), primary_key=True),
+        sa.Column("last_read_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_index("ix_notifications_target_created_at", "notifications", ["target", "created_at"])
+    op.execute("""
+        DELETE FROM user_notifications
+        WHERE id IN (
+            SELECT id FROM (
+                SELECT id, ROW_NUMBER() OVER (
+                    PARTITION BY user_id, notification_id
+                    ORDER BY (read_at IS NOT NULL) DESC, created_at, id
+                ) AS rn
+                FROM user_notifications
+            ) ranked
+            WHERE rn > 1
+        )
+    """)
+    op.create_unique_constraint(
+        "uq_user_notifications_user_notification", "user_notifications", ["user_id", "notification_id"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint("uq_user_notifications_user_notification", "user_notifications", type_="unique")
+    op.drop_index("ix_notifications_target_created_at", table_name="notifications")
+    op.drop_table("notification_watermarks")
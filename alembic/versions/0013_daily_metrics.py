@@ -0,0 +1,34 @@
+"""관리자 KPI 일별 롤업 테이블 (daily_metrics)
+
+- (metric_date, metric, dimension) 복합 PK, 값 1개
+- 발생 지표는 이벤트 훅 + 주기 작업 보정, 스냅샷 지표는 주기 작업이 갱신 (app/services/metrics.py)
+
+Revision ID: 0013
+Revises: 0012
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0013"
+down_revision = "0012"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "daily_metrics",
+        sa.Column("metric_date", sa.Date, primary_key=True),
+        sa.Column("metric", sa.String(50), primary_key=True),
+        sa.Column("dimension", sa.String(50), primary_key=True, server_default=""),
+        sa.Column("value", sa.BigInteger, nullable=False, server_default="0"),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    # 발생 지표 일자 범위 조회 (metric, metric_date)
+    op.create_index("ix_daily_metrics_metric_date", "daily_metrics", ["metric", "metric_date"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_daily_metrics_metric_date", table_name="daily_metrics")
+    op.drop_table("daily_metrics")
@@ -0,0 +1,33 @@
+"""진행 중인 진단 답변 저장 테이블 (diagnosis_sessions)
+
+- 워커 메모리 dict 대신 공유 저장소 (app/services/diagnosis_sessions.py의 sql 저장소)
+- expires_at 이후 조회에서 제외되고 스케줄러가 삭제
+
+Revision ID: 0014
+Revises: 0013
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import JSONB
+
+revision = "0014"
+down_revision = "0013"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "diagnosis_sessions",
+        sa.Column("id", sa.String(100), primary_key=True),
+        sa.Column("answers", sa.JSON().with_variant(JSONB(), "postgresql"), nullable=False),
+        sa.Column("expires_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_index("ix_diagnosis_sessions_expires_at", "diagnosis_sessions", ["expires_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_diagnosis_sessions_expires_at", table_name="diagnosis_sessions")
+    op.drop_table("diagnosis_sessions")
@@ -0,0 +1,38 @@
+"""완료된 진단 원본 답변 테이블 (diagnosis_submissions)
+
+- /diagnosis/complete 시 답변 원본을 보관 → 채점 기준 변경 시 health_index 재채점 백필
+  (python -m app.services.health_backfill)
+
+Revision ID: 0015
+Revises: 0014
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import JSONB
+
+revision = "0015"
+down_revision = "0014"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "diagnosis_submissions",
+        sa.Column("id", sa.String(100), primary_key=True),
+        sa.Column("vip_id", sa.String(100), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("answers", sa.JSON().with_variant(JSONB(), "postgresql"), nullable=False),
+        sa.Column("overall_score", sa.Integer, nullable=True),
+        sa.Column("submitted_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_index(
+        "ix_diagnosis_submissions_vip_id_submitted_at",
+        "diagnosis_submissions",
+        ["vip_id", sa.text("submitted_at DESC")],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_diagnosis_submissions_vip_id_submitted_at", table_name="diagnosis_submissions")
+    op.drop_table("diagnosis_submissions")
@@ -0,0 +1,48 @@
+"""퀘스트 순서 유니크 제약 (quests (vip_id, quest_order))
+
+- 퀘스트 목록 조회 중 동시 초기화로 생긴 중복 퀘스트 세트 정리
+  (순서별로 완료된 행 → 잠금 해제된 행 → 체크리스트가 있는 행 → 먼저 생성된 행 1개만 유지)
+- 남은 세트에서 앞 순서가 완료됐는데 잠겨 있는 퀘스트는 잠금 해제 (서로 다른 세트의 행이 섞인 경우)
+- 기존 비유니크 인덱스 ix_quests_vip_id_quest_order는 유니크 제약의 인덱스로 대체
+
+Revision ID: 0016
+Revises: 0015
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+revision = "0016"
+down_revision = "0015"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("""
+        DELETE FROM quests
+        WHERE id IN (
+            SELECT id FROM (
+                SELECT id, ROW_NUMBER() OVER (
+                    PARTITION BY vip_id, quest_order
+                    ORDER BY (status = 'completed') DESC, is_locked ASC, (ai_questions IS NOT NULL) DESC, created_at, id
+                ) AS rn
+                FROM quests
+            ) ranked
+            WHERE rn > 1
+        )
+    """)
+    op.execute("""
+        UPDATE quests AS q SET is_locked = false
+        FROM quests AS prev
+        WHERE prev.vip_id = q.vip_id
+          AND prev.quest_order = q.quest_order - 1
+          AND prev.status = 'completed'
+          AND q.is_locked
+    """)
+    op.drop_index("ix_quests_vip_id_quest_order", table_name="quests", if_exists=True)
+    op.create_unique_constraint("uq_quests_vip_id_quest_order", "quests", ["vip_id", "quest_order"])
+
+
+def downgrade() -> None:
+    op.drop_constraint("uq_quests_vip_id_quest_order", "quests", type_="unique")
+    op.create_index("ix_quests_vip_id_quest_order", "quests", ["vip_id", "quest_order"], if_not_exists=True)
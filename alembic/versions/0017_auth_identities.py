@@ -0,0 +1,42 @@
+"""Supabase Auth 계정 로컬 인덱스 (auth_identities)
+
+- 이메일(소문자) → auth user id. 계정 삭제 / 초대 활성화 시 list_users() 전체 조회 대신 PK 조회
+- users.auth_id가 있는 행으로 초기 적재 (이후 Auth 이벤트 / 계정 생성·삭제 경로가 갱신)
+
+Revision ID: 0017
+Revises: 0016
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0017"
+down_revision = "0016"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "auth_identities",
+        sa.Column("email", sa.String(255), primary_key=True),
+        sa.Column("auth_id", sa.String(100), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.UniqueConstraint("auth_id", name="uq_auth_identities_auth_id"),
+    )
+    # 같은 이메일 / auth_id가 여러 행에 있으면 1개만 적재
+    op.execute("""
+        INSERT INTO auth_identities (email, auth_id)
+        SELECT email, auth_id FROM (
+            SELECT LOWER(email) AS email, auth_id,
+                   ROW_NUMBER() OVER (PARTITION BY LOWER(email) ORDER BY created_at DESC) AS rn_email,
+                   ROW_NUMBER() OVER (PARTITION BY auth_id ORDER BY created_at DESC) AS rn_auth
+            FROM users
+            WHERE auth_id IS NOT NULL AND email IS NOT NULL
+        ) ranked
+        WHERE rn_email = 1 AND rn_auth = 1
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table("auth_identities")
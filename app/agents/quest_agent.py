@@ -1,5 +1,7 @@
 """
 Quest Agent: VIP의 6대 균형 지표를 기반으로 성장 미션 질문 생성 및 답변 평가
+- evaluate_locally(): 통과 판정 + 메시지 뱅크 문구 (LLM 호출 없음)
+- personalize_message(): 같은 판정에 대한 맞춤 메시지 (백그라운드)
 """
 from typing import Dict, Any, List
 from openai import OpenAI
@@ -20,6 +22,70 @@ class QuestAgent:
         "system_leverage": "같은 일을 반복하고 있습니다. '이걸 언제까지 손으로 해야 하나?' 더 효율적인 방법이 있을 것 같은데 막막합니다."
     }
 
+    # 로컬 평가용 메시지 뱅크 (카테고리별 통과 / 재도전 문구, LLM 맞춤 메시지가 준비되기 전 즉시 응답용)
+    # 치환: {name} VIP 이름, {category} 영역 이름, {checked}/{total} 체크 수, {required} 통과 기준
+    MESSAGE_BANK = {
+        "future_safety_net": {
+            "passed": [
+                "{name}님, {total}개 중 {checked}개를 이미 챙기고 계셨네요. 내일을 대비하는 안전망이 생각보다 단단합니다. 지금의 습관이 불안함을 줄이는 가장 확실한 힘이에요.",
+                "{checked}개 항목을 체크하셨습니다. {name}님의 {category}은 이미 기초 공사가 끝난 상태예요. 남은 빈칸만 채우면 수입 걱정 없이 잠드는 밤이 늘어날 거예요.",
+            ],
+            "retry": [
+                "{name}님, 지금은 {checked}개를 체크하셨어요. {required}개만 채우면 다음 단계로 갈 수 있습니다. 가장 쉬운 항목 하나부터 이번 주에 시작해 보세요.",
+            ],
+        },
+        "emotional_anchor": {
+            "passed": [
+                "{name}님, {checked}개 항목을 체크하셨네요. 흔들리는 순간에도 스스로를 붙잡는 방법을 이미 알고 계십니다. 그 감각을 믿으셔도 좋아요.",
+                "{total}개 중 {checked}개 — {name}님의 마음에는 생각보다 단단한 닻이 내려져 있어요. 힘든 날에도 오늘의 체크리스트를 떠올려 보세요.",
+            ],
+            "retry": [
+                "{name}님, 혼자만 힘든 게 아닙니다. 지금 {checked}개를 체크하셨고, {required}개면 다음 단계로 넘어갈 수 있어요. 나를 위한 작은 시간 하나부터 챙겨 보세요.",
+            ],
+        },
+        "time_mastery": {
+            "passed": [
+                "{name}님, {checked}개 항목을 체크하셨습니다. 바쁜 와중에도 시간의 주인이 되는 습관을 갖고 계시네요. 이제 그 여유를 더 넓혀 갈 차례입니다.",
+                "{total}개 중 {checked}개 — {name}님의 하루에는 이미 우선순위가 살아 있어요. 지금의 리듬을 지키면서 한 걸음 더 나아가 봅시다.",
+            ],
+            "retry": [
+                "{name}님, 지금은 {checked}개를 체크하셨어요. {required}개만 채우면 다음 단계가 열립니다. 이번 주에 하루 30분, 온전히 나를 위한 시간을 먼저 떼어 두세요.",
+            ],
+        },
+        "body_signals": {
+            "passed": [
+                "{name}님, {checked}개 항목을 체크하셨네요. 몸이 보내는 신호에 귀 기울이고 계신다는 뜻입니다. 건강한 몸이 가장 오래가는 사업 자산이에요.",
+                "{total}개 중 {checked}개 — {name}님은 달리면서도 쉬는 법을 알고 계시네요. 지금의 컨디션 관리가 다음 도약의 기반이 됩니다.",
+            ],
+            "retry": [
+                "{name}님, 지금은 {checked}개를 체크하셨어요. {required}개를 채우면 다음 단계로 갈 수 있습니다. 오늘 밤 평소보다 30분 일찍 잠자리에 드는 것부터 시작해 보세요.",
+            ],
+        },
+        "relationship_power": {
+            "passed": [
+                "{name}님, {checked}개 항목을 체크하셨습니다. 곁에 든든한 사람들이 있다는 증거예요. 그 관계가 위기 때 가장 큰 힘이 되어 줄 겁니다.",
+                "{total}개 중 {checked}개 — {name}님은 이미 좋은 네트워크를 가꾸고 계십니다. 이제 그 관계를 사업의 기회로 연결해 볼 차례예요.",
+            ],
+            "retry": [
+                "{name}님, 지금은 {checked}개를 체크하셨어요. {required}개만 채우면 다음 단계가 열립니다. 이번 주에 오랫동안 연락하지 못한 한 분께 먼저 안부를 전해 보세요.",
+            ],
+        },
+        "system_leverage": {
+            "passed": [
+                "{name}님, {checked}개 항목을 체크하셨네요. 반복 업무를 시스템으로 바꾸는 감각을 이미 갖고 계십니다. 이제 그 시스템이 대신 일하게 만들 차례예요.",
+                "{total}개 중 {checked}개 — {name}님의 사업에는 이미 레버리지가 작동하고 있어요. 남은 반복 업무 하나만 더 덜어내 봅시다.",
+            ],
+            "retry": [
+                "{name}님, 지금은 {checked}개를 체크하셨어요. {required}개를 채우면 다음 단계로 갈 수 있습니다. 이번 주에 가장 자주 반복하는 일 하나를 적어 보는 것부터 시작해 보세요.",
+            ],
+        },
+    }
+    DEFAULT_MESSAGES = {
+        "passed": ["{name}님, {total}개 중 {checked}개를 체크하셨습니다. {category} 영역을 잘 챙기고 계시네요. 다음 단계로 함께 나아가 봅시다."],
+        "retry": ["{name}님, 지금은 {checked}개를 체크하셨어요. {required}개를 채우면 다음 단계로 갈 수 있습니다. 할 수 있는 것 하나부터 시작해 보세요."],
+    }
+    NEXT_STEP_MESSAGE = "다음 퀘스트가 열렸습니다. 이어서 점검해 보세요."
+
     def __init__(self):
         self.client = OpenAI(api_key=settings.openai_api_key)
 
@@ -63,44 +129,58 @@ class QuestAgent:
         
         return json.loads(response.choices[0].message.content)
 
-    def evaluate_answers(self, vip_name: str, category: str, questions: List[str], checked_indices: List[int]) -> Dict[str, Any]:
-        """VIP의 체크리스트 응답 평가"""
-        
+    def evaluate_locally(self, vip_name: str, category: str, questions: List[str], checked_indices: List[int], min_checks: int = 3) -> Dict[str, Any]:
+        """LLM 없이 즉시 평가 (체크 수 >= minChecks면 통과, 메시지는 메시지 뱅크에서 선택)"""
+        checked_count = len(set(checked_indices))
+        total_count = len(questions)
+        required = max(1, min(min_checks, total_count))
+        passed = checked_count >= required
+
+        bank = self.MESSAGE_BANK.get(category, self.DEFAULT_MESSAGES)["passed" if passed else "retry"]
+        message = bank[checked_count % len(bank)].format(
+            name=vip_name,
+            category=self._get_category_name(category),
+            checked=checked_count,
+            total=total_count,
+            required=required,
+        )
+        return {
+            "passed": passed,
+            "score": checked_count,
+            "total": total_count,
+            "message": message,
+            "nextStep": self.NEXT_STEP_MESSAGE if passed else "",
+            "personalized": False,
+        }
+
+    def personalize_message(self, vip_name: str, category: str, questions: List[str], checked_indices: List[int], passed: bool) -> Dict[str, str]:
+        """판정은 그대로 두고 맞춤 메시지만 생성 (evaluate_locally 이후 백그라운드에서 호출)"""
+
         category_name = self._get_category_name(category)
         checked_items = [questions[i] for i in checked_indices]
         unchecked_items = [questions[i] for i in range(len(questions)) if i not in checked_indices]
-        
-        checked_count = len(checked_indices)
-        total_count = len(questions)
-        min_checks = 3 # 기본 기준
-        
+        result = "통과" if passed else "재도전"
+
         system_prompt = "당신은 비즈니스 오너의 성장을 돕는 전문 멘토입니다."
         user_prompt = f"""
-{vip_name}님이 "{category_name}" 영역의 체크리스트를 완료했습니다.
+{vip_name}님이 "{category_name}" 영역의 체크리스트를 완료했고, 결과는 "{result}"입니다.
 
-체크된 항목 ({checked_count}/{total_count}개):
+체크된 항목 ({len(checked_items)}/{len(questions)}개):
 {chr(10).join([f'✓ {item}' for item in checked_items])}
 
 체크 안 된 항목:
 {chr(10).join([f'☐ {item}' for item in unchecked_items])}
 
-이 VIP의 "{category_name}" 개선 준비도를 평가하고, 다음 단계로 넘어갈 수 있는지 판단해주세요.
-
-판단 기준:
-- {min_checks}개 이상 체크 시 통과(passed: true).
-- 하지만 핵심적인 항목이 빠졌거나 성의가 부족해 보인다면 재검토 권장 가능.
+결과는 이미 정해졌습니다. 체크한 항목과 빠진 항목을 짚어 주는 맞춤 메시지를 작성해주세요.
 - 톤은 매우 따뜻하고 격려하며, 전문가적인 인사이트를 포함해야 함.
 
 반드시 아래 JSON 형식으로만 응답하세요:
 {{
-  "passed": true 또는 false,
-  "score": {checked_count},
-  "total": {total_count},
   "message": "평가 및 격려 메시지 (3-4문장)",
-  "nextStep": "통과 시 다음 단계 안내 문구 (미통과 시 빈 문자열)"
+  "nextStep": "통과 시 다음 단계 안내 문구 (재도전이면 빈 문자열)"
 }}
 """
-        
+
         response = self.client.chat.completions.create(
             model="gpt-4",
             messages=[
@@ -110,8 +190,9 @@ class QuestAgent:
             response_format={"type": "json_object"},
             temperature=0.7
         )
-        
-        return json.loads(response.choices[0].message.content)
+
+        content = json.loads(response.choices[0].message.content)
+        return {"message": content.get("message", ""), "nextStep": content.get("nextStep", "") if passed else ""}
 
     def _get_category_name(self, category: str) -> str:
         names = {
@@ -1,16 +1,29 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 from sqlalchemy.orm import Session
 from sqlalchemy import func
 from typing import List, Optional
 from datetime import datetime, timedelta
 
-from app.database import get_db
+from app.config import get_settings
+from app.database import get_db, get_read_db
 from app.models import (
     User, AgentApplication, SolutionRequest, Notification, 
-    UserNotification, SynergyService, Report, SolutionHistory,
+    SynergyService, Report, SolutionHistory,
     PointTransaction, WithdrawalRequest, SessionPayment, Quest, HealthIndex,
     InvitationToken
 )
+from app.services.counters import increment_counter
+from app.services.notifications import count_recipients, materialize_inbox
+from app.services.metrics import (
+    record_event, latest_snapshot, daily_series, growth_rate, total,
+    SIGNUPS, QUESTS_COMPLETED, WITHDRAWAL_AMOUNT,
+    USERS_TOTAL, AGENTS_BY_STATUS, EXPECTED_REVENUE, QUESTS_BY_STATUS, PENDING_ITEMS, ACTIVE_VIPS,
+)
+from app.services.cache import response_cache, user_tag, ADMIN_KPI_TAG
+from app.services.auth_identity import delete_auth_user
+from app.services.admin_bulk import (
+    action_values, bulk_extend, bulk_change_tier, bulk_change_status, bulk_change_vip_limit,
+)
 from pydantic import BaseModel
 import uuid
 
@@ -76,9 +89,26 @@ class ExtensionRequest(BaseModel):
     days: Optional[int] = None
     admin_id: str
 
+# 일괄 작업 (app/services/admin_bulk.py — 대상 수와 무관하게 UPDATE 1번 + 로그 INSERT 1번)
 class BulkExtensionRequest(BaseModel):
     agent_ids: List[str]
-    days: int
+    days: Optional[int] = None
+    subscription_end_date: Optional[str] = None  # 지정 시 days 대신 이 날짜로 설정
+    admin_id: str
+
+class BulkTierRequest(BaseModel):
+    agent_ids: List[str]
+    tier: str
+    admin_id: str
+
+class BulkStatusRequest(BaseModel):
+    agent_ids: List[str]
+    subscription_status: str
+    admin_id: str
+
+class BulkVipLimitRequest(BaseModel):
+    agent_ids: List[str]
+    vip_limit: int
     admin_id: str
 
 class AgentPartialUpdateRequest(BaseModel):
@@ -92,18 +122,10 @@ class AgentPartialUpdateRequest(BaseModel):
 # --- Helpers ---
 
 from app.models import AdminAction
-import json
 
 def log_admin_action(db: Session, admin_id: str, action_type: str, target_id: str, old_val: any, new_val: any):
     """관리자 활동 로그 기록"""
-    action = AdminAction(
-        admin_id=admin_id,
-        action_type=action_type,
-        target_agent_id=target_id,
-        old_value=json.dumps(old_val, default=str) if old_val else None,
-        new_value=json.dumps(new_val, default=str) if new_val else None
-    )
-    db.add(action)
+    db.add(AdminAction(**action_values(admin_id, action_type, target_id, old_val, new_val)))
 
 def verify_admin(db: Session, admin_id: str):
     """관리자 권한 검증"""
@@ -115,48 +137,43 @@ def verify_admin(db: Session, admin_id: str):
 # --- Endpoints ---
 
 @router.get("/stats/kpi", response_model=KPISummary)
-def get_kpi_summary(db: Session = Depends(get_db)):
-    """대시보드 상단 KPI 데이터"""
-    total_agents = db.query(User).filter(User.role == "agent").count()
-    total_vips = db.query(User).filter(User.role == "vip").count()
-    
-    # 예상 수익 계산 (단순화: 에이전트 구독 타입에 따른 합계)
-    # 실제로는 구독 기록 테이블이 따로 있는 것이 좋으나 현재는 User 모델 필드 기준
-    # 월간 ₩50,000, 연간 ₩500,000 가정
-    revenue = 0
-    agents = db.query(User).filter(User.role == "agent", User.subscription_status == "active").all()
-    for agent in agents:
-        if agent.subscription_type == "monthly":
-            revenue += 50000
-        elif agent.subscription_type == "yearly":
-            revenue += 500000 // 12  # 월 평균
-    
-    pending_apps = db.query(AgentApplication).filter(AgentApplication.status == "pending").count()
-    pending_solutions = db.query(SolutionRequest).filter(SolutionRequest.status == "pending").count()
+def get_kpi_summary(request: Request, db: Session = Depends(get_read_db)):
+    """대시보드 상단 KPI 데이터 (daily_metrics 롤업 기준, 증가율은 30일 전 스냅샷 대비 / 롤업 갱신 시 캐시 무효화)"""
+    def build():
+        snapshot = latest_snapshot(db)
+        previous = latest_snapshot(db, on_or_before=datetime.now().date() - timedelta(days=30))
+        users, users_before = snapshot[USERS_TOTAL], previous[USERS_TOTAL]
+        
+        return {
+            "total_agents": users.get("agent", 0),
+            "total_vips": users.get("vip", 0),
+            "expected_revenue": snapshot[EXPECTED_REVENUE].get("", 0),
+            "pending_notifications": total(snapshot[PENDING_ITEMS]),
+            "agent_growth_rate": growth_rate(users.get("agent", 0), users_before.get("agent")),
+            "vip_growth_rate": growth_rate(users.get("vip", 0), users_before.get("vip")),
+        }
     
-    return {
-        "total_agents": total_agents,
-        "total_vips": total_vips,
-        "expected_revenue": revenue,
-        "pending_notifications": pending_apps + pending_solutions,
-        "agent_growth_rate": 12.5, # Mock data for now
-        "vip_growth_rate": 8.2     # Mock data for now
-    }
+    return response_cache.respond(request, build, ttl=300, tags=[ADMIN_KPI_TAG])
 
 @router.get("/stats/realtime", response_model=RealtimeStats)
-def get_realtime_stats(db: Session = Depends(get_db)):
-    """우측 사이드바 실시간 현황"""
+def get_realtime_stats(db: Session = Depends(get_read_db)):
+    """우측 사이드바 실시간 현황 (daily_metrics 롤업 기준)"""
     today = datetime.now().date()
-    today_start = datetime.combine(today, datetime.min.time())
-    
-    new_agents = db.query(User).filter(User.role == "agent", User.created_at >= today_start).count()
-    new_vips = db.query(User).filter(User.role == "vip", User.created_at >= today_start).count()
+    month_start = today.replace(day=1)
+    series = daily_series(db, (SIGNUPS, QUESTS_COMPLETED, WITHDRAWAL_AMOUNT), min(month_start, today - timedelta(days=6)), today)
+    signups_today = series[SIGNUPS].get(today, {})
     
     return {
-        "today_new_agents": new_agents,
-        "today_new_vips": new_vips,
-        "weekly_completed_deals": 47, # Mock
-        "monthly_withdrawal_points": 8450000 # Mock
+        "today_new_agents": signups_today.get("agent", 0),
+        "today_new_vips": signups_today.get("vip", 0),
+        # 최근 7일 퀘스트 완료 건수
+        "weekly_completed_deals": sum(
+            total(values) for day, values in series[QUESTS_COMPLETED].items() if day > today - timedelta(days=7)
+        ),
+        # 이번 달 출금 신청 포인트 합계
+        "monthly_withdrawal_points": sum(
+            total(values) for day, values in series[WITHDRAWAL_AMOUNT].items() if day >= month_start
+        ),
     }
 
 @router.get("/agents")
@@ -193,6 +210,7 @@ def update_agent(agent_id: str, req: AgentUpdateRequest, db: Session = Depends(g
     if req.memo is not None: agent.memo = req.memo
     
     db.commit()
+    response_cache.invalidate(user_tag(agent_id))
     return {"message": "Updated successfully"}
 
 @router.delete("/agents/{agent_id}")
@@ -209,23 +227,9 @@ def delete_agent(agent_id: str, db: Session = Depends(get_db)):
         # 1. Supabase Auth에서 삭제 (관리자 권한)
         supabase = get_supabase_admin()
         
-        # ID로 직접 삭제 시도 전에 이메일로 검색하여 확실한 Auth ID 확보
-        # auth.admin.list_users()를 통해 이메일 검색 (약간의 오버헤드 있으나 가장 확실함)
-        # response.users를 직접 순회해야 함 (list_users()는 객체를 반환)
-        response = supabase.auth.admin.list_users()
-        target_auth_id = None
-        for u in response.users:
-            if u.email == agent.email:
-                target_auth_id = u.id
-                break
-        
-        if target_auth_id:
-            supabase.auth.admin.delete_user(target_auth_id)
-            logger.info(f"Supabase Auth user deleted by email ({agent.email}): {target_auth_id}")
-        else:
-            # 검색 안되면 기존 ID로 최종 시도
-            supabase.auth.admin.delete_user(agent_id)
-            logger.info(f"Supabase Auth user deleted by ID directly: {agent_id}")
+        # users.auth_id → auth_identities 인덱스 → list_users 페이지 조회(폴백) 순으로 Auth ID 확보
+        target_auth_id = delete_auth_user(db, supabase, agent)
+        logger.info(f"Supabase Auth user deleted ({agent.email}): {target_auth_id}")
             
     except Exception as e:
         logger.error(f"Critical failure deleting Supabase Auth user: {str(e)}")
@@ -246,6 +250,7 @@ def delete_agent(agent_id: str, db: Session = Depends(get_db)):
     # 4. 로컬 데이터베이스 삭제
     db.delete(agent)
     db.commit()
+    response_cache.invalidate(user_tag(agent_id))
     return {"message": "에이전트와 인증 계정이 완전히 삭제되었습니다.", "affected_vips": vip_count}
 
 from app.supabase_client import get_supabase_admin
@@ -275,17 +280,19 @@ def reset_agent_password(agent_id: str, db: Session = Depends(get_db)):
 
 @router.post("/agents/{agent_id}/points")
 def adjust_agent_points(agent_id: str, req: PointAdjustRequest, db: Session = Depends(get_db)):
-    """에이전트 포인트 추가/차감"""
-    agent = db.query(User).filter(User.id == agent_id).first()
-    if not agent:
-        raise HTTPException(status_code=404, detail="Agent not found")
-    
+    """에이전트 포인트 추가/차감 (UPDATE ... RETURNING 으로 원자적 증감)"""
     if req.type == "add":
-        agent.points += req.amount
+        current_points = increment_counter(db, User.points, agent_id, req.amount)
     elif req.type == "deduct":
-        if agent.points < req.amount:
+        # 잔액 확인과 차감을 한 문장으로 처리해 동시 차감 시 음수 잔액 방지
+        current_points = increment_counter(db, User.points, agent_id, -req.amount, func.coalesce(User.points, 0) >= req.amount)
+        if current_points is None and db.query(User.id).filter(User.id == agent_id).first():
             raise HTTPException(status_code=400, detail="Insufficient points")
-        agent.points -= req.amount
+    else:
+        raise HTTPException(status_code=400, detail="Invalid type")
+    
+    if current_points is None:
+        raise HTTPException(status_code=404, detail="Agent not found")
     
     # 이력 기록
     transaction = PointTransaction(
@@ -297,7 +304,7 @@ def adjust_agent_points(agent_id: str, req: PointAdjustRequest, db: Session = De
     )
     db.add(transaction)
     db.commit()
-    return {"message": "Points adjusted successfully", "current_points": agent.points}
+    return {"message": "Points adjusted successfully", "current_points": current_points}
 
 @router.get("/vips")
 def list_vips(db: Session = Depends(get_db)):
@@ -323,20 +330,9 @@ def delete_vip_hard(vip_id: str, db: Session = Depends(get_db)):
         # 1. Supabase Auth에서 삭제
         supabase = get_supabase_admin()
         
-        # 이메일로 검색하여 확실한 Auth ID 확보
-        response = supabase.auth.admin.list_users()
-        target_auth_id = None
-        for u in response.users:
-            if u.email == vip.email:
-                target_auth_id = u.id
-                break
-        
-        if target_auth_id:
-            supabase.auth.admin.delete_user(target_auth_id)
-            logger.info(f"Supabase Auth VIP deleted by email ({vip.email}): {target_auth_id}")
-        else:
-            supabase.auth.admin.delete_user(vip_id)
-            logger.info(f"Supabase Auth VIP deleted by ID directly: {vip_id}")
+        # users.auth_id → auth_identities 인덱스 → list_users 페이지 조회(폴백) 순으로 Auth ID 확보
+        target_auth_id = delete_auth_user(db, supabase, vip)
+        logger.info(f"Supabase Auth VIP deleted ({vip.email}): {target_auth_id}")
             
     except Exception as e:
         logger.error(f"Critical failure deleting Supabase Auth VIP: {str(e)}")
@@ -364,11 +360,10 @@ def delete_vip_hard(vip_id: str, db: Session = Depends(get_db)):
     db.delete(vip)
     
     if agent_id:
-        agent = db.query(User).filter(User.id == agent_id).first()
-        if agent and agent.vip_current_count > 0:
-            agent.vip_current_count -= 1
+        increment_counter(db, User.vip_current_count, agent_id, -1, User.vip_current_count > 0)
 
     db.commit()
+    response_cache.invalidate(user_tag(vip_id))
     return {"message": "VIP와 인증 계정이 완전히 삭제되었습니다. 이제 재가입이 가능합니다."}
 
 @router.get("/applications")
@@ -415,7 +410,7 @@ def approve_application(app_id: str, db: Session = Depends(get_db)):
         </div>
     </div>
     """
-    send_email(application.email, subject, body)
+    send_email(application.email, subject, body, db=db)
     
     db.commit()
     return {"message": "이메일이 발송되었습니다."}
@@ -437,31 +432,25 @@ def list_solutions(db: Session = Depends(get_db), status: str = "pending"):
 
 @router.post("/notifications/send")
 def send_notification(title: str, content: str, target: str, db: Session = Depends(get_db)):
-    """공지사항 발송"""
-    notif_id = str(uuid.uuid4())
+    """
+    공지사항 발송
+    - 공지 1행 저장, 읽음 상태는 조회 시 계산 (app/services/notifications.py)
+    - notification_inbox_fanout이면 기존 받은 알림함(user_notifications) 행도 INSERT ... SELECT 1번으로 생성
+    """
     new_notif = Notification(
-        id=notif_id,
+        id=str(uuid.uuid4()),
         title=title,
         content=content,
         target=target
     )
     db.add(new_notif)
-    
-    # 대상 사용자들에게 개별 알림 생성
-    users_query = db.query(User)
-    if target != "all":
-        users_query = users_query.filter(User.role == target)
-    
-    target_users = users_query.all()
-    for user in target_users:
-        db.add(UserNotification(
-            id=str(uuid.uuid4()),
-            user_id=user.id,
-            notification_id=notif_id
-        ))
-    
+    db.flush()
+    if get_settings().notification_inbox_fanout:
+        recipients = materialize_inbox(db, new_notif.id, target)
+    else:
+        recipients = count_recipients(db, target)
     db.commit()
-    return {"message": f"Sent notification to {len(target_users)} users"}
+    return {"message": f"Sent notification to {recipients} users"}
 
 class AgentRegisterAndInviteRequest(BaseModel):
     name: str
@@ -513,6 +502,7 @@ def register_and_invite_agent(req: AgentRegisterAndInviteRequest, db: Session =
         new_agent.subscription_status = "trial"
 
     db.add(new_agent)
+    record_event(db, SIGNUPS, "agent")
     
     # 3. 초대 토큰 생성
     token_str = str(uuid.uuid4()).replace("-", "")
@@ -545,7 +535,7 @@ def register_and_invite_agent(req: AgentRegisterAndInviteRequest, db: Session =
     </div>
     """
     
-    success = send_email(req.email, subject, body)
+    success = send_email(req.email, subject, body, db=db)
     
     if success:
         db.commit()
@@ -604,7 +594,7 @@ def re_invite_agent(agent_id: str, db: Session = Depends(get_db)):
     </div>
     """
     
-    success = send_email(agent.email, subject, body)
+    success = send_email(agent.email, subject, body, db=db)
     if success:
         db.commit()
         return {"message": f"{agent.name}님에게 초대 링크가 재발송되었습니다."}
@@ -694,7 +684,7 @@ def update_solution_status(solution_id: str, req: SolutionStatusUpdateRequest, d
             </div>
         </div>
         """
-        send_email(vip.email, subject, body)
+        send_email(vip.email, subject, body, db=db)
         
     db.commit()
     return {"message": "이메일이 발송되었습니다.", "status": req.status}
@@ -761,28 +751,46 @@ def update_settlement_status(request_id: str, req: SettlementStatusUpdate, db: S
 # --- 통계 (Stats) ---
 
 @router.get("/stats/full")
-def get_full_stats(db: Session = Depends(get_db)):
-    """고급 통계 데이터 (차트용)"""
+def get_full_stats(db: Session = Depends(get_read_db)):
+    """고급 통계 데이터 (차트용, daily_metrics 롤업 기준)"""
+    snapshot = latest_snapshot(db)
+    
     # 1. 가입자 통계 (최근 7일)
     today = datetime.now().date()
+    signups = daily_series(db, (SIGNUPS,), today - timedelta(days=6), today)[SIGNUPS]
     subscriber_stats = []
     for i in range(6, -1, -1):
         date = today - timedelta(days=i)
-        start = datetime.combine(date, datetime.min.time())
-        end = datetime.combine(date, datetime.max.time())
-        count = db.query(User).filter(User.created_at.between(start, end)).count()
-        subscriber_stats.append({"date": date.strftime("%m-%d"), "count": count})
+        subscriber_stats.append({"date": date.strftime("%m-%d"), "count": total(signups.get(date, {}))})
     
     # 2. 수익 통계 (유료 결제자군)
-    paid_agents = db.query(User).filter(User.role == "agent", User.subscription_status == "active").count()
-    free_agents = db.query(User).filter(User.role == "agent", User.subscription_status == "free").count()
+    agents_by_status = snapshot[AGENTS_BY_STATUS]
+    paid_agents = agents_by_status.get("active", 0)
+    free_agents = agents_by_status.get("free", 0)
     conversion_rate = (paid_agents / (paid_agents + free_agents) * 100) if (paid_agents + free_agents) > 0 else 0
     
     # 3. VIP 활동도
-    total_quests = db.query(Quest).count()
-    completed_quests = db.query(Quest).filter(Quest.status == "completed").count()
+    quests_by_status = snapshot[QUESTS_BY_STATUS]
+    total_quests = total(quests_by_status)
+    completed_quests = quests_by_status.get("completed", 0)
     quest_rate = (completed_quests / total_quests * 100) if total_quests > 0 else 0
     
+    # 4. 관리 VIP 수 상위 에이전트 (GROUP BY 1번)
+    vip_counts = (
+        db.query(User.created_by, func.count(User.id).label("vip_count"))
+        .filter(User.role == "vip", User.created_by.isnot(None))
+        .group_by(User.created_by)
+        .subquery()
+    )
+    top_agents = (
+        db.query(User.name, vip_counts.c.vip_count)
+        .join(vip_counts, vip_counts.c.created_by == User.id)
+        .filter(User.role == "agent")
+        .order_by(vip_counts.c.vip_count.desc())
+        .limit(5)
+        .all()
+    )
+    
     return {
         "subscribers": subscriber_stats,
         "revenue": {
@@ -792,14 +800,10 @@ def get_full_stats(db: Session = Depends(get_db)):
         },
         "activity": {
             "quest_completion_rate": round(quest_rate, 1),
-            "active_vips": db.query(User).filter(User.role == "vip").count() # Mocking 'active' as total for now
+            # 최근 30일 안에 퀘스트를 완료한 VIP 수
+            "active_vips": snapshot[ACTIVE_VIPS].get("", 0)
         },
-        "top_agents": [
-            {
-                "name": u.name,
-                "vip_count": db.query(User).filter(User.role == "vip", User.created_by == u.id).count()
-            } for u in db.query(User).filter(User.role == "agent").order_by(func.random()).limit(5)
-        ]
+        "top_agents": [{"name": name, "vip_count": vip_count} for name, vip_count in top_agents]
     }
 
 # --- 비회원 세션 결제 (Session Payments) ---
@@ -834,40 +838,8 @@ def update_agent_tier(id: str, req: TierUpdateRequest, db: Session = Depends(get
     if not agent:
         raise HTTPException(status_code=404, detail="에이전트를 찾을 수 없습니다.")
 
-    old_state = {"tier": agent.tier, "vip_limit": agent.vip_limit, "status": agent.subscription_status}
-    now = datetime.now()
-
-    if req.tier == "free":
-        agent.subscription_status = "trial"
-        agent.trial_start_date = now
-        agent.trial_end_date = now + timedelta(days=3)
-        agent.subscription_end_date = None
-        agent.vip_limit = 5
-    elif req.tier == "monthly":
-        agent.subscription_status = "active"
-        agent.subscription_start_date = now
-        agent.subscription_end_date = now + timedelta(days=30)
-        agent.trial_end_date = None
-        agent.vip_limit = 50
-    elif req.tier == "yearly":
-        agent.subscription_status = "active"
-        agent.subscription_start_date = now
-        agent.subscription_end_date = now + timedelta(days=365)
-        agent.trial_end_date = None
-        agent.vip_limit = 50
-    elif req.tier == "core_member":
-        agent.subscription_status = "lifetime"
-        agent.subscription_start_date = now
-        agent.subscription_end_date = None
-        agent.trial_end_date = None
-        agent.vip_limit = 999999
-        agent.grace_period_end_date = None
-    else:
-        raise HTTPException(status_code=400, detail="유효하지 않은 등급입니다.")
-
-    agent.tier = req.tier
-    log_admin_action(db, req.admin_id, "tier_change", id, old_state, {"tier": agent.tier})
-    db.commit()
+    # 등급별 규칙은 일괄 변경과 같은 TIER_RULES (app/services/admin_bulk.py)
+    _run_bulk(db, lambda: bulk_change_tier(db, req.admin_id, [id], req.tier))
     return {"success": True, "message": "등급이 변경되었습니다", "agent": {"id": agent.id, "tier": agent.tier, "status": agent.subscription_status}}
 
 @router.patch("/agents/{id}/status")
@@ -924,26 +896,59 @@ def extend_subscription(id: str, req: ExtensionRequest, db: Session = Depends(ge
     db.commit()
     return {"success": True, "message": "만료일이 연장되었습니다", "subscription_end_date": agent.subscription_end_date}
 
+def _parse_end_date(value: Optional[str]) -> Optional[datetime]:
+    """지정 만료일 (ISO 형식, 잘못된 값은 ValueError → 400)"""
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        raise ValueError("날짜 형식이 올바르지 않습니다. (예: 2026-12-31)")
+
+def _run_bulk(db: Session, operation):
+    """일괄 작업 실행 + commit + 대상 캐시 무효화 (규칙 위반은 400)"""
+    try:
+        result = operation()
+    except ValueError as e:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
+    db.commit()
+    response_cache.invalidate(*(user_tag(agent_id) for agent_id in result.updated_ids))
+    return result
+
 @router.patch("/agents/bulk-extend")
 def bulk_extend_subscriptions(req: BulkExtensionRequest, db: Session = Depends(get_db)):
-    """여러 에이전트의 만료일 동시 연장"""
+    """여러 에이전트의 만료일 동시 연장 (일수 또는 지정 날짜)"""
     verify_admin(db, req.admin_id)
-    
-    agents = db.query(User).filter(User.id.in_(req.agent_ids), User.role == "agent").all()
-    now = datetime.now()
-    
-    for agent in agents:
-        base_date = agent.subscription_end_date if agent.subscription_end_date and agent.subscription_end_date > now else now
-        agent.subscription_end_date = base_date + timedelta(days=req.days)
-        
-        if agent.subscription_status == "expired":
-            agent.subscription_status = "active"
-        agent.grace_period_end_date = None
-        
-        log_admin_action(db, req.admin_id, "bulk_extend", agent.id, None, f"+{req.days} days")
 
-    db.commit()
-    return {"success": True, "message": f"{len(agents)}명의 만료일이 연장되었습니다", "updated_count": len(agents)}
+    def operation():
+        end_date = _parse_end_date(req.subscription_end_date)
+        return bulk_extend(db, req.admin_id, req.agent_ids, days=req.days, end_date=end_date, action_type="bulk_extend")
+
+    result = _run_bulk(db, operation)
+    return {"success": True, "message": f"{result.count}명의 만료일이 연장되었습니다", "updated_count": result.count, "updated_ids": result.updated_ids}
+
+# 경로는 /agents/bulk-*: /agents/{id}/tier 등 단건 경로보다 뒤에 등록되므로 두 단계 경로(bulk/tier)는 가려짐
+@router.patch("/agents/bulk-tier")
+def bulk_change_agent_tier(req: BulkTierRequest, db: Session = Depends(get_db)):
+    """여러 에이전트 등급 변경"""
+    verify_admin(db, req.admin_id)
+    result = _run_bulk(db, lambda: bulk_change_tier(db, req.admin_id, req.agent_ids, req.tier))
+    return {"success": True, "message": f"{result.count}명의 등급이 변경되었습니다", "updated_count": result.count, "updated_ids": result.updated_ids}
+
+@router.patch("/agents/bulk-status")
+def bulk_change_agent_status(req: BulkStatusRequest, db: Session = Depends(get_db)):
+    """여러 에이전트 구독 상태 변경"""
+    verify_admin(db, req.admin_id)
+    result = _run_bulk(db, lambda: bulk_change_status(db, req.admin_id, req.agent_ids, req.subscription_status))
+    return {"success": True, "message": f"{result.count}명의 상태가 변경되었습니다", "updated_count": result.count, "updated_ids": result.updated_ids}
+
+@router.patch("/agents/bulk-vip-limit")
+def bulk_change_agent_vip_limit(req: BulkVipLimitRequest, db: Session = Depends(get_db)):
+    """여러 에이전트 VIP 한도 변경"""
+    verify_admin(db, req.admin_id)
+    result = _run_bulk(db, lambda: bulk_change_vip_limit(db, req.admin_id, req.agent_ids, req.vip_limit))
+    return {"success": True, "message": f"{result.count}명의 VIP 한도가 변경되었습니다", "updated_count": result.count, "updated_ids": result.updated_ids}
 
 @router.patch("/agents/{id}")
 def partial_update_agent(id: str, req: AgentPartialUpdateRequest, db: Session = Depends(get_db)):
@@ -980,4 +985,54 @@ def partial_update_agent(id: str, req: AgentPartialUpdateRequest, db: Session =
 
     log_admin_action(db, req.admin_id, "profile_update", id, old_data, req.dict(exclude_unset=True))
     db.commit()
+    response_cache.invalidate(user_tag(id))
     return {"success": True, "message": "에이전트 정보가 수정되었습니다", "agent": {"id": agent.id, "name": agent.name, "tier": agent.tier, "status": agent.subscription_status}}
+
+
+# --- 스케줄러 작업 API ---
+
+from app.services.scheduler import scheduler, list_runs
+
+class JobTriggerRequest(BaseModel):
+    admin_id: str
+
+def _serialize_run(run):
+    return {
+        "id": run.id,
+        "job_name": run.job_name,
+        "scheduled_for": run.scheduled_for,
+        "trigger": run.trigger,
+        "status": run.status,
+        "instance": run.instance,
+        "started_at": run.started_at,
+        "finished_at": run.finished_at,
+        "duration_ms": run.duration_ms,
+        "error": run.error,
+    }
+
+@router.get("/jobs")
+def list_jobs(db: Session = Depends(get_db)):
+    """등록된 주기 작업 목록 및 최근 실행 결과"""
+    result = []
+    for job in scheduler.jobs.values():
+        last = list_runs(db, job.name, limit=1)
+        result.append({
+            "name": job.name,
+            "schedule": job.schedule,
+            "description": job.description,
+            "last_run": _serialize_run(last[0]) if last else None,
+        })
+    return result
+
+@router.get("/jobs/runs")
+def list_job_runs(job_name: Optional[str] = None, limit: int = 50, db: Session = Depends(get_db)):
+    """작업 실행 이력 (소요 시간 / 결과 / 오류)"""
+    return [_serialize_run(r) for r in list_runs(db, job_name, min(limit, 500))]
+
+@router.post("/jobs/{job_name}/run", status_code=202)
+def trigger_job(job_name: str, req: JobTriggerRequest, db: Session = Depends(get_db)):
+    """작업 수동 실행 (백그라운드). 결과는 /jobs/runs에서 확인"""
+    verify_admin(db, req.admin_id)
+    if not scheduler.trigger(job_name):
+        raise HTTPException(status_code=404, detail="등록되지 않은 작업입니다.")
+    return {"success": True, "message": f"{job_name} 작업을 시작했습니다"}
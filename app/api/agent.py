@@ -1,13 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 from sqlalchemy.orm import Session
 from sqlalchemy import func
 from typing import List, Optional
 from datetime import datetime
 import uuid
 
-from app.database import get_db
+from app.database import get_db, get_read_db
 from app.models import (
-    User, SynergyService, SynergyApplication, HealthIndex, 
+    User, SynergyService, SynergyApplication, 
     Quest, AgentNote, ReferralReward, WithdrawalRequest, 
     Notification, UserNotification, Report
 )
@@ -16,6 +16,9 @@ import uuid
 import logging
 from app.utils.mailer import send_vip_invite
 from app.config import get_settings
+from app.services.health_projection import get_current_health_map
+from app.services.metrics import record_event, WITHDRAWAL_REQUESTS, WITHDRAWAL_AMOUNT
+from app.services.cache import response_cache, synergy_agent_tag
 
 logger = logging.getLogger(__name__)
 
@@ -118,23 +121,30 @@ def invite_vip(req: InviteRequest, db: Session = Depends(get_db)):
         raise HTTPException(status_code=500, detail="이메일 발송에 실패했습니다. 다시 시도해주세요")
 
 @router.get("/synergy")
-def get_synergy_lineup(agent_id: str, db: Session = Depends(get_db)):
-    """전체 시너지 서비스 및 신청 상태 조회"""
-    services = db.query(SynergyService).all()
-    # 해당 에이전트의 신청 내역 조회
-    apps = db.query(SynergyApplication).filter(SynergyApplication.agent_id == agent_id).all()
-    app_map = {a.service_id: a.status for a in apps}
+def get_synergy_lineup(agent_id: str, request: Request, db: Session = Depends(get_db)):
+    """
+    전체 시너지 서비스 및 신청 상태 조회 (응답 캐시)
+    - 신청 시 해당 에이전트 항목 무효화
+    - 서비스 목록(synergy_services)은 백엔드에 쓰기 경로가 없어 TTL(300초)로만 갱신
+    """
+    def build():
+        services = db.query(SynergyService).all()
+        # 해당 에이전트의 신청 내역 조회
+        apps = db.query(SynergyApplication).filter(SynergyApplication.agent_id == agent_id).all()
+        app_map = {a.service_id: a.status for a in apps}
+        
+        result = []
+        for s in services:
+            result.append({
+                "id": s.id,
+                "name": s.name,
+                "description": s.description,
+                "price": s.price,
+                "status": app_map.get(s.id, "not_applied")
+            })
+        return result
     
-    result = []
-    for s in services:
-        result.append({
-            "id": s.id,
-            "name": s.name,
-            "description": s.description,
-            "price": s.price,
-            "status": app_map.get(s.id, "not_applied")
-        })
-    return result
+    return response_cache.respond(request, build, ttl=300, tags=[synergy_agent_tag(agent_id)])
 
 @router.post("/onboarding/complete")
 def complete_onboarding(agent_id: str, db: Session = Depends(get_db)):
@@ -152,21 +162,24 @@ def complete_onboarding(agent_id: str, db: Session = Depends(get_db)):
     return {"message": "Onboarding completed"}
 
 @router.get("/dashboard/synergy")
-def get_dashboard_synergy(agent_id: str, db: Session = Depends(get_db)):
-    """에이전트용 시너지 라인업 현황"""
-    services = db.query(SynergyService).all()
-    applied_service_ids = [a.service_id for a in db.query(SynergyApplication).filter(SynergyApplication.agent_id == agent_id).all()]
+def get_dashboard_synergy(agent_id: str, request: Request, db: Session = Depends(get_db)):
+    """에이전트용 시너지 라인업 현황 (응답 캐시, get_synergy_lineup과 같은 무효화 / TTL)"""
+    def build():
+        services = db.query(SynergyService).all()
+        applied_service_ids = [a.service_id for a in db.query(SynergyApplication).filter(SynergyApplication.agent_id == agent_id).all()]
+        
+        result = []
+        for s in services:
+            result.append({
+                "id": s.id,
+                "name": s.name,
+                "description": s.description,
+                "price": s.price,
+                "is_applied": s.id in applied_service_ids
+            })
+        return result
     
-    result = []
-    for s in services:
-        result.append({
-            "id": s.id,
-            "name": s.name,
-            "description": s.description,
-            "price": s.price,
-            "is_applied": s.id in applied_service_ids
-        })
-    return result
+    return response_cache.respond(request, build, ttl=300, tags=[synergy_agent_tag(agent_id)])
 
 @router.post("/synergy/apply")
 def apply_synergy(service_id: str, agent_id: str, db: Session = Depends(get_db)):
@@ -195,17 +208,19 @@ def apply_synergy(service_id: str, agent_id: str, db: Session = Depends(get_db))
     )
     db.add(new_app)
     db.commit()
+    response_cache.invalidate(synergy_agent_tag(agent_id))
     return {"message": "Success"}
 
 @router.get("/vips")
-def list_managed_vips(agent_id: str, db: Session = Depends(get_db)):
+def list_managed_vips(agent_id: str, db: Session = Depends(get_read_db)):
     """에이전트가 관리하는 VIP 리스트"""
     vips = db.query(User).filter(User.role == "vip", User.created_by == agent_id).all()
+    # 최신 건강 점수는 프로젝션 테이블에서 일괄 조회 (VIP 수와 무관하게 쿼리 1번)
+    health_map = get_current_health_map(db, [vip.id for vip in vips])
     
     result = []
     for vip in vips:
-        # 최신 건강 점수 가져오기 (단순화: order by created_at)
-        latest_score = db.query(HealthIndex).filter(HealthIndex.vip_id == vip.id).order_by(HealthIndex.created_at.desc()).first()
+        latest_score = health_map.get(vip.id)
         score = latest_score.overall_score if latest_score else 0
         
         result.append({
@@ -277,5 +292,7 @@ def request_withdrawal(req: WithdrawalRequestCreate, db: Session = Depends(get_d
         status="pending"
     )
     db.add(new_req)
+    record_event(db, WITHDRAWAL_REQUESTS)
+    record_event(db, WITHDRAWAL_AMOUNT, amount=req.amount)
     db.commit()
     return {"message": "Success"}
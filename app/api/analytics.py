@@ -0,0 +1,120 @@
+"""
+어드민 인사이트 분석 API
+- 리포트/설문 JSONB 컬럼 집계를 SQL(PostgreSQL)로 처리
+- 전체 리포트를 메모리로 읽어 파이썬에서 집계하지 않음
+- GIN 인덱스: alembic 0004 참고
+"""
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+from sqlalchemy import text
+from typing import Optional
+import json
+
+from app.database import get_read_db
+
+router = APIRouter(tags=["analytics"])
+
+
+def _require_postgres(db: Session):
+    """JSONB 연산자는 PostgreSQL 전용"""
+    if db.bind.dialect.name != "postgresql":
+        raise HTTPException(status_code=501, detail="JSONB 분석은 PostgreSQL에서만 지원됩니다.")
+
+
+# 리포트 bottlenecks.bottlenecks 배열을 행으로 펼침 (배열이 아닌 레코드는 제외)
+_BOTTLENECK_ROWS = """
+    FROM reports r
+    JOIN surveys s ON s.id = r.survey_id
+    CROSS JOIN LATERAL jsonb_array_elements(
+        CASE WHEN jsonb_typeof(r.bottlenecks -> 'bottlenecks') = 'array'
+             THEN r.bottlenecks -> 'bottlenecks' ELSE '[]'::jsonb END
+    ) AS b(elem)
+"""
+
+
+@router.get("/bottlenecks/by-industry")
+def bottleneck_frequency_by_industry(industry: Optional[str] = None, db: Session = Depends(get_read_db)):
+    """업종별 병목 카테고리 빈도 및 평균 긴급도"""
+    _require_postgres(db)
+
+    sql = f"""
+        SELECT s.industry,
+               COALESCE(b.elem ->> 'category', 'unknown') AS category,
+               COUNT(*) AS count,
+               ROUND(AVG(NULLIF(b.elem ->> 'urgency', '')::numeric), 1) AS avg_urgency
+        {_BOTTLENECK_ROWS}
+        WHERE (CAST(:industry AS text) IS NULL OR s.industry = :industry)
+        GROUP BY s.industry, category
+        ORDER BY s.industry, count DESC
+    """
+    rows = db.execute(text(sql), {"industry": industry}).mappings().all()
+
+    result: dict = {}
+    for row in rows:
+        result.setdefault(row["industry"], []).append({
+            "category": row["category"],
+            "count": row["count"],
+            "avg_urgency": float(row["avg_urgency"]) if row["avg_urgency"] is not None else None,
+        })
+    return result
+
+
+@router.get("/urgency/by-persona")
+def urgency_distribution_by_persona(db: Session = Depends(get_read_db)):
+    """페르소나별 긴급도(1-10) 분포"""
+    rows = db.execute(text("""
+        SELECT persona_type, urgency_score, COUNT(*) AS count
+        FROM reports
+        GROUP BY persona_type, urgency_score
+        ORDER BY persona_type, urgency_score
+    """)).mappings().all()
+
+    result: dict = {}
+    for row in rows:
+        persona = result.setdefault(row["persona_type"], {"total": 0, "distribution": {}})
+        persona["distribution"][str(row["urgency_score"])] = row["count"]
+        persona["total"] += row["count"]
+    return result
+
+
+@router.get("/bottlenecks/reports")
+def reports_by_bottleneck_category(category: str, limit: int = 50, db: Session = Depends(get_read_db)):
+    """특정 병목 카테고리가 포함된 리포트 검색 (GIN 포함 연산자 @> 사용)"""
+    _require_postgres(db)
+
+    containment = json.dumps({"bottlenecks": [{"category": category}]}, ensure_ascii=False)
+    params = {"filter": containment, "limit": min(limit, 500)}
+
+    total = db.execute(
+        text("SELECT COUNT(*) FROM reports WHERE bottlenecks @> CAST(:filter AS jsonb)"), params
+    ).scalar()
+    rows = db.execute(text("""
+        SELECT id, persona_type, urgency_score, created_at
+        FROM reports
+        WHERE bottlenecks @> CAST(:filter AS jsonb)
+        ORDER BY created_at DESC
+        LIMIT :limit
+    """), params).mappings().all()
+
+    return {"category": category, "total": total, "reports": [dict(r) for r in rows]}
+
+
+@router.get("/surveys/answers")
+def survey_answer_distribution(question_key: str, industry: Optional[str] = None, db: Session = Depends(get_read_db)):
+    """설문 응답(responses) 특정 문항의 답변 분포 (GIN 키 존재 연산자 ? 사용)"""
+    _require_postgres(db)
+
+    rows = db.execute(text("""
+        SELECT responses ->> :key AS answer, COUNT(*) AS count
+        FROM surveys
+        WHERE responses ? :key
+          AND (CAST(:industry AS text) IS NULL OR industry = :industry)
+        GROUP BY answer
+        ORDER BY count DESC
+    """), {"key": question_key, "industry": industry}).mappings().all()
+
+    return {
+        "question_key": question_key,
+        "total": sum(r["count"] for r in rows),
+        "answers": [{"answer": r["answer"], "count": r["count"]} for r in rows],
+    }
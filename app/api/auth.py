@@ -1,13 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException
 from sqlalchemy.orm import Session
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+from typing import Any, Dict, Optional
 from datetime import datetime, timedelta
 import logging
 
+from app.config import get_settings
 from app.database import get_db
 from app.models import User, InvitationToken
+from app.services.counters import increment_counter
 from app.supabase_client import get_supabase_admin
+from app.services.auth_identity import create_auth_user, remember, apply_auth_event
 
+logger = logging.getLogger(__name__)
+settings = get_settings()
 router = APIRouter(tags=["auth"])
 
 class FindIdRequest(BaseModel):
@@ -38,8 +44,6 @@ def find_id(req: FindIdRequest, db: Session = Depends(get_db)):
         
     return {"message": "아이디를 찾았습니다.", "masked_email": masked_email}
 
-from app.supabase_client import get_supabase_admin
-
 @router.post("/find-password")
 def find_password(req: FindPasswordRequest, db: Session = Depends(get_db)):
     """비밀번호 찾기 (비밀번호 재설정 메일 발송)"""
@@ -106,20 +110,8 @@ def activate_account(req: InvitationActivateRequest, db: Session = Depends(get_d
     try:
         supabase = get_supabase_admin()
         
-        # 이미 Auth에 동일 이메일이 있는지 최종 확인 (정리 안 된 유령 계정 대비)
-        auth_users = supabase.auth.admin.list_users()
-        orphaned_auth_id = None
-        for u in auth_users.users:
-            if u.email == user.email:
-                orphaned_auth_id = u.id
-                break
-        
-        if orphaned_auth_id:
-            logger.info(f"Cleaning up orphaned auth user during activation: {user.email}")
-            supabase.auth.admin.delete_user(orphaned_auth_id)
-
         # 실제 계정 생성 (이메일 확인 절차 건너뜀 - 관리자가 신뢰한 초대이므로)
-        auth_res = supabase.auth.admin.create_user({
+        new_user = {
             "email": user.email,
             "password": req.password,
             "email_confirm": True,
@@ -127,12 +119,15 @@ def activate_account(req: InvitationActivateRequest, db: Session = Depends(get_d
                 "role": user.role,
                 "name": user.name
             }
-        })
+        }
+        # 같은 이메일의 유령 계정(정리 안 된 Auth 계정)이 있으면 삭제 후 재시도
+        auth_res = create_auth_user(db, supabase, new_user)
         
         if not auth_res or not auth_res.user:
             raise Exception("Failed to create auth user record")
             
         new_auth_id = auth_res.user.id
+        remember(db, user.email, new_auth_id)
         
         # 3. 로컬 DB 유저 상태 업데이트 및 가입 시점 기록
         user.id_status = "active" # 기존 필드명 status (id_status 매핑)
@@ -146,10 +141,9 @@ def activate_account(req: InvitationActivateRequest, db: Session = Depends(get_d
             
         # VIP 가입 시 초대한 에이전트의 실시간 카운트 증가
         if user.role == "vip" and user.created_by:
-            agent = db.query(User).filter(User.id == user.created_by).first()
-            if agent:
-                agent.vip_current_count = (agent.vip_current_count or 0) + 1
-                logger.info(f"Incremented VIP count for agent {agent.email}: {agent.vip_current_count}")
+            vip_count = increment_counter(db, User.vip_current_count, user.created_by)
+            if vip_count is not None:
+                logger.info(f"Incremented VIP count for agent {user.created_by}: {vip_count}")
 
         # 4. 토큰 사용 처리
         inv.used = True
@@ -166,3 +160,32 @@ def activate_account(req: InvitationActivateRequest, db: Session = Depends(get_d
         db.rollback()
         logger.error(f"Account activation failed for {user.email}: {str(e)}")
         raise HTTPException(status_code=500, detail=f"계정 활성화 중 오류가 발생했습니다: {str(e)}")
+
+
+# --- Supabase Auth 이벤트 (auth_identities 인덱스 동기화) ---
+
+class AuthEvent(BaseModel):
+    type: str                                  # INSERT / UPDATE / DELETE
+    table: Optional[str] = None
+    schema_name: Optional[str] = Field(None, alias="schema")
+    record: Optional[Dict[str, Any]] = None
+    old_record: Optional[Dict[str, Any]] = None
+
+@router.post("/auth-events")
+def receive_auth_event(event: AuthEvent, x_internal_secret: Optional[str] = Header(None), db: Session = Depends(get_db)):
+    """
+    Supabase Database Webhook(auth.users INSERT/UPDATE/DELETE) 수신
+    - 이메일 → auth user id 로컬 인덱스 갱신 (계정 삭제 / 활성화 시 list_users 전체 조회 불필요)
+    - X-Internal-Secret 헤더로 인증
+    설정 (Supabase Dashboard → Database → Webhooks → Create a new hook):
+    - Table: auth 스키마의 users / Events: Insert, Update, Delete 모두 선택
+    - Type: HTTP Request, Method: POST, URL: https://<API 호스트>/api/auth/auth-events
+    - HTTP Headers: Content-Type: application/json, X-Internal-Secret: <INTERNAL_SECRET 값>
+    - 웹훅이 빠져도 동작은 같음 (인덱스 값은 get_user_by_id로 확인하고, 없으면 list_users 폴백이 다시 채움)
+    """
+    if x_internal_secret != settings.internal_secret:
+        raise HTTPException(status_code=403, detail="Unauthorized internal call")
+
+    apply_auth_event(db, event.type, event.record, event.old_record)
+    db.commit()
+    return {"status": "ok"}
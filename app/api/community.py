@@ -3,8 +3,9 @@ from sqlalchemy.orm import Session
 from typing import List, Optional
 import uuid
 
-from app.database import get_db
+from app.database import get_db, get_read_db
 from app.models import LoungePost, User, CommunityComment
+from app.services.counters import increment_counter, post_view_counter
 from pydantic import BaseModel
 
 router = APIRouter(tags=["community"])
@@ -25,7 +26,7 @@ class CommentCreate(BaseModel):
 # --- Endpoints ---
 
 @router.get("/posts")
-def list_posts(category: Optional[str] = None, db: Session = Depends(get_db)):
+def list_posts(category: Optional[str] = None, db: Session = Depends(get_read_db)):
     """커뮤니티 게시글 목록 조회"""
     query = db.query(LoungePost).filter(LoungePost.is_hidden == False)
     if category and category.lower() != "all":
@@ -57,8 +58,8 @@ def get_post_detail(post_id: str, db: Session = Depends(get_db)):
     if not post:
         raise HTTPException(status_code=404, detail="Post not found")
         
-    post.view_count += 1
-    db.commit()
+    # 조회수는 버퍼에 모았다가 주기적으로 일괄 반영 (조회마다 쓰기 트랜잭션 방지)
+    post_view_counter.add(post_id)
     
     user = db.query(User).filter(User.id == post.user_id).first()
     comments = db.query(CommunityComment).filter(CommunityComment.post_id == post_id).all()
@@ -70,7 +71,7 @@ def get_post_detail(post_id: str, db: Session = Depends(get_db)):
         "category": post.category,
         "author": user.name if user else "Unknown",
         "created_at": post.created_at,
-        "view_count": post.view_count,
+        "view_count": (post.view_count or 0) + post_view_counter.pending(post_id),
         "comments": [
             {
                 "id": c.id,
@@ -98,13 +99,15 @@ def create_post(req: PostCreate, db: Session = Depends(get_db)):
 @router.post("/posts/{post_id}/report")
 def report_post(post_id: str, db: Session = Depends(get_db)):
     """게시글 신고"""
-    post = db.query(LoungePost).filter(LoungePost.id == post_id).first()
-    if not post:
+    report_count = increment_counter(db, LoungePost.report_count, post_id)
+    if report_count is None:
         raise HTTPException(status_code=404, detail="Post not found")
     
-    post.report_count += 1
-    if post.report_count >= 5:
-        post.is_hidden = True # 5번 이상 신고 시 자동 숨김
+    if report_count >= 5:
+        # 5번 이상 신고 시 자동 숨김
+        db.query(LoungePost).filter(LoungePost.id == post_id).update(
+            {LoungePost.is_hidden: True}, synchronize_session=False
+        )
     
     db.commit()
     return {"message": "Reported successfully"}
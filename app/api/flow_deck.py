@@ -173,22 +173,26 @@ async def download_pptx(req: DownloadRequest):
 # ─── 엔드포인트: 상태 조회 ────────────────────────────────────────────────────
 @router.get("/status/{session_id}")
 async def get_session_status(session_id: str):
-    """세션 처리 상태와 완료 시 다운로드 URL을 반환합니다."""
+    """
+    세션 처리 상태와 완료 시 다운로드 URL을 반환합니다.
+    폴링이 잦은 경로라 공용 비동기 클라이언트 사용 (이벤트 루프를 막지 않고 커넥션 재사용)
+    """
     try:
-        from app.supabase_client import get_supabase
-        supabase = get_supabase()
+        from app.supabase_client import get_supabase_async
+        supabase = await get_supabase_async()
     except Exception as e:
         logger.error(f"[FlowDeck] Supabase 초기화 실패: {e}")
         raise HTTPException(status_code=500, detail="DB 연결 실패")
 
     try:
-        res = supabase.table("flow_deck_sessions") \
+        res = await supabase.table("flow_deck_sessions") \
             .select("id, status, pptx_url, title") \
             .eq("id", session_id) \
             .maybe_single() \
             .execute()
 
-        if not res.data:
+        # postgrest 버전에 따라 결과가 없으면 None 반환
+        if not res or not res.data:
             raise HTTPException(status_code=404, detail="세션을 찾을 수 없습니다.")
 
         data = res.data
@@ -3,11 +3,14 @@
 - Supabase Edge Function → 이 엔드포인트 → 알리고 API 순서로 호출
 - Railway 서버의 고정 IP를 알리고에 등록하면 IP 인증 문제 해결
 """
-from fastapi import APIRouter, HTTPException, Header
+from fastapi import APIRouter, Depends, HTTPException, Header
 from pydantic import BaseModel
-from typing import Optional, Dict
-import requests
+from sqlalchemy.orm import Session
+from typing import Optional, Dict, List
 from app.config import get_settings
+from app.database import get_db
+from app.services.http_clients import http_clients
+from app.services.kakao_sender import enqueue_alimtalk, kakao_dispatcher
 
 router = APIRouter()
 settings = get_settings()
@@ -111,7 +114,7 @@ async def send_kakao(
     }
 
     try:
-        resp = requests.post(ALIGO_URL, data=payload, timeout=10)
+        resp = await http_clients.get_async("aligo").post(ALIGO_URL, data=payload)
         data = resp.json()
         success = data.get("code") == 0
         if not success:
@@ -124,3 +127,67 @@ async def send_kakao(
     except Exception as e:
         print(f"[알리고 API 오류]: {e}")
         raise HTTPException(status_code=502, detail=f"알리고 API 오류: {str(e)}")
+
+
+class BulkRecipient(BaseModel):
+    """대량 발송 수신자 (수신자별 템플릿 변수)"""
+    phone: str
+    variables: Optional[Dict[str, str]] = None
+
+
+class SendKakaoBulkRequest(BaseModel):
+    """알림톡 대량 발송 요청 모델"""
+    type: Optional[str] = None
+    template_code: Optional[str] = None
+    message: Optional[str] = None
+    recipients: List[BulkRecipient]
+    fail_sms: bool = True
+
+
+@router.post("/send-bulk", status_code=202)
+def send_kakao_bulk(
+    request: SendKakaoBulkRequest,
+    x_internal_secret: Optional[str] = Header(None),
+    db: Session = Depends(get_db),
+):
+    """
+    카카오 알림톡 대량 발송 (대기열 적재 후 즉시 반환)
+    - 발송기가 템플릿 코드별로 최대 500명씩 묶어 알리고 1회 요청으로 발송
+    - 수신자별 결과는 kakao_outbox에 기록
+    """
+    if x_internal_secret != settings.internal_secret:
+        raise HTTPException(status_code=403, detail="Unauthorized internal call")
+
+    if request.type and request.type in KAKAO_TEMPLATES:
+        template_code = KAKAO_TEMPLATES[request.type]["code"]
+        content = KAKAO_TEMPLATES[request.type]["content"]
+    elif request.template_code and request.message:
+        template_code, content = request.template_code, request.message
+    else:
+        raise HTTPException(status_code=400, detail="type 또는 template_code+message 필요")
+
+    if not request.recipients:
+        raise HTTPException(status_code=400, detail="recipients가 비어 있습니다")
+
+    rows = [
+        enqueue_alimtalk(
+            db,
+            tpl_code=template_code,
+            phone=r.phone,
+            message=_apply_variables(content, r.variables or {}),
+            fail_sms=request.fail_sms,
+        )
+        for r in request.recipients
+    ]
+    # commit 후에는 행이 만료되므로 응답 값은 먼저 수집
+    ids = [r.id for r in rows]
+    rejected = [r.phone for r in rows if r.status == "failed"]
+    db.commit()
+    kakao_dispatcher.wake()
+
+    return {
+        "success": True,
+        "queued": len(rows) - len(rejected),
+        "rejected": rejected,
+        "ids": ids,
+    }
@@ -0,0 +1,51 @@
+"""
+사용자 알림 API
+- 공지 발송은 admin.send_notification (브로드캐스트 1행 저장)
+- 읽음 상태는 워터마크 + 영수증으로 지연 계산 (app/services/notifications.py)
+"""
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+
+from app.database import get_db, get_read_db
+from app.models import Notification, User
+from app.services.notifications import get_unread_notifications, mark_read, mark_all_read
+
+router = APIRouter(tags=["notifications"])
+
+
+@router.get("/{user_id}/unread")
+def list_unread_notifications(user_id: str, limit: int = 50, db: Session = Depends(get_read_db)):
+    """안 읽은 알림 목록 (최신순)"""
+    notifications = get_unread_notifications(db, user_id, min(limit, 200))
+    return {
+        "count": len(notifications),
+        "notifications": [
+            {
+                "id": n.id,
+                "title": n.title,
+                "content": n.content,
+                "target": n.target,
+                "created_at": n.created_at,
+            } for n in notifications
+        ],
+    }
+
+
+@router.post("/{user_id}/read/{notification_id}")
+def read_notification(user_id: str, notification_id: str, db: Session = Depends(get_db)):
+    """알림 1건 읽음 처리"""
+    if not db.query(Notification.id).filter(Notification.id == notification_id).first():
+        raise HTTPException(status_code=404, detail="Notification not found")
+    mark_read(db, user_id, notification_id)
+    db.commit()
+    return {"success": True}
+
+
+@router.post("/{user_id}/read-all")
+def read_all_notifications(user_id: str, db: Session = Depends(get_db)):
+    """지금까지의 알림 모두 읽음 처리 (워터마크 이동, 행 1개 갱신)"""
+    if not db.query(User.id).filter(User.id == user_id).first():
+        raise HTTPException(status_code=404, detail="User not found")
+    mark_all_read(db, user_id)
+    db.commit()
+    return {"success": True}
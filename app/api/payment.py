@@ -9,10 +9,13 @@ import hmac
 import hashlib
 import base64
 import os
-import httpx
 
-from app.database import get_db
+from fastapi.concurrency import run_in_threadpool
+
+from app.database import get_db, SessionLocal
 from app.config import get_settings
+from app.services.billing import process_payment_event
+from app.services.http_clients import http_clients
 
 router = APIRouter(tags=["payment"])
 logger = logging.getLogger(__name__)
@@ -76,6 +79,40 @@ def _verify_toss_signature(raw_body: bytes, toss_signature: str) -> bool:
     return hmac.compare_digest(expected_b64, toss_signature)
 
 
+# ── 결제 원장 반영 (confirm용, 스레드풀에서 실행) ───────────────
+def _find_processed_order(order_id: str) -> bool:
+    """이미 원장에 기록된 주문인지 (confirm 재요청 시 토스 재호출 생략)"""
+    from app.models import PaymentEvent
+    db = SessionLocal()
+    try:
+        return db.query(PaymentEvent.id).filter(PaymentEvent.order_id == order_id).first() is not None
+    finally:
+        db.close()
+
+
+def _record_confirmed_payment(data: dict, agent_id: str, tier: str, billing_cycle: str) -> bool:
+    db = SessionLocal()
+    try:
+        is_new = process_payment_event(
+            db,
+            source="confirm",
+            order_id=data.get("orderId"),
+            payment_key=data.get("paymentKey"),
+            agent_id=agent_id,
+            tier=tier,
+            billing_cycle=billing_cycle,
+            amount=data.get("totalAmount"),
+            payload=data,
+        )
+        db.commit()
+        return is_new
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
 # ── API 엔드포인트 ─────────────────────────────────────────────
 
 @router.get("/subscription-status/{agent_id}")
@@ -141,25 +178,33 @@ def upgrade_subscription(req: UpgradeRequest, db: Optional[Session] = Depends(ge
 async def confirm_payment(req: ConfirmRequest):
     """
     토스 결제 성공 redirect 후 최종 승인 요청
-    - DB 연결 없이 Supabase REST API로 직접 업데이트 (SQLAlchemy DB 불안정 대응)
+    - 결제 원장(payment_events)을 거쳐 1회만 구독 활성화 (중복 confirm / 이후 웹훅은 no-op)
+    - DB 반영 실패 시 Supabase REST API로 직접 업데이트 (SQLAlchemy DB 불안정 대응)
     - 모든 경우 JSON 응답 반환 (Railway 프록시 CORS 문제 방지)
     """
+    # 0. 이미 처리된 주문이면 토스 재호출 없이 성공 응답
+    try:
+        if await run_in_threadpool(_find_processed_order, req.orderId):
+            return {"status": "success", "message": "이미 처리된 결제입니다."}
+    except Exception as e:
+        logger.warning(f"[Toss Confirm] 원장 조회 실패 (승인 계속 진행): {e}")
+
     # 1. 토스 서버에 최종 승인 요청
     try:
-        async with httpx.AsyncClient() as client:
-            resp = await client.post(
-                f"{TOSS_API_BASE}/payments/confirm",
-                headers={
-                    "Authorization": _get_toss_auth_header(),
-                    "Content-Type": "application/json",
-                },
-                json={
-                    "paymentKey": req.paymentKey,
-                    "orderId":    req.orderId,
-                    "amount":     req.amount,
-                },
-                timeout=10.0,
-            )
+        client = http_clients.get_async("toss")
+        resp = await client.post(
+            f"{TOSS_API_BASE}/payments/confirm",
+            headers={
+                "Authorization": _get_toss_auth_header(),
+                "Content-Type": "application/json",
+            },
+            json={
+                "paymentKey": req.paymentKey,
+                "orderId":    req.orderId,
+                "amount":     req.amount,
+            },
+            timeout=10.0,
+        )
     except Exception as e:
         logger.error(f"[Toss Confirm] API 호출 실패: {e}")
         raise HTTPException(status_code=502, detail="토스 서버 통신 오류")
@@ -183,7 +228,15 @@ async def confirm_payment(req: ConfirmRequest):
         logger.warning("[Toss Confirm] metadata.agentId 없음 — 웹훅에서 처리")
         return {"status": "success", "message": "결제 완료 (구독 처리 중)"}
 
-    # 2. Supabase REST API로 직접 구독 업데이트 (SQLAlchemy 대신 사용)
+    # 2. 결제 원장 + 구독 활성화 (멱등)
+    try:
+        await run_in_threadpool(_record_confirmed_payment, data, agent_id, tier, billing_cycle)
+        logger.info(f"[Toss Confirm] 구독 활성화 완료: {agent_id} / {tier} / {billing_cycle}")
+        return {"status": "success", "message": "구독이 활성화되었습니다.", "orderName": data.get("orderName", "")}
+    except Exception as e:
+        logger.error(f"[Toss Confirm] DB 반영 실패, Supabase REST로 대체: {e}")
+
+    # 3. DB 실패 시 Supabase REST API로 직접 구독 업데이트 (웹훅이 원장 기록을 보완)
     supabase_url = os.environ.get("SUPABASE_URL", "")
     service_key  = os.environ.get("SUPABASE_SERVICE_ROLE_KEY", "")
 
@@ -196,25 +249,25 @@ async def confirm_payment(req: ConfirmRequest):
     expires_at = (now + timedelta(days=days)).isoformat()
 
     try:
-        async with httpx.AsyncClient() as client:
-            patch_resp = await client.patch(
-                f"{supabase_url}/rest/v1/users?id=eq.{agent_id}",
-                headers={
-                    "apikey":        service_key,
-                    "Authorization": f"Bearer {service_key}",
-                    "Content-Type":  "application/json",
-                    "Prefer":        "return=minimal",
-                },
-                json={
-                    "tier":                    tier,
-                    "subscription_type":       tier,
-                    "subscription_status":     "active",
-                    "subscription_expires_at": expires_at,
-                    "last_payment_date":       now.isoformat(),
-                    "payment_method":          "tosspayments",
-                },
-                timeout=10.0,
-            )
+        client = http_clients.get_async("supabase")
+        patch_resp = await client.patch(
+            f"{supabase_url}/rest/v1/users?id=eq.{agent_id}",
+            headers={
+                "apikey":        service_key,
+                "Authorization": f"Bearer {service_key}",
+                "Content-Type":  "application/json",
+                "Prefer":        "return=minimal",
+            },
+            json={
+                "tier":                    tier,
+                "subscription_type":       tier,
+                "subscription_status":     "active",
+                "subscription_expires_at": expires_at,
+                "last_payment_date":       now.isoformat(),
+                "payment_method":          "tosspayments",
+            },
+            timeout=10.0,
+        )
 
         if patch_resp.status_code not in (200, 204):
             logger.error(f"[Toss Confirm] Supabase 업데이트 실패 {patch_resp.status_code}: {patch_resp.text}")
@@ -237,6 +290,7 @@ async def toss_webhook(
     """
     토스페이먼츠 웹훅 수신 및 처리
     - 서명 검증 후 결제 결과를 DB에 반영
+    - 결제 원장으로 중복 판정 → 재전송 / confirm 이후 도착한 웹훅은 no-op
     - 공식 문서: https://docs.tosspayments.com/reference/webhook
     """
     from app.models import User
@@ -275,6 +329,7 @@ async def toss_webhook(
 
         metadata      = payment.get("metadata") or {}
         agent_id      = metadata.get("agentId")
+        order_id      = payment.get("orderId")
         tier          = metadata.get("tier", "flow_one")
         billing_cycle = metadata.get("billing_cycle", "monthly")
 
@@ -282,13 +337,28 @@ async def toss_webhook(
             logger.error("[Toss Webhook] metadata.agentId 누락")
             return {"status": "error", "message": "Missing agentId in metadata"}
 
-        agent = db.query(User).filter(User.id == agent_id).first()
-        if not agent:
+        if not order_id:
+            logger.error("[Toss Webhook] orderId 누락")
+            return {"status": "error", "message": "Missing orderId"}
+
+        if not db.query(User.id).filter(User.id == agent_id).first():
             logger.error(f"[Toss Webhook] 에이전트 없음: {agent_id}")
             return {"status": "error", "message": "Agent not found"}
 
-        _activate_subscription(agent, tier, billing_cycle, payment)
+        is_new = process_payment_event(
+            db,
+            source="webhook",
+            order_id=order_id,
+            payment_key=payment.get("paymentKey"),
+            agent_id=agent_id,
+            tier=tier,
+            billing_cycle=billing_cycle,
+            amount=payment.get("totalAmount"),
+            payload=payment,
+        )
         db.commit()
+        if not is_new:
+            return {"status": "ok", "message": "Already processed"}
         return {"status": "success", "message": "Subscription activated"}
 
     # 정기 결제(자동갱신) 이벤트
@@ -305,25 +375,3 @@ async def toss_webhook(
 
     return {"status": "ok", "message": f"Unhandled eventType: {event_type}"}
 
-
-# ── 공통 헬퍼 ────────────────────────────────────────────────
-def _activate_subscription(agent, tier: str, billing_cycle: str, payment_data: dict):
-    """결제 완료 후 DB 상태 업데이트 (confirm / webhook 공용)"""
-    now = datetime.now()
-    days = 30 if billing_cycle == "monthly" else 365
-
-    agent.tier                  = tier
-    agent.subscription_type     = tier          # 기존 컬럼 병행 유지
-    agent.subscription_status   = "active"
-    agent.subscription_start_date = now
-    agent.subscription_end_date = now + timedelta(days=days)
-    agent.subscription_expires_at = now + timedelta(days=days)  # Supabase 컬럼
-    agent.last_payment_date     = now
-    agent.payment_method        = "tosspayments"
-
-    # 빌링키 저장 (있는 경우)
-    billing_key = payment_data.get("billingKey") or payment_data.get("billing_key")
-    if billing_key:
-        agent.billing_key = billing_key
-
-    logger.info(f"[Payment] 구독 활성화: {agent.email} / {tier} / {billing_cycle}")
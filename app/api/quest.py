@@ -1,15 +1,22 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
 from sqlalchemy.orm import Session
-from sqlalchemy import func
-from typing import List, Optional
-from datetime import datetime
-import uuid
+from typing import Any, Dict, List
+import logging
 
-from app.database import get_db
-from app.models import User, Quest, HealthIndex, Notification
+from app.config import get_settings
+from app.database import SessionLocal, get_db
+from app.models import User
 from app.agents.quest_agent import QuestAgent
+from app.services.quest_flow import (
+    QuestStateError, initialize_quests, load_quest_context, validate_checked_indexes,
+    apply_questions, apply_evaluation, attach_personalized_message, QuestContext,
+    prefetch_contexts, claim_prefetch, release_prefetch,
+)
 from pydantic import BaseModel
 
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
 router = APIRouter(tags=["quests"])
 agent = QuestAgent()
 
@@ -21,130 +28,109 @@ class EvaluateRequest(BaseModel):
 # --- Endpoints ---
 
 @router.get("/init")
-def initialize_vip_quests(vip_id: str, db: Session = Depends(get_db)):
-    """VIP 가입 시 초기 6개 지표 퀘스트 자동 생성"""
-    vip = db.query(User).filter(User.id == vip_id).first()
+def initialize_vip_quests(vip_id: str, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
+    """VIP 가입 시 초기 6개 지표 퀘스트 자동 생성 (동시 호출에도 1벌만 생성) + 앞 퀘스트 체크리스트 미리 생성"""
+    vip = db.query(User.id, User.created_by).filter(User.id == vip_id).first()
     if not vip:
         raise HTTPException(status_code=404, detail="VIP not found")
-        
-    existing = db.query(Quest).filter(Quest.vip_id == vip_id).first()
-    if existing:
-        return {"message": "Quests already initialized"}
 
-    latest_health = db.query(HealthIndex).filter(HealthIndex.vip_id == vip_id).order_by(HealthIndex.created_at.desc()).first()
-    
-    metrics = [
-        ("future_safety_net", latest_health.asset_stability if latest_health else 50),
-        ("emotional_anchor", latest_health.emotional_balance if latest_health else 50),
-        ("time_mastery", latest_health.time_independence if latest_health else 50),
-        ("body_signals", latest_health.physical_condition if latest_health else 50),
-        ("relationship_power", latest_health.network_power if latest_health else 50),
-        ("system_leverage", latest_health.system_leverage if latest_health else 50)
-    ]
-    
-    sorted_metrics = sorted(metrics, key=lambda x: x[1])
-    
-    titles = {
-        "future_safety_net": "자산 안정성 점검",
-        "emotional_anchor": "정서 균형 점검",
-        "time_mastery": "시간 독립성 점검",
-        "body_signals": "신체 컨디션 점검",
-        "relationship_power": "네트워크 파워 점검",
-        "system_leverage": "시스템 레버리지 점검"
-    }
-
-    new_quests = []
-    for i, (category, score) in enumerate(sorted_metrics):
-        new_quest = Quest(
-            id=str(uuid.uuid4()),
-            vip_id=vip_id,
-            agent_id=vip.created_by,
-            title=titles.get(category, category),
-            category=category,
-            quest_order=i + 1,
-            is_locked=(i != 0),
-            status="pending"
-        )
-        db.add(new_quest)
-        new_quests.append(new_quest)
-        
+    created = initialize_quests(db, vip_id, vip.created_by)
     db.commit()
-    return {"message": "Initialization success", "count": len(new_quests)}
+    if not created:
+        return {"message": "Quests already initialized"}
+    background_tasks.add_task(prefetch_checklists, vip_id)
+    return {"message": "Initialization success", "count": created}
 
 @router.post("/{quest_id}/generate-questions")
-def generate_quest_questions(quest_id: str, db: Session = Depends(get_db)):
-    """퀘스트용 AI 체크리스트 생성"""
-    quest = db.query(Quest).filter(Quest.id == quest_id).first()
-    if not quest:
-        raise HTTPException(status_code=404, detail="Quest not found")
-    
-    if quest.is_locked:
-        raise HTTPException(status_code=403, detail="Quest is locked")
-
-    vip = db.query(User).filter(User.id == quest.vip_id).first()
-    latest_health = db.query(HealthIndex).filter(HealthIndex.vip_id == quest.vip_id).order_by(HealthIndex.created_at.desc()).first()
-    
-    category_to_field = {
-        "future_safety_net": "asset_stability",
-        "emotional_anchor": "emotional_balance",
-        "time_mastery": "time_independence",
-        "body_signals": "physical_condition",
-        "relationship_power": "network_power",
-        "system_leverage": "system_leverage"
-    }
-    field_name = category_to_field.get(quest.category, quest.category)
-    score = getattr(latest_health, field_name) if latest_health and hasattr(latest_health, field_name) else 50
-
-    ai_content = agent.generate_questions(vip.name, quest.category, score)
-    
-    quest.ai_questions = ai_content
-    db.commit()
-    
+def generate_quest_questions(quest_id: str, regenerate: bool = False, db: Session = Depends(get_db)):
+    """
+    퀘스트용 AI 체크리스트 (LLM 호출 동안 트랜잭션을 열어두지 않음)
+    - 미리 생성된 체크리스트가 있으면 그대로 반환 (regenerate=true면 새로 생성)
+    """
+    try:
+        context = load_quest_context(db, quest_id)
+        if context.is_locked:
+            raise QuestStateError(403, "Quest is locked")
+        if context.ai_questions and not regenerate:
+            return context.ai_questions
+
+        ai_content = agent.generate_questions(context.vip_name, context.category, context.score)
+
+        apply_questions(db, quest_id, ai_content)
+        db.commit()
+    except QuestStateError as e:
+        db.rollback()
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+
     return ai_content
 
 @router.post("/{quest_id}/evaluate")
-def evaluate_quest(quest_id: str, req: EvaluateRequest, db: Session = Depends(get_db)):
-    """퀘스트 답변 평가 및 다음 단계 해제"""
-    quest = db.query(Quest).filter(Quest.id == quest_id).first()
-    if not quest:
-        raise HTTPException(status_code=404, detail="Quest not found")
-        
-    if not quest.ai_questions:
-        raise HTTPException(status_code=400, detail="Questions not generated yet")
-
-    vip = db.query(User).filter(User.id == quest.vip_id).first()
-    
-    evaluation = agent.evaluate_answers(
-        vip.name, 
-        quest.category, 
-        quest.ai_questions["checklist"], 
-        req.checkedIndexes
-    )
-    
-    quest.user_answers = req.checkedIndexes
-    quest.checked_count = len(req.checkedIndexes)
-    quest.ai_evaluation = evaluation
-    
-    if evaluation.get("passed"):
-        quest.status = "completed"
-        quest.completed_at = datetime.now()
-        
-        next_quest = db.query(Quest).filter(
-            Quest.vip_id == quest.vip_id,
-            Quest.quest_order == quest.quest_order + 1
-        ).first()
-        
-        if next_quest:
-            next_quest.is_locked = False
-            
-        new_noti = Notification(
-            id=str(uuid.uuid4()),
-            title=f"🎉 '{quest.title}' 미션 완료!",
-            content=evaluation.get("message"),
-            target="vip",
-            created_by=quest.agent_id
+def evaluate_quest(quest_id: str, req: EvaluateRequest, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
+    """
+    퀘스트 답변 평가 및 다음 단계 해제
+    - 통과 여부(체크 수 >= minChecks)와 메시지 뱅크 문구로 즉시 응답 (LLM 대기 없음)
+    - LLM 맞춤 메시지는 응답 후 생성해 ai_evaluation에 반영 (personalized: true)
+    """
+    checked = sorted(set(req.checkedIndexes))
+    try:
+        context = load_quest_context(db, quest_id)
+        validate_checked_indexes(context, checked)
+
+        evaluation = agent.evaluate_locally(
+            context.vip_name,
+            context.category,
+            context.checklist,
+            checked,
+            context.min_checks
         )
-        db.add(new_noti)
-        
-    db.commit()
+
+        evaluation = apply_evaluation(db, context, checked, evaluation)
+        db.commit()
+    except QuestStateError as e:
+        db.rollback()
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+
+    if settings.quest_llm_commentary and not evaluation.get("personalized"):
+        background_tasks.add_task(personalize_evaluation, context, checked, evaluation)
+    if evaluation.get("passed"):
+        background_tasks.add_task(prefetch_checklists, context.vip_id)
     return evaluation
+
+def prefetch_checklists(vip_id: str):
+    """백그라운드: 곧 열릴 퀘스트의 체크리스트를 미리 생성 (이미 있거나 생성 중이면 건너뜀)"""
+    db = SessionLocal()
+    try:
+        for context in prefetch_contexts(db, vip_id):
+            if not claim_prefetch(context.quest_id):
+                continue
+            try:
+                ai_content = agent.generate_questions(context.vip_name, context.category, context.score)
+                apply_questions(db, context.quest_id, ai_content, overwrite=False)
+                db.commit()
+            except Exception as e:
+                db.rollback()
+                logger.warning(f"[Quest] 체크리스트 미리 생성 실패 ({context.quest_id}): {e}")
+            finally:
+                release_prefetch(context.quest_id)
+    finally:
+        db.close()
+
+def personalize_evaluation(context: QuestContext, checked: List[int], evaluation: Dict[str, Any]):
+    """백그라운드: LLM 맞춤 메시지 생성 후 ai_evaluation에 병합 (실패 시 메시지 뱅크 문구 유지)"""
+    try:
+        personalized = agent.personalize_message(
+            context.vip_name, context.category, context.checklist, checked, bool(evaluation.get("passed"))
+        )
+    except Exception as e:
+        logger.warning(f"[Quest] 맞춤 메시지 생성 실패 ({context.quest_id}): {e}")
+        return
+
+    db = SessionLocal()
+    try:
+        attach_personalized_message(db, context.quest_id, checked, personalized)
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        logger.error(f"[Quest] 맞춤 메시지 저장 실패 ({context.quest_id}): {e}")
+    finally:
+        db.close()
@@ -10,6 +10,10 @@ from functools import lru_cache
 class Settings(BaseSettings):
     # ─── 데이터베이스 ───────────────────────────────
     database_url: str = ""
+    # 읽기 전용 복제본 (미설정 시 primary 사용)
+    database_replica_url: str = ""
+    # 쓰기 직후 복제 지연 대비: 같은 클라이언트의 읽기를 primary로 고정하는 시간(초)
+    replica_pin_seconds: int = 5
 
     # ─── Supabase ────────────────────────────────────
     supabase_url: str = ""
@@ -21,6 +25,7 @@ class Settings(BaseSettings):
     # ─── AI 서비스 ────────────────────────────────────
     openai_api_key: str = ""
     anthropic_api_key: str = ""
+    quest_llm_commentary: bool = True  # 퀘스트 평가 후 LLM 맞춤 메시지를 백그라운드 생성 (false면 메시지 뱅크 문구만)
 
     # ─── 알리고 카카오 알림톡 ──────────────────────────
     kakao_api_key: str = ""      # 알리고 API Key (= ALIGO_API_KEY)
@@ -33,9 +38,44 @@ class Settings(BaseSettings):
     # ─── 토스페이먼츠 ─────────────────────────────────
     tosspayments_secret_key: str = ""
     tosspayments_client_key: str = ""
+    toss_api_base: str = "https://api.tosspayments.com/v1"  # 로컬 스텁 서버 테스트 시 변경
+    # 자동갱신 결제 엔진 (app/services/renewal.py)
+    renewal_concurrency: int = 10        # 동시 결제 요청 수
+    renewal_max_retries: int = 3         # 일시 오류(네트워크/429/5xx) 재시도 횟수
+    renewal_backoff_seconds: float = 1.0 # 재시도 대기 기본값 (지수 증가)
 
     # ─── 이메일(SMTP) ─────────────────────────────────
+    smtp_host: str = "smtp.gmail.com"
+    smtp_port: int = 587
+    smtp_user: str = ""
     smtp_password: str = ""
+    smtp_use_tls: bool = True   # 로컬 디버그 SMTP(app.utils.smtp_debug) 사용 시 false
+    sender_email: str = ""
+    mail_batch_size: int = 50   # 발송기가 한 번에 선점하는 outbox 건수
+    mail_max_attempts: int = 6  # 초과 시 failed
+
+    # ─── 응답 캐시 (app/services/cache.py) ─────────────
+    response_cache_enabled: bool = True
+    response_cache_max_entries: int = 2048  # 인프로세스 LRU 최대 항목 수
+    redis_url: str = ""                     # 설정 시(redis 패키지 필요) 워커 간 공유 캐시
+    # 인프로세스 캐시는 무효화가 해당 워커에만 적용됨 → 워커가 여러 개면 TTL을 이 값(초)으로 제한
+    # 레플리카를 여러 개 띄우면 REDIS_URL 필수
+    response_cache_local_ttl_seconds: int = 30
+    web_concurrency: int = 1                # uvicorn 워커 수 (uvicorn --workers 기본값과 같은 WEB_CONCURRENCY)
+
+    # ─── 진단 세션 (app/services/diagnosis_sessions.py) ─
+    diagnosis_session_store: str = "sql"          # sql / redis / memory
+    diagnosis_session_ttl_seconds: int = 86400    # 마지막 답변 저장 후 만료까지(초)
+
+    # ─── 알림 (app/services/notifications.py) ──────────
+    # 프론트엔드가 user_notifications를 Supabase로 직접 읽는 동안 공지마다 사용자별 행도 생성 (INSERT ... SELECT 1번)
+    # 프론트엔드가 /api/notifications로 전환되면 false
+    notification_inbox_fanout: bool = True
+
+    # ─── 스케줄러 ─────────────────────────────────────
+    scheduler_enabled: bool = True          # 인스턴스별로 끄려면 SCHEDULER_ENABLED=false
+    scheduler_timezone: str = "Asia/Seoul"  # 예약 시각 기준 시간대
+    scheduler_tick_seconds: int = 30
 
     # ─── 앱 URL ──────────────────────────────────────
     frontend_url: str = "https://uniflow.ai.kr"
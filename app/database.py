@@ -1,15 +1,75 @@
-from sqlalchemy import create_engine
+"""
+데이터베이스 엔진 / 세션 관리
+- get_db()      : primary (읽기/쓰기)
+- get_read_db() : 읽기 전용 복제본 (DATABASE_REPLICA_URL 미설정/연결 실패 시 primary)
+- read-your-writes: primary에 쓰기가 발생한 요청의 응답에 REPLICA_PIN_COOKIE를 붙여
+  replica_pin_seconds 동안 같은 클라이언트의 이후 요청 읽기를 primary로 고정 (main.py 미들웨어)
+  ※ 요청 안에서는 고정되지 않음: 의존성(get_read_db)은 핸들러 실행 전에 세션을 정하므로
+    한 요청에서 쓰기 후 읽기까지 해야 하는 엔드포인트는 get_db만 사용할 것
+"""
+from contextvars import ContextVar
+from typing import Optional
+import logging
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.exc import OperationalError
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.config import get_settings
 
+logger = logging.getLogger(__name__)
 settings = get_settings()
 
 engine = create_engine(settings.database_url)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+replica_engine = (
+    create_engine(settings.database_replica_url, pool_pre_ping=True)
+    if settings.database_replica_url else None
+)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=replica_engine or engine)
+
 Base = declarative_base()
 
+REPLICA_PIN_COOKIE = "uf_read_primary"
+
+
+class RoutingState:
+    """요청 단위 라우팅 상태 (스레드풀로 복사된 컨텍스트에서도 같은 객체를 공유)"""
+
+    def __init__(self, pinned: bool = False):
+        self.pinned = pinned   # True면 읽기도 primary 사용 (요청 시작 시 쿠키로 결정)
+        self.wrote = False     # 이번 요청에서 primary 쓰기 발생 여부 → 응답에 고정 쿠키
+
+
+_routing_state: ContextVar[Optional[RoutingState]] = ContextVar("_routing_state", default=None)
+
+
+def start_request_routing(pinned: bool = False) -> RoutingState:
+    """요청 시작 시 라우팅 상태 초기화 (미들웨어에서 호출)"""
+    state = RoutingState(pinned=pinned)
+    _routing_state.set(state)
+    return state
+
+
+def _mark_primary_write():
+    state = _routing_state.get()
+    if state is not None:
+        state.wrote = True
+
+
+@event.listens_for(SessionLocal, "after_flush")
+def _on_primary_flush(session, flush_context):
+    """ORM unit-of-work 쓰기 (add / 변경 / delete)"""
+    _mark_primary_write()
+
+
+@event.listens_for(SessionLocal, "do_orm_execute")
+def _on_primary_execute(orm_execute_state):
+    """query.update()/delete(), session.execute(insert/update/delete) 쓰기"""
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        _mark_primary_write()
+
 
 def get_db():
     """데이터베이스 세션 의존성"""
@@ -18,3 +78,25 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+def get_read_db():
+    """
+    읽기 전용 세션 의존성 (대시보드/통계 GET용)
+    - 세션은 요청 시작 시점의 고정 여부로 결정 (같은 요청의 이후 쓰기로 primary로 바뀌지 않음)
+    """
+    state = _routing_state.get()
+    if replica_engine is None or (state is not None and state.pinned):
+        db = SessionLocal()
+    else:
+        db = ReadSessionLocal()
+        try:
+            db.connection()  # 복제본 연결 확인
+        except OperationalError as e:
+            logger.warning(f"[DB] 복제본 연결 실패, primary로 대체: {e}")
+            db.close()
+            db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
@@ -1,10 +1,42 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from app.config import get_settings
+from app.database import start_request_routing, REPLICA_PIN_COOKIE
+from app.services.counters import post_view_counter
+from app.services.scheduler import scheduler
+from app.services.http_clients import http_clients
+from app.supabase_client import supabase_clients
+from app.utils.mailer import mail_sender
+from app.services.kakao_sender import kakao_dispatcher
 
 settings = get_settings()
 
-app = FastAPI(title="Uniflow AI Report System", version="1.0.0")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # 외부 API용 HTTP 클라이언트 풀 (keep-alive 재사용)
+    await http_clients.startup()
+    # 조회수 버퍼 주기적 반영 스레드
+    post_view_counter.start()
+    # 메일 outbox 발송기 (SMTP 연결 재사용)
+    mail_sender.start()
+    # 알림톡 대량 발송기 (알리고 다중 수신자 배치)
+    kakao_dispatcher.start()
+    # 주기 작업 (구독 점검 등) — 인스턴스 간 중복 실행은 advisory lock / job_runs로 차단
+    if settings.scheduler_enabled:
+        scheduler.start()
+    yield
+    scheduler.stop()
+    mail_sender.stop()
+    kakao_dispatcher.stop()
+    # 종료 시 남은 조회수까지 반영
+    post_view_counter.stop()
+    await http_clients.shutdown()
+    await supabase_clients.shutdown()
+
+
+app = FastAPI(title="Uniflow AI Report System", version="1.0.0", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -19,6 +51,18 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def replica_routing_middleware(request: Request, call_next):
+    """read-your-writes: 쓰기 직후 일정 시간 동안 같은 클라이언트의 읽기를 primary로 고정"""
+    state = start_request_routing(pinned=request.cookies.get(REPLICA_PIN_COOKIE) == "1")
+    response = await call_next(request)
+    if state.wrote:
+        response.set_cookie(
+            REPLICA_PIN_COOKIE, "1",
+            max_age=settings.replica_pin_seconds, httponly=True, secure=True, samesite="none",
+        )
+    return response
+
 @app.get("/")
 async def root():
     return {"message": "Uniflow AI Report System", "status": "running"}
@@ -30,26 +74,22 @@ async def health_check():
 @app.get("/my-ip")
 async def get_my_ip():
     """Railway 서버의 실제 outbound IP 확인용 (알리고 IP 등록에 사용)"""
-    import httpx
     try:
-        async with httpx.AsyncClient() as client:
-            r = await client.get("https://api.ipify.org?format=json", timeout=5)
-            return r.json()
+        client = http_clients.get_async()
+        r = await client.get("https://api.ipify.org?format=json", timeout=5)
+        return r.json()
     except Exception as e:
         return {"error": str(e)}
 
 
-try:
-    from app.database import engine, Base
-    Base.metadata.create_all(bind=engine)
-except Exception as e:
-    import logging
-    logging.getLogger(__name__).error(f"DB 연결 실패: {e}")
+# DB 스키마는 Alembic 버전 마이그레이션으로 관리 (alembic/versions)
+# 배포 시 `alembic upgrade head`가 uvicorn 기동 전에 실행됨 (Procfile / Dockerfile 참고)
 
-from app.api import survey, report, admin, agent, vip, community, quest, auth, payment, flow_deck, kakao
+from app.api import survey, report, admin, agent, vip, community, quest, auth, payment, flow_deck, kakao, analytics, notifications
 app.include_router(survey.router, prefix="/api/survey", tags=["survey"])
 app.include_router(report.router, prefix="/api/report", tags=["report"])
 app.include_router(admin.router, prefix="/api/admin", tags=["admin"])
+app.include_router(analytics.router, prefix="/api/admin/analytics", tags=["analytics"])
 app.include_router(agent.router, prefix="/api/agent", tags=["agent"])
 app.include_router(vip.router, prefix="/api/vip", tags=["vip"])
 app.include_router(community.router, prefix="/api/community", tags=["community"])
@@ -58,3 +98,4 @@ app.include_router(auth.router, prefix="/api/auth", tags=["auth"])
 app.include_router(payment.router, prefix="/api/payment", tags=["payment"])
 app.include_router(flow_deck.router, prefix="/api/flow-deck", tags=["flow-deck"])
 app.include_router(kakao.router, prefix="/api/kakao", tags=["kakao"])
+app.include_router(notifications.router, prefix="/api/notifications", tags=["notifications"])
@@ -1,13 +1,21 @@
-from sqlalchemy import Column, Integer, String, JSON, DateTime, Text, Boolean, Numeric, ForeignKey, Date
+from sqlalchemy import BigInteger, Column, Integer, String, JSON, DateTime, Text, Boolean, Numeric, ForeignKey, Date, Index, UniqueConstraint, text
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
+from sqlalchemy.dialects.postgresql import JSONB
 from app.database import Base
 import uuid
 
+# PostgreSQL에서는 JSONB(GIN 인덱스/연산자 지원), 그 외 DB는 일반 JSON
+JSONType = JSON().with_variant(JSONB(), "postgresql")
+
 
 class Survey(Base):
     """설문 응답 모델"""
     __tablename__ = "surveys"
+    __table_args__ = (
+        # jsonb_ops: 키 존재(?) / 포함(@>) 검색 모두 지원
+        Index("ix_surveys_responses_gin", "responses", postgresql_using="gin"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     
@@ -24,7 +32,7 @@ class Survey(Base):
     team_size = Column(Integer, nullable=False)
     
     # 설문 응답 (JSON 형태로 저장)
-    responses = Column(JSON, nullable=False)
+    responses = Column(JSONType, nullable=False)
     
     # 타임스탬프
     created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -34,11 +42,17 @@ class Survey(Base):
 class User(Base):
     """사용자 모델 (통합)"""
     __tablename__ = "users"
+    __table_args__ = (
+        Index("ix_users_role_created_by", "role", "created_by"),
+        Index("ix_users_role_status_trial_end", "role", "subscription_status", "trial_end_date"),
+        Index("ix_users_role_status_sub_end", "role", "subscription_status", "subscription_end_date"),
+    )
     
     id = Column(String(100), primary_key=True)  # Supabase UUID
     name = Column(String(100), nullable=False)
     phone = Column(String(50), unique=True, nullable=True)
     email = Column(String(100), unique=True, nullable=True, index=True)
+    role = Column(String(20), nullable=True)  # admin, agent, vip
     
     # 어드민 관련 필드
     # 구독 및 등급 관리
@@ -52,6 +66,9 @@ class User(Base):
     # VIP 관리 및 한도
     vip_limit = Column(Integer, default=5)
     vip_current_count = Column(Integer, default=0)
+
+    # 에이전트 포인트 (증감은 app/services/counters.increment_counter로 원자적으로 처리)
+    points = Column(Integer, default=0)
     
     # 유예 기간 및 알림 추적
     grace_period_end_date = Column(DateTime(timezone=True), nullable=True)
@@ -106,6 +123,12 @@ class AdminAction(Base):
 class Report(Base):
     """리포트 모델"""
     __tablename__ = "reports"
+    __table_args__ = (
+        # jsonb_path_ops: 포함(@>) 검색 전용, 인덱스 크기가 작음
+        Index("ix_reports_bottlenecks_gin", "bottlenecks", postgresql_using="gin", postgresql_ops={"bottlenecks": "jsonb_path_ops"}),
+        Index("ix_reports_insights_gin", "insights", postgresql_using="gin", postgresql_ops={"insights": "jsonb_path_ops"}),
+        Index("ix_reports_recommendations_gin", "recommendations", postgresql_using="gin", postgresql_ops={"recommendations": "jsonb_path_ops"}),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     survey_id = Column(Integer, nullable=False, index=True)
@@ -121,9 +144,9 @@ class Report(Base):
     persona_type = Column(String(50), nullable=False)  # 5가지 페르소나 중 하나
     
     # AI 분석 결과 (JSON)
-    bottlenecks = Column(JSON, nullable=False)  # 병목 포인트 분석
-    insights = Column(JSON, nullable=False)  # 핵심 인사이트
-    recommendations = Column(JSON, nullable=False)  # 추천 사항
+    bottlenecks = Column(JSONType, nullable=False)  # 병목 포인트 분석
+    insights = Column(JSONType, nullable=False)  # 핵심 인사이트
+    recommendations = Column(JSONType, nullable=False)  # 추천 사항
     
     # 리포트 내러티브 (감성 텍스트)
     narrative_text = Column(Text, nullable=False)
@@ -148,8 +171,12 @@ class Report(Base):
 
 
 class Notification(Base):
-    """공지사항/알림 모델"""
+    """공지사항/알림 모델 (브로드캐스트 1건 = 1행, 읽음 판정은 app/services/notifications.py)"""
     __tablename__ = "notifications"
+    __table_args__ = (
+        # 안 읽은 알림 조회: target 일치 + 최신순
+        Index("ix_notifications_target_created_at", "target", "created_at"),
+    )
     
     id = Column(String(100), primary_key=True)
     title = Column(String(200), nullable=False)
@@ -171,8 +198,11 @@ class AgentNote(Base):
 
 
 class UserNotification(Base):
-    """사용자별 알림 읽음 상태"""
+    """사용자별 알림 행 — 읽음 영수증(read_at) / 기존 클라이언트용 받은 알림함 행(read_at NULL)"""
     __tablename__ = "user_notifications"
+    __table_args__ = (
+        UniqueConstraint("user_id", "notification_id", name="uq_user_notifications_user_notification"),
+    )
     
     id = Column(String(100), primary_key=True)
     user_id = Column(String(100), ForeignKey("users.id"))
@@ -181,6 +211,15 @@ class UserNotification(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
 
+class NotificationWatermark(Base):
+    """사용자별 알림 읽음 워터마크 (last_read_at 이전 알림은 모두 읽음)"""
+    __tablename__ = "notification_watermarks"
+    
+    user_id = Column(String(100), ForeignKey("users.id"), primary_key=True)
+    last_read_at = Column(DateTime(timezone=True), nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
 class AgentApplication(Base):
     """에이전트 신청 모델"""
     __tablename__ = "agent_applications"
@@ -262,6 +301,9 @@ class SynergyApplication(Base):
 class LoungePost(Base):
     """라운지 게시글 모델"""
     __tablename__ = "lounge_posts"
+    __table_args__ = (
+        Index("ix_lounge_posts_hidden_category_created", "is_hidden", "category", "created_at"),
+    )
     
     id = Column(String(100), primary_key=True)
     user_id = Column(String(100), ForeignKey("users.id"))
@@ -288,6 +330,9 @@ class ReferralReward(Base):
 class WithdrawalRequest(Base):
     """출금 신청 모델"""
     __tablename__ = "withdrawal_requests"
+    __table_args__ = (
+        Index("ix_withdrawal_requests_status", "status"),
+    )
     
     id = Column(String(100), primary_key=True)
     user_id = Column(String(100), ForeignKey("users.id"))
@@ -304,6 +349,10 @@ class WithdrawalRequest(Base):
 class Quest(Base):
     """성장 미션 모델"""
     __tablename__ = "quests"
+    __table_args__ = (
+        # VIP당 순서별 1개 — 초기화 중복 방지 + 다음 단계 해제 조회용 인덱스 겸용
+        UniqueConstraint("vip_id", "quest_order", name="uq_quests_vip_id_quest_order"),
+    )
     
     id = Column(String(100), primary_key=True)
     vip_id = Column(String(100), ForeignKey("users.id"))
@@ -328,6 +377,9 @@ class Quest(Base):
 class HealthIndex(Base):
     """건강 지표 모델"""
     __tablename__ = "health_index"
+    __table_args__ = (
+        Index("ix_health_index_vip_id_created_at", "vip_id", text("created_at DESC")),
+    )
     
     id = Column(String(100), primary_key=True)
     vip_id = Column(String(100), ForeignKey("users.id"))
@@ -342,6 +394,24 @@ class HealthIndex(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
 
+class VipCurrentHealth(Base):
+    """VIP별 최신 건강 지표 프로젝션 (health_index의 최신 1건, VIP당 1행)"""
+    __tablename__ = "vip_current_health"
+
+    vip_id = Column(String(100), ForeignKey("users.id"), primary_key=True)
+    agent_id = Column(String(100), ForeignKey("users.id"), nullable=True, index=True)
+    health_index_id = Column(String(100), nullable=True)  # 원본 health_index 행
+    asset_stability = Column(Integer, default=50)
+    time_independence = Column(Integer, default=50)
+    physical_condition = Column(Integer, default=50)
+    emotional_balance = Column(Integer, default=50)
+    network_power = Column(Integer, default=50)
+    system_leverage = Column(Integer, default=50)
+    overall_score = Column(Integer, default=50)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())  # 원본 health_index 측정 시각
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
 class PointTransaction(Base):
     """포인트 변동 이력 모델"""
     __tablename__ = "point_transactions"
@@ -357,6 +427,9 @@ class PointTransaction(Base):
 class CommunityComment(Base):
     """커뮤니티 댓글 모델"""
     __tablename__ = "community_comments"
+    __table_args__ = (
+        Index("ix_community_comments_post_id", "post_id"),
+    )
     
     id = Column(String(100), primary_key=True)
     post_id = Column(String(100), ForeignKey("lounge_posts.id"))
@@ -394,3 +467,161 @@ class InvitationToken(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
 
+class JobRun(Base):
+    """스케줄러 작업 실행 이력 (작업/예정 시각당 1행 → 여러 인스턴스 중복 실행 방지)"""
+    __tablename__ = "job_runs"
+    __table_args__ = (
+        UniqueConstraint("job_name", "scheduled_for", name="uq_job_runs_job_name_scheduled_for"),
+        Index("ix_job_runs_job_name_started_at", "job_name", "started_at"),
+    )
+
+    id = Column(String(100), primary_key=True, default=lambda: str(uuid.uuid4()))
+    job_name = Column(String(100), nullable=False)
+    scheduled_for = Column(DateTime(timezone=True), nullable=False)  # 예약 슬롯 (수동 실행은 요청 시각)
+    trigger = Column(String(20), default="schedule")  # schedule, manual
+    status = Column(String(20), default="running")  # running, success, failed, skipped
+    instance = Column(String(100), nullable=True)  # 실행한 프로세스 (host:pid)
+    started_at = Column(DateTime(timezone=True), server_default=func.now())
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+    duration_ms = Column(Integer, nullable=True)
+    error = Column(Text, nullable=True)
+
+
+class BatchCheckpoint(Base):
+    """배치 작업 단계별 진행 위치 (청크 commit마다 갱신 → 중단 시 last_id 다음부터 재개)"""
+    __tablename__ = "batch_checkpoints"
+
+    job_name = Column(String(100), primary_key=True)
+    step = Column(String(100), primary_key=True)
+    run_key = Column(String(50), nullable=True)  # 실행 회차 (예: 2026-10-18) — 바뀌면 처음부터
+    last_id = Column(String(100), nullable=True)  # 마지막으로 처리한 users.id
+    completed = Column(Boolean, default=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
+class RenewalAttempt(Base):
+    """자동갱신 결제 시도 이력 (시도마다 1행, 같은 결제 주기는 같은 order_id)"""
+    __tablename__ = "renewal_attempts"
+
+    id = Column(String(100), primary_key=True, default=lambda: str(uuid.uuid4()))
+    agent_id = Column(String(100), ForeignKey("users.id"), index=True)
+    order_id = Column(String(100), nullable=False, index=True)
+    attempt = Column(Integer, default=1)
+    amount = Column(Integer, default=0)
+    status = Column(String(20), nullable=False)  # success, failed
+    http_status = Column(Integer, nullable=True)
+    error_code = Column(String(100), nullable=True)
+    error_message = Column(Text, nullable=True)
+    payment_key = Column(String(200), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class PaymentEvent(Base):
+    """결제 원장 — 결제 1건당 1행 (order_id / payment_key 유니크로 중복 반영 차단)"""
+    __tablename__ = "payment_events"
+
+    id = Column(String(100), primary_key=True, default=lambda: str(uuid.uuid4()))
+    order_id = Column(String(100), unique=True, nullable=False)
+    payment_key = Column(String(200), unique=True, nullable=True)
+    agent_id = Column(String(100), ForeignKey("users.id"), nullable=True, index=True)
+    source = Column(String(20), nullable=False)  # confirm, webhook, renewal
+    tier = Column(String(50), nullable=True)
+    billing_cycle = Column(String(20), nullable=True)
+    amount = Column(Integer, nullable=True)
+    payload = Column(JSONType, nullable=True)  # 토스 응답 / 웹훅 원문
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class MailOutbox(Base):
+    """메일 발송 대기열 (app/utils/mailer.py의 MailSender가 발송)"""
+    __tablename__ = "mail_outbox"
+    __table_args__ = (
+        Index("ix_mail_outbox_status_next_attempt_at", "status", "next_attempt_at"),
+    )
+
+    id = Column(String(100), primary_key=True, default=lambda: str(uuid.uuid4()))
+    to_email = Column(String(255), nullable=False)
+    subject = Column(String(500), nullable=False)
+    body = Column(Text, nullable=False)
+    status = Column(String(20), default="pending")  # pending, sending, sent, failed
+    attempts = Column(Integer, default=0)
+    next_attempt_at = Column(DateTime(timezone=True), server_default=func.now())
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    sent_at = Column(DateTime(timezone=True), nullable=True)
+
+
+class KakaoOutbox(Base):
+    """알림톡 발송 대기열 — 수신자당 1행 (app/services/kakao_sender.py의 KakaoDispatcher가 배치 발송)"""
+    __tablename__ = "kakao_outbox"
+    __table_args__ = (
+        Index("ix_kakao_outbox_status_next_attempt_at", "status", "next_attempt_at"),
+    )
+
+    id = Column(String(100), primary_key=True, default=lambda: str(uuid.uuid4()))
+    tpl_code = Column(String(50), nullable=False)
+    phone = Column(String(20), nullable=False)
+    subject = Column(String(100), default="UNIFLOW")
+    message = Column(Text, nullable=False)
+    fail_sms = Column(Boolean, default=True)
+    status = Column(String(20), default="pending")  # pending, sending, accepted(배치 접수 / 결과 확인 대기), sent, failed
+    attempts = Column(Integer, default=0)
+    next_attempt_at = Column(DateTime(timezone=True), server_default=func.now())
+    batch_mid = Column(String(100), nullable=True)  # 알리고 요청 mid (이력 조회용)
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    sent_at = Column(DateTime(timezone=True), nullable=True)  # 알리고 접수 시각
+
+
+class DailyMetric(Base):
+    """관리자 KPI 일별 롤업 (app/services/metrics.py) — (일자, 지표, 차원)당 값 1개"""
+    __tablename__ = "daily_metrics"
+    __table_args__ = (
+        Index("ix_daily_metrics_metric_date", "metric", "metric_date"),
+    )
+
+    metric_date = Column(Date, primary_key=True)
+    metric = Column(String(50), primary_key=True)  # signups, users_total, expected_revenue ...
+    dimension = Column(String(50), primary_key=True, default="")  # role / tier / status 등 (없으면 "")
+    value = Column(BigInteger, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
+class DiagnosisSession(Base):
+    """진행 중인 진단 답변 (완료 시 삭제, expires_at 이후 만료) — app/services/diagnosis_sessions.py"""
+    __tablename__ = "diagnosis_sessions"
+    __table_args__ = (
+        Index("ix_diagnosis_sessions_expires_at", "expires_at"),
+    )
+
+    id = Column(String(100), primary_key=True)  # diagnosis_id (= vip_id)
+    answers = Column(JSONType, nullable=False, default=dict)  # {question_id: answer}
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
+class DiagnosisSubmission(Base):
+    """완료된 진단 원본 답변 (채점 기준 변경 시 재채점 백필용 — app/services/health_backfill.py)"""
+    __tablename__ = "diagnosis_submissions"
+    __table_args__ = (
+        # VIP별 최신 제출을 인덱스 순서대로 스트리밍 (백필 keyset 청크)
+        Index("ix_diagnosis_submissions_vip_id_submitted_at", "vip_id", text("submitted_at DESC")),
+    )
+
+    id = Column(String(100), primary_key=True, default=lambda: str(uuid.uuid4()))
+    vip_id = Column(String(100), ForeignKey("users.id"), nullable=False)
+    answers = Column(JSONType, nullable=False)  # {question_id: answer}
+    overall_score = Column(Integer, nullable=True)  # 제출 시점 종합 점수 (참고용)
+    submitted_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class AuthIdentity(Base):
+    """Supabase Auth 계정 로컬 인덱스 (이메일 → auth user id) — app/services/auth_identity.py"""
+    __tablename__ = "auth_identities"
+    __table_args__ = (
+        UniqueConstraint("auth_id", name="uq_auth_identities_auth_id"),
+    )
+
+    email = Column(String(255), primary_key=True)  # 소문자 정규화
+    auth_id = Column(String(100), nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
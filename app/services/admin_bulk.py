@@ -0,0 +1,232 @@
+"""
+관리자 에이전트 일괄 작업 (연장 / 등급 / 상태 / VIP 한도)
+- 대상 수와 무관하게 SQL 2문장 (한 트랜잭션, commit은 호출자가 수행)
+  1) UPDATE users SET ... FROM users old WHERE users.id = old.id AND old.id = ANY(:ids) AND old.role = 'agent'
+     RETURNING users.id, old.<변경 전 값>, users.<변경 후 값>
+     → 에이전트별 분기(만료 여부 / 등급별 기간 등)는 CASE 식으로 표현, 변경 전 값은 self-join 스냅샷
+  2) admin_actions 다중 행 INSERT 1번
+- 단건 엔드포인트(app/api/admin.py)와 같은 규칙 적용 (단건 등급 변경은 bulk_change_tier를 대상 1명으로 호출)
+- PostgreSQL 외 DB는 변경 전 값을 먼저 SELECT 한 뒤 같은 UPDATE (IN 목록)
+"""
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+import json
+
+from sqlalchemy import String, any_, bindparam, case, func, insert, select, update
+from sqlalchemy.orm import Session, aliased
+
+from app.models import AdminAction, User
+
+# 등급별 구독 기본값 (단건 / 일괄 등급 변경 공용)
+TIER_RULES: Dict[str, dict] = {
+    "free":        {"status": "trial",    "days": None, "trial_days": 3, "vip_limit": 5},
+    "monthly":     {"status": "active",   "days": 30,   "trial_days": None, "vip_limit": 50},
+    "yearly":      {"status": "active",   "days": 365,  "trial_days": None, "vip_limit": 50},
+    "core_member": {"status": "lifetime", "days": None, "trial_days": None, "vip_limit": 999999},
+}
+
+
+def action_values(admin_id: str, action_type: str, target_id: str, old_val: Any, new_val: Any) -> dict:
+    """admin_actions 1행 값 (log_admin_action과 같은 JSON 직렬화)"""
+    return {
+        "admin_id": admin_id,
+        "action_type": action_type,
+        "target_agent_id": target_id,
+        "old_value": json.dumps(old_val, default=str) if old_val else None,
+        "new_value": json.dumps(new_val, default=str) if new_val else None,
+    }
+
+
+@dataclass
+class BulkResult:
+    updated_ids: List[str]
+
+    @property
+    def count(self) -> int:
+        return len(self.updated_ids)
+
+
+def _days_after(db: Session, column, days: int, now: datetime):
+    """column이 미래면 column + days, 아니면 now + days"""
+    if db.bind.dialect.name == "sqlite":
+        shifted = func.datetime(column, f"+{days} days")
+    else:
+        shifted = column + timedelta(days=days)
+    return case((column > now, shifted), else_=now + timedelta(days=days))
+
+
+def _run(
+    db: Session,
+    admin_id: str,
+    action_type: str,
+    agent_ids: List[str],
+    values: Dict[str, Any],
+    old_columns: List[str],
+    new_columns: List[str],
+    describe: Callable[[dict], tuple],
+) -> BulkResult:
+    """
+    UPDATE 1번 + admin_actions INSERT 1번
+    - describe(row) → (old_val, new_val): RETURNING 행({old_<col>, new_<col>})으로 로그 값 구성
+    """
+    ids = list(dict.fromkeys(agent_ids))
+    if not ids:
+        return BulkResult([])
+
+    if db.bind.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import ARRAY
+
+        old = aliased(User, name="old")
+        stmt = (
+            update(User)
+            .where(
+                User.id == old.id,
+                old.id == any_(bindparam("ids", ids, type_=ARRAY(String))),
+                old.role == "agent",
+            )
+            .values(values)
+            .returning(
+                User.id,
+                *(getattr(old, c).label(f"old_{c}") for c in old_columns),
+                *(getattr(User, c).label(f"new_{c}") for c in new_columns),
+            )
+            .execution_options(synchronize_session=False)
+        )
+        rows = [dict(r._mapping) for r in db.execute(stmt)]
+    else:
+        before = {
+            r.id: r for r in db.execute(
+                select(User.id, *(getattr(User, c) for c in old_columns))
+                .where(User.id.in_(ids), User.role == "agent")
+            )
+        }
+        rows = []
+        if before:
+            stmt = (
+                update(User)
+                .where(User.id.in_(list(before)))
+                .values(values)
+                .returning(User.id, *(getattr(User, c).label(f"new_{c}") for c in new_columns))
+                .execution_options(synchronize_session=False)
+            )
+            for r in db.execute(stmt):
+                row = dict(r._mapping)
+                row.update({f"old_{c}": getattr(before[r.id], c) for c in old_columns})
+                rows.append(row)
+
+    if rows:
+        db.execute(insert(AdminAction).values([
+            action_values(admin_id, action_type, row["id"], *describe(row)) for row in rows
+        ]))
+    return BulkResult([row["id"] for row in rows])
+
+
+# ── 작업 ──────────────────────────────────────────────────────
+
+def bulk_extend(
+    db: Session,
+    admin_id: str,
+    agent_ids: List[str],
+    days: Optional[int] = None,
+    end_date: Optional[datetime] = None,
+    action_type: str = "extend",
+    now: Optional[datetime] = None,
+) -> BulkResult:
+    """만료일 연장 (지정 날짜 또는 max(현재 만료일, 지금) + days), 만료 상태는 활성으로 복구"""
+    now = now or datetime.now()
+    if end_date is not None:
+        new_end = end_date
+    elif days:
+        new_end = _days_after(db, User.subscription_end_date, days, now)
+    else:
+        raise ValueError("날짜 또는 일수를 입력해 주세요.")
+
+    values = {
+        User.subscription_end_date: new_end,
+        User.subscription_status: case(
+            (User.subscription_status == "expired", "active"), else_=User.subscription_status
+        ),
+        User.grace_period_end_date: None,
+    }
+    if action_type == "bulk_extend":
+        describe = lambda row: (None, f"+{days} days" if days else row["new_subscription_end_date"])
+    else:
+        describe = lambda row: (row["old_subscription_end_date"], row["new_subscription_end_date"])
+    return _run(
+        db, admin_id, action_type, agent_ids, values,
+        ["subscription_end_date"], ["subscription_end_date"], describe,
+    )
+
+
+def bulk_change_tier(db: Session, admin_id: str, agent_ids: List[str], tier: str, now: Optional[datetime] = None) -> BulkResult:
+    """등급 변경 + 등급별 구독 상태 / 기간 / VIP 한도 초기화"""
+    rule = TIER_RULES.get(tier)
+    if rule is None:
+        raise ValueError("유효하지 않은 등급입니다.")
+    now = now or datetime.now()
+
+    values = {
+        User.tier: tier,
+        User.subscription_status: rule["status"],
+        User.vip_limit: rule["vip_limit"],
+    }
+    if tier == "free":
+        values.update({
+            User.trial_start_date: now,
+            User.trial_end_date: now + timedelta(days=rule["trial_days"]),
+            User.subscription_end_date: None,
+        })
+    else:
+        values.update({
+            User.subscription_start_date: now,
+            User.subscription_end_date: now + timedelta(days=rule["days"]) if rule["days"] else None,
+            User.trial_end_date: None,
+        })
+    if tier == "core_member":
+        values[User.grace_period_end_date] = None
+
+    return _run(
+        db, admin_id, "tier_change", agent_ids, values,
+        ["tier", "vip_limit", "subscription_status"], ["tier"],
+        lambda row: (
+            {"tier": row["old_tier"], "vip_limit": row["old_vip_limit"], "status": row["old_subscription_status"]},
+            {"tier": row["new_tier"]},
+        ),
+    )
+
+
+def bulk_change_status(db: Session, admin_id: str, agent_ids: List[str], status: str, now: Optional[datetime] = None) -> BulkResult:
+    """구독 상태 변경 (update_agent_status와 같은 부가 처리)"""
+    now = now or datetime.now()
+    values: Dict[Any, Any] = {User.subscription_status: status}
+    if status == "active":
+        # 만료일이 없거나 지났으면 등급에 맞춰 연장 (연간 365일, 그 외 30일)
+        values[User.subscription_end_date] = case(
+            (
+                (User.subscription_end_date == None) | (User.subscription_end_date < now),
+                case((User.tier == "yearly", now + timedelta(days=365)), else_=now + timedelta(days=30)),
+            ),
+            else_=User.subscription_end_date,
+        )
+        values[User.grace_period_end_date] = None
+    elif status == "expired":
+        values[User.grace_period_end_date] = now + timedelta(days=7)
+    elif status == "lifetime":
+        values[User.subscription_end_date] = None
+        values[User.tier] = "core_member"
+
+    return _run(
+        db, admin_id, "status_change", agent_ids, values,
+        ["subscription_status"], ["subscription_status"],
+        lambda row: (row["old_subscription_status"], row["new_subscription_status"]),
+    )
+
+
+def bulk_change_vip_limit(db: Session, admin_id: str, agent_ids: List[str], vip_limit: int) -> BulkResult:
+    """VIP 한도 변경"""
+    return _run(
+        db, admin_id, "vip_limit_change", agent_ids, {User.vip_limit: vip_limit},
+        ["vip_limit"], ["vip_limit"],
+        lambda row: ({"vip_limit": row["old_vip_limit"]}, {"vip_limit": row["new_vip_limit"]}),
+    )
@@ -0,0 +1,212 @@
+"""
+Supabase Auth 계정 식별 (auth_identities 로컬 인덱스)
+- resolve_auth_id(): users.auth_id → auth_identities(이메일 PK 조회) → list_users() 페이지 순회(폴백) 순서
+  인덱스에서 찾은 id는 get_user_by_id()로 이메일이 맞는지 확인 (다르거나 없으면 인덱스에서 지우고 폴백)
+  폴백 중 받은 계정은 페이지마다 인덱스에 일괄 적재 → 다음 조회부터는 로컬에서 끝남
+- 인덱스 갱신: 계정 생성 / 삭제 경로(remember / forget) + Supabase Auth 이벤트 웹훅(apply_auth_event)
+- 모든 함수는 호출자 트랜잭션에 포함 (commit은 호출자가 수행)
+"""
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import logging
+
+from sqlalchemy.orm import Session
+
+from app.models import AuthIdentity, User
+
+logger = logging.getLogger(__name__)
+
+LIST_USERS_PAGE_SIZE = 1000
+
+
+def normalize_email(email: Optional[str]) -> Optional[str]:
+    email = (email or "").strip().lower()
+    return email or None
+
+
+# ── 인덱스 갱신 ───────────────────────────────────────────────
+
+def remember_many(db: Session, identities: Iterable[Tuple[Optional[str], Optional[str]]]):
+    """(email, auth_id) 일괄 upsert — 이메일이 바뀐 계정은 기존 행을 지우고 새 이메일로 저장"""
+    rows = {}
+    for email, auth_id in identities:
+        email = normalize_email(email)
+        if email and auth_id:
+            rows[email] = str(auth_id)
+    if not rows:
+        return
+
+    db.query(AuthIdentity).filter(
+        AuthIdentity.auth_id.in_(list(rows.values())),
+        AuthIdentity.email.notin_(list(rows)),
+    ).delete(synchronize_session=False)
+
+    values = [{"email": email, "auth_id": auth_id} for email, auth_id in rows.items()]
+    dialect = db.bind.dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+
+        stmt = insert(AuthIdentity).values(values)
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=[AuthIdentity.email],
+            set_={"auth_id": stmt.excluded.auth_id},
+        ))
+        return
+
+    for row in values:
+        db.merge(AuthIdentity(**row))
+
+
+def remember(db: Session, email: Optional[str], auth_id: Optional[str]):
+    remember_many(db, [(email, auth_id)])
+
+
+def forget(db: Session, auth_id: Optional[str] = None, email: Optional[str] = None):
+    """삭제된 Auth 계정을 인덱스에서 제거 (auth_id 또는 이메일 기준)"""
+    if auth_id:
+        db.query(AuthIdentity).filter(AuthIdentity.auth_id == str(auth_id)).delete(synchronize_session=False)
+    email = normalize_email(email)
+    if email:
+        db.query(AuthIdentity).filter(AuthIdentity.email == email).delete(synchronize_session=False)
+
+
+def apply_auth_event(db: Session, event_type: str, record: Optional[Dict[str, Any]], old_record: Optional[Dict[str, Any]]):
+    """
+    Supabase Database Webhook(auth.users) 이벤트 반영
+    - INSERT / UPDATE: 이메일 → id 저장 (이메일 변경 포함)
+    - DELETE: 인덱스에서 제거 + users.auth_id 해제
+    """
+    event_type = (event_type or "").upper()
+    if event_type in ("INSERT", "UPDATE") and record:
+        remember(db, record.get("email"), record.get("id"))
+    elif event_type == "DELETE" and old_record:
+        auth_id = old_record.get("id")
+        forget(db, auth_id=auth_id, email=old_record.get("email"))
+        if auth_id:
+            db.query(User).filter(User.auth_id == str(auth_id)).update({User.auth_id: None}, synchronize_session=False)
+
+
+# ── 조회 ──────────────────────────────────────────────────────
+
+def lookup(db: Session, email: Optional[str]) -> Optional[str]:
+    email = normalize_email(email)
+    if not email:
+        return None
+    return db.query(AuthIdentity.auth_id).filter(AuthIdentity.email == email).scalar()
+
+
+def _list_users_page(supabase, page: int, per_page: int) -> List[Any]:
+    response = supabase.auth.admin.list_users(page=page, per_page=per_page)
+    # supabase-py 버전에 따라 list 또는 .users를 가진 객체
+    return list(getattr(response, "users", response) or [])
+
+
+def find_auth_id_remote(db: Session, supabase, email: Optional[str], per_page: int = LIST_USERS_PAGE_SIZE) -> Optional[str]:
+    """list_users()를 페이지 단위로 순회하며 검색 (찾으면 중단, 받은 계정은 인덱스에 적재)"""
+    target = normalize_email(email)
+    if not target:
+        return None
+    page = 1
+    while True:
+        users = _list_users_page(supabase, page, per_page)
+        remember_many(db, ((u.email, u.id) for u in users))
+        for u in users:
+            if normalize_email(u.email) == target:
+                return str(u.id)
+        if len(users) < per_page:
+            return None
+        page += 1
+
+
+def _remote_email_matches(supabase, auth_id: str, email: Optional[str]) -> bool:
+    """auth_id 계정이 아직 있고 이메일이 같은지 (Auth 이벤트가 빠져 인덱스가 낡았을 수 있음)"""
+    try:
+        response = supabase.auth.admin.get_user_by_id(auth_id)
+    except Exception as e:
+        if is_not_found(e):
+            return False
+        raise
+    remote = getattr(response, "user", response)
+    return remote is not None and normalize_email(getattr(remote, "email", None)) == normalize_email(email)
+
+
+def resolve_auth_id(db: Session, supabase, email: Optional[str], user: Optional[User] = None, fallback: bool = True) -> Optional[str]:
+    """Auth user id: users.auth_id → 로컬 인덱스(원격 확인) → (fallback=True) list_users 페이지 순회"""
+    if user is not None and user.auth_id:
+        return user.auth_id
+    auth_id = lookup(db, email)
+    if auth_id and not _remote_email_matches(supabase, auth_id, email):
+        logger.info(f"[AuthIdentity] 인덱스의 auth_id가 없거나 이메일이 다름 ({email} → {auth_id}) → 인덱스에서 제거")
+        forget(db, email=email)
+        auth_id = None
+    if auth_id or not fallback:
+        return auth_id
+    logger.info(f"[AuthIdentity] 로컬 인덱스에 없음 → list_users 페이지 조회 ({email})")
+    return find_auth_id_remote(db, supabase, email)
+
+
+def is_not_found(error: Exception) -> bool:
+    """Auth API 404 (이미 삭제된 계정)"""
+    return getattr(error, "status", None) == 404 or getattr(error, "code", None) == "user_not_found"
+
+
+def is_email_taken(error: Exception) -> bool:
+    """create_user 실패 원인이 이미 등록된 이메일인지"""
+    if getattr(error, "code", None) in ("email_exists", "user_already_exists"):
+        return True
+    return "already" in str(error).lower() and "registered" in str(error).lower()
+
+
+def create_auth_user(db: Session, supabase, attributes: Dict[str, Any]):
+    """
+    Auth 계정 생성 → create_user 응답
+    - 같은 이메일의 유령 계정(정리 안 된 Auth 계정)이 있을 때만 찾아서 삭제 후 1번 재시도
+    """
+    try:
+        return supabase.auth.admin.create_user(attributes)
+    except Exception as create_err:
+        if not is_email_taken(create_err):
+            raise
+        orphaned_auth_id = resolve_auth_id(db, supabase, attributes.get("email"))
+        if not orphaned_auth_id:
+            raise
+        logger.info(f"[AuthIdentity] 같은 이메일의 유령 Auth 계정 삭제 후 재시도 ({attributes.get('email')})")
+        supabase.auth.admin.delete_user(orphaned_auth_id)
+        forget(db, auth_id=orphaned_auth_id, email=attributes.get("email"))
+        return supabase.auth.admin.create_user(attributes)
+
+
+def delete_auth_user(db: Session, supabase, user: User) -> Optional[str]:
+    """
+    사용자의 Auth 계정 삭제 → 삭제한 auth id
+    - 저장된 auth_id가 이미 삭제된 계정이면 이메일로 다시 찾아 삭제
+    - 끝까지 못 찾으면 로컬 id로 최종 시도 (초기 데이터는 auth id = users.id), 그래도 없으면 None
+    """
+    auth_id = resolve_auth_id(db, supabase, user.email, user)
+    if auth_id:
+        try:
+            supabase.auth.admin.delete_user(auth_id)
+            forget(db, auth_id=auth_id, email=user.email)
+            return auth_id
+        except Exception as e:
+            if not is_not_found(e):
+                raise
+            logger.info(f"[AuthIdentity] 저장된 auth_id가 이미 없음 ({auth_id}) → 이메일로 재검색")
+            forget(db, auth_id=auth_id)
+            auth_id = find_auth_id_remote(db, supabase, user.email)
+            if auth_id:
+                supabase.auth.admin.delete_user(auth_id)
+                forget(db, auth_id=auth_id, email=user.email)
+                return auth_id
+
+    try:
+        supabase.auth.admin.delete_user(user.id)
+    except Exception as e:
+        if not is_not_found(e):
+            raise
+        logger.info(f"[AuthIdentity] Auth 계정 없음 ({user.email}) — 삭제할 대상 없음")
+        return None
+    forget(db, auth_id=user.id, email=user.email)
+    return user.id
@@ -0,0 +1,118 @@
+"""
+결제 원장(payment_events) + 멱등 결제 이벤트 처리
+- confirm / 토스 웹훅 / 자동갱신이 모두 process_payment_event()를 거침
+- order_id, payment_key 유니크 → INSERT ... ON CONFLICT DO NOTHING 한 번으로 중복 판정
+  (재전송된 웹훅, confirm 후 도착한 웹훅 등은 구독 갱신 없이 즉시 no-op)
+- 최초 1회만 구독 활성화 / 연장 반영
+"""
+from datetime import datetime, timedelta
+from typing import Optional
+import logging
+import uuid
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models import PaymentEvent, User
+from app.services.subscription import PLAN_CYCLE_DAYS
+
+logger = logging.getLogger(__name__)
+
+RENEWAL_ORDER_PREFIX = "renew-"  # 자동갱신 orderId 접두사 (app/services/renewal.py)
+
+
+def _insert_event(db: Session, values: dict) -> bool:
+    """원장 기록. 이미 같은 order_id / payment_key가 있으면 False"""
+    dialect = db.bind.dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+
+        stmt = insert(PaymentEvent).values(**values).on_conflict_do_nothing().returning(PaymentEvent.id)
+        return db.execute(stmt).scalar_one_or_none() is not None
+
+    # 그 외 DB는 savepoint + 유니크 위반으로 판정
+    try:
+        with db.begin_nested():
+            db.add(PaymentEvent(**values))
+        return True
+    except IntegrityError:
+        return False
+
+
+def activate_subscription(agent: User, tier: str, billing_cycle: str, payment_data: dict):
+    """결제 완료 후 구독 활성화 (신규 결제: 지금부터 한 주기)"""
+    now = datetime.now()
+    days = PLAN_CYCLE_DAYS.get(billing_cycle, 30)
+
+    agent.tier                  = tier
+    agent.subscription_type     = tier          # 기존 컬럼 병행 유지
+    agent.subscription_status   = "active"
+    agent.subscription_start_date = now
+    agent.subscription_end_date = now + timedelta(days=days)
+    agent.subscription_expires_at = now + timedelta(days=days)  # Supabase 컬럼
+    agent.last_payment_date     = now
+    agent.payment_method        = "tosspayments"
+
+    # 빌링키 저장 (있는 경우)
+    billing_key = payment_data.get("billingKey") or payment_data.get("billing_key")
+    if billing_key:
+        agent.billing_key = billing_key
+
+    logger.info(f"[Payment] 구독 활성화: {agent.email} / {tier} / {billing_cycle}")
+
+
+def extend_subscription(agent: User, billing_cycle: str):
+    """자동갱신 결제 완료: 기존 만료일에서 한 주기 연장"""
+    days = PLAN_CYCLE_DAYS.get(billing_cycle, 30)
+    base = agent.subscription_end_date or datetime.now()
+    agent.subscription_end_date   = base + timedelta(days=days)
+    agent.subscription_expires_at = agent.subscription_end_date
+    agent.last_payment_date       = datetime.now()
+    agent.subscription_status     = "active"
+
+
+def process_payment_event(
+    db: Session,
+    *,
+    source: str,
+    order_id: str,
+    payment_key: Optional[str],
+    agent_id: Optional[str],
+    tier: Optional[str] = None,
+    billing_cycle: str = "monthly",
+    amount: Optional[int] = None,
+    payload: Optional[dict] = None,
+) -> bool:
+    """
+    결제 이벤트 멱등 처리 (commit은 호출자가 수행)
+    - True: 최초 수신 → 원장 기록 + 구독 반영
+    - False: 이미 처리된 결제 → 아무것도 하지 않음
+    """
+    is_new = _insert_event(db, {
+        "id": str(uuid.uuid4()),
+        "order_id": order_id,
+        "payment_key": payment_key,
+        "agent_id": agent_id,
+        "source": source,
+        "tier": tier,
+        "billing_cycle": billing_cycle,
+        "amount": amount,
+        "payload": payload,
+    })
+    if not is_new:
+        logger.info(f"[Payment] 중복 결제 이벤트 무시 ({source}): {order_id}")
+        return False
+
+    agent = db.get(User, agent_id) if agent_id else None
+    if agent is None:
+        logger.error(f"[Payment] 결제 이벤트의 에이전트 없음 ({source}): {order_id} / {agent_id}")
+        return True
+
+    if order_id.startswith(RENEWAL_ORDER_PREFIX):
+        extend_subscription(agent, billing_cycle)
+    else:
+        activate_subscription(agent, tier or "flow_one", billing_cycle, payload or {})
+    return True
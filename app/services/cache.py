@@ -0,0 +1,240 @@
+"""
+조회 API 응답 캐시
+- 키: 경로 + 정렬된 쿼리 파라미터 (GET 응답 본문을 JSON 바이트로 저장)
+- 저장소: 인프로세스 TTL LRU (기본) / REDIS_URL 설정 + redis 패키지 설치 시 Redis 공유 캐시
+  인프로세스 캐시의 invalidate()는 호출한 워커에만 적용되므로 WEB_CONCURRENCY > 1이면
+  TTL을 response_cache_local_ttl_seconds로 제한 (다른 워커는 그 시간 동안 이전 응답을 줄 수 있음)
+  레플리카가 여러 개인 배포는 프로세스 수를 알 수 없으므로 REDIS_URL 필수
+- 태그 무효화: 응답마다 태그(예: synergy:agent:{id})를 달고, 해당 데이터를 바꾸는 쓰기 경로가
+  commit 이후 invalidate(태그)를 호출
+- 클라이언트 재검증: 본문 해시로 ETag 발급, If-None-Match 일치 시 본문 없이 304
+"""
+from collections import OrderedDict
+from dataclasses import dataclass
+from importlib.util import find_spec
+from typing import Any, Callable, Dict, Iterable, Optional, Set, Tuple
+import hashlib
+import json
+import logging
+import threading
+import time
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+REDIS_AVAILABLE = find_spec("redis") is not None
+
+
+@dataclass
+class CachedResponse:
+    body: bytes
+    etag: str
+
+
+class MemoryBackend:
+    """프로세스 내 TTL LRU (워커별로 따로 유지됨)"""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, CachedResponse, Tuple[str, ...]]]" = OrderedDict()
+        self._tags: Dict[str, Set[str]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            if item[0] <= time.monotonic():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return item[1]
+
+    def set(self, key: str, value: CachedResponse, ttl: int, tags: Tuple[str, ...]):
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = (time.monotonic() + ttl, value, tags)
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def invalidate(self, tags: Iterable[str]):
+        with self._lock:
+            for tag in tags:
+                for key in self._tags.pop(tag, set()):
+                    self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tags.clear()
+
+    def _remove(self, key: str):
+        item = self._entries.pop(key, None)
+        if item is None:
+            return
+        for tag in item[2]:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+
+class RedisBackend:
+    """Redis 공유 캐시 (모든 워커/레플리카가 같은 항목과 무효화를 공유)"""
+
+    PREFIX = "uniflow:cache:"
+
+    def __init__(self, url: str):
+        import redis
+
+        self._redis = redis.Redis.from_url(url, socket_timeout=0.5, socket_connect_timeout=0.5)
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        data = self._redis.hgetall(self.PREFIX + key)
+        if not data:
+            return None
+        return CachedResponse(body=data[b"body"], etag=data[b"etag"].decode())
+
+    def set(self, key: str, value: CachedResponse, ttl: int, tags: Tuple[str, ...]):
+        name = self.PREFIX + key
+        pipe = self._redis.pipeline()
+        pipe.hset(name, mapping={"body": value.body, "etag": value.etag})
+        pipe.expire(name, ttl)
+        for tag in tags:
+            # 태그 집합은 항목보다 길게 유지 (만료된 키를 가리켜도 삭제 시 무해)
+            pipe.sadd(self.PREFIX + "tag:" + tag, name)
+            pipe.expire(self.PREFIX + "tag:" + tag, ttl * 2)
+        pipe.execute()
+
+    def invalidate(self, tags: Iterable[str]):
+        for tag in tags:
+            tag_key = self.PREFIX + "tag:" + tag
+            keys = self._redis.smembers(tag_key)
+            self._redis.delete(tag_key, *keys)
+
+    def clear(self):
+        keys = list(self._redis.scan_iter(self.PREFIX + "*"))
+        if keys:
+            self._redis.delete(*keys)
+
+
+def cache_key(request: Request, key_params: Optional[Iterable[str]] = None) -> str:
+    """경로 + 쿼리 파라미터 (key_params 지정 시 응답에 영향을 주는 파라미터만)"""
+    items = request.query_params.multi_items()
+    if key_params is not None:
+        allowed = set(key_params)
+        items = [(k, v) for k, v in items if k in allowed]
+    params = "&".join(f"{k}={v}" for k, v in sorted(items))
+    return f"{request.url.path}?{params}"
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return etag in candidates or "*" in candidates
+
+
+class ResponseCache:
+    def __init__(self):
+        self.enabled = settings.response_cache_enabled
+        self.backend = self._create_backend()
+        # 워커 간에 무효화가 전달되지 않는 경우의 최대 TTL (None: 제한 없음)
+        self.max_ttl: Optional[int] = None
+        if isinstance(self.backend, MemoryBackend) and settings.web_concurrency > 1:
+            self.max_ttl = settings.response_cache_local_ttl_seconds
+            logger.warning(
+                f"[Cache] 워커 {settings.web_concurrency}개에 인프로세스 캐시 사용 — "
+                f"TTL을 {self.max_ttl}초로 제한 (REDIS_URL 설정 권장)"
+            )
+
+    @staticmethod
+    def _create_backend():
+        if settings.redis_url and REDIS_AVAILABLE:
+            logger.info("[Cache] Redis 공유 캐시 사용")
+            return RedisBackend(settings.redis_url)
+        if settings.redis_url:
+            logger.warning("[Cache] REDIS_URL이 설정됐지만 redis 패키지가 없어 인프로세스 캐시 사용")
+        return MemoryBackend(settings.response_cache_max_entries)
+
+    def respond(
+        self,
+        request: Request,
+        build: Callable[[], Any],
+        ttl: int,
+        tags: Iterable[str] = (),
+        key_params: Optional[Iterable[str]] = None,
+    ) -> Response:
+        """
+        캐시된 응답 반환. 없으면 build()로 만들어 저장
+        - 캐시 저장소 오류는 미스로 처리 (응답은 항상 반환)
+        """
+        key = cache_key(request, key_params)
+        if self.max_ttl is not None:
+            ttl = min(ttl, self.max_ttl)
+        entry = self._get(key) if self.enabled else None
+        if entry is None:
+            body = json.dumps(jsonable_encoder(build()), ensure_ascii=False, separators=(",", ":")).encode()
+            entry = CachedResponse(body=body, etag=f'"{hashlib.sha1(body).hexdigest()}"')
+            if self.enabled:
+                self._set(key, entry, ttl, tuple(tags))
+
+        # no-cache: 브라우저는 저장하되 매번 ETag로 재검증 → 무효화가 즉시 반영됨
+        headers = {"ETag": entry.etag, "Cache-Control": "private, no-cache"}
+        if _etag_matches(request, entry.etag):
+            return Response(status_code=304, headers=headers)
+        return Response(content=entry.body, media_type="application/json", headers=headers)
+
+    def invalidate(self, *tags: str):
+        """쓰기 commit 이후 호출 — 태그가 달린 캐시 항목 삭제"""
+        if not self.enabled:
+            return
+        try:
+            self.backend.invalidate(tags)
+        except Exception as e:
+            logger.error(f"[Cache] 무효화 실패 {tags}: {e}")
+
+    def clear(self):
+        self.backend.clear()
+
+    def _get(self, key: str) -> Optional[CachedResponse]:
+        try:
+            return self.backend.get(key)
+        except Exception as e:
+            logger.warning(f"[Cache] 조회 실패 ({key}): {e}")
+            return None
+
+    def _set(self, key: str, entry: CachedResponse, ttl: int, tags: Tuple[str, ...]):
+        try:
+            self.backend.set(key, entry, ttl, tags)
+        except Exception as e:
+            logger.warning(f"[Cache] 저장 실패 ({key}): {e}")
+
+
+response_cache = ResponseCache()
+
+
+# ── 태그 ──────────────────────────────────────────────────────
+
+def user_tag(user_id: str) -> str:
+    """사용자 프로필 / 담당 관계가 들어간 응답"""
+    return f"user:{user_id}"
+
+
+def synergy_agent_tag(agent_id: str) -> str:
+    """에이전트별 시너지 신청 현황"""
+    return f"synergy:agent:{agent_id}"
+
+
+ADMIN_KPI_TAG = "admin:kpi"
+DIAGNOSIS_QUESTIONS_TAG = "diagnosis:questions"
@@ -0,0 +1,105 @@
+"""
+원자적 카운터
+- increment_counter(): UPDATE ... SET x = x + :n RETURNING x (읽기-수정-쓰기 경합 / 갱신 유실 방지)
+- BufferedCounter: 조회수처럼 빈번한 증가를 메모리에 모았다가 주기적으로 일괄 반영
+  (인기 게시글 조회 1회마다 쓰기 트랜잭션이 생기지 않도록)
+"""
+from collections import defaultdict
+from typing import Dict, Optional
+import logging
+import threading
+
+from sqlalchemy import update, bindparam, func
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.models import LoungePost
+
+logger = logging.getLogger(__name__)
+
+
+def increment_counter(db: Session, column, row_id: str, amount: int = 1, *conditions) -> Optional[int]:
+    """
+    column(예: LoungePost.view_count)을 amount만큼 원자적으로 증감하고 새 값을 반환.
+    - 대상 행이 없거나 추가 조건(conditions)을 만족하지 않으면 None
+    - commit은 호출자가 수행
+    """
+    model = column.class_
+    stmt = (
+        update(model)
+        .where(model.id == row_id, *conditions)
+        .values({column.key: func.coalesce(column, 0) + amount})
+        .returning(column)
+        .execution_options(synchronize_session=False)
+    )
+    return db.execute(stmt).scalar_one_or_none()
+
+
+class BufferedCounter:
+    """메모리 버퍼 카운터 — flush_interval초마다 누적분을 한 번의 배치 UPDATE로 반영"""
+
+    def __init__(self, column, flush_interval: float = 5.0):
+        self.column = column
+        self.flush_interval = flush_interval
+        self._pending: Dict[str, int] = defaultdict(int)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def add(self, row_id: str, amount: int = 1):
+        with self._lock:
+            self._pending[row_id] += amount
+
+    def pending(self, row_id: str) -> int:
+        """아직 DB에 반영되지 않은 누적분 (응답 값 보정용)"""
+        with self._lock:
+            return self._pending.get(row_id, 0)
+
+    def flush(self):
+        """누적분을 DB에 반영 (실패 시 버퍼로 되돌림)"""
+        with self._lock:
+            if not self._pending:
+                return
+            batch, self._pending = dict(self._pending), defaultdict(int)
+
+        table = self.column.class_.__table__
+        col = table.c[self.column.key]
+        stmt = (
+            update(table)
+            .where(table.c.id == bindparam("b_id"))
+            .values({self.column.key: func.coalesce(col, 0) + bindparam("b_amount")})
+        )
+        db = SessionLocal()
+        try:
+            db.execute(stmt, [{"b_id": k, "b_amount": v} for k, v in batch.items()])
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.error(f"[Counter] {table.name}.{self.column.key} flush 실패 ({len(batch)}건): {e}")
+            with self._lock:
+                for k, v in batch.items():
+                    self._pending[k] += v
+        finally:
+            db.close()
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name=f"counter-{self.column.key}", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """종료 시 남은 누적분까지 반영"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=self.flush_interval)
+        self.flush()
+
+
+# 커뮤니티 게시글 조회수
+post_view_counter = BufferedCounter(LoungePost.view_count)
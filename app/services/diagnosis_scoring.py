@@ -0,0 +1,183 @@
+"""
+6축 비즈니스 진단 채점 엔진
+- DIAGNOSIS_QUESTIONS를 한 번 컴파일: 문항별 옵션→점수 dict + 카테고리 소속 행렬
+  (문항마다 options.index() 선형 탐색 / 카테고리 리스트 재구성 없음)
+- score_answers(): VIP 1명 채점 / score_batch(): 여러 VIP 답변을 (VIP × 문항) 행렬로 모아 NumPy로 한 번에 집계
+- 문항 가중치를 바꿔 전체 VIP를 재채점할 때는 compile_questions(weights=...)로 새 엔진을 만들어 사용
+- FastAPI / DB 의존 없음 (단독 import 가능)
+"""
+from dataclasses import dataclass
+from typing import Any, Dict, List, Mapping, Optional, Sequence
+
+import numpy as np
+
+# 6축 비즈니스 진단 20개 고정 질문 (프론트엔드 diagnosisApi.ts와 연동)
+DIAGNOSIS_QUESTIONS = [
+    # 자산 안정성 (asset) - 3문항
+    {"id": "asset_1", "question": "현재 월 순수익(수입 - 고정 지출)은 얼마나 됩니까?", "category": "asset", "type": "radio", "options": ["적자 또는 0원", "1~50만원", "50~200만원", "200만원 이상"], "order": 1},
+    {"id": "asset_2", "question": "현재 6개월 이상 생활 가능한 비상금(비상 자금)을 보유하고 있습니까?", "category": "asset", "type": "radio", "options": ["없음", "1~3개월치", "3~6개월치", "6개월 이상"], "order": 2},
+    {"id": "asset_3", "question": "부채(대출, 카드빚 등) 대비 자산 비율이 어떻게 됩니까?", "category": "asset", "type": "radio", "options": ["부채가 자산을 초과", "부채 = 자산의 50% 이상", "부채 = 자산의 30% 미만", "부채 없음"], "order": 3},
+    # 시간 독립성 (time) - 3문항
+    {"id": "time_1", "question": "하루 중 '내가 원하는 일'에 쓸 수 있는 자유 시간은?", "category": "time", "type": "radio", "options": ["1시간 미만", "1~3시간", "3~6시간", "6시간 이상"], "order": 4},
+    {"id": "time_2", "question": "현재 비즈니스 운영이 나 없이도 하루 이상 돌아갈 수 있습니까?", "category": "time", "type": "radio", "options": ["전혀 안됨, 내가 없으면 멈춤", "몇 시간은 가능", "하루~이틀 가능", "1주일 이상 가능"], "order": 5},
+    {"id": "time_3", "question": "반복적으로 하는 업무 중 자동화되어 있는 비율은?", "category": "time", "type": "radio", "options": ["10% 미만", "10~30%", "30~60%", "60% 이상"], "order": 6},
+    # 신체 컨디션 (body) - 3문항
+    {"id": "body_1", "question": "최근 한 달 기준, 규칙적인 운동(주 2회 이상)을 하고 있습니까?", "category": "body", "type": "radio", "options": ["전혀 안함", "월 1~3회", "주 1회", "주 2회 이상"], "order": 7},
+    {"id": "body_2", "question": "현재 수면의 질과 평균 수면 시간은?", "category": "body", "type": "radio", "options": ["5시간 미만, 항상 피곤함", "5~6시간, 자주 피곤함", "6~7시간, 보통", "7~8시간, 개운함"], "order": 8},
+    {"id": "body_3", "question": "현재 에너지 수준을 1~10으로 평가하면?", "category": "body", "type": "slider", "options": [], "order": 9},
+    # 정서 균형 (emotion) - 4문항
+    {"id": "emotion_1", "question": "비즈니스/삶에 대한 전반적인 만족도는?", "category": "emotion", "type": "slider", "options": [], "order": 10},
+    {"id": "emotion_2", "question": "최근 번아웃(극도의 피로나 무기력)을 느낀 적이 있습니까?", "category": "emotion", "type": "radio", "options": ["거의 매일", "주 2~3회", "월 1~2회", "거의 없음"], "order": 11},
+    {"id": "emotion_3", "question": "스트레스 상황에서 회복하는 데 보통 얼마나 걸립니까?", "category": "emotion", "type": "radio", "options": ["1주일 이상", "3~7일", "1~2일", "하루 이내"], "order": 12},
+    {"id": "emotion_4", "question": "현재 가장 큰 정서적 걱정거리는? (복수 선택)", "category": "emotion", "type": "checkbox", "options": ["수입/재정 불안", "인간관계", "건강", "미래에 대한 불확실성", "없음"], "order": 13},
+    # 네트워크 파워 (network) - 4문항
+    {"id": "network_1", "question": "사업/커리어와 관련하여 적극적으로 연락 가능한 인맥 수는?", "category": "network", "type": "radio", "options": ["5명 미만", "5~20명", "20~50명", "50명 이상"], "order": 14},
+    {"id": "network_2", "question": "최근 6개월 내 새로운 비즈니스 파트너 또는 협업 기회가 생겼습니까?", "category": "network", "type": "radio", "options": ["없음", "관심 표현 수준", "미팅 진행함", "실제 협업 중"], "order": 15},
+    {"id": "network_3", "question": "나를 타인에게 소개해줄 수 있는 지인이 몇 명이나 됩니까?", "category": "network", "type": "radio", "options": ["1~2명", "3~5명", "6~10명", "11명 이상"], "order": 16},
+    {"id": "network_4", "question": "온라인 또는 오프라인 커뮤니티/네트워크 활동을 하고 있습니까?", "category": "network", "type": "radio", "options": ["전혀 없음", "가끔 참여", "정기적으로 참여", "직접 운영 중"], "order": 17},
+    # 시스템 레버리지 (system) - 3문항
+    {"id": "system_1", "question": "현재 수익 구조에서 나의 시간을 쓰지 않고도 발생하는 수익(자동화/파시브 인컴)의 비율은?", "category": "system", "type": "radio", "options": ["0%", "1~10%", "10~30%", "30% 이상"], "order": 18},
+    {"id": "system_2", "question": "현재 비즈니스에 표준 운영 절차(SOP) 또는 매뉴얼이 있습니까?", "category": "system", "type": "radio", "options": ["전혀 없음", "일부 있음", "주요 업무는 있음", "전 분야 문서화"], "order": 19},
+    {"id": "system_3", "question": "현재 비즈니스의 확장 가능성을 어떻게 보십니까?", "category": "system", "type": "radio", "options": ["나 혼자 감당이 한계", "1~2명 더 추가 가능", "팀 구조로 성장 가능", "무한 확장 가능한 구조"], "order": 20},
+]
+
+# 점수 환산 테이블 (radio 답변 → 점수)
+SCORE_MAP = {
+    0: 15,   # 첫 번째 옵션: 15점
+    1: 40,   # 두 번째 옵션: 40점
+    2: 70,   # 세 번째 옵션: 70점
+    3: 100,  # 네 번째 옵션: 100점
+}
+
+
+CATEGORIES = ("asset", "time", "body", "emotion", "network", "system")
+DEFAULT_SCORE = 50.0  # 미응답 / 해석 불가 답변
+
+
+@dataclass
+class DiagnosisScore:
+    categories: Dict[str, int]  # {asset: 0~100, ...}
+    overall: int
+
+    def as_columns(self) -> Dict[str, int]:
+        """health_index 컬럼명 기준"""
+        c = self.categories
+        return {
+            "asset_stability": c["asset"],
+            "time_independence": c["time"],
+            "physical_condition": c["body"],
+            "emotional_balance": c["emotion"],
+            "network_power": c["network"],
+            "system_leverage": c["system"],
+            "overall_score": self.overall,
+        }
+
+
+def _slider_score(answer: Any) -> float:
+    # 슬라이더는 1~10 → 10~100 변환
+    try:
+        val = float(answer)
+        return min(100.0, max(0.0, val * 10))
+    except (TypeError, ValueError):
+        return DEFAULT_SCORE
+
+
+def _checkbox_score(answer: Any) -> float:
+    # 체크한 항목 수에 따라 점수 계산
+    selected = answer if isinstance(answer, list) else []
+    if "없음" in selected:
+        return 90.0  # 걱정거리 없음 = 높은 점수
+    non_neutral = [s for s in selected if s != "없음"]
+    if len(non_neutral) == 0:
+        return DEFAULT_SCORE
+    return max(10.0, 80.0 - len(non_neutral) * 20)
+
+
+class DiagnosisScorer:
+    """컴파일된 채점기 (문항 목록 / 가중치별로 1개)"""
+
+    def __init__(self, questions: Sequence[dict], weights: Optional[Mapping[str, float]] = None):
+        self.question_ids: List[str] = [q["id"] for q in questions]
+        self._scorers = []
+        for q in questions:
+            options = q.get("options", [])
+            if q["type"] == "radio" and options:
+                # 옵션 문자열 → 점수 (같은 옵션이 여러 번이면 첫 번째 위치 기준)
+                table: Dict[str, float] = {}
+                for idx, option in enumerate(options):
+                    table.setdefault(option, float(SCORE_MAP.get(idx, 50)))
+                self._scorers.append(lambda a, t=table: t.get(str(a), DEFAULT_SCORE))
+            elif q["type"] == "slider":
+                self._scorers.append(_slider_score)
+            elif q["type"] == "checkbox" and options:
+                self._scorers.append(_checkbox_score)
+            else:
+                self._scorers.append(lambda a: DEFAULT_SCORE)
+
+        # 카테고리 소속 행렬 (문항 × 카테고리) × 문항 가중치
+        weights = weights or {}
+        w = np.array([float(weights.get(qid, 1.0)) for qid in self.question_ids])
+        membership = np.zeros((len(questions), len(CATEGORIES)))
+        for i, q in enumerate(questions):
+            if q["category"] in CATEGORIES:
+                membership[i, CATEGORIES.index(q["category"])] = 1.0
+        self._weighted = membership * w[:, None]
+        self._weight_sums = self._weighted.sum(axis=0)
+
+    def answer_matrix(self, answer_sets: Sequence[Mapping[str, Any]]) -> np.ndarray:
+        """(VIP × 문항) 문항 점수 행렬"""
+        matrix = np.full((len(answer_sets), len(self.question_ids)), DEFAULT_SCORE)
+        for row, answers in enumerate(answer_sets):
+            for col, (qid, scorer) in enumerate(zip(self.question_ids, self._scorers)):
+                answer = answers.get(qid)
+                if answer is not None:
+                    matrix[row, col] = scorer(answer)
+        return matrix
+
+    def score_matrix(self, matrix: np.ndarray) -> np.ndarray:
+        """
+        문항 점수 행렬 → (VIP × [6개 카테고리 + 종합]) 정수 점수
+        - 카테고리 = 문항 점수 가중 평균(반올림), 종합 = 카테고리 점수 평균(반올림)
+        - 문항이 없는 카테고리는 50
+        """
+        with np.errstate(invalid="ignore", divide="ignore"):
+            categories = (matrix @ self._weighted) / self._weight_sums
+        categories = np.where(self._weight_sums > 0, np.rint(categories), DEFAULT_SCORE)
+        overall = np.rint(categories.mean(axis=1))
+        return np.column_stack([categories, overall]).astype(int)
+
+    def score_batch(self, answer_sets: Sequence[Mapping[str, Any]]) -> List[DiagnosisScore]:
+        """여러 VIP 답변 일괄 채점 (입력 순서 유지)"""
+        if not answer_sets:
+            return []
+        scores = self.score_matrix(self.answer_matrix(answer_sets))
+        return [
+            DiagnosisScore(
+                categories={cat: int(row[i]) for i, cat in enumerate(CATEGORIES)},
+                overall=int(row[-1]),
+            )
+            for row in scores
+        ]
+
+    def score_answers(self, answers: Mapping[str, Any]) -> DiagnosisScore:
+        return self.score_batch([answers])[0]
+
+
+def compile_questions(
+    questions: Sequence[dict] = DIAGNOSIS_QUESTIONS,
+    weights: Optional[Mapping[str, float]] = None,
+) -> DiagnosisScorer:
+    return DiagnosisScorer(questions, weights)
+
+
+default_scorer = compile_questions()
+
+
+def score_answers(answers: Mapping[str, Any]) -> DiagnosisScore:
+    """기본 문항 / 동일 가중치로 1명 채점"""
+    return default_scorer.score_answers(answers)
+
+
+def score_batch(answer_sets: Sequence[Mapping[str, Any]]) -> List[DiagnosisScore]:
+    """기본 문항 / 동일 가중치로 여러 명 채점"""
+    return default_scorer.score_batch(answer_sets)
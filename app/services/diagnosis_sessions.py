@@ -0,0 +1,201 @@
+"""
+진행 중인 진단 답변 저장소 (diagnosis_id → {question_id: answer})
+- 여러 uvicorn 워커 / 레플리카가 같은 세션을 보도록 프로세스 밖에 저장
+- DIAGNOSIS_SESSION_STORE로 선택
+  - sql (기본): diagnosis_sessions 테이블, PostgreSQL은 jsonb || 병합 upsert 1번
+  - redis: 세션당 해시 1개 (질문별 필드), 키 TTL로 만료 (REDIS_URL + redis 패키지 필요)
+  - memory: 단일 프로세스 개발용
+- 모든 저장소는 마지막 저장 후 diagnosis_session_ttl_seconds가 지나면 만료
+  (sql은 조회 시 만료분 무시 + 스케줄러가 주기적으로 삭제, 만료된 행에 저장하면 이전 답변을 버리고 새로 시작)
+"""
+from datetime import datetime, timedelta, timezone
+from importlib.util import find_spec
+from typing import Any, Dict, Tuple
+import json
+import logging
+import threading
+import time
+
+from sqlalchemy import case, func
+
+from app.config import get_settings
+from app.database import SessionLocal
+from app.models import DiagnosisSession
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+Answers = Dict[str, Any]
+
+
+class MemorySessionStore:
+    """프로세스 내 dict (워커 간 공유되지 않음)"""
+
+    def __init__(self, ttl_seconds: int):
+        self.ttl_seconds = ttl_seconds
+        self._sessions: Dict[str, Tuple[float, Answers]] = {}
+        self._lock = threading.Lock()
+
+    def save_answers(self, diagnosis_id: str, answers: Answers):
+        with self._lock:
+            self._purge_locked()
+            _, current = self._sessions.get(diagnosis_id, (0.0, {}))
+            self._sessions[diagnosis_id] = (time.monotonic() + self.ttl_seconds, {**current, **answers})
+
+    def get_answers(self, diagnosis_id: str) -> Answers:
+        with self._lock:
+            expires_at, answers = self._sessions.get(diagnosis_id, (0.0, {}))
+            return dict(answers) if expires_at > time.monotonic() else {}
+
+    def delete(self, diagnosis_id: str):
+        with self._lock:
+            self._sessions.pop(diagnosis_id, None)
+
+    def purge_expired(self) -> int:
+        with self._lock:
+            return self._purge_locked()
+
+    def _purge_locked(self) -> int:
+        now = time.monotonic()
+        expired = [k for k, (expires_at, _) in self._sessions.items() if expires_at <= now]
+        for key in expired:
+            del self._sessions[key]
+        return len(expired)
+
+
+class SqlSessionStore:
+    """diagnosis_sessions 테이블 (답변 1건마다 짧은 트랜잭션 1번)"""
+
+    def __init__(self, ttl_seconds: int):
+        self.ttl_seconds = ttl_seconds
+
+    def _expires_at(self) -> datetime:
+        return datetime.now(timezone.utc) + timedelta(seconds=self.ttl_seconds)
+
+    @staticmethod
+    def _is_live(session: DiagnosisSession) -> bool:
+        expires_at = session.expires_at
+        if expires_at.tzinfo is None:  # SQLite는 tz 없이 UTC로 돌려줌
+            expires_at = expires_at.replace(tzinfo=timezone.utc)
+        return expires_at > datetime.now(timezone.utc)
+
+    def save_answers(self, diagnosis_id: str, answers: Answers):
+        db = SessionLocal()
+        try:
+            if db.bind.dialect.name == "postgresql":
+                from sqlalchemy.dialects.postgresql import insert
+
+                # 동시 저장(다른 워커)도 유실 없이 병합: answers = answers || excluded.answers
+                # (아직 삭제되지 않은 만료 행이면 이전 답변은 버림)
+                stmt = insert(DiagnosisSession).values(
+                    id=diagnosis_id, answers=answers, expires_at=self._expires_at()
+                )
+                db.execute(stmt.on_conflict_do_update(
+                    index_elements=[DiagnosisSession.id],
+                    set_={
+                        "answers": case(
+                            (DiagnosisSession.expires_at > func.now(),
+                             DiagnosisSession.answers.op("||")(stmt.excluded.answers)),
+                            else_=stmt.excluded.answers,
+                        ),
+                        "expires_at": stmt.excluded.expires_at,
+                    },
+                ))
+            else:
+                session = db.get(DiagnosisSession, diagnosis_id, with_for_update=True)
+                if session is None:
+                    db.add(DiagnosisSession(id=diagnosis_id, answers=answers, expires_at=self._expires_at()))
+                else:
+                    current = (session.answers or {}) if self._is_live(session) else {}
+                    session.answers = {**current, **answers}
+                    session.expires_at = self._expires_at()
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def get_answers(self, diagnosis_id: str) -> Answers:
+        db = SessionLocal()
+        try:
+            answers = db.query(DiagnosisSession.answers).filter(
+                DiagnosisSession.id == diagnosis_id,
+                DiagnosisSession.expires_at > datetime.now(timezone.utc),
+            ).scalar()
+            return dict(answers or {})
+        finally:
+            db.close()
+
+    def delete(self, diagnosis_id: str):
+        db = SessionLocal()
+        try:
+            db.query(DiagnosisSession).filter(DiagnosisSession.id == diagnosis_id).delete(synchronize_session=False)
+            db.commit()
+        finally:
+            db.close()
+
+    def purge_expired(self) -> int:
+        db = SessionLocal()
+        try:
+            deleted = db.query(DiagnosisSession).filter(
+                DiagnosisSession.expires_at <= datetime.now(timezone.utc)
+            ).delete(synchronize_session=False)
+            db.commit()
+            return deleted
+        finally:
+            db.close()
+
+
+class RedisSessionStore:
+    """세션당 Redis 해시 1개 (필드 = question_id, 값 = JSON)"""
+
+    PREFIX = "uniflow:diagnosis:"
+
+    def __init__(self, url: str, ttl_seconds: int):
+        import redis
+
+        self.ttl_seconds = ttl_seconds
+        self._redis = redis.Redis.from_url(url, socket_timeout=1.0, socket_connect_timeout=1.0)
+
+    def save_answers(self, diagnosis_id: str, answers: Answers):
+        if not answers:
+            return
+        key = self.PREFIX + diagnosis_id
+        pipe = self._redis.pipeline()
+        pipe.hset(key, mapping={k: json.dumps(v, ensure_ascii=False) for k, v in answers.items()})
+        pipe.expire(key, self.ttl_seconds)
+        pipe.execute()
+
+    def get_answers(self, diagnosis_id: str) -> Answers:
+        data = self._redis.hgetall(self.PREFIX + diagnosis_id)
+        return {k.decode(): json.loads(v) for k, v in data.items()}
+
+    def delete(self, diagnosis_id: str):
+        self._redis.delete(self.PREFIX + diagnosis_id)
+
+    def purge_expired(self) -> int:
+        return 0  # 키 TTL로 자동 만료
+
+
+def _create_store():
+    backend = settings.diagnosis_session_store
+    ttl = settings.diagnosis_session_ttl_seconds
+    if backend == "redis":
+        if settings.redis_url and find_spec("redis") is not None:
+            return RedisSessionStore(settings.redis_url, ttl)
+        logger.warning("[Diagnosis] redis 저장소를 쓰려면 REDIS_URL과 redis 패키지가 필요합니다 — sql 저장소 사용")
+        return SqlSessionStore(ttl)
+    if backend == "memory":
+        return MemorySessionStore(ttl)
+    return SqlSessionStore(ttl)
+
+
+diagnosis_sessions = _create_store()
+
+
+def purge_expired_sessions():
+    """스케줄러 작업 진입점"""
+    deleted = diagnosis_sessions.purge_expired()
+    if deleted:
+        logger.info(f"[Diagnosis] 만료 세션 {deleted}건 삭제")
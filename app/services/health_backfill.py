@@ -0,0 +1,219 @@
+"""
+health_index 재채점 백필
+- SCORE_MAP / 문항 가중치가 바뀌었을 때 diagnosis_submissions(원본 답변)로 전체 VIP를 다시 채점
+- VIP id 순 keyset 청크로 스트리밍 (VIP별 최신 제출 1건), 청크마다
+  1) 답변 → diagnosis_scoring.score_batch()로 NumPy 일괄 채점
+  2) health_index INSERT ... ON CONFLICT (id) DO UPDATE (VIP별 기존 최신 행을 갱신, 없으면 새 행) +
+     RETURNING 결과로 vip_current_health upsert를 같은 문장(CTE)에서 실행
+     (UPDATE 트리거에만 의존하지 않고 프로젝션을 원본 행 id / created_at 기준으로 직접 맞춤)
+  3) commit → 중단돼도 처리한 청크까지는 반영
+
+사용법:
+    python -m app.services.health_backfill --chunk-size 1000
+    python -m app.services.health_backfill --weights weights.json --dry-run
+"""
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+import argparse
+import json
+import logging
+import time
+import uuid
+
+from sqlalchemy import func, or_, select
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.models import DiagnosisSubmission, HealthIndex, User, VipCurrentHealth
+from app.services.diagnosis_scoring import DiagnosisScorer, compile_questions
+from app.services.health_projection import HEALTH_FIELDS, upsert_current_health
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 1000
+
+
+@dataclass
+class BackfillStats:
+    vips: int = 0
+    inserted: int = 0
+    updated: int = 0
+    chunks: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def per_second(self) -> float:
+        return self.vips / self.elapsed if self.elapsed else 0.0
+
+
+def _latest_submissions(db: Session, after_vip_id: Optional[str], limit: int) -> List[Tuple[str, dict]]:
+    """after_vip_id 다음 VIP들의 최신 제출 답변 (vip_id 순)"""
+    ranked = db.query(
+        DiagnosisSubmission.vip_id,
+        DiagnosisSubmission.answers,
+        func.row_number().over(
+            partition_by=DiagnosisSubmission.vip_id,
+            order_by=DiagnosisSubmission.submitted_at.desc(),
+        ).label("rn"),
+    )
+    if after_vip_id is not None:
+        ranked = ranked.filter(DiagnosisSubmission.vip_id > after_vip_id)
+    ranked = ranked.subquery()
+    return (
+        db.query(ranked.c.vip_id, ranked.c.answers)
+        .filter(ranked.c.rn == 1)
+        .order_by(ranked.c.vip_id)
+        .limit(limit)
+        .all()
+    )
+
+
+def _latest_health_ids(db: Session, vip_ids: List[str]) -> Dict[str, str]:
+    """VIP별 최신 health_index id (재채점 시 이 행을 갱신)"""
+    ranked = db.query(
+        HealthIndex.vip_id,
+        HealthIndex.id,
+        func.row_number().over(
+            partition_by=HealthIndex.vip_id,
+            order_by=HealthIndex.created_at.desc(),
+        ).label("rn"),
+    ).filter(HealthIndex.vip_id.in_(vip_ids)).subquery()
+    return {vip_id: hid for vip_id, hid in db.query(ranked.c.vip_id, ranked.c.id).filter(ranked.c.rn == 1)}
+
+
+def _upsert_health_rows(db: Session, rows: List[dict]):
+    """health_index + vip_current_health 청크 upsert (PostgreSQL: 문장 1번)"""
+    if db.bind.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+
+        stmt = insert(HealthIndex).values(rows)
+        upserted = stmt.on_conflict_do_update(
+            index_elements=[HealthIndex.id],
+            set_={f: stmt.excluded[f] for f in HEALTH_FIELDS},
+        ).returning(
+            HealthIndex.id, HealthIndex.vip_id, HealthIndex.agent_id, HealthIndex.created_at,
+            *(getattr(HealthIndex, f) for f in HEALTH_FIELDS),
+        ).cte("upserted")
+
+        columns = ["vip_id", "agent_id", "health_index_id", "created_at", "updated_at", *HEALTH_FIELDS]
+        projection = insert(VipCurrentHealth).from_select(columns, select(
+            upserted.c.vip_id, upserted.c.agent_id, upserted.c.id, upserted.c.created_at, func.now(),
+            *(upserted.c[f] for f in HEALTH_FIELDS),
+        ))
+        excluded = projection.excluded
+        db.execute(projection.on_conflict_do_update(
+            index_elements=[VipCurrentHealth.vip_id],
+            set_={
+                **{f: excluded[f] for f in HEALTH_FIELDS},
+                "agent_id": func.coalesce(excluded.agent_id, VipCurrentHealth.agent_id),
+                "health_index_id": excluded.health_index_id,
+                "created_at": excluded.created_at,
+                "updated_at": excluded.updated_at,
+            },
+            # 백필 도중 들어온 더 최신 진단은 덮지 않음 (원본 id가 없는 기존 프로젝션은 갱신 — 0003 트리거와 동일)
+            where=or_(
+                VipCurrentHealth.created_at <= excluded.created_at,
+                VipCurrentHealth.health_index_id.is_(None),
+                VipCurrentHealth.health_index_id == excluded.health_index_id,
+            ),
+        ))
+        return
+
+    # 그 외 DB(로컬 SQLite 등)는 merge 후 저장된 행 기준으로 프로젝션 직접 갱신
+    merged = [db.merge(HealthIndex(**row)) for row in rows]
+    db.flush()
+    for row, health in zip(rows, merged):
+        upsert_current_health(
+            db, row["vip_id"], row, agent_id=row["agent_id"],
+            health_index_id=health.id, measured_at=health.created_at,
+        )
+
+
+def rescore_chunk(db: Session, scorer: DiagnosisScorer, submissions: List[Tuple[str, dict]], dry_run: bool = False) -> Tuple[int, int]:
+    """제출 답변 청크 재채점 + health_index 일괄 upsert → (inserted, updated)"""
+    vip_ids = [vip_id for vip_id, _ in submissions]
+    scores = scorer.score_batch([answers or {} for _, answers in submissions])
+    existing = _latest_health_ids(db, vip_ids)
+    agents = dict(db.query(User.id, User.created_by).filter(User.id.in_(vip_ids)))
+
+    rows = []
+    for vip_id, score in zip(vip_ids, scores):
+        rows.append({
+            "id": existing.get(vip_id) or str(uuid.uuid4()),
+            "vip_id": vip_id,
+            "agent_id": agents.get(vip_id),
+            **score.as_columns(),
+        })
+    if rows and not dry_run:
+        _upsert_health_rows(db, rows)
+    updated = sum(1 for vip_id in vip_ids if vip_id in existing)
+    return len(rows) - updated, updated
+
+
+def run_backfill(
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    weights: Optional[Dict[str, float]] = None,
+    dry_run: bool = False,
+) -> BackfillStats:
+    scorer = compile_questions(weights=weights)
+    stats = BackfillStats()
+    started = time.monotonic()
+    last_vip_id: Optional[str] = None
+
+    db = SessionLocal()
+    try:
+        while True:
+            submissions = _latest_submissions(db, last_vip_id, chunk_size)
+            if not submissions:
+                break
+            inserted, updated = rescore_chunk(db, scorer, submissions, dry_run)
+            if dry_run:
+                db.rollback()
+            else:
+                db.commit()
+
+            last_vip_id = submissions[-1][0]
+            stats.vips += len(submissions)
+            stats.inserted += inserted
+            stats.updated += updated
+            stats.chunks += 1
+            stats.elapsed = time.monotonic() - started
+            logger.info(
+                f"[Backfill] 청크 {stats.chunks}: 누적 {stats.vips}명 "
+                f"({stats.per_second:,.0f}명/초, 마지막 {last_vip_id})"
+            )
+            if len(submissions) < chunk_size:
+                break
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+    stats.elapsed = time.monotonic() - started
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="diagnosis_submissions 기준 health_index 재채점 백필")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--weights", default=None, help="문항 가중치 JSON 파일 ({question_id: weight})")
+    parser.add_argument("--dry-run", action="store_true", help="채점만 하고 저장하지 않음")
+    args = parser.parse_args()
+
+    weights = None
+    if args.weights:
+        with open(args.weights, encoding="utf-8") as f:
+            weights = json.load(f)
+
+    logging.basicConfig(level=logging.INFO)
+    stats = run_backfill(args.chunk_size, weights, args.dry_run)
+    logger.info(
+        f"[Backfill] 완료{' (dry-run)' if args.dry_run else ''}: VIP {stats.vips}명 / "
+        f"갱신 {stats.updated} / 신규 {stats.inserted} / 청크 {stats.chunks} / "
+        f"{stats.elapsed:.1f}초 ({stats.per_second:,.0f}명/초)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+VIP 최신 건강 지표 프로젝션 (vip_current_health)
+- health_index를 created_at DESC LIMIT 1로 매번 조회하지 않고 VIP당 1행 테이블에서 읽음
+- 진단 완료(/diagnosis/complete) 시 health_index 저장에 성공하면 upsert_current_health()로 동기화
+  (PostgreSQL에서는 health_index 트리거로도 동기화됨 — alembic 0003 참고)
+- created_at은 원본 health_index 행의 측정 시각 (갱신 시각이 아님), health_index_id는 원본 행 id
+- get_current_health_map()으로 여러 VIP를 쿼리 1번에 조회
+"""
+from typing import Dict, Iterable, Optional
+from datetime import datetime
+
+from sqlalchemy.orm import Session
+
+from app.models import VipCurrentHealth
+
+# 6대 지표 + 종합 점수 컬럼
+HEALTH_FIELDS = (
+    "asset_stability",
+    "time_independence",
+    "physical_condition",
+    "emotional_balance",
+    "network_power",
+    "system_leverage",
+    "overall_score",
+)
+DEFAULT_SCORE = 50
+
+
+def upsert_current_health(
+    db: Session,
+    vip_id: str,
+    scores: Dict[str, int],
+    agent_id: Optional[str] = None,
+    health_index_id: Optional[str] = None,
+    measured_at: Optional[datetime] = None,
+):
+    """
+    최신 지표 프로젝션 갱신 (commit은 호출자가 수행)
+    - 방금 저장한 health_index 행 기준으로 호출 (health_index_id / measured_at = 그 행의 id / created_at)
+    """
+    now = datetime.now()
+    measured_at = measured_at or now
+    values = {f: scores.get(f, DEFAULT_SCORE) for f in HEALTH_FIELDS}
+
+    if db.bind.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+
+        stmt = insert(VipCurrentHealth).values(
+            vip_id=vip_id, agent_id=agent_id, health_index_id=health_index_id,
+            created_at=measured_at, updated_at=now, **values
+        )
+        update_cols = {**values, "health_index_id": health_index_id, "created_at": measured_at, "updated_at": now}
+        if agent_id:
+            update_cols["agent_id"] = agent_id
+        db.execute(stmt.on_conflict_do_update(index_elements=[VipCurrentHealth.vip_id], set_=update_cols))
+        return
+
+    # 그 외 DB(로컬 SQLite 등)는 merge로 대체
+    current = db.get(VipCurrentHealth, vip_id) or VipCurrentHealth(vip_id=vip_id)
+    for field, value in values.items():
+        setattr(current, field, value)
+    if agent_id:
+        current.agent_id = agent_id
+    current.health_index_id = health_index_id
+    current.created_at = measured_at
+    current.updated_at = now
+    db.merge(current)
+
+
+def get_current_health(db: Session, vip_id: str) -> Optional[VipCurrentHealth]:
+    """단일 VIP 최신 지표 (PK 조회)"""
+    return db.get(VipCurrentHealth, vip_id)
+
+
+def get_current_health_map(db: Session, vip_ids: Iterable[str]) -> Dict[str, VipCurrentHealth]:
+    """여러 VIP 최신 지표를 쿼리 1번으로 조회 → {vip_id: VipCurrentHealth}"""
+    ids = list(set(vip_ids))
+    if not ids:
+        return {}
+    rows = db.query(VipCurrentHealth).filter(VipCurrentHealth.vip_id.in_(ids)).all()
+    return {r.vip_id: r for r in rows}
+
@@ -0,0 +1,81 @@
+"""
+앱 전역 HTTP 클라이언트 레지스트리
+- 외부 서비스(토스 / Supabase REST / 알리고)별 클라이언트를 앱 수명 동안 재사용
+  → 요청마다 TCP/TLS 핸드셰이크를 새로 하지 않고 keep-alive 커넥션 풀 사용
+- 서비스별 클라이언트 = 호스트별 커넥션 한도 / 타임아웃
+- h2 패키지가 설치돼 있으면 HTTP/2 사용 (ALPN 협상, 미지원 서버는 HTTP/1.1)
+- FastAPI lifespan에서 startup() / shutdown() 호출
+"""
+from importlib.util import find_spec
+from typing import Dict
+import logging
+import threading
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+HTTP2_AVAILABLE = find_spec("h2") is not None
+
+# 서비스별 커넥션 한도 / 타임아웃(초)
+CLIENT_CONFIGS: Dict[str, dict] = {
+    "toss":     {"max_connections": 20, "timeout": 15.0},
+    "supabase": {"max_connections": 20, "timeout": 10.0},
+    "aligo":    {"max_connections": 10, "timeout": 10.0},
+    "default":  {"max_connections": 10, "timeout": 10.0},
+}
+
+
+def _client_options(name: str) -> dict:
+    config = CLIENT_CONFIGS.get(name, CLIENT_CONFIGS["default"])
+    return {
+        "timeout": httpx.Timeout(config["timeout"], connect=5.0),
+        "limits": httpx.Limits(
+            max_connections=config["max_connections"],
+            max_keepalive_connections=config["max_connections"],
+            keepalive_expiry=60.0,
+        ),
+        "http2": HTTP2_AVAILABLE,
+    }
+
+
+class HttpClients:
+    """
+    이름별 AsyncClient(이벤트 루프용) / Client(동기 코드용) 보관
+    - lifespan 밖(스크립트 등)에서 호출돼도 첫 사용 시 생성
+    """
+
+    def __init__(self):
+        self._async: Dict[str, httpx.AsyncClient] = {}
+        self._sync: Dict[str, httpx.Client] = {}
+        self._lock = threading.Lock()
+
+    def get_async(self, name: str = "default") -> httpx.AsyncClient:
+        client = self._async.get(name)
+        if client is None or client.is_closed:
+            client = self._async[name] = httpx.AsyncClient(**_client_options(name))
+        return client
+
+    def get_sync(self, name: str = "default") -> httpx.Client:
+        with self._lock:
+            client = self._sync.get(name)
+            if client is None or client.is_closed:
+                client = self._sync[name] = httpx.Client(**_client_options(name))
+            return client
+
+    async def startup(self):
+        for name in CLIENT_CONFIGS:
+            self.get_async(name)
+        logger.info(f"[HTTP] 클라이언트 풀 생성 (HTTP/2: {HTTP2_AVAILABLE})")
+
+    async def shutdown(self):
+        for client in self._async.values():
+            await client.aclose()
+        with self._lock:
+            for client in self._sync.values():
+                client.close()
+        self._async.clear()
+        self._sync.clear()
+
+
+http_clients = HttpClients()
@@ -3,14 +3,26 @@
 - 알리고 가입: https://www.aligo.in
 - 카카오 알림톡 신청 후 발신프로필키(senderkey) 발급 필요
 """
-import requests
-from typing import Dict, Any
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Any, List, Optional
+import re
+import threading
+import uuid
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
 from app.config import get_settings
+from app.database import SessionLocal, engine
+from app.models import KakaoOutbox
+from app.services.http_clients import http_clients
 
 settings = get_settings()
 
 # 알리고 API 엔드포인트
 ALIGO_URL = "https://kakaoapi.aligo.in/akv10/alimtalk/send/"
+ALIGO_HISTORY_DETAIL_URL = "https://kakaoapi.aligo.in/akv10/history/detail/"  # mid별 수신자 결과
 
 
 class KakaoSender:
@@ -51,7 +63,7 @@ class KakaoSender:
         }
 
         try:
-            response = requests.post(ALIGO_URL, data=payload, timeout=10)
+            response = http_clients.get_sync("aligo").post(ALIGO_URL, data=payload)
             data = response.json()
             success = data.get("code") == 0
             if not success:
@@ -85,9 +97,324 @@ class KakaoSender:
         }
 
         try:
-            response = requests.post(ALIGO_URL, data=payload, timeout=10)
+            response = http_clients.get_sync("aligo").post(ALIGO_URL, data=payload)
             data = response.json()
             return data.get("code") == 0
         except Exception as e:
             print(f"초대 알림톡 오류: {e}")
             return False
+
+
+# ─── 대량 발송 (outbox + 알리고 다중 수신자 배치) ─────────────────
+# 만료 안내처럼 수천 건이 한꺼번에 나가는 알림톡은 kakao_outbox에 적재하고
+# KakaoDispatcher가 템플릿 코드별로 묶어 receiver_1..N(최대 500) 한 번의 요청으로 발송
+# - 알리고는 요청 단위 성공/실패 건수(scnt/fcnt)만 응답 → fcnt > 0이면 mid로 이력 상세를 조회해 수신자별 판정
+#   성공 확인 → sent / 실패 → pending(백오프 후 개별 재발송) / 결과 대기 → accepted(확인 주기마다 재조회)
+# - 재시도(attempts > 0)는 배치에 섞지 않고 개별 발송
+
+ALIGO_MAX_RECEIVERS = 500
+ALIGO_DELIVERED = "0"  # 이력 상세 rslt: "0" 성공, 빈 값 결과 대기, 그 외 실패 코드
+KAKAO_MAX_ATTEMPTS = 3
+RETRY_BASE_SECONDS = 60  # 재시도 대기: 60s, 120s ...
+SEND_LEASE = timedelta(minutes=5)  # 발송 중(sending) 선점 유지 시간 — 프로세스가 죽으면 이후 재시도
+CONFIRM_INTERVAL = timedelta(minutes=1)  # accepted 결과 재조회 주기
+CONFIRM_TIMEOUT = timedelta(minutes=30)  # 접수 후 이 시간이 지나도 결과가 없으면 미발송으로 보고 재발송
+PHONE_PATTERN = re.compile(r"^01[016789]\d{7,8}$")
+
+
+def normalize_phone(phone: str) -> str:
+    """010-1234-5678 → 01012345678"""
+    return re.sub(r"[^0-9]", "", phone or "")
+
+
+def enqueue_alimtalk(
+    db: Session,
+    tpl_code: str,
+    phone: str,
+    message: str,
+    subject: str = "UNIFLOW",
+    fail_sms: bool = True,
+) -> KakaoOutbox:
+    """알림톡 발송 대기열 적재 (commit은 호출자가 수행)"""
+    clean_phone = normalize_phone(phone)
+    row = KakaoOutbox(
+        id=str(uuid.uuid4()),
+        tpl_code=tpl_code,
+        phone=clean_phone,
+        subject=subject,
+        message=message,
+        fail_sms=fail_sms,
+        status="pending",
+        attempts=0,
+        next_attempt_at=datetime.now(timezone.utc),
+    )
+    # 형식이 잘못된 번호는 배치에 넣지 않음 (배치 전체 거부 방지)
+    if not PHONE_PATTERN.match(clean_phone):
+        row.status, row.error = "failed", "invalid phone number"
+    db.add(row)
+    return row
+
+
+def _aligo_auth() -> Dict[str, str]:
+    return {
+        "apikey": settings.kakao_api_key,
+        "userid": settings.kakao_api_secret,
+        "senderkey": settings.kakao_sender_key,
+        "sender": settings.kakao_sender_number,
+    }
+
+
+def send_alimtalk_batch(tpl_code: str, messages: List[Dict[str, str]], fail_sms: bool = True) -> Dict[str, Any]:
+    """
+    같은 템플릿 메시지를 한 번의 알리고 요청으로 발송 (receiver_1..N)
+    messages: [{"phone", "subject", "message"}, ...] (최대 ALIGO_MAX_RECEIVERS)
+    """
+    payload: Dict[str, Any] = {**_aligo_auth(), "tpl_code": tpl_code, "failover": "Y" if fail_sms else "N"}
+    for i, m in enumerate(messages, start=1):
+        payload[f"receiver_{i}"] = m["phone"]
+        payload[f"subject_{i}"] = m["subject"]
+        payload[f"message_{i}"] = m["message"]
+        if fail_sms:
+            payload[f"fsubject_{i}"] = m["subject"]
+            payload[f"fmessage_{i}"] = m["message"]
+    response = http_clients.get_sync("aligo").post(ALIGO_URL, data=payload)
+    return response.json()
+
+
+def fetch_batch_results(mid: str) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    알리고 이력 상세(mid)의 수신자별 결과 → {phone: [{"delivered": True/False/None, "message"}, ...]}
+    - delivered None: 아직 결과 미수신 / 같은 번호가 배치에 여러 번 있으면 순서대로 여러 건
+    """
+    auth = _aligo_auth()
+    results: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+    page = 1
+    while True:
+        response = http_clients.get_sync("aligo").post(ALIGO_HISTORY_DETAIL_URL, data={
+            "apikey": auth["apikey"], "userid": auth["userid"], "mid": mid, "page": page, "limit": ALIGO_MAX_RECEIVERS,
+        })
+        data = response.json()
+        if data.get("code") != 0:
+            raise RuntimeError(f"history/detail 조회 실패: {data.get('message')}")
+        for item in data.get("list") or []:
+            rslt = str(item.get("rslt") or "").strip()
+            results[normalize_phone(item.get("phone"))].append({
+                "delivered": (rslt == ALIGO_DELIVERED) if rslt else None,
+                "message": item.get("rslt_message") or rslt,
+            })
+        if page >= int(data.get("totalPage") or 1):
+            return results
+        page += 1
+
+
+class KakaoDispatcher:
+    """kakao_outbox 폴링 → 템플릿별 배치 발송 → 수신자별 결과 기록 (백그라운드 스레드)"""
+
+    def __init__(self, poll_seconds: float = 2.0, claim_size: int = ALIGO_MAX_RECEIVERS * 4):
+        self.poll_seconds = poll_seconds
+        self.claim_size = claim_size
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _claim(self, statuses=("pending", "sending")) -> List[Dict[str, Any]]:
+        """
+        발송 / 결과 확인 대상 선점 (PostgreSQL: SKIP LOCKED로 인스턴스 간 중복 처리 방지)
+        - pending / sending → sending으로 바꾸고 SEND_LEASE 동안 선점
+        - accepted(결과 확인) → 상태는 그대로 두고 SEND_LEASE 동안 선점
+        """
+        db = SessionLocal()
+        try:
+            now = datetime.now(timezone.utc)
+            query = db.query(KakaoOutbox).filter(
+                KakaoOutbox.status.in_(statuses),
+                KakaoOutbox.next_attempt_at <= now,
+            ).order_by(KakaoOutbox.created_at).limit(self.claim_size)
+            if engine.dialect.name == "postgresql":
+                query = query.with_for_update(skip_locked=True)
+
+            rows = []
+            for row in query.all():
+                rows.append({
+                    "id": row.id, "tpl_code": row.tpl_code, "phone": row.phone, "subject": row.subject,
+                    "message": row.message, "fail_sms": bool(row.fail_sms), "attempts": row.attempts or 0,
+                    "batch_mid": row.batch_mid, "sent_at": row.sent_at,
+                })
+                if row.status != "accepted":
+                    row.status = "sending"
+                row.next_attempt_at = now + SEND_LEASE
+            db.commit()
+            return rows
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def _record(self, results: List[Dict[str, Any]]):
+        """
+        수신자별 결과 반영: {"id", "attempts", "ok", "accepted", "error", "mid"}
+        - sent_at: 알리고 접수 시각 (accepted → sent로 확인돼도 접수 시각 유지, 재발송 대상은 초기화)
+        """
+        db = SessionLocal()
+        try:
+            now = datetime.now(timezone.utc)
+            for r in results:
+                if r["ok"]:
+                    values = {
+                        "status": "sent", "sent_at": func.coalesce(KakaoOutbox.sent_at, now),
+                        "batch_mid": r.get("mid"), "error": None,
+                    }
+                elif r.get("accepted"):
+                    values = {
+                        "status": "accepted", "sent_at": func.coalesce(KakaoOutbox.sent_at, now),
+                        "batch_mid": r.get("mid"), "next_attempt_at": now + CONFIRM_INTERVAL,
+                    }
+                elif r["attempts"] >= KAKAO_MAX_ATTEMPTS:
+                    values = {"status": "failed", "sent_at": None, "error": r.get("error")}
+                else:
+                    values = {
+                        "status": "pending",
+                        "sent_at": None,
+                        "error": r.get("error"),
+                        "next_attempt_at": now + timedelta(seconds=RETRY_BASE_SECONDS * 2 ** (r["attempts"] - 1)),
+                    }
+                values["attempts"] = r["attempts"]
+                db.query(KakaoOutbox).filter(KakaoOutbox.id == r["id"]).update(values, synchronize_session=False)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            print(f"[알림톡 대량] 결과 기록 실패: {e}")
+        finally:
+            db.close()
+
+    def _send_single(self, row: Dict[str, Any]) -> Dict[str, Any]:
+        """개별 발송 (배치 요청 거부 / 배치 일부 실패 후 재시도)"""
+        result = {"id": row["id"], "attempts": row["attempts"] + 1, "ok": False}
+        try:
+            data = send_alimtalk_batch(row["tpl_code"], [row], row["fail_sms"])
+            info = data.get("info") or {}
+            result["ok"] = data.get("code") == 0 and not info.get("fcnt")
+            result["mid"] = info.get("mid")
+            if not result["ok"]:
+                result["error"] = data.get("message") if data.get("code") != 0 else "rejected by aligo (fcnt=1)"
+        except Exception as e:
+            result["error"] = str(e)
+        return result
+
+    def _resolve_batch(self, mid: Optional[str], rows: List[Dict[str, Any]], attempts: int, expired: bool = False) -> List[Dict[str, Any]]:
+        """
+        배치 mid의 수신자별 결과 판정 (attempts: 각 행 attempts에 더할 값 — 발송 직후 1, 재조회 0)
+        - expired: 접수 후 CONFIRM_TIMEOUT이 지나도 결과가 없는 수신자는 실패로 보고 재발송
+        - 이력 조회 자체가 실패하면 전부 accepted로 두고 다음 주기에 다시 조회
+        """
+        delivery = None
+        if mid:
+            try:
+                delivery = fetch_batch_results(mid)
+            except Exception as e:
+                print(f"[알림톡 대량] 결과 조회 실패 (mid={mid}): {e}")
+
+        results = []
+        for row in rows:
+            result = {"id": row["id"], "attempts": row["attempts"] + attempts, "ok": False, "mid": mid}
+            outcomes = delivery.get(row["phone"]) if delivery is not None else None
+            outcome = outcomes.pop(0) if outcomes else {"delivered": None, "message": None}
+            if outcome["delivered"]:
+                result["ok"] = True
+            elif outcome["delivered"] is False:
+                result["error"] = outcome["message"] or "delivery failed"
+            elif expired and delivery is not None:
+                result["error"] = "delivery result not found"
+            else:
+                result["accepted"] = True
+            results.append(result)
+        return results
+
+    def _send_group(self, tpl_code: str, fail_sms: bool, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        try:
+            data = send_alimtalk_batch(tpl_code, rows, fail_sms)
+        except Exception as e:
+            data = {"code": -1, "message": str(e)}
+
+        if data.get("code") != 0:
+            # 배치 요청 자체가 거부됨 → 어떤 수신자 때문인지 알 수 없으므로 개별 발송으로 대체
+            print(f"[알림톡 대량] 배치 실패 ({tpl_code}, {len(rows)}건) → 개별 발송: {data.get('message')}")
+            return [self._send_single(row) for row in rows]
+
+        info = data.get("info") or {}
+        if not info.get("fcnt"):
+            return [{"id": row["id"], "attempts": row["attempts"] + 1, "ok": True, "mid": info.get("mid")} for row in rows]
+
+        # 일부 실패 → 알리고 이력 상세로 수신자별 판정
+        print(f"[알림톡 대량] 배치 일부 실패 ({tpl_code}, fcnt={info.get('fcnt')}/{len(rows)}) → 수신자별 결과 조회")
+        return self._resolve_batch(info.get("mid"), rows, attempts=1)
+
+    def _confirm_accepted(self) -> List[Dict[str, Any]]:
+        """결과 대기(accepted) 수신자 재조회 (배치 mid별 이력 상세 1번)"""
+        batches: Dict[Optional[str], List[Dict[str, Any]]] = defaultdict(list)
+        for row in self._claim(statuses=("accepted",)):
+            batches[row["batch_mid"]].append(row)
+
+        now = datetime.now(timezone.utc)
+        results: List[Dict[str, Any]] = []
+        for mid, rows in batches.items():
+            accepted_at = min((r["sent_at"] for r in rows if r["sent_at"]), default=None)
+            if accepted_at is not None and accepted_at.tzinfo is None:
+                accepted_at = accepted_at.replace(tzinfo=timezone.utc)
+            expired = mid is None or accepted_at is None or now - accepted_at > CONFIRM_TIMEOUT
+            results.extend(self._resolve_batch(mid, rows, attempts=0, expired=expired))
+        return results
+
+    def process_once(self) -> int:
+        """결과 대기 건 확인 + 대기 중인 알림톡 한 묶음 발송. 처리 건수 반환"""
+        if not settings.kakao_api_key or not settings.kakao_api_secret or not settings.kakao_sender_key:
+            return 0
+        results = self._confirm_accepted()
+        confirmed = sum(1 for r in results if not r.get("accepted"))
+
+        rows = self._claim()
+        groups: Dict[tuple, List[Dict[str, Any]]] = defaultdict(list)
+        for row in rows:
+            groups[(row["tpl_code"], row["fail_sms"])].append(row)
+
+        for (tpl_code, fail_sms), group in groups.items():
+            # 재시도 건(배치 거부 / 일부 실패 / 결과 미확인)은 개별 발송, 첫 발송만 배치
+            results.extend(self._send_single(row) for row in group if row["attempts"] > 0)
+            first = [row for row in group if row["attempts"] == 0]
+            for i in range(0, len(first), ALIGO_MAX_RECEIVERS):
+                results.extend(self._send_group(tpl_code, fail_sms, first[i:i + ALIGO_MAX_RECEIVERS]))
+        if results:
+            self._record(results)
+        return len(rows) + confirmed
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                sent = self.process_once()
+            except Exception as e:
+                print(f"[알림톡 대량] 발송기 오류: {e}")
+                sent = 0
+            if sent:
+                continue
+            self._wake.wait(self.poll_seconds)
+            self._wake.clear()
+
+    def wake(self):
+        self._wake.set()
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="kakao-dispatcher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout=30)
+
+
+kakao_dispatcher = KakaoDispatcher()
@@ -0,0 +1,225 @@
+"""
+관리자 대시보드 KPI 롤업 (daily_metrics)
+- (일자, 지표, 차원) 1행 = 값 1개. KPI API는 users를 스캔하지 않고 몇 행만 읽음
+- 일별 발생 지표(가입 / 퀘스트 완료 / 출금 신청): 이벤트 시점에 record_event()로 즉시 증가
+  + 주기 작업이 원본 테이블 기준으로 다시 계산해 보정 (훅이 빠진 경로도 반영)
+- 현황 스냅샷 지표(역할별 회원 수 / 구독 현황 / 예상 매출 등): 주기 작업이 오늘 날짜 행으로 갱신
+- refresh_daily_metrics()는 지표별 GROUP BY 쿼리 몇 번으로 끝남 (스케줄러 5분 간격)
+"""
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+import logging
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.models import AgentApplication, DailyMetric, Quest, SolutionRequest, User, WithdrawalRequest
+from app.services.subscription import TIER_PRICE_MAP
+from app.services.cache import response_cache, ADMIN_KPI_TAG
+
+logger = logging.getLogger(__name__)
+
+# 일별 발생 지표 (해당 일자에 일어난 건수 / 합계)
+SIGNUPS             = "signups"              # 차원: role
+QUESTS_COMPLETED    = "quests_completed"
+WITHDRAWAL_REQUESTS = "withdrawal_requests"
+WITHDRAWAL_AMOUNT   = "withdrawal_amount"
+
+# 현황 스냅샷 지표 (집계 시점의 전체 값)
+USERS_TOTAL          = "users_total"           # 차원: role
+AGENTS_BY_STATUS     = "agents_by_status"      # 차원: subscription_status
+ACTIVE_SUBSCRIPTIONS = "active_subscriptions"  # 차원: tier
+EXPECTED_REVENUE     = "expected_revenue"      # 월 환산 예상 매출 (활성 구독 등급별 월 요금 합계)
+QUESTS_BY_STATUS     = "quests_by_status"      # 차원: status
+PENDING_ITEMS        = "pending_items"         # 차원: agent_application / solution_request
+ACTIVE_VIPS          = "active_vips"           # 집계일 포함 최근 ACTIVE_VIP_DAYS일 안에 퀘스트를 완료한 VIP 수
+
+ACTIVE_VIP_DAYS = 30
+
+LEGACY_MONTHLY_PRICE = {"monthly": 50000, "yearly": 500000 // 12}
+
+Rows = Dict[Tuple[str, str], int]  # (metric, dimension) → value
+
+
+def _day_range(day: date) -> Tuple[datetime, datetime]:
+    start = datetime.combine(day, time.min)
+    return start, start + timedelta(days=1)
+
+
+def _monthly_price(tier: Optional[str]) -> int:
+    """등급별 월 환산 요금 (요금제 등급은 TIER_PRICE_MAP, 기존 monthly/yearly 등급은 ₩50,000 / ₩500,000 ÷ 12)"""
+    if tier in TIER_PRICE_MAP:
+        return TIER_PRICE_MAP[tier]["monthly"]
+    return LEGACY_MONTHLY_PRICE.get(tier, 0)
+
+
+def _grouped(rows: Iterable, metric: str, out: Rows):
+    for dimension, value in rows:
+        out[(metric, dimension or "")] = int(value or 0)
+
+
+# ── 집계 ──────────────────────────────────────────────────────
+
+def _daily_event_rows(db: Session, day: date) -> Rows:
+    start, end = _day_range(day)
+    out: Rows = {}
+    _grouped(
+        db.query(User.role, func.count(User.id))
+        .filter(User.created_at >= start, User.created_at < end)
+        .group_by(User.role),
+        SIGNUPS, out,
+    )
+    out[(QUESTS_COMPLETED, "")] = db.query(func.count(Quest.id)).filter(
+        Quest.completed_at >= start, Quest.completed_at < end
+    ).scalar() or 0
+    count, amount = db.query(func.count(WithdrawalRequest.id), func.sum(WithdrawalRequest.amount)).filter(
+        WithdrawalRequest.created_at >= start, WithdrawalRequest.created_at < end
+    ).one()
+    out[(WITHDRAWAL_REQUESTS, "")] = count or 0
+    out[(WITHDRAWAL_AMOUNT, "")] = int(amount or 0)
+    return out
+
+
+def _snapshot_rows(db: Session, today: date) -> Rows:
+    out: Rows = {}
+    _grouped(db.query(User.role, func.count(User.id)).group_by(User.role), USERS_TOTAL, out)
+    _grouped(
+        db.query(User.subscription_status, func.count(User.id))
+        .filter(User.role == "agent")
+        .group_by(User.subscription_status),
+        AGENTS_BY_STATUS, out,
+    )
+
+    active = db.query(User.tier, func.count(User.id)).filter(
+        User.role == "agent", User.subscription_status == "active"
+    ).group_by(User.tier).all()
+    _grouped(active, ACTIVE_SUBSCRIPTIONS, out)
+    out[(EXPECTED_REVENUE, "")] = sum(_monthly_price(tier) * count for tier, count in active)
+
+    _grouped(db.query(Quest.status, func.count(Quest.id)).group_by(Quest.status), QUESTS_BY_STATUS, out)
+    out[(ACTIVE_VIPS, "")] = db.query(func.count(func.distinct(Quest.vip_id))).filter(
+        Quest.completed_at >= _day_range(today - timedelta(days=ACTIVE_VIP_DAYS - 1))[0],
+        Quest.completed_at < _day_range(today)[1],
+    ).scalar() or 0
+    out[(PENDING_ITEMS, "agent_application")] = db.query(func.count(AgentApplication.id)).filter(
+        AgentApplication.status == "pending"
+    ).scalar() or 0
+    out[(PENDING_ITEMS, "solution_request")] = db.query(func.count(SolutionRequest.id)).filter(
+        SolutionRequest.status == "pending"
+    ).scalar() or 0
+    return out
+
+
+def _replace_rows(db: Session, day: date, metrics: Iterable[str], rows: Rows):
+    """day의 해당 지표 행을 rows로 교체 (사라진 차원은 삭제)"""
+    db.query(DailyMetric).filter(
+        DailyMetric.metric_date == day, DailyMetric.metric.in_(list(metrics))
+    ).delete(synchronize_session=False)
+    db.add_all(
+        DailyMetric(metric_date=day, metric=metric, dimension=dimension, value=value)
+        for (metric, dimension), value in rows.items()
+    )
+
+
+EVENT_METRICS = (SIGNUPS, QUESTS_COMPLETED, WITHDRAWAL_REQUESTS, WITHDRAWAL_AMOUNT)
+SNAPSHOT_METRICS = (
+    USERS_TOTAL, AGENTS_BY_STATUS, ACTIVE_SUBSCRIPTIONS, EXPECTED_REVENUE, QUESTS_BY_STATUS, PENDING_ITEMS, ACTIVE_VIPS,
+)
+
+
+def refresh_daily_metrics(db: Session, today: Optional[date] = None):
+    """오늘(+자정 직전 이벤트 보정용 어제) 발생 지표와 오늘 스냅샷을 다시 계산 (commit은 호출자가 수행)"""
+    today = today or datetime.now().date()
+    for day in (today - timedelta(days=1), today):
+        _replace_rows(db, day, EVENT_METRICS, _daily_event_rows(db, day))
+    _replace_rows(db, today, SNAPSHOT_METRICS, _snapshot_rows(db, today))
+
+
+def run_metrics_rollup():
+    """스케줄러 작업 진입점"""
+    db = SessionLocal()
+    try:
+        refresh_daily_metrics(db)
+        db.commit()
+        response_cache.invalidate(ADMIN_KPI_TAG)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+# ── 이벤트 훅 ─────────────────────────────────────────────────
+
+def record_event(db: Session, metric: str, dimension: Optional[str] = "", amount: int = 1, day: Optional[date] = None):
+    """
+    일별 발생 지표를 원자적으로 증가 (호출자 트랜잭션에 포함, commit은 호출자가 수행)
+    - 다음 롤업 작업이 원본 기준으로 다시 계산하므로 훅은 그 사이의 실시간성만 담당
+    """
+    values = {"metric_date": day or datetime.now().date(), "metric": metric, "dimension": dimension or "", "value": amount}
+    dialect = db.bind.dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+
+        stmt = insert(DailyMetric).values(**values)
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=[DailyMetric.metric_date, DailyMetric.metric, DailyMetric.dimension],
+            set_={"value": DailyMetric.value + stmt.excluded.value, "updated_at": func.now()},
+        ))
+        return
+
+    updated = db.query(DailyMetric).filter(
+        DailyMetric.metric_date == values["metric_date"],
+        DailyMetric.metric == metric,
+        DailyMetric.dimension == values["dimension"],
+    ).update({DailyMetric.value: DailyMetric.value + amount}, synchronize_session=False)
+    if not updated:
+        db.add(DailyMetric(**values))
+
+
+# ── 조회 ──────────────────────────────────────────────────────
+
+def latest_snapshot(db: Session, on_or_before: Optional[date] = None) -> Dict[str, Dict[str, int]]:
+    """가장 최근(또는 지정 일자 이전) 스냅샷 → {metric: {dimension: value}}"""
+    latest = db.query(func.max(DailyMetric.metric_date)).filter(DailyMetric.metric == USERS_TOTAL)
+    if on_or_before is not None:
+        latest = latest.filter(DailyMetric.metric_date <= on_or_before)
+    snapshot: Dict[str, Dict[str, int]] = defaultdict(dict)
+    rows = db.query(DailyMetric.metric, DailyMetric.dimension, DailyMetric.value).filter(
+        DailyMetric.metric_date == latest.scalar_subquery(),
+        DailyMetric.metric.in_(SNAPSHOT_METRICS),
+    )
+    for metric, dimension, value in rows:
+        snapshot[metric][dimension] = int(value)
+    return snapshot
+
+
+def daily_series(db: Session, metrics: Iterable[str], start: date, end: date) -> Dict[str, Dict[date, Dict[str, int]]]:
+    """발생 지표 일별 값 (start ~ end 포함) → {metric: {date: {dimension: value}}}"""
+    series: Dict[str, Dict[date, Dict[str, int]]] = defaultdict(lambda: defaultdict(dict))
+    rows = db.query(DailyMetric.metric, DailyMetric.metric_date, DailyMetric.dimension, DailyMetric.value).filter(
+        DailyMetric.metric.in_(list(metrics)),
+        DailyMetric.metric_date >= start,
+        DailyMetric.metric_date <= end,
+    )
+    for metric, day, dimension, value in rows:
+        series[metric][day][dimension] = int(value)
+    return series
+
+
+def growth_rate(current: int, previous: Optional[int]) -> float:
+    """증가율(%) — 비교 기준이 없으면 0"""
+    if not previous:
+        return 0.0
+    return round((current - previous) / previous * 100, 1)
+
+
+def total(values: Dict[str, int], dimensions: Optional[List[str]] = None) -> int:
+    if dimensions is None:
+        return sum(values.values())
+    return sum(values.get(d, 0) for d in dimensions)
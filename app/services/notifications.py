@@ -0,0 +1,112 @@
+"""
+공지/알림 읽음 상태 (브로드캐스트 1행 + 지연 계산)
+- 발송: notifications에 1행 저장
+- 읽음: 사용자별 읽음 워터마크(notification_watermarks.last_read_at) 이전 알림은 모두 읽음,
+        이후 알림은 개별 읽음 영수증(user_notifications.read_at)으로 판정
+- 안 읽은 알림: (target, created_at) 인덱스를 타는 쿼리 1번
+- 호환: 프론트엔드는 아직 user_notifications를 Supabase로 직접 읽으므로
+  notification_inbox_fanout이 켜져 있으면 materialize_inbox()로 사용자별 행도 생성 (INSERT ... SELECT 1번)
+  read_at NULL 행은 영수증이 아니므로 위 판정에 영향 없음, 읽음 처리는 양쪽에 같이 반영
+"""
+from datetime import datetime, timezone
+from typing import List
+import uuid
+
+from sqlalchemy import String, exists, func, insert, literal, or_, select
+from sqlalchemy.orm import Session
+
+from app.models import Notification, NotificationWatermark, User, UserNotification
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def count_recipients(db: Session, target: str) -> int:
+    """브로드캐스트 대상 인원 (COUNT 1번)"""
+    query = db.query(func.count(User.id))
+    if target != "all":
+        query = query.filter(User.role == target)
+    return query.scalar() or 0
+
+
+def materialize_inbox(db: Session, notification_id: str, target: str) -> int:
+    """기존 받은 알림함용 사용자별 행 생성 → 생성 건수 (INSERT ... SELECT 1번, commit은 호출자가 수행)"""
+    if db.bind.dialect.name == "postgresql":
+        row_id = func.gen_random_uuid().cast(String)
+    else:
+        row_id = func.lower(func.hex(func.randomblob(16)))
+    recipients = select(row_id, User.id, literal(notification_id))
+    if target != "all":
+        recipients = recipients.where(User.role == target)
+    stmt = insert(UserNotification).from_select(["id", "user_id", "notification_id"], recipients)
+    return db.execute(stmt).rowcount
+
+
+def unread_notifications_query(db: Session, user_id: str):
+    """사용자의 안 읽은 알림 쿼리 (역할 / 워터마크 / 영수증을 서브쿼리로 한 번에 판정)"""
+    role = select(User.role).where(User.id == user_id).scalar_subquery()
+    watermark = (
+        select(NotificationWatermark.last_read_at)
+        .where(NotificationWatermark.user_id == user_id)
+        .scalar_subquery()
+    )
+    receipt = exists().where(
+        UserNotification.notification_id == Notification.id,
+        UserNotification.user_id == user_id,
+        UserNotification.read_at.isnot(None),
+    )
+    return db.query(Notification).filter(
+        or_(Notification.target == "all", Notification.target == role),
+        or_(watermark.is_(None), Notification.created_at > watermark),
+        ~receipt,
+    )
+
+
+def get_unread_notifications(db: Session, user_id: str, limit: int = 50) -> List[Notification]:
+    return (
+        unread_notifications_query(db, user_id)
+        .order_by(Notification.created_at.desc())
+        .limit(limit)
+        .all()
+    )
+
+
+def mark_read(db: Session, user_id: str, notification_id: str):
+    """개별 읽음 영수증 기록 (commit은 호출자가 수행)"""
+    now = _now()
+    if db.bind.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+
+        stmt = insert(UserNotification).values(
+            id=str(uuid.uuid4()), user_id=user_id, notification_id=notification_id, read_at=now
+        )
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=[UserNotification.user_id, UserNotification.notification_id],
+            set_={"read_at": func.coalesce(UserNotification.read_at, now)},
+        ))
+        return
+
+    # 그 외 DB(로컬 SQLite 등)는 조회 후 갱신
+    receipt = db.query(UserNotification).filter(
+        UserNotification.user_id == user_id, UserNotification.notification_id == notification_id
+    ).first()
+    if receipt is None:
+        db.add(UserNotification(
+            id=str(uuid.uuid4()), user_id=user_id, notification_id=notification_id, read_at=now
+        ))
+    elif receipt.read_at is None:
+        receipt.read_at = now
+
+
+def mark_all_read(db: Session, user_id: str):
+    """읽음 워터마크를 현재 시각으로 이동 + 받은 알림함 행도 읽음 처리 (commit은 호출자가 수행)"""
+    now = _now()
+    watermark = db.get(NotificationWatermark, user_id)
+    if watermark is None:
+        db.add(NotificationWatermark(user_id=user_id, last_read_at=now))
+    else:
+        watermark.last_read_at = now
+    db.query(UserNotification).filter(
+        UserNotification.user_id == user_id, UserNotification.read_at.is_(None)
+    ).update({UserNotification.read_at: now}, synchronize_session=False)
@@ -0,0 +1,289 @@
+"""
+퀘스트 상태 머신
+- 상태: 잠김(is_locked) → 진행 중(pending) → 완료(completed, 종료 상태)
+  완료 시 다음 순서(quest_order + 1) 퀘스트 잠금 해제
+- quests (vip_id, quest_order) 유니크 → 초기화가 동시에 실행돼도 VIP당 퀘스트 세트는 1벌
+  initialize_quests()는 6개를 INSERT ... ON CONFLICT DO NOTHING 1번으로 일괄 생성 (멱등)
+- LLM 호출(체크리스트 생성 / 답변 평가)은 DB 트랜잭션 밖에서 실행
+  1) load_quest_context(): 필요한 값만 읽고 트랜잭션 종료 (LLM 대기 중 커넥션을 잡지 않음)
+  2) LLM 호출
+  3) apply_*(): SELECT ... FOR UPDATE로 퀘스트를 잠그고 상태를 다시 확인한 뒤 반영
+     (그 사이 다른 요청이 완료 / 체크리스트 재생성을 했으면 중복 반영하지 않음)
+- 답변 평가는 LLM 없이 즉시 판정(체크 수 >= minChecks) + 메시지 뱅크 문구로 응답하고,
+  LLM 맞춤 메시지는 응답 후 백그라운드에서 만들어 attach_personalized_message()로 ai_evaluation에 병합
+- 체크리스트 미리 생성: 초기화 직후 / 퀘스트 완료 직후 아직 완료되지 않은 앞 순서
+  PREFETCH_LOOKAHEAD개 중 체크리스트가 없는 퀘스트를 백그라운드에서 생성 (prefetch_contexts())
+"""
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set
+import threading
+import uuid
+
+from sqlalchemy.orm import Session
+
+from app.models import Notification, Quest, User
+from app.services.health_projection import DEFAULT_SCORE, get_current_health
+from app.services.metrics import record_event, QUESTS_COMPLETED
+
+# 카테고리 → (건강 지표 필드, 퀘스트 제목). 초기화 시 점수가 낮은 순서로 quest_order 부여
+QUEST_CATEGORIES = {
+    "future_safety_net": ("asset_stability", "자산 안정성 점검"),
+    "emotional_anchor": ("emotional_balance", "정서 균형 점검"),
+    "time_mastery": ("time_independence", "시간 독립성 점검"),
+    "body_signals": ("physical_condition", "신체 컨디션 점검"),
+    "relationship_power": ("network_power", "네트워크 파워 점검"),
+    "system_leverage": ("system_leverage", "시스템 레버리지 점검"),
+}
+
+COMPLETED = "completed"
+PENDING = "pending"
+DEFAULT_MIN_CHECKS = 3
+PREFETCH_LOOKAHEAD = 2  # 현재 퀘스트 + 다음 퀘스트
+
+
+class QuestStateError(Exception):
+    """허용되지 않는 상태 전이 (API에서 status_code로 변환)"""
+
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+@dataclass(frozen=True)
+class QuestContext:
+    """LLM 호출에 필요한 퀘스트 스냅샷 (세션과 분리된 값)"""
+    quest_id: str
+    vip_id: str
+    vip_name: str
+    agent_id: Optional[str]
+    title: str
+    category: str
+    quest_order: int
+    status: str
+    is_locked: bool
+    score: int
+    ai_questions: Optional[Dict[str, Any]]
+
+    @property
+    def checklist(self) -> Optional[List[str]]:
+        return (self.ai_questions or {}).get("checklist")
+
+    @property
+    def min_checks(self) -> int:
+        return int((self.ai_questions or {}).get("minChecks") or DEFAULT_MIN_CHECKS)
+
+
+def category_score(health, category: str) -> int:
+    field = QUEST_CATEGORIES.get(category, (category, None))[0]
+    value = getattr(health, field, None) if health is not None else None
+    return value if value is not None else DEFAULT_SCORE
+
+
+# ── 초기화 ────────────────────────────────────────────────────
+
+def initialize_quests(db: Session, vip_id: str, agent_id: Optional[str]) -> int:
+    """
+    VIP 초기 6개 퀘스트 일괄 생성 → 새로 만든 개수 (이미 있으면 0)
+    - 동시 요청은 (vip_id, quest_order) 유니크 충돌로 걸러짐
+    - commit은 호출자가 수행
+    """
+    if db.query(Quest.id).filter(Quest.vip_id == vip_id).first() is not None:
+        return 0
+
+    health = get_current_health(db, vip_id)
+    ordered = sorted(QUEST_CATEGORIES, key=lambda c: category_score(health, c))
+    rows = [
+        {
+            "id": str(uuid.uuid4()),
+            "vip_id": vip_id,
+            "agent_id": agent_id,
+            "title": QUEST_CATEGORIES[category][1],
+            "category": category,
+            "quest_order": i + 1,
+            "is_locked": i != 0,
+            "status": PENDING,
+        }
+        for i, category in enumerate(ordered)
+    ]
+
+    dialect = db.bind.dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+
+        result = db.execute(
+            insert(Quest).values(rows).on_conflict_do_nothing(index_elements=[Quest.vip_id, Quest.quest_order])
+        )
+        return result.rowcount
+
+    db.add_all(Quest(**row) for row in rows)
+    db.flush()
+    return len(rows)
+
+
+# ── 조회 (트랜잭션 밖 LLM 호출 준비) ──────────────────────────
+
+def _context(quest: Quest, vip_name: Optional[str], health) -> QuestContext:
+    return QuestContext(
+        quest_id=quest.id,
+        vip_id=quest.vip_id,
+        vip_name=vip_name or "",
+        agent_id=quest.agent_id,
+        title=quest.title,
+        category=quest.category,
+        quest_order=quest.quest_order,
+        status=quest.status,
+        is_locked=bool(quest.is_locked),
+        score=category_score(health, quest.category),
+        ai_questions=quest.ai_questions,
+    )
+
+
+def load_quest_context(db: Session, quest_id: str) -> QuestContext:
+    """퀘스트 + VIP 이름 + 해당 카테고리 점수를 읽고 트랜잭션 종료"""
+    row = (
+        db.query(Quest, User.name)
+        .outerjoin(User, User.id == Quest.vip_id)
+        .filter(Quest.id == quest_id)
+        .first()
+    )
+    if row is None:
+        raise QuestStateError(404, "Quest not found")
+    quest, vip_name = row
+    context = _context(quest, vip_name, get_current_health(db, quest.vip_id))
+    db.commit()
+    return context
+
+
+def prefetch_contexts(db: Session, vip_id: str, lookahead: int = PREFETCH_LOOKAHEAD) -> List[QuestContext]:
+    """미완료 퀘스트 앞 lookahead개 중 체크리스트가 아직 없는 것 (트랜잭션 종료 후 반환)"""
+    rows = (
+        db.query(Quest, User.name)
+        .outerjoin(User, User.id == Quest.vip_id)
+        .filter(Quest.vip_id == vip_id, Quest.status != COMPLETED)
+        .order_by(Quest.quest_order.asc())
+        .limit(lookahead)
+        .all()
+    )
+    missing = [(quest, vip_name) for quest, vip_name in rows if not quest.ai_questions]
+    contexts = []
+    if missing:
+        health = get_current_health(db, vip_id)
+        contexts = [_context(quest, vip_name, health) for quest, vip_name in missing]
+    db.commit()
+    return contexts
+
+
+# 워커 내 중복 생성 방지 (같은 퀘스트를 목록 조회 / 완료가 동시에 예약해도 LLM 호출 1번)
+_prefetching: Set[str] = set()
+_prefetching_lock = threading.Lock()
+
+
+def claim_prefetch(quest_id: str) -> bool:
+    with _prefetching_lock:
+        if quest_id in _prefetching:
+            return False
+        _prefetching.add(quest_id)
+        return True
+
+
+def release_prefetch(quest_id: str):
+    with _prefetching_lock:
+        _prefetching.discard(quest_id)
+
+
+def validate_checked_indexes(context: QuestContext, checked: List[int]):
+    if not context.checklist:
+        raise QuestStateError(400, "Questions not generated yet")
+    if any(i < 0 or i >= len(context.checklist) for i in checked):
+        raise QuestStateError(400, "checkedIndexes out of range")
+
+
+# ── 상태 전이 (FOR UPDATE) ────────────────────────────────────
+
+def _lock_quest(db: Session, quest_id: str) -> Quest:
+    quest = db.query(Quest).filter(Quest.id == quest_id).with_for_update().first()
+    if quest is None:
+        raise QuestStateError(404, "Quest not found")
+    return quest
+
+
+def _complete_locked(db: Session, quest: Quest):
+    """잠긴 퀘스트를 완료 처리하고 다음 순서 잠금 해제 (유니크 (vip_id, quest_order) 인덱스 조회)"""
+    quest.status = COMPLETED
+    quest.completed_at = datetime.now()
+    quest.is_locked = False
+    record_event(db, QUESTS_COMPLETED)
+    db.query(Quest).filter(
+        Quest.vip_id == quest.vip_id,
+        Quest.quest_order == quest.quest_order + 1,
+    ).update({Quest.is_locked: False}, synchronize_session=False)
+
+
+def apply_questions(db: Session, quest_id: str, ai_questions: Dict[str, Any], overwrite: bool = True) -> bool:
+    """
+    생성된 체크리스트 저장 → 저장 여부 (완료된 퀘스트는 변경 불가, commit은 호출자가 수행)
+    - overwrite=False(미리 생성): 그 사이 체크리스트가 생겼으면 기존 것을 유지
+    """
+    quest = _lock_quest(db, quest_id)
+    if quest.status == COMPLETED:
+        raise QuestStateError(409, "Quest already completed")
+    if quest.ai_questions and not overwrite:
+        return False
+    quest.ai_questions = ai_questions
+    return True
+
+
+def apply_evaluation(db: Session, context: QuestContext, checked: List[int], evaluation: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    평가 결과 반영 → 최종 평가 (commit은 호출자가 수행)
+    - 그 사이 다른 요청이 먼저 완료했으면 기존 평가를 그대로 반환 (완료 이벤트 / 알림 중복 없음)
+    - 평가 중 체크리스트가 다시 생성됐으면 409
+    """
+    quest = _lock_quest(db, context.quest_id)
+    if quest.status == COMPLETED:
+        return quest.ai_evaluation or evaluation
+    if (quest.ai_questions or {}).get("checklist") != context.checklist:
+        raise QuestStateError(409, "Checklist changed during evaluation")
+
+    quest.user_answers = checked
+    quest.checked_count = len(checked)
+    quest.ai_evaluation = evaluation
+
+    if evaluation.get("passed"):
+        _complete_locked(db, quest)
+        db.add(Notification(
+            id=str(uuid.uuid4()),
+            title=f"🎉 '{quest.title}' 미션 완료!",
+            content=evaluation.get("message"),
+            target="vip",
+            created_by=quest.agent_id,
+        ))
+    return evaluation
+
+
+def attach_personalized_message(db: Session, quest_id: str, checked: List[int], personalized: Dict[str, str]) -> bool:
+    """
+    백그라운드에서 만든 맞춤 메시지를 ai_evaluation에 병합 → 반영 여부 (commit은 호출자가 수행)
+    - 그 사이 다시 제출됐거나(답변 변경) 이미 맞춤 메시지가 붙었으면 반영하지 않음
+    """
+    quest = db.query(Quest).filter(Quest.id == quest_id).with_for_update().first()
+    if quest is None or not quest.ai_evaluation or quest.user_answers != checked:
+        return False
+    if quest.ai_evaluation.get("personalized"):
+        return False
+    quest.ai_evaluation = {**quest.ai_evaluation, **personalized, "personalized": True}
+    return True
+
+
+def complete_quest(db: Session, quest_id: str) -> bool:
+    """수동 완료 처리 → 이번 호출로 완료됐으면 True (이미 완료면 False, commit은 호출자가 수행)"""
+    quest = _lock_quest(db, quest_id)
+    if quest.status == COMPLETED:
+        return False
+    _complete_locked(db, quest)
+    return True
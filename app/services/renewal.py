@@ -0,0 +1,232 @@
+"""
+자동갱신 결제 엔진
+- 만료 도래 에이전트를 모아 하나의 이벤트 루프 / 하나의 AsyncClient(커넥션 풀)로 동시 결제
+- 동시 요청 수 제한(Semaphore) + 일시 오류(네트워크 / 429 / 5xx) 지수 백오프 재시도
+- orderId는 에이전트 + 결제 주기(만료일)로 결정 → 재시도 / 재실행해도 같은 주기는 중복 결제되지 않음
+- 모든 시도는 renewal_attempts에 기록 (결과 반영과 같은 트랜잭션)
+- 성공 결제는 결제 원장(process_payment_event)을 거쳐 반영 → 웹훅과 중복 반영되지 않음
+"""
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import List, Optional
+import asyncio
+import logging
+import random
+import uuid
+
+import httpx
+
+from app.config import get_settings
+from app.database import SessionLocal
+from app.models import User, RenewalAttempt
+from app.utils.mailer import enqueue_email
+from app.services.billing import RENEWAL_ORDER_PREFIX, process_payment_event
+from app.services.subscription import (
+    TIER_PRICE_MAP, PAYMENT_FAIL_GRACE,
+    _toss_auth_header, _infer_billing_cycle, _payment_failed_email,
+)
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# 같은 orderId 재요청 시 토스가 돌려주는 오류 코드 → 기존 결제 상태를 조회해 판정
+DUPLICATE_ORDER_CODES = {"ALREADY_PROCESSED_PAYMENT", "DUPLICATED_ORDER_ID"}
+
+
+@dataclass
+class RenewalCharge:
+    """결제 요청 1건 (DB 세션 밖에서 사용하도록 필요한 값만 복사)"""
+    agent_id: str
+    email: str
+    billing_key: str
+    tier: str
+    billing_cycle: str
+    amount: int
+    order_id: str
+    order_name: str
+    period_end: datetime
+    attempts: List[dict] = field(default_factory=list)
+    success: bool = False
+    payment_key: Optional[str] = None
+
+
+def renewal_order_id(agent_id: str, period_end: datetime) -> str:
+    """결정적 orderId (토스 규칙: 6~64자, 영문/숫자/-/_)"""
+    return f"{RENEWAL_ORDER_PREFIX}{agent_id}-{period_end.strftime('%Y%m%d')}"
+
+
+# ── 준비 ──────────────────────────────────────────────────────
+
+def _prepare_charges(agent_ids: List[str]) -> List[RenewalCharge]:
+    """
+    결제 대상 확정. 빌링키 / 시크릿 키가 없으면 결제 없이 바로 payment_failed 처리
+    (이미 갱신됐거나 상태가 바뀐 대상은 제외 → 재실행해도 안전)
+    """
+    charges: List[RenewalCharge] = []
+    auth_header = _toss_auth_header()
+    db = SessionLocal()
+    try:
+        for agent in db.query(User).filter(User.id.in_(agent_ids)):
+            end = agent.subscription_end_date
+            if agent.subscription_status != "active" or end is None or end > datetime.now(end.tzinfo):
+                continue
+
+            if not agent.billing_key or not auth_header:
+                logger.warning(
+                    f"[AutoRenew] 갱신 불가 — billing_key 또는 TOSS_SECRET_KEY 없음: {agent.email}"
+                )
+                agent.subscription_status   = "payment_failed"
+                agent.grace_period_end_date = datetime.now() + timedelta(days=PAYMENT_FAIL_GRACE)
+                continue
+
+            billing_cycle = _infer_billing_cycle(agent)
+            amount        = TIER_PRICE_MAP.get(agent.tier, {}).get(billing_cycle, 99000)
+            discount      = getattr(agent, "special_discount", 0) or 0
+            charges.append(RenewalCharge(
+                agent_id=agent.id,
+                email=agent.email,
+                billing_key=agent.billing_key,
+                tier=agent.tier,
+                billing_cycle=billing_cycle,
+                amount=int(amount * (1 - discount / 100)),
+                order_id=renewal_order_id(agent.id, end),
+                order_name=f"UNIFLOW {agent.tier} ({billing_cycle}) 자동갱신",
+                period_end=end,
+            ))
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+    return charges
+
+
+# ── 동시 결제 ─────────────────────────────────────────────────
+
+def _retryable(status_code: int) -> bool:
+    return status_code == 429 or status_code >= 500
+
+
+async def _lookup_order(client: httpx.AsyncClient, order_id: str) -> Optional[dict]:
+    """orderId로 기존 결제 조회 (중복 요청 판정용)"""
+    try:
+        resp = await client.get(f"/payments/orders/{order_id}")
+        return resp.json() if resp.status_code == 200 else None
+    except httpx.HTTPError:
+        return None
+
+
+async def _charge(client: httpx.AsyncClient, semaphore: asyncio.Semaphore, charge: RenewalCharge):
+    """1건 결제 (일시 오류만 재시도, 같은 orderId 유지)"""
+    max_attempts = max(1, settings.renewal_max_retries + 1)
+    for attempt in range(1, max_attempts + 1):
+        record = {"attempt": attempt, "http_status": None, "error_code": None, "error_message": None}
+        retry = False
+        async with semaphore:
+            try:
+                resp = await client.post(f"/billing/{charge.billing_key}", json={
+                    "customerKey": charge.agent_id,
+                    "amount":      charge.amount,
+                    "orderId":     charge.order_id,
+                    "orderName":   charge.order_name,
+                    "metadata": {
+                        "agentId":       charge.agent_id,
+                        "tier":          charge.tier,
+                        "billing_cycle": charge.billing_cycle,
+                    },
+                })
+                record["http_status"] = resp.status_code
+                data = resp.json() if resp.content else {}
+                if resp.status_code == 200:
+                    charge.success, charge.payment_key = True, data.get("paymentKey")
+                elif data.get("code") in DUPLICATE_ORDER_CODES:
+                    # 이전 시도가 실제로는 처리됐을 수 있음 → 결제 상태로 판정
+                    existing = await _lookup_order(client, charge.order_id)
+                    if existing and existing.get("status") == "DONE":
+                        charge.success, charge.payment_key = True, existing.get("paymentKey")
+                    else:
+                        record["error_code"], record["error_message"] = data.get("code"), data.get("message")
+                else:
+                    record["error_code"], record["error_message"] = data.get("code"), data.get("message")
+                    retry = _retryable(resp.status_code)
+            except (httpx.HTTPError, ValueError) as e:
+                record["error_code"], record["error_message"] = type(e).__name__, str(e)
+                retry = True
+
+        record["status"] = "success" if charge.success else "failed"
+        charge.attempts.append(record)
+        if charge.success or not retry or attempt == max_attempts:
+            return
+        # 지수 백오프 + 지터 (세마포어 밖에서 대기)
+        await asyncio.sleep(settings.renewal_backoff_seconds * (2 ** (attempt - 1)) * (1 + random.random()))
+
+
+async def _charge_all(charges: List[RenewalCharge]):
+    concurrency = max(1, settings.renewal_concurrency)
+    semaphore = asyncio.Semaphore(concurrency)
+    async with httpx.AsyncClient(
+        base_url=settings.toss_api_base,
+        headers={"Authorization": _toss_auth_header(), "Content-Type": "application/json"},
+        timeout=15.0,
+        limits=httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency),
+    ) as client:
+        await asyncio.gather(*(_charge(client, semaphore, c) for c in charges))
+
+
+# ── 결과 반영 ─────────────────────────────────────────────────
+
+def _apply_result(charge: RenewalCharge):
+    """결제 결과 + 시도 이력을 에이전트별 짧은 트랜잭션으로 반영"""
+    db = SessionLocal()
+    try:
+        for record in charge.attempts:
+            db.add(RenewalAttempt(
+                id=str(uuid.uuid4()),
+                agent_id=charge.agent_id,
+                order_id=charge.order_id,
+                amount=charge.amount,
+                payment_key=charge.payment_key if record["status"] == "success" else None,
+                **record,
+            ))
+
+        if charge.success:
+            # 같은 결제의 웹훅이 먼저 도착했으면 원장에서 중복으로 걸러짐
+            process_payment_event(
+                db,
+                source="renewal",
+                order_id=charge.order_id,
+                payment_key=charge.payment_key,
+                agent_id=charge.agent_id,
+                tier=charge.tier,
+                billing_cycle=charge.billing_cycle,
+                amount=charge.amount,
+            )
+            logger.info(f"[AutoRenew] 갱신 성공: {charge.email} / {charge.amount:,}원")
+        else:
+            agent = db.get(User, charge.agent_id)
+            if agent is not None and agent.subscription_end_date == charge.period_end:
+                last = charge.attempts[-1] if charge.attempts else {}
+                logger.error(f"[AutoRenew] 갱신 실패: {charge.email} — {last.get('error_code')} {last.get('error_message')}")
+                agent.subscription_status   = "payment_failed"
+                agent.grace_period_end_date = datetime.now() + timedelta(days=PAYMENT_FAIL_GRACE)
+                enqueue_email(db, *_payment_failed_email(agent))
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        logger.error(f"[AutoRenew] 결과 반영 실패: {charge.agent_id} ({charge.order_id}) — {e}")
+    finally:
+        db.close()
+
+
+def run_auto_renewals(agent_ids: List[str]):
+    """자동갱신 대상 일괄 결제 (스케줄러 스레드에서 호출)"""
+    if not agent_ids:
+        return
+    charges = _prepare_charges(agent_ids)
+    if charges:
+        asyncio.run(_charge_all(charges))
+    for charge in charges:
+        _apply_result(charge)
+    succeeded = sum(1 for c in charges if c.success)
+    logger.info(f"[AutoRenew] 완료: 대상 {len(charges)}건 / 성공 {succeeded}건 / 실패 {len(charges) - succeeded}건")
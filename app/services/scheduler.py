@@ -0,0 +1,289 @@
+"""
+인프로세스 작업 스케줄러
+- 앱 기동 시(lifespan) 주기 작업을 등록된 일정대로 데몬 스레드에서 실행
+- 여러 uvicorn 워커/레플리카가 같은 작업을 중복 실행하지 않도록
+  1) PostgreSQL advisory lock(pg_try_advisory_lock)으로 동시 실행 차단
+  2) job_runs(job_name, scheduled_for) 유니크 제약으로 이미 처리된 슬롯 재실행 차단
+     (advisory lock은 세션 단위라 PgBouncer transaction 모드에서는 보장되지 않으므로 2)가 최종 방어선)
+- 모든 실행의 소요 시간 / 결과 / 오류를 job_runs에 기록
+"""
+from datetime import datetime, time, timedelta
+from typing import Callable, Dict, List, Optional
+from zoneinfo import ZoneInfo
+import logging
+import os
+import socket
+import threading
+import time as time_module
+import traceback
+import uuid
+import zlib
+
+from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
+
+from app.config import get_settings
+from app.database import SessionLocal, engine
+from app.models import JobRun
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+INSTANCE_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+
+class Job:
+    """주기 작업 정의 — daily_at(매일 지정 시각) 또는 interval_seconds(고정 간격) 중 하나"""
+
+    def __init__(
+        self,
+        name: str,
+        func: Callable[[], None],
+        daily_at: Optional[time] = None,
+        interval_seconds: Optional[int] = None,
+        misfire_grace_seconds: int = 3600,
+        description: str = "",
+    ):
+        if (daily_at is None) == (interval_seconds is None):
+            raise ValueError("daily_at 또는 interval_seconds 중 하나만 지정해야 합니다")
+        self.name = name
+        self.func = func
+        self.daily_at = daily_at
+        self.interval_seconds = interval_seconds
+        # 인스턴스가 내려가 있던 사이 지난 슬롯을 기동 후 몇 초 이내까지 따라잡을지
+        self.misfire_grace_seconds = misfire_grace_seconds
+        self.description = description
+        self.last_slot: Optional[datetime] = None
+        self.local_lock = threading.Lock()
+
+    @property
+    def schedule(self) -> str:
+        if self.daily_at is not None:
+            return f"daily {self.daily_at.strftime('%H:%M')}"
+        return f"every {self.interval_seconds}s"
+
+    def slot_for(self, now: datetime) -> datetime:
+        """now 시점 기준 가장 최근 예약 슬롯"""
+        if self.daily_at is not None:
+            slot = now.replace(hour=self.daily_at.hour, minute=self.daily_at.minute, second=0, microsecond=0)
+            return slot if slot <= now else slot - timedelta(days=1)
+        epoch = int(now.timestamp())
+        return datetime.fromtimestamp(epoch - epoch % self.interval_seconds, tz=now.tzinfo)
+
+
+def _lock_key(job_name: str) -> int:
+    """작업 이름 → advisory lock 키 (프로세스/재시작과 무관하게 고정)"""
+    return zlib.crc32(f"uniflow:job:{job_name}".encode())
+
+
+class Scheduler:
+    def __init__(self, tick_seconds: int = 30):
+        self.tick_seconds = tick_seconds
+        self.jobs: Dict[str, Job] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # ── 등록 / 조회 ───────────────────────────────────────────
+
+    def register(self, name: str, func: Callable[[], None], **kwargs) -> Job:
+        job = Job(name, func, **kwargs)
+        self.jobs[name] = job
+        return job
+
+    def get(self, name: str) -> Optional[Job]:
+        return self.jobs.get(name)
+
+    # ── 실행 ──────────────────────────────────────────────────
+
+    def _acquire_lock(self, job: Job):
+        """
+        작업 잠금 획득. 성공 시 해제에 필요한 연결(또는 True), 다른 인스턴스가 실행 중이면 None
+        - 같은 프로세스 내 중복은 threading.Lock, 인스턴스 간 중복은 advisory lock으로 차단
+        """
+        if not job.local_lock.acquire(blocking=False):
+            return None
+        if engine.dialect.name != "postgresql":
+            return True
+        conn = engine.connect()
+        try:
+            locked = conn.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": _lock_key(job.name)}).scalar()
+            conn.commit()
+        except Exception:
+            conn.close()
+            job.local_lock.release()
+            raise
+        if not locked:
+            conn.close()
+            job.local_lock.release()
+            return None
+        return conn
+
+    def _release_lock(self, job: Job, lock):
+        try:
+            if lock is not True:
+                lock.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": _lock_key(job.name)})
+                lock.commit()
+                lock.close()
+        except Exception as e:
+            logger.warning(f"[Scheduler] {job.name} 잠금 해제 실패 (연결 종료 시 자동 해제): {e}")
+        finally:
+            job.local_lock.release()
+
+    def _claim_run(self, job: Job, scheduled_for: datetime, trigger: str, status: str = "running") -> Optional[str]:
+        """job_runs에 실행 기록 생성. 같은 슬롯이 이미 기록돼 있으면 None (다른 인스턴스가 처리함)"""
+        db = SessionLocal()
+        try:
+            run = JobRun(
+                id=str(uuid.uuid4()),
+                job_name=job.name,
+                scheduled_for=scheduled_for,
+                trigger=trigger,
+                status=status,
+                instance=INSTANCE_ID,
+            )
+            db.add(run)
+            db.commit()
+            return run.id
+        except IntegrityError:
+            db.rollback()
+            return None
+        finally:
+            db.close()
+
+    def _finish_run(self, run_id: str, status: str, duration_ms: int, error: Optional[str]):
+        db = SessionLocal()
+        try:
+            db.query(JobRun).filter(JobRun.id == run_id).update({
+                JobRun.status: status,
+                JobRun.finished_at: datetime.now(ZoneInfo(settings.scheduler_timezone)),
+                JobRun.duration_ms: duration_ms,
+                JobRun.error: error,
+            })
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.error(f"[Scheduler] 실행 기록 갱신 실패 ({run_id}): {e}")
+        finally:
+            db.close()
+
+    def run_job(self, job: Job, scheduled_for: datetime, trigger: str = "schedule") -> Optional[str]:
+        """
+        잠금 → 슬롯 선점 → 실행 → 결과 기록. 생성된 job_runs.id 반환
+        - 스케줄 실행이 잠금/슬롯 선점에 실패하면 기록 없이 None (다른 인스턴스 담당)
+        - 수동 실행이 잠금에 실패하면 skipped로 기록
+        """
+        lock = self._acquire_lock(job)
+        if lock is None:
+            logger.info(f"[Scheduler] {job.name} 다른 인스턴스에서 실행 중 — 건너뜀")
+            if trigger == "manual":
+                return self._claim_run(job, scheduled_for, trigger, status="skipped")
+            return None
+
+        try:
+            run_id = self._claim_run(job, scheduled_for, trigger)
+            if run_id is None:
+                logger.info(f"[Scheduler] {job.name} {scheduled_for.isoformat()} 슬롯은 이미 처리됨")
+                return None
+
+            started = time_module.monotonic()
+            status, error = "success", None
+            try:
+                job.func()
+            except Exception:
+                status, error = "failed", traceback.format_exc()
+                logger.error(f"[Scheduler] {job.name} 실패: {error}")
+            duration_ms = int((time_module.monotonic() - started) * 1000)
+            self._finish_run(run_id, status, duration_ms, error)
+            logger.info(f"[Scheduler] {job.name} {status} ({duration_ms}ms)")
+            return run_id
+        finally:
+            self._release_lock(job, lock)
+
+    def trigger(self, name: str) -> bool:
+        """수동 실행 (백그라운드 스레드). 등록되지 않은 작업이면 False"""
+        job = self.get(name)
+        if not job:
+            return False
+        now = datetime.now(ZoneInfo(settings.scheduler_timezone))
+        threading.Thread(
+            target=self.run_job, args=(job, now, "manual"), name=f"job-{name}-manual", daemon=True
+        ).start()
+        return True
+
+    # ── 루프 ──────────────────────────────────────────────────
+
+    def _tick(self):
+        now = datetime.now(ZoneInfo(settings.scheduler_timezone))
+        for job in list(self.jobs.values()):
+            slot = job.slot_for(now)
+            if slot == job.last_slot:
+                continue
+            job.last_slot = slot
+            if (now - slot).total_seconds() > job.misfire_grace_seconds:
+                # 기동 직후 오래 지난 슬롯은 따라잡지 않고 다음 슬롯부터 실행
+                continue
+            try:
+                self.run_job(job, slot)
+            except Exception as e:
+                logger.error(f"[Scheduler] {job.name} 실행 준비 실패: {e}")
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._tick()
+            self._stop.wait(self.tick_seconds)
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="scheduler", daemon=True)
+        self._thread.start()
+        logger.info(f"[Scheduler] 시작 ({INSTANCE_ID}): {', '.join(self.jobs)}")
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=self.tick_seconds)
+
+
+def list_runs(db, job_name: Optional[str] = None, limit: int = 50) -> List[JobRun]:
+    query = db.query(JobRun)
+    if job_name:
+        query = query.filter(JobRun.job_name == job_name)
+    return query.order_by(JobRun.started_at.desc()).limit(limit).all()
+
+
+scheduler = Scheduler(tick_seconds=settings.scheduler_tick_seconds)
+
+
+# ── 작업 등록 ─────────────────────────────────────────────────
+
+from app.services.subscription import check_subscriptions
+
+scheduler.register(
+    "check_subscriptions",
+    check_subscriptions,
+    daily_at=time(0, 0),
+    misfire_grace_seconds=6 * 3600,
+    description="구독 만료 / 자동갱신 / 유예 기간 일괄 점검",
+)
+
+from app.services.metrics import run_metrics_rollup
+
+scheduler.register(
+    "metrics_rollup",
+    run_metrics_rollup,
+    interval_seconds=300,
+    misfire_grace_seconds=300,
+    description="관리자 KPI 일별 롤업(daily_metrics) 갱신",
+)
+
+
+from app.services.diagnosis_sessions import purge_expired_sessions
+
+scheduler.register(
+    "purge_diagnosis_sessions",
+    purge_expired_sessions,
+    interval_seconds=3600,
+    description="만료된 진단 세션 삭제",
+)
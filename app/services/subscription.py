@@ -1,20 +1,22 @@
 """
 구독 만료 / 자동갱신 스케줄러
 매일 자정 실행: 체험 만료 → 유료 리마인드 → 자동갱신 → 유예 기간 처리
+(app/services/scheduler.py에 등록, 청크 단위 commit + 체크포인트로 중단 지점부터 재개)
 
 토스 빌링 API 연동 준비 완료 상태.
 실제 API 호출은 TOSS_SECRET_KEY 환경 변수 설정 후 자동 활성화.
 """
 
 from datetime import datetime, timedelta
-from sqlalchemy.orm import Session
+from typing import Callable, List, Optional, Tuple
+from sqlalchemy.orm import Session, Query
 import logging
 import os
 import base64
 import httpx
 
-from app.models import User
-from app.utils.mailer import send_email
+from app.models import User, BatchCheckpoint
+from app.utils.mailer import enqueue_email
 from app.database import SessionLocal
 
 logger = logging.getLogger(__name__)
@@ -24,6 +26,9 @@ TOSS_API_BASE   = "https://api.tosspayments.com/v1"
 GRACE_DAYS      = 7    # 만료 후 읽기전용 유예 기간
 PAYMENT_FAIL_GRACE = 3 # 결제 실패 후 재시도 유예 기간
 
+JOB_NAME   = "check_subscriptions"  # batch_checkpoints.job_name
+CHUNK_SIZE = 200                    # 청크당 처리 인원 (청크마다 commit)
+
 # 요금제별 결제 금액 (billing_cycle → 가격)
 TIER_PRICE_MAP: dict[str, dict[str, int]] = {
     "flow_one": {"monthly": 33000,  "yearly": 330000},
@@ -54,190 +59,190 @@ def _toss_auth_header() -> str | None:
 
 # ── 메인 스케줄러 ─────────────────────────────────────────────
 
-def check_subscriptions():
-    """매일 자정 실행: 체험/유료 구독 상태 일괄 점검"""
-    db = SessionLocal()
+def check_subscriptions(now: Optional[datetime] = None):
+    """
+    매일 자정 실행: 체험/유료 구독 상태 일괄 점검
+    - 단계별로 CHUNK_SIZE명씩 처리하고 청크마다 commit (행 잠금은 청크 단위로만 유지)
+    - 같은 날 재실행하면 단계별 체크포인트 다음부터 재개
+    - 메일은 청크와 같은 트랜잭션으로 outbox에 적재, 자동갱신 결제는 스캔이 끝난 뒤 결제 엔진으로 일괄 처리
+    """
+    now = now or datetime.now()
+    run_key = now.strftime("%Y-%m-%d")
     try:
-        now = datetime.now()
-        _check_trial_expiry(db, now)
-        _check_paid_renewal(db, now)
-        _check_payment_failed(db, now)
-        _check_grace_period(db, now)
-        db.commit()
+        _check_trial_expiry(run_key, now)
+        renewal_ids = _check_paid_renewal(run_key, now)
+        _check_payment_failed(run_key, now)
+        _check_grace_period(run_key, now)
+
+        # 자동갱신 결제 엔진 (동시 결제 / 재시도 / 시도 이력) — app/services/renewal.py
+        from app.services.renewal import run_auto_renewals
+        run_auto_renewals(renewal_ids)
         logger.info("[Scheduler] 구독 점검 완료")
     except Exception as e:
         logger.error(f"[Scheduler] 오류: {e}")
+        raise  # 실행 결과(failed)를 job_runs에 기록하기 위해 전파
+
+
+# ── 청크 처리 ─────────────────────────────────────────────────
+
+Mail = Tuple[str, str, str]  # (to_email, subject, body)
+
+
+def _process_in_chunks(
+    step: str,
+    run_key: str,
+    build_query: Callable[[Session], Query],
+    handle: Callable[[User, List[Mail]], None],
+):
+    """
+    build_query 조건에 맞는 User를 id 순 keyset 페이지로 처리
+    - 청크 변경분과 체크포인트를 한 트랜잭션으로 commit → 중단 시 다음 청크부터 재개
+    - handle이 쌓은 메일은 같은 트랜잭션으로 mail_outbox에 적재 (commit돼야 발송됨)
+    """
+    db = SessionLocal()
+    try:
+        checkpoint = db.get(BatchCheckpoint, (JOB_NAME, step))
+        if checkpoint is None:
+            checkpoint = BatchCheckpoint(job_name=JOB_NAME, step=step)
+            db.add(checkpoint)
+        if checkpoint.run_key != run_key:
+            checkpoint.run_key, checkpoint.last_id, checkpoint.completed = run_key, None, False
+        elif checkpoint.completed:
+            logger.info(f"[Scheduler] {step} 이미 완료됨 ({run_key}) — 건너뜀")
+            return
+
+        processed = 0
+        while True:
+            query = build_query(db)
+            if checkpoint.last_id:
+                query = query.filter(User.id > checkpoint.last_id)
+            agents = query.order_by(User.id).limit(CHUNK_SIZE).all()
+
+            mails: List[Mail] = []
+            for agent in agents:
+                handle(agent, mails)
+
+            for mail in mails:
+                enqueue_email(db, *mail)
+            if agents:
+                checkpoint.last_id = agents[-1].id
+            checkpoint.completed = len(agents) < CHUNK_SIZE
+            db.commit()
+
+            processed += len(agents)
+            if checkpoint.completed:
+                break
+
+        if processed:
+            logger.info(f"[Scheduler] {step}: {processed}건 처리")
+    except Exception:
         db.rollback()
+        raise
     finally:
         db.close()
 
 
 # ── 단계별 함수 ───────────────────────────────────────────────
 
-def _check_trial_expiry(db: Session, now: datetime):
+def _check_trial_expiry(run_key: str, now: datetime):
     """퍼스트 FLOW(7일 무료 체험) + 유료 trial 상태 만료 알림 및 전환"""
 
     # 퍼스트 FLOW: trial_end_date 기준 7일 체험 만료 체크
-    for agent in db.query(User).filter(
-        User.tier == "first_flow",
-        User.subscription_status == "active",
-        User.trial_end_date <= now,
-    ).all():
+    def expire_first_flow(agent: User, mails: List[Mail]):
         agent.subscription_status   = "expired"
         agent.grace_period_end_date = now + timedelta(days=GRACE_DAYS)
         logger.info(f"[스케줄러] 퍼스트FLOW 체험 만료: {agent.email}")
         # 만료 안내 메일
-        _send_trial_expiry_email(agent, days_left=0)
+        mails.append(_trial_expiry_email(agent, days_left=0))
+
+    _process_in_chunks("first_flow_expiry", run_key, lambda db: db.query(User).filter(
+        User.tier == "first_flow",
+        User.subscription_status == "active",
+        User.trial_end_date <= now,
+    ), expire_first_flow)
 
     # D-2 알림
     two_days_later = now + timedelta(days=2)
-    for agent in db.query(User).filter(
+
+    def notify_two_days(agent: User, mails: List[Mail]):
+        mails.append(_trial_expiry_email(agent, days_left=2))
+        agent.notification_sent_2days = True
+        logger.info(f"[스케줄러] D-2 알림 발송: {agent.email}")
+
+    _process_in_chunks("trial_notify_2days", run_key, lambda db: db.query(User).filter(
         User.subscription_status == "trial",
         User.trial_end_date <= two_days_later,
         User.trial_end_date > now,
         User.notification_sent_2days == False,
-    ).all():
-        _send_trial_expiry_email(agent, days_left=2)
-        agent.notification_sent_2days = True
-        logger.info(f"[스케줄러] D-2 알림 발송: {agent.email}")
+    ), notify_two_days)
 
     # 당일 만료 → expired + 유예 7일
-    for agent in db.query(User).filter(
-        User.subscription_status == "trial",
-        User.trial_end_date <= now,
-        User.notification_sent_today == False,
-    ).all():
-        _send_trial_expiry_email(agent, days_left=0)
+    def expire_trial(agent: User, mails: List[Mail]):
+        mails.append(_trial_expiry_email(agent, days_left=0))
         agent.notification_sent_today = True
         agent.subscription_status     = "expired"
         agent.grace_period_end_date   = now + timedelta(days=GRACE_DAYS)
         logger.info(f"[스케줄러] 체험 만료 처리: {agent.email}")
 
+    _process_in_chunks("trial_expiry", run_key, lambda db: db.query(User).filter(
+        User.subscription_status == "trial",
+        User.trial_end_date <= now,
+        User.notification_sent_today == False,
+    ), expire_trial)
+
 
-def _check_paid_renewal(db: Session, now: datetime):
-    """유료 구독 갱신 리마인드 + 자동갱신 처리"""
+def _check_paid_renewal(run_key: str, now: datetime) -> List[str]:
+    """유료 구독 갱신 리마인드 + 자동갱신 대상 수집 (결제는 renewal.run_auto_renewals에서 처리)"""
 
     # D-7 리마인드
     seven_days_later = now + timedelta(days=7)
-    for agent in db.query(User).filter(
+
+    def remind(agent: User, mails: List[Mail]):
+        mails.append(_renewal_remind_email(agent))
+        logger.info(f"[Scheduler] 갱신 리마인드 발송: {agent.email}")
+
+    _process_in_chunks("paid_renewal_remind", run_key, lambda db: db.query(User).filter(
         User.subscription_status == "active",
         User.tier.in_(TIER_PRICE_MAP.keys()),
         User.subscription_end_date <= seven_days_later,
         User.subscription_end_date > now,
-    ).all():
-        _send_renewal_remind_email(agent)
-        logger.info(f"[Scheduler] 갱신 리마인드 발송: {agent.email}")
+    ), remind)
 
-    # 만료일 도달 → 자동갱신 시도
-    for agent in db.query(User).filter(
-        User.subscription_status == "active",
-        User.tier.in_(TIER_PRICE_MAP.keys()),
-        User.subscription_end_date <= now,
-    ).all():
-        _process_auto_renewal(agent, db)
+    # 만료일 도달 → 자동갱신 대상 (id만 조회)
+    db = SessionLocal()
+    try:
+        return [row.id for row in db.query(User.id).filter(
+            User.subscription_status == "active",
+            User.tier.in_(TIER_PRICE_MAP.keys()),
+            User.subscription_end_date <= now,
+        ).order_by(User.id)]
+    finally:
+        db.close()
 
 
-def _check_payment_failed(db: Session, now: datetime):
+def _check_payment_failed(run_key: str, now: datetime):
     """결제 실패 유예 종료 → expired 전환"""
-    for agent in db.query(User).filter(
-        User.subscription_status == "payment_failed",
-        User.grace_period_end_date <= now,
-    ).all():
+    def expire(agent: User, mails: List[Mail]):
         agent.subscription_status   = "expired"
         agent.grace_period_end_date = now + timedelta(days=GRACE_DAYS)
         logger.info(f"[Scheduler] 결제실패 → expired: {agent.email}")
 
+    _process_in_chunks("payment_failed_expiry", run_key, lambda db: db.query(User).filter(
+        User.subscription_status == "payment_failed",
+        User.grace_period_end_date <= now,
+    ), expire)
+
 
-def _check_grace_period(db: Session, now: datetime):
+def _check_grace_period(run_key: str, now: datetime):
     """유예 기간 종료 → blocked 전환"""
-    for agent in db.query(User).filter(
-        User.subscription_status == "expired",
-        User.grace_period_end_date <= now,
-    ).all():
+    def block(agent: User, mails: List[Mail]):
         agent.subscription_status = "blocked"
         logger.info(f"[Scheduler] 유예 종료 → blocked: {agent.email}")
 
-
-# ── 자동갱신 핵심 로직 ────────────────────────────────────────
-
-def _process_auto_renewal(agent: User, db: Session):
-    """
-    토스 빌링 API로 실제 자동 결제 요청.
-    TOSS_SECRET_KEY 미설정 시 로그만 남기고 스킵.
-    """
-    auth_header = _toss_auth_header()
-
-    # 빌링키 없거나 키 미설정 → 갱신 불가
-    if not agent.billing_key or not auth_header:
-        logger.warning(
-            f"[AutoRenew] 갱신 불가 — billing_key 또는 TOSS_SECRET_KEY 없음: {agent.email}"
-        )
-        agent.subscription_status   = "payment_failed"
-        agent.grace_period_end_date = datetime.now() + timedelta(days=PAYMENT_FAIL_GRACE)
-        return
-
-    # billing_cycle 판별 (기존 subscription_type 또는 새 tier cycle 필드 참조)
-    billing_cycle = _infer_billing_cycle(agent)
-    amount        = TIER_PRICE_MAP.get(agent.tier, {}).get(billing_cycle, 99000)
-
-    # special_discount 적용
-    discount = getattr(agent, "special_discount", 0) or 0
-    amount   = int(amount * (1 - discount / 100))
-
-    import uuid
-    order_id   = str(uuid.uuid4())
-    order_name = f"UNIFLOW {agent.tier} ({billing_cycle}) 자동갱신"
-
-    try:
-        import httpx, asyncio, json
-
-        async def _call_toss():
-            async with httpx.AsyncClient() as client:
-                return await client.post(
-                    f"{TOSS_API_BASE}/billing/{agent.billing_key}",
-                    headers={
-                        "Authorization": auth_header,
-                        "Content-Type": "application/json",
-                    },
-                    json={
-                        "customerKey": agent.id,
-                        "amount":      amount,
-                        "orderId":     order_id,
-                        "orderName":   order_name,
-                        "metadata": {
-                            "agentId":      agent.id,
-                            "tier":         agent.tier,
-                            "billing_cycle": billing_cycle,
-                        },
-                    },
-                    timeout=15.0,
-                )
-
-        resp = asyncio.run(_call_toss())
-
-        if resp.status_code == 200:
-            now = datetime.now()
-            days = PLAN_CYCLE_DAYS.get(billing_cycle, 30)
-            agent.subscription_end_date   = agent.subscription_end_date + timedelta(days=days)
-            agent.subscription_expires_at = agent.subscription_end_date
-            agent.last_payment_date       = now
-            agent.subscription_status     = "active"
-            logger.info(f"[AutoRenew] 갱신 성공: {agent.email} / {amount:,}원")
-        else:
-            err = resp.json()
-            logger.error(f"[AutoRenew] 갱신 실패: {agent.email} — {err}")
-            _handle_renewal_failure(agent)
-
-    except Exception as e:
-        logger.error(f"[AutoRenew] 예외 발생: {agent.email} — {e}")
-        _handle_renewal_failure(agent)
-
-
-def _handle_renewal_failure(agent: User):
-    """갱신 실패 시 payment_failed 상태로 전환 + 유예 부여"""
-    agent.subscription_status   = "payment_failed"
-    agent.grace_period_end_date = datetime.now() + timedelta(days=PAYMENT_FAIL_GRACE)
-    _send_payment_failed_email(agent)
+    _process_in_chunks("grace_period_block", run_key, lambda db: db.query(User).filter(
+        User.subscription_status == "expired",
+        User.grace_period_end_date <= now,
+    ), block)
 
 
 def _infer_billing_cycle(agent: User) -> str:
@@ -251,9 +256,9 @@ def _infer_billing_cycle(agent: User) -> str:
     return "monthly"
 
 
-# ── 이메일 템플릿 ─────────────────────────────────────────────
+# ── 이메일 템플릿 (발송은 mail_outbox) ────────────────────────
 
-def _send_trial_expiry_email(agent: User, days_left: int):
+def _trial_expiry_email(agent: User, days_left: int) -> Mail:
     subject = (
         f"[UNIFLOW] 무료 체험이 오늘 종료됩니다"
         if days_left == 0
@@ -286,10 +291,10 @@ def _send_trial_expiry_email(agent: User, days_left: int):
         </p>
     </div>
     """
-    send_email(agent.email, subject, body)
+    return agent.email, subject, body
 
 
-def _send_renewal_remind_email(agent: User):
+def _renewal_remind_email(agent: User) -> Mail:
     billing_cycle = _infer_billing_cycle(agent)
     amount        = TIER_PRICE_MAP.get(agent.tier, {}).get(billing_cycle, 99000)
     discount      = getattr(agent, "special_discount", 0) or 0
@@ -310,10 +315,10 @@ def _send_renewal_remind_email(agent: User):
         <p style="color:#666;font-size:13px;">결제 수단 변경이 필요하시면 미리 마이페이지에서 업데이트해 주세요.</p>
     </div>
     """
-    send_email(agent.email, subject, body)
+    return agent.email, subject, body
 
 
-def _send_payment_failed_email(agent: User):
+def _payment_failed_email(agent: User) -> Mail:
     subject = "[UNIFLOW] 자동 결제가 실패했습니다"
     body = f"""
     <div style="font-family:sans-serif;max-width:600px;margin:0 auto;padding:20px;border:1px solid #eee;border-radius:10px;">
@@ -327,4 +332,4 @@ def _send_payment_failed_email(agent: User):
         </div>
     </div>
     """
-    send_email(agent.email, subject, body)
+    return agent.email, subject, body
@@ -0,0 +1,132 @@
+"""
+VIP 홈 대시보드 집계 (HTTP 요청 1번 / SQL 2번)
+- load_snapshot(): VIP + 담당 에이전트 + 최신 건강 지표 + 현재 퀘스트 + 활동 건수를 조인/스칼라 서브쿼리로 1번에 조회
+- recent_timeline(): 리포트 / 완료 퀘스트 / 지표 업데이트를 UNION ALL로 합쳐 DB에서 정렬 + LIMIT
+"""
+from typing import List, Optional
+
+from sqlalchemy import and_, func, literal, select, union_all
+from sqlalchemy.orm import Session, aliased
+
+from app.models import AgentNote, HealthIndex, Quest, Report, User, VipCurrentHealth
+from app.services.health_projection import DEFAULT_SCORE, HEALTH_FIELDS
+
+
+def _count(model, *conditions):
+    return select(func.count()).select_from(model).where(*conditions).scalar_subquery()
+
+
+def activity_counts(vip_id: str):
+    """활동 건수 스칼라 서브쿼리 (리포트 / 상담 메모 / 완료 퀘스트 / 전체 퀘스트)"""
+    return {
+        "reports": _count(Report, Report.user_id == vip_id),
+        "consultations": _count(AgentNote, AgentNote.vip_id == vip_id),
+        "quests": _count(Quest, Quest.vip_id == vip_id, Quest.status == "completed"),
+        "quests_total": _count(Quest, Quest.vip_id == vip_id),
+    }
+
+
+def load_activity_counts(db: Session, vip_id: str) -> dict:
+    counts = activity_counts(vip_id)
+    row = db.execute(select(*(c.label(name) for name, c in counts.items()))).one()
+    return dict(row._mapping)
+
+
+def load_snapshot(db: Session, vip_id: str) -> Optional[dict]:
+    """대시보드 상단 데이터 (쿼리 1번). VIP가 없으면 None"""
+    agent = aliased(User)
+    # 현재 퀘스트: 잠금 해제 + 미완료 중 가장 앞 순서 (app/api/vip._get_current_quest와 같은 기준)
+    current_quest_id = (
+        select(Quest.id)
+        .where(Quest.vip_id == User.id, Quest.is_locked == False, Quest.status != "completed")
+        .order_by(Quest.quest_order.asc())
+        .limit(1)
+        .correlate(User)
+        .scalar_subquery()
+    )
+    counts = activity_counts(vip_id)
+    stmt = (
+        select(
+            User.id.label("vip_id"),
+            User.name.label("vip_name"),
+            agent.id.label("agent_id"),
+            agent.name.label("agent_name"),
+            agent.email.label("agent_email"),
+            agent.phone.label("agent_phone"),
+            agent.specialty.label("agent_specialty"),
+            agent.intro.label("agent_intro"),
+            *(getattr(VipCurrentHealth, f).label(f) for f in HEALTH_FIELDS),
+            VipCurrentHealth.created_at.label("health_created_at"),
+            Quest.id.label("quest_id"),
+            Quest.title.label("quest_title"),
+            Quest.category.label("quest_category"),
+            Quest.status.label("quest_status"),
+            Quest.quest_order.label("quest_order"),
+            Quest.due_date.label("quest_due_date"),
+            *(c.label(f"count_{name}") for name, c in counts.items()),
+        )
+        .select_from(User)
+        .outerjoin(agent, agent.id == User.created_by)
+        .outerjoin(VipCurrentHealth, VipCurrentHealth.vip_id == User.id)
+        .outerjoin(Quest, Quest.id == current_quest_id)
+        .where(User.id == vip_id)
+    )
+    row = db.execute(stmt).first()
+    if row is None:
+        return None
+    r = row._mapping
+
+    health = {f: r[f] if r[f] is not None else DEFAULT_SCORE for f in HEALTH_FIELDS}
+    health["created_at"] = r["health_created_at"]
+    return {
+        "vip": {"id": r["vip_id"], "name": r["vip_name"]},
+        "health": health,
+        "current_quest": {
+            "id": r["quest_id"],
+            "title": r["quest_title"],
+            "category": r["quest_category"],
+            "status": r["quest_status"],
+            "quest_order": r["quest_order"],
+            "due_date": r["quest_due_date"],
+        } if r["quest_id"] else None,
+        "agent": {
+            "id": r["agent_id"],
+            "name": r["agent_name"],
+            "email": r["agent_email"],
+            "phone": r["agent_phone"],
+            "specialty": r["agent_specialty"],
+            "intro": r["agent_intro"],
+        } if r["agent_id"] else None,
+        "stats": {name: r[f"count_{name}"] for name in counts},
+    }
+
+
+def recent_timeline(db: Session, vip_id: str, limit: int = 5, per_type: int = 3) -> List[dict]:
+    """
+    최근 활동 (쿼리 1번)
+    - 유형별 최신 per_type건을 UNION ALL로 합친 뒤 날짜 역순 limit건
+    """
+    def branch(kind, title, date_col, *conditions):
+        sub = (
+            select(literal(kind).label("type"), title.label("title"), date_col.label("date"))
+            .where(*conditions)
+            .order_by(date_col.desc())
+            .limit(per_type)
+            .subquery()
+        )
+        return select(sub.c.type, sub.c.title, sub.c.date)
+
+    timeline = union_all(
+        branch("report", func.coalesce(Report.title, "비즈니스 진단 리포트"), Report.created_at,
+               Report.user_id == vip_id),
+        branch("quest", Quest.title, Quest.completed_at,
+               and_(Quest.vip_id == vip_id, Quest.status == "completed")),
+        branch("health", literal("건강 지표 업데이트"), HealthIndex.created_at,
+               HealthIndex.vip_id == vip_id),
+    ).subquery()
+    rows = db.execute(
+        select(timeline.c.type, timeline.c.title, timeline.c.date)
+        .order_by(timeline.c.date.desc().nulls_last())
+        .limit(limit)
+    )
+    return [dict(row._mapping) for row in rows]
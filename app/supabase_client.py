@@ -1,16 +1,116 @@
-from supabase import create_client, Client
+"""
+Supabase 클라이언트 (프로세스당 1개 재사용)
+- create_client()는 PostgREST / Storage / Auth용 HTTP 세션을 새로 만들기 때문에
+  호출마다 만들지 않고 첫 사용 시 1번 생성 (lazy, 스레드 안전)
+- get_supabase_admin(): 동기 클라이언트 (동기 엔드포인트 / 스레드풀)
+- get_supabase_async(): 비동기 클라이언트 (async 엔드포인트에서 이벤트 루프를 막지 않음)
+- FastAPI lifespan 종료 시 supabase_clients.shutdown()으로 HTTP 세션 정리
+"""
+from typing import Optional
+import asyncio
+import logging
+import threading
+
+from supabase import AsyncClient, AsyncClientOptions, Client, ClientOptions, acreate_client, create_client
 from app.config import get_settings
 
+logger = logging.getLogger(__name__)
 settings = get_settings()
 
 supabase_url = settings.supabase_url
 supabase_key = settings.supabase_service_role_key
 
-def get_supabase_admin() -> Client:
-    """서비스 롤 키로 Supabase 클라이언트를 반환합니다."""
+# 서비스 롤 키 전용: 로그인 세션 저장 / 토큰 자동 갱신 불필요
+_SESSION_OPTIONS = {"auto_refresh_token": False, "persist_session": False}
+
+# 지연 생성되는 하위 클라이언트 (생성된 것만 닫음 — 공개 속성은 접근 시 새로 생성됨)
+_COMPONENTS = ("_postgrest", "_storage", "_functions", "auth")
+_HTTP_ATTRS = ("session", "_http_client", "_client")
+
+
+def _check_credentials():
     if not supabase_url or not supabase_key:
         raise ValueError("Supabase credentials not configured in .env")
-    return create_client(supabase_url, supabase_key)
+
+
+class SupabaseClients:
+    def __init__(self):
+        self._sync: Optional[Client] = None
+        self._async: Optional[AsyncClient] = None
+        self._lock = threading.Lock()
+        self._async_lock: Optional[asyncio.Lock] = None
+
+    def get_sync(self) -> Client:
+        client = self._sync
+        if client is None:
+            with self._lock:
+                if self._sync is None:
+                    _check_credentials()
+                    self._sync = create_client(supabase_url, supabase_key, options=ClientOptions(**_SESSION_OPTIONS))
+                    logger.info("[Supabase] 동기 클라이언트 생성")
+                client = self._sync
+        return client
+
+    async def get_async(self) -> AsyncClient:
+        if self._async is None:
+            if self._async_lock is None:
+                self._async_lock = asyncio.Lock()
+            async with self._async_lock:
+                if self._async is None:
+                    _check_credentials()
+                    self._async = await acreate_client(
+                        supabase_url, supabase_key, options=AsyncClientOptions(**_SESSION_OPTIONS)
+                    )
+                    logger.info("[Supabase] 비동기 클라이언트 생성")
+        return self._async
+
+    async def shutdown(self):
+        with self._lock:
+            sync_client, self._sync = self._sync, None
+        async_client, self._async = self._async, None
+        if sync_client is not None:
+            for http in _http_sessions(sync_client):
+                _quietly(http.close)
+        if async_client is not None:
+            for http in _http_sessions(async_client):
+                try:
+                    await http.aclose()
+                except Exception as e:
+                    logger.debug(f"[Supabase] 세션 종료 무시: {e}")
+
+
+def _http_sessions(client):
+    """클라이언트가 이미 만든 하위 클라이언트의 httpx 세션"""
+    seen = set()
+    for name in _COMPONENTS:
+        component = client.__dict__.get(name)
+        if component is None:
+            continue
+        for attr in _HTTP_ATTRS:
+            http = getattr(component, attr, None)
+            if http is not None and hasattr(http, "is_closed") and id(http) not in seen:
+                seen.add(id(http))
+                yield http
+
+
+def _quietly(close):
+    try:
+        close()
+    except Exception as e:
+        logger.debug(f"[Supabase] 세션 종료 무시: {e}")
+
+
+supabase_clients = SupabaseClients()
+
+
+def get_supabase_admin() -> Client:
+    """서비스 롤 키 Supabase 클라이언트 (프로세스 공용 인스턴스)"""
+    return supabase_clients.get_sync()
+
+
+async def get_supabase_async() -> AsyncClient:
+    """서비스 롤 키 비동기 Supabase 클라이언트 (프로세스 공용 인스턴스)"""
+    return await supabase_clients.get_async()
 
 # flow_deck.py 등에서 get_supabase() 이름으로 import하는 경우를 위한 alias
 # (함수명 불일치로 인한 ImportError 방지)
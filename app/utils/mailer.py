@@ -1,8 +1,28 @@
+"""
+메일 발송 모듈 (DB outbox + 백그라운드 SMTP 발송기)
+- send_email() / queue_email()은 mail_outbox에 적재만 하고 즉시 반환 → 요청 지연에 SMTP 핸드셰이크 없음
+  (db를 넘기면 호출자 트랜잭션과 함께 commit — 롤백되면 메일도 발송되지 않음)
+- MailSender 스레드가 인증된 SMTP 연결 하나를 재사용해 여러 통을 연속 발송
+- 실패 시 지수 백오프로 재시도, MAIL_MAX_ATTEMPTS 초과 시 failed
+- SMTP_USER / SMTP_PASSWORD / SENDER_EMAIL이 모두 있어야 발송 (없으면 outbox에 보관)
+  예외: TLS를 끈 로컬 디버그 SMTP(localhost)는 인증 / 발신 주소 없이 발송
+- 로컬 테스트: `python -m app.utils.smtp_debug` 실행 후 SMTP_HOST=localhost SMTP_PORT=1025 SMTP_USE_TLS=false
+"""
 import smtplib
+from datetime import datetime, timedelta, timezone
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
+from typing import List, Optional, Tuple
 import logging
+import threading
+import time
+import uuid
+
+from sqlalchemy.orm import Session
+
 from app.config import get_settings
+from app.database import SessionLocal, engine
+from app.models import MailOutbox
 
 # 로깅 설정
 logging.basicConfig(level=logging.INFO)
@@ -10,38 +30,238 @@ logger = logging.getLogger(__name__)
 
 settings = get_settings()
 
-def send_email(to_email: str, subject: str, body: str):
-    """
-    Gmail SMTP를 이용해 이메일을 발송합니다.
-    """
-    if not settings.smtp_password:
-        logger.error("SMTP_PASSWORD가 설정되지 않았습니다.")
-        return False
+SEND_LEASE = timedelta(minutes=5)  # 발송 중(sending) 선점 유지 시간 — 프로세스가 죽으면 이후 재시도
+RETRY_BASE_SECONDS = 30            # 재시도 대기: 30s, 60s, 120s ...
+SMTP_IDLE_SECONDS = 60             # 이 시간 이상 쉬면 연결을 닫고 다음 발송 때 재연결
+LOCAL_SMTP_HOSTS = ("localhost", "127.0.0.1", "::1")
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+# ─── outbox 적재 ───────────────────────────────────────
+
+def enqueue_email(db: Session, to_email: str, subject: str, body: str):
+    """호출자 세션에 outbox 행 추가 (commit은 호출자가 수행)"""
+    db.add(MailOutbox(
+        id=str(uuid.uuid4()),
+        to_email=to_email,
+        subject=subject,
+        body=body,
+        status="pending",
+        attempts=0,
+        next_attempt_at=_utcnow(),
+    ))
+
 
+def queue_email(to_email: str, subject: str, body: str) -> bool:
+    """별도 세션으로 outbox에 적재 후 즉시 commit"""
+    db = SessionLocal()
     try:
-        # 메시지 구성
-        msg = MIMEMultipart()
-        msg['From'] = f"UNIFLOW <{settings.sender_email}>"
-        msg['To'] = to_email
-        msg['Subject'] = subject
-        
-        msg.attach(MIMEText(body, 'html'))
-        
-        # SMTP 서버 연결
-        server = smtplib.SMTP(settings.smtp_host, settings.smtp_port)
-        server.starttls() # TLS 보안 시작
-        
-        # 로그인 및 발송
-        server.login(settings.smtp_user, settings.smtp_password)
-        server.send_message(msg)
-        server.quit()
-        
-        logger.info(f"이메일 발송 성공: {to_email}")
+        enqueue_email(db, to_email, subject, body)
+        db.commit()
+        mail_sender.wake()
         return True
-        
     except Exception as e:
-        logger.error(f"이메일 발송 실패 ({to_email}): {str(e)}")
+        db.rollback()
+        logger.error(f"이메일 발송 대기열 적재 실패 ({to_email}): {str(e)}")
         return False
+    finally:
+        db.close()
+
+
+def send_email(to_email: str, subject: str, body: str, db: Optional[Session] = None) -> bool:
+    """
+    이메일 발송 요청 (outbox 적재). 실제 발송은 MailSender가 수행
+    - db 전달 시 호출자 트랜잭션에 포함 (호출자가 commit)
+    """
+    if db is not None:
+        enqueue_email(db, to_email, subject, body)
+        return True
+    return queue_email(to_email, subject, body)
+
+
+# ─── SMTP 발송 ─────────────────────────────────────────
+
+def smtp_configured() -> bool:
+    """발송 가능한 SMTP 설정인지 (인증 없이 / 빈 발신 주소로 보내면 서버가 거부해 재시도만 소진됨)"""
+    if not settings.smtp_host:
+        return False
+    if not settings.smtp_use_tls and settings.smtp_host in LOCAL_SMTP_HOSTS:
+        return True  # 로컬 디버그 SMTP (app.utils.smtp_debug)
+    return bool(settings.smtp_user and settings.smtp_password and settings.sender_email)
+
+
+def _build_message(to_email: str, subject: str, body: str) -> MIMEMultipart:
+    msg = MIMEMultipart()
+    msg['From'] = f"UNIFLOW <{settings.sender_email}>"
+    msg['To'] = to_email
+    msg['Subject'] = subject
+    msg.attach(MIMEText(body, 'html'))
+    return msg
+
+
+class SmtpConnection:
+    """인증된 SMTP 연결 재사용 (끊기면 1회 재연결)"""
+
+    def __init__(self):
+        self._server: Optional[smtplib.SMTP] = None
+        self._last_used = 0.0
+
+    def _connect(self) -> smtplib.SMTP:
+        server = smtplib.SMTP(settings.smtp_host, settings.smtp_port, timeout=30)
+        if settings.smtp_use_tls:
+            server.starttls()  # TLS 보안 시작
+        if settings.smtp_user:
+            server.login(settings.smtp_user, settings.smtp_password)
+        return server
+
+    def close_if_idle(self):
+        if self._server is not None and time.monotonic() - self._last_used > SMTP_IDLE_SECONDS:
+            self.close()
+
+    def send(self, msg: MIMEMultipart):
+        self.close_if_idle()
+        try:
+            if self._server is None:
+                self._server = self._connect()
+            self._server.send_message(msg)
+        except (smtplib.SMTPServerDisconnected, ConnectionError):
+            self.close()
+            self._server = self._connect()
+            self._server.send_message(msg)
+        self._last_used = time.monotonic()
+
+    def close(self):
+        if self._server is None:
+            return
+        try:
+            self._server.quit()
+        except Exception:
+            pass
+        self._server = None
+
+
+class MailSender:
+    """mail_outbox 폴링 → 발송 → 결과 기록 (백그라운드 스레드)"""
+
+    def __init__(self, poll_seconds: float = 2.0):
+        self.poll_seconds = poll_seconds
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._smtp = SmtpConnection()
+        self._warned_unconfigured = False
+
+    def _claim_batch(self) -> List[Tuple[str, str, str, str, int]]:
+        """발송 대상 선점 (PostgreSQL: SKIP LOCKED로 인스턴스 간 중복 발송 방지)"""
+        db = SessionLocal()
+        try:
+            now = _utcnow()
+            query = db.query(MailOutbox).filter(
+                MailOutbox.status.in_(("pending", "sending")),
+                MailOutbox.next_attempt_at <= now,
+            ).order_by(MailOutbox.next_attempt_at).limit(settings.mail_batch_size)
+            if engine.dialect.name == "postgresql":
+                query = query.with_for_update(skip_locked=True)
+
+            batch = []
+            for row in query.all():
+                batch.append((row.id, row.to_email, row.subject, row.body, row.attempts or 0))
+                row.status = "sending"
+                row.next_attempt_at = now + SEND_LEASE
+            db.commit()
+            return batch
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def _record(self, results: List[Tuple[str, int, Optional[str], bool]]):
+        """(id, attempts, error, permanent) 목록을 한 트랜잭션으로 반영"""
+        db = SessionLocal()
+        try:
+            now = _utcnow()
+            for mail_id, attempts, error, permanent in results:
+                values = {MailOutbox.attempts: attempts, MailOutbox.last_error: error}
+                if error is None:
+                    values.update({MailOutbox.status: "sent", MailOutbox.sent_at: now})
+                elif permanent or attempts >= settings.mail_max_attempts:
+                    values[MailOutbox.status] = "failed"
+                else:
+                    values.update({
+                        MailOutbox.status: "pending",
+                        MailOutbox.next_attempt_at: now + timedelta(seconds=RETRY_BASE_SECONDS * 2 ** (attempts - 1)),
+                    })
+                db.query(MailOutbox).filter(MailOutbox.id == mail_id).update(values, synchronize_session=False)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.error(f"이메일 발송 결과 기록 실패: {str(e)}")
+        finally:
+            db.close()
+
+    def process_once(self) -> int:
+        """대기 중인 메일 한 묶음 발송. 처리 건수 반환"""
+        # SMTP 미설정 시 발송하지 않고 outbox에 보관 (설정 후 순차 발송)
+        if not smtp_configured():
+            if not self._warned_unconfigured:
+                logger.warning("SMTP_USER / SMTP_PASSWORD / SENDER_EMAIL 미설정 — 메일은 outbox에 보관만 합니다")
+                self._warned_unconfigured = True
+            return 0
+        batch = self._claim_batch()
+        results = []
+        for mail_id, to_email, subject, body, attempts in batch:
+            try:
+                self._smtp.send(_build_message(to_email, subject, body))
+                results.append((mail_id, attempts + 1, None, False))
+                logger.info(f"이메일 발송 성공: {to_email}")
+            except smtplib.SMTPRecipientsRefused as e:
+                # 수신자 거부는 재시도해도 실패
+                results.append((mail_id, attempts + 1, str(e), True))
+                logger.error(f"이메일 발송 실패 ({to_email}): {str(e)}")
+            except Exception as e:
+                self._smtp.close()
+                results.append((mail_id, attempts + 1, str(e), False))
+                logger.error(f"이메일 발송 실패 ({to_email}): {str(e)}")
+        if results:
+            self._record(results)
+        return len(batch)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                sent = self.process_once()
+            except Exception as e:
+                logger.error(f"이메일 발송기 오류: {str(e)}")
+                sent = 0
+            if sent:
+                continue
+            self._smtp.close_if_idle()
+            self._wake.wait(self.poll_seconds)
+            self._wake.clear()
+
+    def wake(self):
+        self._wake.set()
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="mail-sender", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout=30)
+        self._smtp.close()
+
+
+mail_sender = MailSender()
 
 def send_vip_invite(to_email: str, vip_name: str, invite_link: str):
     """VIP 초대 메일 발송"""
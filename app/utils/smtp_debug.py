@@ -0,0 +1,126 @@
+"""
+로컬 디버깅용 SMTP 수신 서버 (메일을 실제로 보내지 않고 콘솔 출력 / 디렉터리 저장)
+
+사용법:
+    python -m app.utils.smtp_debug --port 1025 --save-dir ./tmp/mail
+    # 앱 쪽 환경변수: SMTP_HOST=localhost SMTP_PORT=1025 SMTP_USE_TLS=false
+
+- EHLO/HELO, AUTH(무조건 허용), MAIL, RCPT, DATA, RSET, NOOP, QUIT만 지원
+- 하나의 연결로 여러 통을 받는 MailSender 연결 재사용 동작 확인용
+"""
+from email import message_from_bytes
+from email.header import decode_header, make_header
+from pathlib import Path
+from typing import Optional
+import argparse
+import asyncio
+import logging
+import uuid
+
+logger = logging.getLogger("smtp_debug")
+
+
+class DebugSmtpSession:
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, save_dir: Optional[Path]):
+        self.reader = reader
+        self.writer = writer
+        self.save_dir = save_dir
+        self.mail_from: Optional[str] = None
+        self.rcpt_to: list = []
+
+    async def reply(self, line: str):
+        self.writer.write(f"{line}\r\n".encode())
+        await self.writer.drain()
+
+    async def read_data(self) -> bytes:
+        lines = []
+        while True:
+            line = await self.reader.readline()
+            if not line or line in (b".\r\n", b".\n"):
+                break
+            if line.startswith(b".."):
+                line = line[1:]  # dot-stuffing 해제
+            lines.append(line)
+        return b"".join(lines)
+
+    def deliver(self, data: bytes):
+        msg = message_from_bytes(data)
+        subject = str(make_header(decode_header(msg.get("Subject", ""))))
+        logger.info(f"[수신] {self.mail_from} → {', '.join(self.rcpt_to)} | {subject} ({len(data)} bytes)")
+        if self.save_dir:
+            path = self.save_dir / f"{uuid.uuid4().hex}.eml"
+            path.write_bytes(data)
+
+    async def handle(self):
+        await self.reply("220 uniflow-debug-smtp ready")
+        while True:
+            raw = await self.reader.readline()
+            if not raw:
+                break
+            line = raw.decode(errors="replace").strip()
+            command = line.split(" ", 1)[0].upper()
+
+            if command in ("EHLO", "HELO"):
+                await self.reply("250-uniflow-debug-smtp")
+                await self.reply("250 AUTH PLAIN LOGIN")
+            elif command == "AUTH":
+                parts = line.split()
+                if len(parts) >= 2 and parts[1].upper() == "LOGIN":
+                    # LOGIN: 사용자명 / 비밀번호를 차례로 받음 (검증 없음)
+                    for prompt in ("334 VXNlcm5hbWU6", "334 UGFzc3dvcmQ6"):
+                        await self.reply(prompt)
+                        await self.reader.readline()
+                elif len(parts) == 2:
+                    await self.reply("334 ")
+                    await self.reader.readline()
+                await self.reply("235 Authentication successful")
+            elif command == "MAIL":
+                self.mail_from, self.rcpt_to = line.split(":", 1)[-1].strip(), []
+                await self.reply("250 OK")
+            elif command == "RCPT":
+                self.rcpt_to.append(line.split(":", 1)[-1].strip())
+                await self.reply("250 OK")
+            elif command == "DATA":
+                await self.reply("354 End data with <CR><LF>.<CR><LF>")
+                self.deliver(await self.read_data())
+                await self.reply("250 OK: queued")
+            elif command == "RSET":
+                self.mail_from, self.rcpt_to = None, []
+                await self.reply("250 OK")
+            elif command == "NOOP":
+                await self.reply("250 OK")
+            elif command == "QUIT":
+                await self.reply("221 Bye")
+                break
+            else:
+                await self.reply("502 Command not implemented")
+        self.writer.close()
+
+
+async def serve(host: str, port: int, save_dir: Optional[Path]):
+    async def on_connect(reader, writer):
+        await DebugSmtpSession(reader, writer, save_dir).handle()
+
+    server = await asyncio.start_server(on_connect, host, port)
+    logger.info(f"디버그 SMTP 서버 실행: {host}:{port}" + (f" (저장: {save_dir})" if save_dir else ""))
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="로컬 디버깅용 SMTP 수신 서버")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=1025)
+    parser.add_argument("--save-dir", default=None, help="수신 메일(.eml) 저장 디렉터리")
+    args = parser.parse_args()
+
+    save_dir = Path(args.save_dir) if args.save_dir else None
+    if save_dir:
+        save_dir.mkdir(parents=True, exist_ok=True)
+
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(serve(args.host, args.port, save_dir))
+
+
+if __name__ == "__main__":
+    main()
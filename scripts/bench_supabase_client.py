@@ -0,0 +1,132 @@
+"""
+Supabase 클라이언트 생성 비용 측정 (호출마다 create_client() vs 프로세스 공용 인스턴스)
+- 생성만: create_client() 1회 시간 vs supabase_clients.get_sync() 1회 시간
+- 생성 + 조회 1건: 로컬 스텁 PostgREST 서버(기본) 또는 --live 시 .env의 Supabase 프로젝트 대상
+  스텁 서버는 받은 TCP 연결 수도 집계 (호출마다 생성하면 요청마다 새 연결)
+
+사용법:
+    python scripts/bench_supabase_client.py --iterations 200
+    python scripts/bench_supabase_client.py --live --table users --iterations 50
+"""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, List
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from supabase import ClientOptions, create_client  # noqa: E402
+
+from app import supabase_client  # noqa: E402
+
+# create_client()의 키 형식 검사를 통과하는 더미 JWT (스텁 서버 전용)
+STUB_KEY = "eyJhbGciOiJIUzI1NiJ9.eyJyb2xlIjoic2VydmljZV9yb2xlIn0.c3R1Yg"
+
+
+class StubPostgrest:
+    """/rest/v1/* 에 빈 배열을 돌려주는 keep-alive HTTP 서버"""
+
+    def __init__(self):
+        self.connections = 0
+        lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True  # 헤더 / 본문 분할 전송 시 지연 ACK로 40ms씩 늘어나는 것 방지
+
+            def setup(self):
+                super().setup()
+                with lock:
+                    stub.connections += 1
+
+            def do_GET(self):
+                body = b"[]"
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def _options() -> ClientOptions:
+    # app.supabase_client와 같은 옵션 (서비스 롤 키 전용)
+    return ClientOptions(auto_refresh_token=False, persist_session=False)
+
+
+def _timed(fn: Callable[[], None], iterations: int) -> List[float]:
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+def _report(label: str, samples: List[float], extra: str = ""):
+    p95 = sorted(samples)[int(len(samples) * 0.95) - 1]
+    print(
+        f"{label:<34} 평균 {statistics.mean(samples):8.3f}ms  "
+        f"중앙값 {statistics.median(samples):8.3f}ms  p95 {p95:8.3f}ms{extra}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="호출마다 create_client() vs 공용 Supabase 클라이언트")
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--live", action="store_true", help=".env의 SUPABASE_URL / 서비스 롤 키로 실제 요청")
+    parser.add_argument("--table", default="users", help="조회 1건에 쓸 테이블 (select id limit 1)")
+    args = parser.parse_args()
+
+    stub = None
+    if args.live:
+        url, key = supabase_client.supabase_url, supabase_client.supabase_key
+    else:
+        stub = StubPostgrest()
+        url, key = stub.url, STUB_KEY
+        # 공용 인스턴스도 스텁 서버를 보도록 모듈 설정 교체 (이 프로세스 안에서만)
+        supabase_client.supabase_url, supabase_client.supabase_key = url, key
+
+    clients = supabase_client.supabase_clients
+
+    def query(client):
+        client.table(args.table).select("id").limit(1).execute()
+
+    print(f"대상: {'Supabase ' + url if args.live else '로컬 스텁 ' + url} / 반복 {args.iterations}회\n")
+
+    _report("생성만: create_client()", _timed(lambda: create_client(url, key, options=_options()), args.iterations))
+    clients.get_sync()
+    _report("생성만: 공용 인스턴스", _timed(clients.get_sync, args.iterations))
+    print()
+
+    # 이전 동작: 호출마다 새 클라이언트 (닫지 않음)
+    before = stub.connections if stub else 0
+    samples = _timed(lambda: query(create_client(url, key, options=_options())), args.iterations)
+    _report("조회 1건: 호출마다 create_client()", samples, f"  연결 {stub.connections - before}개" if stub else "")
+
+    query(clients.get_sync())  # 연결 수립은 측정에서 제외
+    before = stub.connections if stub else 0
+    samples = _timed(lambda: query(clients.get_sync()), args.iterations)
+    _report("조회 1건: 공용 인스턴스", samples, f"  연결 {stub.connections - before}개" if stub else "")
+
+    if stub:
+        stub.close()
+
+
+if __name__ == "__main__":
+    main()
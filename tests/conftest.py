@@ -0,0 +1,59 @@
+"""
+테스트 공통 설정
+- app 모듈 import 전에 DATABASE_URL을 테스트용으로 교체 (.env의 운영 DB에 연결하지 않도록)
+  기본은 인메모리 SQLite, PostgreSQL 테스트는 TEST_DATABASE_URL이 있을 때만 실행
+- TEST_DATABASE_URL은 비워 둔 전용 DB (pg_engine이 public 스키마를 지우고 alembic upgrade head 적용)
+  예) TEST_DATABASE_URL=postgresql+psycopg2://postgres@localhost/uniflow_test python -m pytest
+"""
+from pathlib import Path
+import os
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+TEST_DATABASE_URL = os.environ.get("TEST_DATABASE_URL", "")
+
+os.environ["DATABASE_URL"] = TEST_DATABASE_URL or "sqlite://"
+os.environ["DATABASE_REPLICA_URL"] = ""
+os.environ["REDIS_URL"] = ""
+os.environ["SCHEDULER_ENABLED"] = "false"
+
+
+@pytest.fixture(scope="session")
+def pg_engine():
+    """마이그레이션(head)까지 적용된 PostgreSQL 엔진"""
+    if not TEST_DATABASE_URL.startswith("postgresql"):
+        pytest.skip("TEST_DATABASE_URL(PostgreSQL) 미설정")
+
+    from alembic import command
+    from alembic.config import Config
+    from sqlalchemy import text
+
+    from app.database import engine
+
+    with engine.begin() as conn:
+        conn.execute(text("DROP SCHEMA public CASCADE"))
+        conn.execute(text("CREATE SCHEMA public"))
+
+    config = Config(str(ROOT / "alembic.ini"))
+    config.set_main_option("script_location", str(ROOT / "alembic"))
+    command.upgrade(config, "head")
+    return engine
+
+
+@pytest.fixture
+def pg_db(pg_engine):
+    """테스트별 세션 (종료 후 alembic_version 외 모든 테이블 비움)"""
+    from sqlalchemy import inspect, text
+
+    from app.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.rollback()
+        db.close()
+        tables = [t for t in inspect(pg_engine).get_table_names() if t != "alembic_version"]
+        with pg_engine.begin() as conn:
+            conn.execute(text("TRUNCATE " + ", ".join(f'"{t}"' for t in tables) + " CASCADE"))
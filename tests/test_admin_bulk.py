@@ -0,0 +1,207 @@
+"""
+관리자 에이전트 일괄 작업 (app/services/admin_bulk.py + app/api/admin.py)
+- 연장 / 등급 / 상태 / VIP 한도: SQLite는 SELECT 후 UPDATE, PostgreSQL은 UPDATE ... FROM users old RETURNING
+- API 테스트는 PostgreSQL 전용
+"""
+from datetime import datetime, timedelta
+import json
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+import pytest
+
+from app.api import admin
+from app.database import SessionLocal, engine
+from app.models import AdminAction, User
+from app.services.admin_bulk import (
+    TIER_RULES, bulk_change_status, bulk_change_tier, bulk_change_vip_limit, bulk_extend,
+)
+
+NOW = datetime.now().replace(microsecond=0)
+IDS = ["agent-1", "agent-2", "vip-1", "agent-1", "missing"]  # 에이전트가 아니거나 없는 id / 중복은 제외
+
+
+@pytest.fixture
+def db(request):
+    if engine.dialect.name == "postgresql":
+        session = request.getfixturevalue("pg_db")
+    else:
+        for table in (User.__table__, AdminAction.__table__):
+            table.create(engine)
+        session = SessionLocal()
+    session.add_all([
+        User(id="admin-1", name="관리자", role="admin"),
+        User(id="agent-1", name="A1", role="agent", tier="monthly", subscription_status="active",
+             subscription_end_date=NOW + timedelta(days=10), vip_limit=50),
+        User(id="agent-2", name="A2", role="agent", tier="yearly", subscription_status="expired",
+             subscription_end_date=NOW - timedelta(days=5), grace_period_end_date=NOW + timedelta(days=2), vip_limit=50),
+        User(id="agent-3", name="A3", role="agent", tier="free", subscription_status="trial", vip_limit=5),
+        User(id="vip-1", name="V1", role="vip", subscription_status="active"),
+    ])
+    session.commit()
+    yield session
+    if engine.dialect.name != "postgresql":
+        session.close()
+        for table in (AdminAction.__table__, User.__table__):
+            table.drop(engine)
+
+
+def _naive(value):
+    # PostgreSQL은 timestamptz를 세션 시간대로 돌려줌 (naive 입력과 같은 벽시계 시각)
+    return value.replace(tzinfo=None) if value is not None and value.tzinfo else value
+
+
+def _agent(db, agent_id):
+    db.expire_all()
+    return db.get(User, agent_id)
+
+
+def _actions(db, action_type):
+    db.expire_all()
+    rows = db.query(AdminAction).filter(AdminAction.action_type == action_type).order_by(AdminAction.target_agent_id)
+    return [
+        (r.admin_id, r.target_agent_id, json.loads(r.old_value) if r.old_value else None,
+         json.loads(r.new_value) if r.new_value else None)
+        for r in rows
+    ]
+
+
+def test_bulk_extend_by_days(db):
+    result = bulk_extend(db, "admin-1", IDS, days=30, action_type="bulk_extend", now=NOW)
+    db.commit()
+
+    assert sorted(result.updated_ids) == ["agent-1", "agent-2"]
+    first, second = _agent(db, "agent-1"), _agent(db, "agent-2")
+    # 남은 기간이 있으면 만료일 + 30일, 이미 지났으면 지금 + 30일 / 만료 상태는 활성으로 복구
+    assert _naive(first.subscription_end_date) == NOW + timedelta(days=40)
+    assert (_naive(second.subscription_end_date), second.subscription_status) == (NOW + timedelta(days=30), "active")
+    assert second.grace_period_end_date is None
+    assert first.subscription_status == "active"
+    assert _agent(db, "vip-1").subscription_end_date is None
+    assert _actions(db, "bulk_extend") == [
+        ("admin-1", "agent-1", None, "+30 days"), ("admin-1", "agent-2", None, "+30 days"),
+    ]
+
+
+def test_bulk_extend_to_date(db):
+    end = NOW + timedelta(days=100)
+    result = bulk_extend(db, "admin-1", ["agent-1"], end_date=end, now=NOW)
+    db.commit()
+
+    assert result.updated_ids == ["agent-1"]
+    assert _naive(_agent(db, "agent-1").subscription_end_date) == end
+    ((_, _, old, new),) = _actions(db, "extend")
+    assert (datetime.fromisoformat(old).replace(tzinfo=None), datetime.fromisoformat(new).replace(tzinfo=None)) == (
+        NOW + timedelta(days=10), end,
+    )
+
+    with pytest.raises(ValueError):
+        bulk_extend(db, "admin-1", ["agent-1"], now=NOW)
+
+
+@pytest.mark.parametrize("tier", list(TIER_RULES))
+def test_bulk_change_tier_applies_tier_rules(db, tier):
+    result = bulk_change_tier(db, "admin-1", IDS, tier, now=NOW)
+    db.commit()
+
+    rule = TIER_RULES[tier]
+    assert sorted(result.updated_ids) == ["agent-1", "agent-2"]
+    for agent_id in result.updated_ids:
+        agent = _agent(db, agent_id)
+        assert (agent.tier, agent.subscription_status, agent.vip_limit) == (tier, rule["status"], rule["vip_limit"])
+        if rule["trial_days"]:
+            assert _naive(agent.trial_end_date) == NOW + timedelta(days=rule["trial_days"])
+            assert agent.subscription_end_date is None
+        else:
+            expected_end = NOW + timedelta(days=rule["days"]) if rule["days"] else None
+            assert (_naive(agent.subscription_end_date), agent.trial_end_date) == (expected_end, None)
+    assert _actions(db, "tier_change") == [
+        ("admin-1", "agent-1", {"tier": "monthly", "vip_limit": 50, "status": "active"}, {"tier": tier}),
+        ("admin-1", "agent-2", {"tier": "yearly", "vip_limit": 50, "status": "expired"}, {"tier": tier}),
+    ]
+
+    with pytest.raises(ValueError):
+        bulk_change_tier(db, "admin-1", IDS, "platinum", now=NOW)
+
+
+def test_bulk_change_status(db):
+    bulk_change_status(db, "admin-1", ["agent-1", "agent-2"], "active", now=NOW)
+    db.commit()
+    # 만료일이 남아 있으면 유지, 지났으면 등급 기준(연간 365일)으로 연장
+    assert _naive(_agent(db, "agent-1").subscription_end_date) == NOW + timedelta(days=10)
+    second = _agent(db, "agent-2")
+    assert (second.subscription_status, _naive(second.subscription_end_date)) == ("active", NOW + timedelta(days=365))
+    assert second.grace_period_end_date is None
+
+    bulk_change_status(db, "admin-1", ["agent-1"], "expired", now=NOW)
+    bulk_change_status(db, "admin-1", ["agent-3", "vip-1"], "lifetime", now=NOW)
+    db.commit()
+    assert _naive(_agent(db, "agent-1").grace_period_end_date) == NOW + timedelta(days=7)
+    third = _agent(db, "agent-3")
+    assert (third.subscription_status, third.tier, third.subscription_end_date) == ("lifetime", "core_member", None)
+    assert _agent(db, "vip-1").subscription_status == "active"
+    assert [(target, old, new) for _, target, old, new in _actions(db, "status_change")] == [
+        ("agent-1", "active", "active"), ("agent-1", "active", "expired"),
+        ("agent-2", "expired", "active"), ("agent-3", "trial", "lifetime"),
+    ]
+
+
+def test_bulk_change_vip_limit(db):
+    result = bulk_change_vip_limit(db, "admin-1", IDS, 120)
+    db.commit()
+
+    assert sorted(result.updated_ids) == ["agent-1", "agent-2"]
+    assert (_agent(db, "agent-1").vip_limit, _agent(db, "agent-3").vip_limit) == (120, 5)
+    assert _actions(db, "vip_limit_change") == [
+        ("admin-1", "agent-1", {"vip_limit": 50}, {"vip_limit": 120}),
+        ("admin-1", "agent-2", {"vip_limit": 50}, {"vip_limit": 120}),
+    ]
+    assert bulk_change_vip_limit(db, "admin-1", [], 120).count == 0
+
+
+# ── API ──────────────────────────────────────────────────────
+
+@pytest.fixture
+def client(pg_db, db):
+    app = FastAPI()
+    app.include_router(admin.router, prefix="/api/admin")
+    return TestClient(app)
+
+
+def test_single_tier_endpoint_uses_tier_rules(client, db):
+    response = client.patch("/api/admin/agents/agent-3/tier", json={"tier": "core_member", "admin_id": "admin-1"})
+
+    assert response.json()["agent"] == {"id": "agent-3", "tier": "core_member", "status": "lifetime"}
+    agent = _agent(db, "agent-3")
+    assert (agent.vip_limit, agent.subscription_end_date) == (TIER_RULES["core_member"]["vip_limit"], None)
+    assert _actions(db, "tier_change") == [
+        ("admin-1", "agent-3", {"tier": "free", "vip_limit": 5, "status": "trial"}, {"tier": "core_member"}),
+    ]
+
+    assert client.patch("/api/admin/agents/agent-3/tier", json={"tier": "platinum", "admin_id": "admin-1"}).status_code == 400
+    assert client.patch("/api/admin/agents/vip-1/tier", json={"tier": "monthly", "admin_id": "admin-1"}).status_code == 404
+    assert client.patch("/api/admin/agents/agent-3/tier", json={"tier": "monthly", "admin_id": "agent-1"}).status_code == 403
+
+
+def test_bulk_endpoints(client, db):
+    response = client.patch("/api/admin/agents/bulk-tier", json={"agent_ids": IDS, "tier": "yearly", "admin_id": "admin-1"})
+    assert response.json()["updated_count"] == 2
+
+    response = client.patch("/api/admin/agents/bulk-vip-limit", json={"agent_ids": ["agent-3"], "vip_limit": 10, "admin_id": "admin-1"})
+    assert response.json()["updated_ids"] == ["agent-3"]
+
+    response = client.patch("/api/admin/agents/bulk-status", json={"agent_ids": ["agent-3"], "subscription_status": "expired", "admin_id": "admin-1"})
+    assert response.json()["updated_count"] == 1
+
+    response = client.patch("/api/admin/agents/bulk-extend", json={"agent_ids": ["agent-3"], "subscription_end_date": "2030-01-31", "admin_id": "admin-1"})
+    assert response.json()["updated_count"] == 1
+    assert _naive(_agent(db, "agent-3").subscription_end_date) == datetime(2030, 1, 31)
+
+
+@pytest.mark.parametrize("body", [{"subscription_end_date": "31/01/2030"}, {}])
+def test_bulk_extend_rejects_bad_input(client, db, body):
+    response = client.patch("/api/admin/agents/bulk-extend", json={"agent_ids": ["agent-1"], "admin_id": "admin-1", **body})
+
+    assert response.status_code == 400
+    assert _naive(_agent(db, "agent-1").subscription_end_date) == NOW + timedelta(days=10)
+    assert _actions(db, "bulk_extend") == []
@@ -0,0 +1,82 @@
+"""어드민 인사이트 분석 API (app/api/analytics.py, JSONB SQL — PostgreSQL 전용)"""
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+import pytest
+
+from app.api import analytics
+from app.models import Report, Survey, User
+
+
+def _survey(survey_id, industry, responses):
+    return Survey(
+        id=survey_id, name="대표", phone=f"010-0000-000{survey_id}", business_type="대표",
+        industry=industry, years_in_business=3, revenue_range="1억 미만", team_size=2, responses=responses,
+    )
+
+
+def _report(report_id, survey_id, persona, urgency, bottlenecks):
+    return Report(
+        id=report_id, survey_id=survey_id, user_id="vip-1", persona_type=persona, urgency_score=urgency,
+        bottlenecks=bottlenecks, insights={}, recommendations={}, narrative_text="",
+        monthly_time_loss=10, monthly_cost_loss=100000, growth_delay_months=1,
+    )
+
+
+@pytest.fixture
+def client(pg_db):
+    pg_db.add(User(id="vip-1", name="VIP", role="vip"))
+    pg_db.add_all([
+        _survey(1, "요식업", {"q1": "A", "q2": "예"}),
+        _survey(2, "요식업", {"q1": "B"}),
+        _survey(3, "IT", {"q1": "A"}),
+    ])
+    pg_db.add_all([
+        _report(1, 1, "solo", 8, {"bottlenecks": [
+            {"category": "marketing", "urgency": 8}, {"category": "finance", "urgency": "6"},
+        ]}),
+        _report(2, 2, "solo", 6, {"bottlenecks": [{"category": "marketing", "urgency": 4}, {"urgency": ""}]}),
+        _report(3, 3, "team", 8, {"bottlenecks": [{"category": "hiring", "urgency": 9}]}),
+        _report(4, 3, "team", 3, {"bottlenecks": "분석 실패"}),  # 배열이 아닌 레코드
+    ])
+    pg_db.commit()
+
+    app = FastAPI()
+    app.include_router(analytics.router, prefix="/api/admin/analytics")
+    return TestClient(app)
+
+
+def test_bottleneck_frequency_by_industry(client):
+    body = client.get("/api/admin/analytics/bottlenecks/by-industry").json()
+    assert body["IT"] == [{"category": "hiring", "count": 1, "avg_urgency": 9.0}]
+    # 건수 내림차순 (동률끼리는 순서 무관)
+    assert body["요식업"][0] == {"category": "marketing", "count": 2, "avg_urgency": 6.0}
+    assert sorted(body["요식업"][1:], key=lambda r: r["category"]) == [
+        {"category": "finance", "count": 1, "avg_urgency": 6.0},
+        {"category": "unknown", "count": 1, "avg_urgency": None},
+    ]
+    filtered = client.get("/api/admin/analytics/bottlenecks/by-industry", params={"industry": "IT"}).json()
+    assert list(filtered) == ["IT"]
+
+
+def test_urgency_distribution_by_persona(client):
+    assert client.get("/api/admin/analytics/urgency/by-persona").json() == {
+        "solo": {"total": 2, "distribution": {"6": 1, "8": 1}},
+        "team": {"total": 2, "distribution": {"3": 1, "8": 1}},
+    }
+
+
+def test_reports_by_bottleneck_category(client):
+    body = client.get("/api/admin/analytics/bottlenecks/reports", params={"category": "marketing"}).json()
+    assert body["total"] == 2
+    assert sorted(r["id"] for r in body["reports"]) == [1, 2]
+
+    limited = client.get("/api/admin/analytics/bottlenecks/reports", params={"category": "marketing", "limit": 1}).json()
+    assert (limited["total"], len(limited["reports"])) == (2, 1)
+
+
+def test_survey_answer_distribution(client):
+    body = client.get("/api/admin/analytics/surveys/answers", params={"question_key": "q1"}).json()
+    assert body == {"question_key": "q1", "total": 3, "answers": [{"answer": "A", "count": 2}, {"answer": "B", "count": 1}]}
+
+    body = client.get("/api/admin/analytics/surveys/answers", params={"question_key": "q2", "industry": "요식업"}).json()
+    assert body["answers"] == [{"answer": "예", "count": 1}]
@@ -0,0 +1,212 @@
+"""
+Supabase Auth 계정 식별 (app/services/auth_identity.py) — 가짜 Admin 클라이언트 대상
+- 인덱스 값은 get_user_by_id로 확인, 다르거나 없으면 list_users 폴백
+- 저장된 auth_id가 404면 이메일로 재검색, 이메일 중복으로 생성 실패 시 유령 계정 삭제 후 재시도
+"""
+from types import SimpleNamespace
+import itertools
+
+import pytest
+
+from app.database import SessionLocal, engine
+from app.models import AuthIdentity, User
+from app.services.auth_identity import (
+    create_auth_user, delete_auth_user, find_auth_id_remote, lookup, remember, remember_many, resolve_auth_id,
+)
+
+
+class NotFound(Exception):
+    status = 404
+
+
+class EmailExists(Exception):
+    code = "email_exists"
+
+
+class FakeAdmin:
+    """supabase.auth.admin 대체 (id → email, 호출 기록)"""
+
+    def __init__(self, users):
+        self.users = dict(users)
+        self.calls = []
+        self._ids = itertools.count(1)
+
+    def _user(self, auth_id):
+        return SimpleNamespace(id=auth_id, email=self.users[auth_id])
+
+    def get_user_by_id(self, auth_id):
+        self.calls.append(("get_user_by_id", auth_id))
+        if auth_id not in self.users:
+            raise NotFound("User not found")
+        return SimpleNamespace(user=self._user(auth_id))
+
+    def list_users(self, page, per_page):
+        self.calls.append(("list_users", page))
+        ids = sorted(self.users)[(page - 1) * per_page:page * per_page]
+        return [self._user(auth_id) for auth_id in ids]
+
+    def delete_user(self, auth_id):
+        self.calls.append(("delete_user", auth_id))
+        if auth_id not in self.users:
+            raise NotFound("User not found")
+        del self.users[auth_id]
+
+    def create_user(self, attributes):
+        self.calls.append(("create_user", attributes["email"]))
+        if attributes["email"] in self.users.values():
+            raise EmailExists("A user with this email address has already been registered")
+        auth_id = f"new-{next(self._ids)}"
+        self.users[auth_id] = attributes["email"]
+        return SimpleNamespace(user=self._user(auth_id))
+
+    def called(self, name):
+        return [arg for call, arg in self.calls if call == name]
+
+
+def _supabase(users):
+    admin = FakeAdmin(users)
+    return SimpleNamespace(auth=SimpleNamespace(admin=admin)), admin
+
+
+@pytest.fixture
+def db(request):
+    if engine.dialect.name == "postgresql":
+        yield request.getfixturevalue("pg_db")
+        return
+    tables = [User.__table__, AuthIdentity.__table__]
+    for table in tables:
+        table.create(engine)
+    session = SessionLocal()
+    yield session
+    session.close()
+    for table in reversed(tables):
+        table.drop(engine)
+
+
+def _index(db):
+    db.expire_all()
+    return {row.email: row.auth_id for row in db.query(AuthIdentity)}
+
+
+def test_remember_many_moves_changed_email(db):
+    remember(db, "a@x.com", "id-1")
+    remember(db, "c@x.com", "id-2")
+    db.commit()
+
+    # id-1의 이메일이 a → B로 변경 (대소문자 정규화)
+    remember_many(db, [(" B@X.com ", "id-1"), ("c@x.com", "id-2"), (None, "id-3"), ("d@x.com", None)])
+    db.commit()
+
+    assert _index(db) == {"b@x.com": "id-1", "c@x.com": "id-2"}
+
+
+def test_verified_index_hit_skips_list_users(db):
+    remember(db, "a@x.com", "id-1")
+    db.commit()
+    supabase, admin = _supabase({"id-1": "A@x.com"})
+
+    assert resolve_auth_id(db, supabase, "a@x.com") == "id-1"
+    assert admin.called("get_user_by_id") == ["id-1"]
+    assert admin.called("list_users") == []
+
+
+@pytest.mark.parametrize("remote", [
+    {"id-1": "b@x.com", "id-2": "a@x.com"},  # 인덱스의 id가 다른 이메일 계정
+    {"id-2": "a@x.com"},                     # 인덱스의 id가 이미 삭제됨
+])
+def test_stale_index_entry_falls_back_to_list_users(db, remote):
+    remember(db, "a@x.com", "id-1")
+    db.commit()
+    supabase, admin = _supabase(remote)
+
+    assert resolve_auth_id(db, supabase, "a@x.com") == "id-2"
+    db.commit()
+    assert admin.called("list_users") == [1]
+    assert _index(db) == {email: auth_id for auth_id, email in remote.items()}
+    assert lookup(db, "a@x.com") == "id-2"
+
+
+def test_find_auth_id_remote_pages_until_found(db):
+    supabase, admin = _supabase({f"id-{i}": f"user{i}@x.com" for i in range(5)})
+
+    assert find_auth_id_remote(db, supabase, "USER3@x.com", per_page=2) == "id-3"
+    assert admin.called("list_users") == [1, 2]
+    assert find_auth_id_remote(db, supabase, "nobody@x.com", per_page=2) is None
+    assert admin.called("list_users")[2:] == [1, 2, 3]
+    db.commit()
+    assert len(_index(db)) == 5
+
+
+def test_delete_researches_email_after_404(db):
+    user = User(id="agent-1", name="에이전트", role="agent", email="a@x.com", auth_id="stale")
+    db.add(user)
+    db.commit()
+    supabase, admin = _supabase({"id-2": "a@x.com", "id-3": "b@x.com"})
+
+    assert delete_auth_user(db, supabase, user) == "id-2"
+    db.commit()
+    assert admin.called("delete_user") == ["stale", "id-2"]
+    assert admin.users == {"id-3": "b@x.com"}
+    assert _index(db) == {"b@x.com": "id-3"}
+
+
+def test_delete_verifies_index_before_deleting(db):
+    user = User(id="agent-1", name="에이전트", role="agent", email="a@x.com")
+    db.add(user)
+    remember(db, "a@x.com", "id-1")
+    db.commit()
+    # 인덱스의 id-1은 이제 다른 사람(b) 계정 → id-1은 삭제하면 안 됨
+    supabase, admin = _supabase({"id-1": "b@x.com", "id-2": "a@x.com"})
+
+    assert delete_auth_user(db, supabase, user) == "id-2"
+    assert admin.called("delete_user") == ["id-2"]
+    assert admin.users == {"id-1": "b@x.com"}
+
+
+def test_delete_without_auth_account_returns_none(db):
+    user = User(id="agent-1", name="에이전트", role="agent", email="a@x.com")
+    db.add(user)
+    db.commit()
+    supabase, admin = _supabase({"id-3": "b@x.com"})
+
+    assert delete_auth_user(db, supabase, user) is None
+    assert admin.called("delete_user") == ["agent-1"]  # 마지막으로 로컬 id로 시도
+    assert admin.users == {"id-3": "b@x.com"}
+
+
+def test_create_deletes_orphan_and_retries(db):
+    remember(db, "a@x.com", "orphan")
+    db.commit()
+    supabase, admin = _supabase({"orphan": "a@x.com", "id-3": "b@x.com"})
+
+    response = create_auth_user(db, supabase, {"email": "a@x.com", "password": "pw"})
+    db.commit()
+
+    assert admin.called("create_user") == ["a@x.com", "a@x.com"]
+    assert admin.called("delete_user") == ["orphan"]
+    assert admin.users == {"id-3": "b@x.com", response.user.id: "a@x.com"}
+    assert "a@x.com" not in _index(db)
+
+
+def test_create_reraises_when_orphan_not_found(db):
+    supabase, admin = _supabase({})
+
+    def taken(attributes):
+        raise EmailExists("already registered")
+
+    admin.create_user = taken
+    with pytest.raises(EmailExists):
+        create_auth_user(db, supabase, {"email": "a@x.com", "password": "pw"})
+    assert admin.called("delete_user") == []
+
+
+def test_create_does_not_retry_other_errors(db):
+    supabase, admin = _supabase({})
+
+    def fail(attributes):
+        raise RuntimeError("weak password")
+
+    admin.create_user = fail
+    with pytest.raises(RuntimeError):
+        create_auth_user(db, supabase, {"email": "a@x.com", "password": "pw"})
+    assert admin.calls == []
@@ -0,0 +1,114 @@
+"""원자적 카운터 (app/services/counters.py, PostgreSQL 전용 — 동시 증감)"""
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from sqlalchemy import func
+
+from app.database import SessionLocal
+from app.models import LoungePost, User
+from app.services import counters
+from app.services.counters import BufferedCounter, increment_counter
+
+
+def _post(db, post_id="p1", view_count=0):
+    db.add(LoungePost(id=post_id, title="글", view_count=view_count, report_count=0))
+    db.commit()
+
+
+def _concurrently(fn, times: int, workers: int = 10):
+    def run(_):
+        db = SessionLocal()
+        try:
+            result = fn(db)
+            db.commit()
+            return result
+        finally:
+            db.close()
+
+    with ThreadPoolExecutor(workers) as pool:
+        return list(pool.map(run, range(times)))
+
+
+def test_concurrent_increments_are_not_lost(pg_db):
+    _post(pg_db)
+    results = _concurrently(lambda db: increment_counter(db, LoungePost.view_count, "p1"), 100)
+
+    pg_db.expire_all()
+    assert pg_db.get(LoungePost, "p1").view_count == 100
+    assert sorted(results) == list(range(1, 101))  # 각 호출이 서로 다른 새 값을 받음
+
+
+def test_missing_row_returns_none(pg_db):
+    assert increment_counter(pg_db, LoungePost.view_count, "missing") is None
+
+
+def test_decrement_floor_guard(pg_db):
+    pg_db.add(User(id="agent-1", name="에이전트", role="agent", vip_current_count=2))
+    pg_db.commit()
+
+    decrement = lambda db: increment_counter(  # noqa: E731
+        db, User.vip_current_count, "agent-1", -1, User.vip_current_count > 0
+    )
+    results = _concurrently(decrement, 10)
+
+    pg_db.expire_all()
+    assert pg_db.get(User, "agent-1").vip_current_count == 0
+    assert sorted(r for r in results if r is not None) == [0, 1]
+    assert results.count(None) == 8
+
+
+def test_buffered_counter_flushes_in_one_batch(pg_db):
+    _post(pg_db, "p1", view_count=5)
+    _post(pg_db, "p2")
+    counter = BufferedCounter(LoungePost.view_count)
+    for _ in range(3):
+        counter.add("p1")
+    counter.add("p2", 2)
+    assert counter.pending("p1") == 3
+
+    counter.flush()
+
+    pg_db.expire_all()
+    assert (pg_db.get(LoungePost, "p1").view_count, pg_db.get(LoungePost, "p2").view_count) == (8, 2)
+    assert counter.pending("p1") == 0
+
+
+def test_buffered_counter_requeues_on_failed_flush(pg_db, monkeypatch):
+    _post(pg_db)
+    counter = BufferedCounter(LoungePost.view_count)
+    counter.add("p1", 3)
+
+    class BrokenSession:
+        def execute(self, *args, **kwargs):
+            raise RuntimeError("db down")
+
+        def rollback(self):
+            pass
+
+        def close(self):
+            pass
+
+    monkeypatch.setattr(counters, "SessionLocal", BrokenSession)
+    counter.flush()
+    # 실패한 누적분은 버퍼로 돌아가고, 그 사이 들어온 증가분과 합쳐짐
+    counter.add("p1", 2)
+    assert counter.pending("p1") == 5
+
+    monkeypatch.setattr(counters, "SessionLocal", SessionLocal)
+    counter.flush()
+
+    pg_db.expire_all()
+    assert pg_db.get(LoungePost, "p1").view_count == 5
+    assert counter.pending("p1") == 0
+
+
+@pytest.mark.parametrize("amount, expected", [(3, 7), (10, 0), (11, None)])
+def test_deduct_requires_balance(pg_db, amount, expected):
+    pg_db.add(User(id="agent-1", name="에이전트", role="agent", points=10))
+    pg_db.commit()
+
+    result = increment_counter(pg_db, User.points, "agent-1", -amount, func.coalesce(User.points, 0) >= amount)
+    pg_db.commit()
+    assert result == expected
+    pg_db.expire_all()
+    assert pg_db.get(User, "agent-1").points == (expected if expected is not None else 10)
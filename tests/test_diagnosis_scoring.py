@@ -0,0 +1,138 @@
+"""
+6축 비즈니스 진단 채점 엔진 (app/services/diagnosis_scoring.py)
+- 문항 유형별 점수(radio / slider / checkbox), 미응답, 가중치
+- score_batch()와 score_answers(), 기존 문항별 채점 방식(_reference_score)의 결과 일치
+"""
+import random
+
+import pytest
+
+from app.services.diagnosis_scoring import (
+    CATEGORIES, DIAGNOSIS_QUESTIONS, SCORE_MAP, compile_questions, score_answers, score_batch,
+)
+
+QUESTIONS = {q["id"]: q for q in DIAGNOSIS_QUESTIONS}
+
+
+def _reference_score(answers):
+    """엔진 도입 전 complete_diagnosis의 문항별 채점 (비교 기준)"""
+    def calc(q):
+        answer = answers.get(q["id"])
+        if answer is None:
+            return 50.0
+        options = q.get("options", [])
+        if q["type"] == "radio" and options:
+            try:
+                return float(SCORE_MAP.get(options.index(str(answer)), 50))
+            except ValueError:
+                return 50.0
+        if q["type"] == "slider":
+            try:
+                return min(100.0, max(0.0, float(answer) * 10))
+            except (TypeError, ValueError):
+                return 50.0
+        if q["type"] == "checkbox" and options:
+            selected = answer if isinstance(answer, list) else []
+            if "없음" in selected:
+                return 90.0
+            if not selected:
+                return 50.0
+            return max(10.0, 80.0 - len(selected) * 20)
+        return 50.0
+
+    def avg(values):
+        return round(sum(values) / len(values)) if values else 50
+
+    cats = {cat: avg([calc(q) for q in DIAGNOSIS_QUESTIONS if q["category"] == cat]) for cat in CATEGORIES}
+    return cats, avg(list(cats.values()))
+
+
+def _random_answers(rng):
+    answers = {}
+    for q in DIAGNOSIS_QUESTIONS:
+        if rng.random() < 0.15:
+            continue  # 미응답
+        if q["type"] == "radio":
+            answers[q["id"]] = rng.choice(q["options"] + ["목록에 없는 답"])
+        elif q["type"] == "slider":
+            answers[q["id"]] = rng.choice([0, 1, 3.5, 7, 10, 12, "8", "abc"])
+        else:
+            answers[q["id"]] = rng.sample(q["options"], rng.randint(0, 3))
+    return answers
+
+
+def _all_first_options():
+    return {qid: (q["options"][0] if q["options"] else 1) for qid, q in QUESTIONS.items()}
+
+
+@pytest.mark.parametrize("option_index, expected", sorted(SCORE_MAP.items()))
+def test_radio_option_scores(option_index, expected):
+    answers = {qid: q["options"][option_index] for qid, q in QUESTIONS.items() if q["category"] == "asset"}
+    assert score_answers(answers).categories["asset"] == expected
+
+
+def test_radio_unknown_option_is_default():
+    assert score_answers({"asset_1": "목록에 없는 답"}).categories["asset"] == 50
+
+
+@pytest.mark.parametrize("answer, expected", [(1, 10), (7, 70), ("8", 80), (12, 100), (-1, 0), ("abc", 50)])
+def test_slider_scores(answer, expected):
+    # body의 나머지 2문항은 100점으로 고정
+    result = score_answers({"body_1": "주 2회 이상", "body_2": "7~8시간, 개운함", "body_3": answer})
+    assert result.categories["body"] == round((100 + 100 + expected) / 3)
+
+
+@pytest.mark.parametrize("answer, expected", [
+    (["없음"], 90),
+    (["없음", "건강"], 90),
+    (["건강"], 60),
+    (["건강", "인간관계"], 40),
+    (["수입/재정 불안", "인간관계", "건강", "미래에 대한 불확실성"], 10),
+    ([], 50),
+    ("건강", 50),
+])
+def test_checkbox_scores(answer, expected):
+    answers = {"emotion_1": 5, "emotion_2": "주 2~3회", "emotion_3": "3~7일", "emotion_4": answer}
+    assert score_answers(answers).categories["emotion"] == round((50 + 40 + 40 + expected) / 4)
+
+
+def test_missing_answers_default_to_50():
+    result = score_answers({})
+    assert result.categories == {cat: 50 for cat in CATEGORIES}
+    assert result.overall == 50
+
+
+def test_as_columns_maps_health_index_fields():
+    columns = score_answers(_all_first_options()).as_columns()
+    assert set(columns) == {
+        "asset_stability", "time_independence", "physical_condition",
+        "emotional_balance", "network_power", "system_leverage", "overall_score",
+    }
+    assert columns["asset_stability"] == 15
+
+
+def test_custom_weights():
+    answers = {"asset_1": "200만원 이상", "asset_2": "없음", "asset_3": "없음"}  # 100, 15, 50(해석 불가)
+    assert score_answers(answers).categories["asset"] == round((100 + 15 + 50) / 3)
+
+    weighted = compile_questions(weights={"asset_1": 3.0})
+    assert weighted.score_answers(answers).categories["asset"] == round((300 + 15 + 50) / 5)
+
+    # 가중치 0인 문항만 있는 카테고리는 기본값
+    zeroed = compile_questions(weights={"asset_1": 0, "asset_2": 0, "asset_3": 0})
+    assert zeroed.score_answers(answers).categories["asset"] == 50
+
+
+def test_batch_matches_single_and_reference():
+    rng = random.Random(42)
+    answer_sets = [_random_answers(rng) for _ in range(200)] + [{}, _all_first_options()]
+
+    batch = score_batch(answer_sets)
+    assert len(batch) == len(answer_sets)
+    for answers, result in zip(answer_sets, batch):
+        assert result == score_answers(answers)
+        assert (result.categories, result.overall) == _reference_score(answers)
+
+
+def test_empty_batch():
+    assert score_batch([]) == []
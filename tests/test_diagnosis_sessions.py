@@ -0,0 +1,189 @@
+"""
+진행 중인 진단 답변 저장소 (app/services/diagnosis_sessions.py) + 진단 답변 API (app/api/vip.py)
+- 저장소 3종(memory / sql / redis) 공통: 병합, 만료, 삭제, 만료분 정리
+- redis 저장소는 TEST_REDIS_URL(비워 둔 전용 DB)과 redis 패키지가 있을 때만 실행
+- API 테스트는 PostgreSQL 전용 (인메모리 SQLite는 TestClient 스레드와 연결이 달라 테이블이 보이지 않음)
+"""
+from datetime import datetime, timedelta, timezone
+import os
+import time
+import uuid
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+import pytest
+
+from app import supabase_client
+from app.api import vip
+from app.database import SessionLocal, engine
+from app.models import DiagnosisSession, DiagnosisSubmission, HealthIndex, User, VipCurrentHealth
+from app.services import diagnosis_sessions as sessions_module
+from app.services.diagnosis_sessions import MemorySessionStore, RedisSessionStore, SqlSessionStore
+
+TTL = 600
+TABLES = [User.__table__, DiagnosisSession.__table__, DiagnosisSubmission.__table__,
+          HealthIndex.__table__, VipCurrentHealth.__table__]
+
+
+@pytest.fixture
+def db(request):
+    if engine.dialect.name == "postgresql":
+        yield request.getfixturevalue("pg_db")
+        return
+    for table in TABLES:
+        table.create(engine)
+    session = SessionLocal()
+    yield session
+    session.close()
+    for table in reversed(TABLES):
+        table.drop(engine)
+
+
+class MemoryBackend:
+    def __init__(self, monkeypatch):
+        self.now = 1000.0
+        monkeypatch.setattr(sessions_module.time, "monotonic", lambda: self.now)
+        self.store = MemorySessionStore(TTL)
+
+    def expire(self, diagnosis_id):
+        self.now += TTL + 1
+
+
+class SqlBackend:
+    def __init__(self, db):
+        self.db = db
+        self.store = SqlSessionStore(TTL)
+
+    def expire(self, diagnosis_id):
+        self.db.query(DiagnosisSession).filter(DiagnosisSession.id == diagnosis_id).update(
+            {DiagnosisSession.expires_at: datetime.now(timezone.utc) - timedelta(seconds=1)}
+        )
+        self.db.commit()
+
+
+class RedisBackend:
+    def __init__(self):
+        url = os.environ.get("TEST_REDIS_URL", "")
+        if not url:
+            pytest.skip("TEST_REDIS_URL 미설정")
+        pytest.importorskip("redis")
+        self.store = RedisSessionStore(url, TTL)
+        self.store.PREFIX = f"test:{uuid.uuid4().hex}:"
+
+    def expire(self, diagnosis_id):
+        self.store._redis.pexpire(self.store.PREFIX + diagnosis_id, 1)
+        time.sleep(0.01)
+
+
+@pytest.fixture(params=["memory", "sql", "redis"])
+def backend(request, monkeypatch):
+    if request.param == "memory":
+        return MemoryBackend(monkeypatch)
+    if request.param == "sql":
+        return SqlBackend(request.getfixturevalue("db"))
+    return RedisBackend()
+
+
+def test_answers_are_merged(backend):
+    store = backend.store
+    store.save_answers("d1", {"asset_1": "1~50만원", "time_1": "1시간 미만"})
+    store.save_answers("d1", {"time_1": "3~6시간", "body_1": "주 1회"})
+    store.save_answers("d2", {"asset_1": "없음"})
+
+    assert store.get_answers("d1") == {"asset_1": "1~50만원", "time_1": "3~6시간", "body_1": "주 1회"}
+    assert store.get_answers("d2") == {"asset_1": "없음"}
+    assert store.get_answers("missing") == {}
+
+
+def test_expired_session_is_ignored_and_restarted(backend):
+    store = backend.store
+    store.save_answers("d1", {"asset_1": "없음", "time_1": "1~3시간"})
+    backend.expire("d1")
+
+    assert store.get_answers("d1") == {}
+    # 만료 후 저장은 이전 답변과 병합하지 않고 새 세션으로 시작
+    store.save_answers("d1", {"body_1": "주 1회"})
+    assert store.get_answers("d1") == {"body_1": "주 1회"}
+
+
+def test_delete(backend):
+    store = backend.store
+    store.save_answers("d1", {"asset_1": "없음"})
+    store.save_answers("d2", {"asset_1": "없음"})
+    store.delete("d1")
+    store.delete("missing")
+
+    assert store.get_answers("d1") == {}
+    assert store.get_answers("d2") == {"asset_1": "없음"}
+
+
+def test_purge_expired(backend):
+    if isinstance(backend, RedisBackend):
+        pytest.skip("redis는 키 TTL로 만료 (purge_expired는 항상 0)")
+    store = backend.store
+    store.save_answers("d1", {"asset_1": "없음"})
+    backend.expire("d1")
+
+    assert store.purge_expired() == 1
+    assert store.purge_expired() == 0
+    if isinstance(backend, SqlBackend):
+        assert backend.db.query(DiagnosisSession).count() == 0
+
+
+# ── API ──────────────────────────────────────────────────────
+
+@pytest.fixture
+def client(pg_db, monkeypatch):
+    pg_db.add(User(id="vip-1", name="VIP", role="vip"))
+    pg_db.commit()
+    monkeypatch.setattr(vip, "diagnosis_sessions", SqlSessionStore(TTL))
+
+    def no_supabase():
+        raise RuntimeError("supabase 미설정")
+
+    monkeypatch.setattr(supabase_client, "get_supabase_admin", no_supabase)  # 로컬 health_index로 저장
+    app = FastAPI()
+    app.include_router(vip.router, prefix="/api/vip")
+    return TestClient(app)
+
+
+def test_save_answers_endpoint(client):
+    response = client.post("/api/vip/diagnosis/answers", json={
+        "diagnosis_id": "vip-1", "answers": {"asset_1": "없음", "time_1": "1~3시간"},
+    })
+    assert response.json() == {"saved": True, "count": 2}
+    client.post("/api/vip/diagnosis/answer", json={"diagnosis_id": "vip-1", "question_id": "time_1", "answer": "6시간 이상"})
+
+    assert vip.diagnosis_sessions.get_answers("vip-1") == {"asset_1": "없음", "time_1": "6시간 이상"}
+
+    response = client.post("/api/vip/diagnosis/answers", json={"diagnosis_id": "vip-1", "answers": {"nope": 1}})
+    assert response.status_code == 400
+    assert vip.diagnosis_sessions.get_answers("vip-1") == {"asset_1": "없음", "time_1": "6시간 이상"}
+
+
+def test_complete_with_inline_answers(client, pg_db):
+    client.post("/api/vip/diagnosis/answers", json={
+        "diagnosis_id": "vip-1", "answers": {"asset_1": "없음", "time_1": "1시간 미만"},
+    })
+
+    # 요청에 포함된 답변이 저장된 답변보다 우선
+    response = client.post("/api/vip/diagnosis/complete", json={
+        "diagnosis_id": "vip-1", "answers": {"asset_1": "200만원 이상"},
+    })
+    assert response.status_code == 200
+
+    pg_db.expire_all()
+    (submission,) = pg_db.query(DiagnosisSubmission).all()
+    assert submission.answers == {"asset_1": "200만원 이상", "time_1": "1시간 미만"}
+    assert submission.overall_score == response.json()["total_score"]
+    assert pg_db.query(HealthIndex).filter(HealthIndex.vip_id == "vip-1").count() == 1
+    # 완료 후 세션 삭제
+    assert vip.diagnosis_sessions.get_answers("vip-1") == {}
+
+
+def test_complete_rejects_unknown_inline_question(client, pg_db):
+    response = client.post("/api/vip/diagnosis/complete", json={"diagnosis_id": "vip-1", "answers": {"nope": 1}})
+
+    assert response.status_code == 400
+    pg_db.expire_all()
+    assert pg_db.query(DiagnosisSubmission).count() == 0
@@ -0,0 +1,104 @@
+"""
+health_index 재채점 백필 (app/services/health_backfill.py, PostgreSQL 전용)
+- 청크 upsert 문장이 vip_current_health까지 직접 맞추는지 (health_index 트리거를 끈 상태로 확인)
+"""
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import text
+
+from app.models import DiagnosisSubmission, HealthIndex, User
+from app.services.diagnosis_scoring import DIAGNOSIS_QUESTIONS
+from app.services.health_backfill import run_backfill
+from app.services.health_projection import get_current_health, upsert_current_health
+
+ANSWERS = {"radio": lambda q: q["options"][-1], "slider": lambda q: 10, "checkbox": lambda q: ["없음"]}
+BEST = {q["id"]: ANSWERS[q["type"]](q) for q in DIAGNOSIS_QUESTIONS}
+SCORES_10 = {
+    "asset_stability": 10, "time_independence": 10, "physical_condition": 10, "emotional_balance": 10,
+    "network_power": 10, "system_leverage": 10, "overall_score": 10,
+}
+
+
+@pytest.fixture
+def no_trigger(pg_db):
+    pg_db.execute(text("ALTER TABLE health_index DISABLE TRIGGER trg_health_index_current"))
+    pg_db.commit()
+    yield pg_db
+    pg_db.execute(text("ALTER TABLE health_index ENABLE TRIGGER trg_health_index_current"))
+    pg_db.commit()
+
+
+def _seed(db):
+    measured = datetime.now().astimezone() - timedelta(days=3)
+    db.add_all([
+        User(id="agent-1", name="에이전트", role="agent"),
+        User(id="vip-1", name="VIP 1", role="vip", created_by="agent-1"),
+        User(id="vip-2", name="VIP 2", role="vip", created_by="agent-1"),
+    ])
+    db.flush()
+    # vip-1: 기존 최신 행 + 그 행을 가리키는 프로젝션 / vip-2: health_index 없음
+    db.add(HealthIndex(id="h-old", vip_id="vip-1", agent_id="agent-1", created_at=measured - timedelta(days=30), **SCORES_10))
+    db.add(HealthIndex(id="h-latest", vip_id="vip-1", agent_id="agent-1", created_at=measured, **SCORES_10))
+    db.flush()
+    upsert_current_health(db, "vip-1", SCORES_10, agent_id="agent-1", health_index_id="h-latest", measured_at=measured)
+    db.add_all([
+        DiagnosisSubmission(vip_id="vip-1", answers=BEST),
+        DiagnosisSubmission(vip_id="vip-2", answers=BEST),
+    ])
+    db.commit()
+    return measured
+
+
+def test_backfill_updates_projection_in_same_statement(no_trigger):
+    db = no_trigger
+    measured = _seed(db)
+
+    stats = run_backfill(chunk_size=1)
+
+    assert (stats.vips, stats.updated, stats.inserted, stats.chunks) == (2, 1, 1, 2)
+    db.expire_all()
+    assert db.get(HealthIndex, "h-old").asset_stability == 10
+    assert db.get(HealthIndex, "h-latest").asset_stability == 100
+
+    current = get_current_health(db, "vip-1")
+    assert (current.health_index_id, current.asset_stability, current.agent_id) == ("h-latest", 100, "agent-1")
+    assert current.created_at == measured
+
+    new_row = db.query(HealthIndex).filter(HealthIndex.vip_id == "vip-2").one()
+    current = get_current_health(db, "vip-2")
+    assert (current.health_index_id, current.asset_stability) == (new_row.id, 100)
+    assert current.created_at == new_row.created_at
+
+
+def test_backfill_does_not_override_newer_projection(no_trigger):
+    db = no_trigger
+    measured = _seed(db)
+    # 백필 도중 새 진단이 저장됨 (프로젝션이 더 최신 행을 가리킴)
+    db.add(HealthIndex(id="h-new", vip_id="vip-1", created_at=measured + timedelta(days=1), **SCORES_10))
+    db.flush()
+    upsert_current_health(db, "vip-1", SCORES_10, health_index_id="h-new", measured_at=measured + timedelta(days=1))
+    db.commit()
+    db.execute(text("UPDATE health_index SET created_at = :at WHERE id = 'h-new'"), {"at": measured - timedelta(days=1)})
+    db.commit()
+
+    run_backfill()
+
+    db.expire_all()
+    assert db.get(HealthIndex, "h-latest").asset_stability == 100
+    current = get_current_health(db, "vip-1")
+    assert (current.health_index_id, current.asset_stability) == ("h-new", 10)
+
+
+def test_backfill_refreshes_legacy_projection_without_source_id(no_trigger):
+    """health_index_id 컬럼 추가 전 프로젝션 (원본 id 없음, 갱신 시각이 created_at으로 저장됨)"""
+    db = no_trigger
+    _seed(db)
+    db.execute(text("UPDATE vip_current_health SET health_index_id = NULL, created_at = now() WHERE vip_id = 'vip-1'"))
+    db.commit()
+
+    run_backfill()
+
+    db.expire_all()
+    current = get_current_health(db, "vip-1")
+    assert (current.health_index_id, current.asset_stability) == ("h-latest", 100)
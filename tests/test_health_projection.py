@@ -0,0 +1,64 @@
+"""vip_current_health 프로젝션 동기화 (0003 트리거 + upsert_current_health, PostgreSQL 전용)"""
+from datetime import datetime, timedelta
+
+from sqlalchemy import text
+
+from app.models import HealthIndex, User
+from app.services.health_projection import get_current_health, upsert_current_health
+
+
+def _vip(db, vip_id="vip-1"):
+    db.add(User(id=vip_id, name="VIP", role="vip"))
+    db.flush()
+    return vip_id
+
+
+def _scores(value):
+    return {
+        "asset_stability": value, "time_independence": value, "physical_condition": value,
+        "emotional_balance": value, "network_power": value, "system_leverage": value, "overall_score": value,
+    }
+
+
+def test_insert_sets_projection_to_source_row(pg_db):
+    vip_id = _vip(pg_db)
+    pg_db.add(HealthIndex(id="h1", vip_id=vip_id, **_scores(10)))
+    pg_db.commit()
+
+    current = get_current_health(pg_db, vip_id)
+    assert (current.health_index_id, current.asset_stability) == ("h1", 10)
+
+
+def test_in_place_update_after_app_upsert_refreshes_projection(pg_db):
+    """재진단: 앱이 프로젝션을 갱신한 뒤 같은 health_index 행을 다시 수정해도 반영"""
+    vip_id = _vip(pg_db)
+    row = HealthIndex(id="h1", vip_id=vip_id, created_at=datetime.now() - timedelta(days=30), **_scores(10))
+    pg_db.add(row)
+    pg_db.commit()
+    upsert_current_health(pg_db, vip_id, _scores(10), health_index_id=row.id, measured_at=row.created_at)
+    pg_db.commit()
+
+    pg_db.execute(text("UPDATE health_index SET asset_stability = 67, overall_score = 53 WHERE id = 'h1'"))
+    pg_db.commit()
+
+    pg_db.expire_all()
+    current = get_current_health(pg_db, vip_id)
+    assert (current.asset_stability, current.overall_score) == (67, 53)
+    assert current.created_at == row.created_at
+
+
+def test_older_measurement_does_not_override(pg_db):
+    vip_id = _vip(pg_db)
+    now = datetime.now().astimezone()
+    pg_db.add(HealthIndex(id="new", vip_id=vip_id, created_at=now, **_scores(80)))
+    pg_db.commit()
+
+    # 늦게 들어온 과거 측정 (INSERT) / 과거 행 수정 (UPDATE) 모두 최신 값을 덮지 않음
+    pg_db.add(HealthIndex(id="old", vip_id=vip_id, created_at=now - timedelta(days=7), **_scores(20)))
+    pg_db.commit()
+    pg_db.execute(text("UPDATE health_index SET asset_stability = 30 WHERE id = 'old'"))
+    pg_db.commit()
+
+    pg_db.expire_all()
+    current = get_current_health(pg_db, vip_id)
+    assert (current.health_index_id, current.asset_stability) == ("new", 80)
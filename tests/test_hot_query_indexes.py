@@ -0,0 +1,88 @@
+"""
+0002 복합 인덱스가 hot query 실행 계획에 쓰이는지 (EXPLAIN, PostgreSQL 전용)
+- 테이블마다 행을 채우고 ANALYZE 한 뒤 enable_seqscan = off로 실행 계획만 확인
+- quests(vip_id, quest_order)는 0016에서 유니크 제약(uq_quests_vip_id_quest_order)으로 대체됨
+"""
+import pytest
+from sqlalchemy import text
+
+SEED = [
+    """
+    INSERT INTO users (id, name, role, created_by, subscription_status, trial_end_date, subscription_end_date)
+    SELECT 'u' || i, 'user ' || i,
+           CASE WHEN i % 10 = 0 THEN 'agent' ELSE 'vip' END,
+           'u' || (i % 50 + 1) * 10,
+           (ARRAY['trial', 'active', 'expired', 'lifetime'])[i % 4 + 1],
+           now() + (i % 30 - 15) * interval '1 day',
+           now() + (i % 60 - 30) * interval '1 day'
+    FROM generate_series(1, 5000) AS i
+    """,
+    """
+    INSERT INTO health_index (id, vip_id, created_at)
+    SELECT 'h' || i, 'u' || (i % 5000 + 1), now() - i * interval '1 hour'
+    FROM generate_series(1, 20000) AS i
+    """,
+    """
+    INSERT INTO quests (id, vip_id, title, quest_order)
+    SELECT 'q' || i, 'u' || (i / 6 + 1), 'quest', i % 6 + 1
+    FROM generate_series(0, 11999) AS i
+    """,
+    """
+    INSERT INTO lounge_posts (id, title, category, is_hidden, created_at)
+    SELECT 'p' || i, 'post', (ARRAY['free', 'qna', 'notice'])[i % 3 + 1], i % 20 = 0, now() - i * interval '1 minute'
+    FROM generate_series(1, 5000) AS i
+    """,
+    """
+    INSERT INTO community_comments (id, post_id, content)
+    SELECT 'c' || i, 'p' || (i % 5000 + 1), 'comment'
+    FROM generate_series(1, 20000) AS i
+    """,
+    """
+    INSERT INTO withdrawal_requests (id, amount, status)
+    SELECT 'w' || i, 1000, CASE WHEN i % 50 = 0 THEN 'pending' ELSE 'paid' END
+    FROM generate_series(1, 5000) AS i
+    """,
+]
+
+# (인덱스 이름, hot query) — app 코드의 필터 / 정렬 조건과 동일
+HOT_QUERIES = [
+    ("ix_users_role_created_by",
+     "SELECT * FROM users WHERE role = 'vip' AND created_by = 'u10'"),
+    ("ix_users_role_status_trial_end",
+     "SELECT * FROM users WHERE role = 'agent' AND subscription_status = 'trial' AND trial_end_date <= now()"),
+    ("ix_users_role_status_sub_end",
+     "SELECT * FROM users WHERE role = 'agent' AND subscription_status = 'active' "
+     "AND subscription_end_date <= now() + interval '7 days' AND subscription_end_date > now()"),
+    ("ix_health_index_vip_id_created_at",
+     "SELECT * FROM health_index WHERE vip_id = 'u7' ORDER BY created_at DESC LIMIT 1"),
+    ("uq_quests_vip_id_quest_order",
+     "SELECT * FROM quests WHERE vip_id = 'u7' ORDER BY quest_order"),
+    ("ix_community_comments_post_id",
+     "SELECT count(*) FROM community_comments WHERE post_id = 'p7'"),
+    ("ix_lounge_posts_hidden_category_created",
+     "SELECT * FROM lounge_posts WHERE is_hidden = false AND category = 'qna' ORDER BY created_at DESC"),
+    ("ix_withdrawal_requests_status",
+     "SELECT * FROM withdrawal_requests WHERE status = 'pending'"),
+]
+
+
+@pytest.fixture(scope="module")
+def seeded(pg_engine):
+    with pg_engine.begin() as conn:
+        for stmt in SEED:
+            conn.execute(text(stmt))
+        conn.execute(text("ANALYZE"))
+    yield pg_engine
+    with pg_engine.begin() as conn:
+        conn.execute(text(
+            "TRUNCATE users, health_index, vip_current_health, quests, lounge_posts, "
+            "community_comments, withdrawal_requests CASCADE"
+        ))
+
+
+@pytest.mark.parametrize("index_name, query", HOT_QUERIES, ids=[name for name, _ in HOT_QUERIES])
+def test_planner_uses_index(seeded, index_name, query):
+    with seeded.connect() as conn:
+        conn.execute(text("SET enable_seqscan = off"))
+        plan = "\n".join(row[0] for row in conn.execute(text(f"EXPLAIN {query}")))
+    assert index_name in plan, plan
@@ -0,0 +1,190 @@
+"""
+알림톡 대량 발송기 (app/services/kakao_sender.KakaoDispatcher)
+- 알리고 발송 / 이력 상세 조회는 가짜 함수로 교체, 수신자별 kakao_outbox 상태 전이 확인
+"""
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List
+
+import pytest
+
+from app.database import SessionLocal, engine
+from app.models import KakaoOutbox
+from app.services import kakao_sender
+from app.services.kakao_sender import CONFIRM_TIMEOUT, KakaoDispatcher, enqueue_alimtalk
+
+PHONES = ["01011110001", "01011110002", "01011110003"]
+
+
+class FakeAligo:
+    def __init__(self):
+        self.sends: List[List[str]] = []
+        self.send_replies: List[Dict[str, Any]] = []
+        self.history: Dict[str, List[Dict[str, Any]]] = {}
+
+    def send(self, tpl_code, messages, fail_sms=True):
+        self.sends.append([m["phone"] for m in messages])
+        if self.send_replies:
+            return self.send_replies.pop(0)
+        return {"code": 0, "info": {"mid": f"mid-{len(self.sends)}", "scnt": len(messages), "fcnt": 0}}
+
+    def fetch(self, mid):
+        results: Dict[str, List[Dict[str, Any]]] = {}
+        for item in self.history.get(mid, []):
+            rslt = item["rslt"]
+            results.setdefault(item["phone"], []).append({
+                "delivered": (rslt == "0") if rslt else None, "message": item.get("rslt_message"),
+            })
+        return results
+
+
+@pytest.fixture
+def db(request):
+    if engine.dialect.name == "postgresql":
+        yield request.getfixturevalue("pg_db")
+        return
+    KakaoOutbox.__table__.create(engine)
+    session = SessionLocal()
+    yield session
+    session.close()
+    KakaoOutbox.__table__.drop(engine)
+
+
+@pytest.fixture
+def aligo(monkeypatch):
+    fake = FakeAligo()
+    monkeypatch.setattr(kakao_sender, "send_alimtalk_batch", fake.send)
+    monkeypatch.setattr(kakao_sender, "fetch_batch_results", fake.fetch)
+    for key in ("kakao_api_key", "kakao_api_secret", "kakao_sender_key"):
+        monkeypatch.setattr(kakao_sender.settings, key, "test")
+    return fake
+
+
+def _enqueue(db):
+    for phone in PHONES:
+        enqueue_alimtalk(db, "UNIFLOW_EXPIRE", phone, "만료 안내")
+    db.commit()
+
+
+def _statuses(db) -> Dict[str, tuple]:
+    db.expire_all()
+    return {r.phone: (r.status, r.attempts) for r in db.query(KakaoOutbox)}
+
+
+def _make_due(db, **values):
+    db.query(KakaoOutbox).update(
+        {KakaoOutbox.next_attempt_at: datetime.now(timezone.utc) - timedelta(seconds=1), **values},
+        synchronize_session=False,
+    )
+    db.commit()
+
+
+def test_full_batch_success_marks_all_sent(db, aligo):
+    _enqueue(db)
+    KakaoDispatcher().process_once()
+
+    assert aligo.sends == [PHONES]
+    assert set(_statuses(db).values()) == {("sent", 1)}
+
+
+def test_partial_failure_resolves_each_receiver(db, aligo):
+    _enqueue(db)
+    aligo.send_replies.append({"code": 0, "info": {"mid": "batch-1", "scnt": 2, "fcnt": 1}})
+    aligo.history["batch-1"] = [
+        {"phone": PHONES[0], "rslt": "0"},
+        {"phone": PHONES[1], "rslt": "K105", "rslt_message": "템플릿 불일치"},
+        {"phone": PHONES[2], "rslt": ""},
+    ]
+    dispatcher = KakaoDispatcher()
+    dispatcher.process_once()
+
+    assert _statuses(db) == {
+        PHONES[0]: ("sent", 1),
+        PHONES[1]: ("pending", 1),
+        PHONES[2]: ("accepted", 1),
+    }
+
+    # 백오프 후: 실패 수신자는 개별 재발송, 결과 대기 수신자는 이력 재조회로 확정
+    aligo.history["batch-1"][2]["rslt"] = "0"
+    _make_due(db)
+    dispatcher.process_once()
+
+    assert aligo.sends == [PHONES, [PHONES[1]]]
+    assert _statuses(db) == {
+        PHONES[0]: ("sent", 1),
+        PHONES[1]: ("sent", 2),
+        PHONES[2]: ("sent", 1),
+    }
+
+
+def test_unconfirmed_receiver_is_resent_after_timeout(db, aligo):
+    _enqueue(db)
+    aligo.send_replies.append({"code": 0, "info": {"mid": "batch-1", "scnt": 2, "fcnt": 1}})
+    aligo.history["batch-1"] = [{"phone": PHONES[0], "rslt": "0"}, {"phone": PHONES[1], "rslt": "0"}]
+    dispatcher = KakaoDispatcher()
+    dispatcher.process_once()
+    assert _statuses(db)[PHONES[2]] == ("accepted", 1)
+
+    # 결과가 계속 없으면 accepted 유지, CONFIRM_TIMEOUT이 지나면 재발송 대상
+    _make_due(db)
+    dispatcher.process_once()
+    assert _statuses(db)[PHONES[2]] == ("accepted", 1)
+
+    _make_due(db, sent_at=datetime.now(timezone.utc) - CONFIRM_TIMEOUT - timedelta(minutes=1))
+    dispatcher.process_once()
+    assert _statuses(db)[PHONES[2]] == ("pending", 1)
+
+    _make_due(db)
+    dispatcher.process_once()
+    assert aligo.sends[-1] == [PHONES[2]]
+    assert _statuses(db)[PHONES[2]] == ("sent", 2)
+
+
+def test_rejected_batch_falls_back_to_single_sends(db, aligo):
+    _enqueue(db)
+    aligo.send_replies.append({"code": -99, "message": "invalid request"})
+    aligo.send_replies.extend([
+        {"code": 0, "info": {"mid": "s1", "scnt": 1, "fcnt": 0}},
+        {"code": 0, "info": {"mid": "s2", "scnt": 0, "fcnt": 1}},
+        {"code": 0, "info": {"mid": "s3", "scnt": 1, "fcnt": 0}},
+    ])
+    KakaoDispatcher().process_once()
+
+    assert aligo.sends == [PHONES, [PHONES[0]], [PHONES[1]], [PHONES[2]]]
+    assert _statuses(db) == {
+        PHONES[0]: ("sent", 1),
+        PHONES[1]: ("pending", 1),
+        PHONES[2]: ("sent", 1),
+    }
+
+
+def test_fetch_batch_results_pages_history_detail(monkeypatch):
+    pages = {
+        1: {"code": 0, "totalPage": 2, "list": [
+            {"phone": "010-1111-0001", "rslt": "0"},
+            {"phone": "01011110002", "rslt": "K105", "rslt_message": "템플릿 불일치"},
+        ]},
+        2: {"code": 0, "totalPage": 2, "list": [{"phone": "01011110001", "rslt": ""}]},
+    }
+    requests = []
+
+    class Response:
+        def __init__(self, data):
+            self._data = data
+
+        def json(self):
+            return self._data
+
+    class Client:
+        def post(self, url, data):
+            requests.append((url, data["mid"], data["page"]))
+            return Response(pages[data["page"]])
+
+    monkeypatch.setattr(kakao_sender.http_clients, "get_sync", lambda name="default": Client())
+    results = kakao_sender.fetch_batch_results("batch-1")
+
+    assert [page for _, _, page in requests] == [1, 2]
+    assert {url for url, _, _ in requests} == {kakao_sender.ALIGO_HISTORY_DETAIL_URL}
+    assert results == {
+        "01011110001": [{"delivered": True, "message": "0"}, {"delivered": None, "message": ""}],
+        "01011110002": [{"delivered": False, "message": "템플릿 불일치"}],
+    }
@@ -0,0 +1,138 @@
+"""
+메일 outbox 발송기 (app/utils/mailer.MailSender) — 로컬 디버그 SMTP(app/utils/smtp_debug) 대상
+- 한 묶음을 SMTP 연결 1개로 발송, 실패 시 백오프 재시도, mail_max_attempts 후 failed
+"""
+from datetime import datetime, timedelta, timezone
+from email import message_from_bytes
+import asyncio
+import socket
+import threading
+
+import pytest
+
+from app.database import SessionLocal, engine
+from app.models import MailOutbox
+from app.utils import mailer
+from app.utils.mailer import RETRY_BASE_SECONDS, MailSender, enqueue_email
+from app.utils.smtp_debug import DebugSmtpSession
+
+
+@pytest.fixture
+def db(request):
+    if engine.dialect.name == "postgresql":
+        yield request.getfixturevalue("pg_db")
+        return
+    MailOutbox.__table__.create(engine)
+    session = SessionLocal()
+    yield session
+    session.close()
+    MailOutbox.__table__.drop(engine)
+
+
+@pytest.fixture
+def smtp_server():
+    """디버그 SMTP 세션을 쓰는 로컬 서버 (받은 연결 수 / 메일 기록)"""
+    stats = {"connections": 0, "messages": []}
+    loop = asyncio.new_event_loop()
+
+    async def on_connect(reader, writer):
+        stats["connections"] += 1
+        session = DebugSmtpSession(reader, writer, None)
+        session.deliver = lambda data: stats["messages"].append(message_from_bytes(data))
+        await session.handle()
+
+    server = loop.run_until_complete(asyncio.start_server(on_connect, "127.0.0.1", 0))
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    yield server.sockets[0].getsockname()[1], stats
+    loop.call_soon_threadsafe(server.close)
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join(timeout=5)
+
+
+def _smtp(monkeypatch, port, **values):
+    settings = {
+        "smtp_host": "127.0.0.1", "smtp_port": port, "smtp_use_tls": False, "smtp_user": "mailer",
+        "smtp_password": "secret", "sender_email": "noreply@uniflow.test", "mail_max_attempts": 3,
+        **values,
+    }
+    for key, value in settings.items():
+        monkeypatch.setattr(mailer.settings, key, value)
+
+
+def _closed_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _enqueue(db, count):
+    for i in range(count):
+        enqueue_email(db, f"user{i}@example.com", f"제목 {i}", "<p>본문</p>")
+    db.commit()
+
+
+def _rows(db):
+    db.expire_all()
+    return db.query(MailOutbox).order_by(MailOutbox.to_email).all()
+
+
+def _naive(value: datetime) -> datetime:
+    return value.astimezone(timezone.utc).replace(tzinfo=None) if value.tzinfo else value
+
+
+def test_batch_uses_one_connection(db, smtp_server, monkeypatch):
+    port, stats = smtp_server
+    _smtp(monkeypatch, port)
+    _enqueue(db, 5)
+    sender = MailSender()
+
+    assert sender.process_once() == 5
+    sender._smtp.close()
+
+    assert stats["connections"] == 1
+    assert sorted(m["To"] for m in stats["messages"]) == [f"user{i}@example.com" for i in range(5)]
+    assert {m["From"] for m in stats["messages"]} == {"UNIFLOW <noreply@uniflow.test>"}
+    assert {(r.status, r.attempts) for r in _rows(db)} == {("sent", 1)}
+
+
+def test_retry_backoff_then_failed(db, monkeypatch):
+    _smtp(monkeypatch, _closed_port())
+    _enqueue(db, 1)
+    sender = MailSender()
+
+    for attempt in range(1, 4):
+        before = datetime.now(timezone.utc).replace(tzinfo=None)
+        assert sender.process_once() == 1
+        (row,) = _rows(db)
+        assert row.attempts == attempt and row.last_error
+        if attempt < 3:
+            # 재시도 대기: 30s, 60s
+            assert row.status == "pending"
+            delay = (_naive(row.next_attempt_at) - before).total_seconds()
+            assert RETRY_BASE_SECONDS * 2 ** (attempt - 1) - 1 <= delay <= RETRY_BASE_SECONDS * 2 ** (attempt - 1) + 5
+            assert sender.process_once() == 0  # 대기 중에는 선점하지 않음
+            row.next_attempt_at = datetime.now(timezone.utc) - timedelta(seconds=1)
+            db.commit()
+
+    assert row.status == "failed"
+    assert sender.process_once() == 0
+
+
+@pytest.mark.parametrize("missing", ["smtp_user", "smtp_password", "sender_email"])
+def test_incomplete_credentials_keep_mail_queued(db, monkeypatch, missing):
+    # 운영 기본값(gmail, TLS)에서 인증 정보나 발신 주소가 하나라도 없으면 발송하지 않음
+    _smtp(monkeypatch, 587, smtp_host="smtp.gmail.com", smtp_use_tls=True, **{missing: ""})
+    _enqueue(db, 2)
+
+    assert MailSender().process_once() == 0
+    assert {(r.status, r.attempts) for r in _rows(db)} == {("pending", 0)}
+
+
+def test_local_debug_host_needs_no_credentials(db, smtp_server, monkeypatch):
+    port, stats = smtp_server
+    _smtp(monkeypatch, port, smtp_user="", smtp_password="", sender_email="")
+    _enqueue(db, 1)
+
+    assert MailSender().process_once() == 1
+    assert len(stats["messages"]) == 1
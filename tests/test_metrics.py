@@ -0,0 +1,105 @@
+"""관리자 KPI 롤업 (app/services/metrics.py, PostgreSQL 전용 — daily_metrics 재계산 / 스냅샷 조회)"""
+from datetime import date, datetime, timedelta
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+import pytest
+
+from app.api import admin
+from app.models import DailyMetric, Quest, User
+from app.services.metrics import (
+    ACTIVE_SUBSCRIPTIONS, ACTIVE_VIPS, AGENTS_BY_STATUS, EXPECTED_REVENUE, QUESTS_BY_STATUS, QUESTS_COMPLETED,
+    SIGNUPS, USERS_TOTAL, growth_rate, latest_snapshot, record_event, refresh_daily_metrics,
+)
+
+TODAY = datetime.now().date()  # /stats/full이 오늘 스냅샷을 읽으므로 실제 오늘 기준으로 시드
+
+
+def _at(day: date, hour: int = 12) -> datetime:
+    return datetime.combine(day, datetime.min.time()) + timedelta(hours=hour)
+
+
+def _quest(quest_id, vip_id, order=1, status="pending", completed_at=None):
+    return Quest(id=quest_id, vip_id=vip_id, quest_order=order, title="퀘스트", status=status, completed_at=completed_at)
+
+
+@pytest.fixture
+def seeded(pg_db):
+    pg_db.add_all([
+        User(id="agent-1", name="A1", role="agent", tier="flow_one", subscription_status="active", created_at=_at(TODAY)),
+        User(id="agent-2", name="A2", role="agent", tier="flow_pro", subscription_status="active", created_at=_at(TODAY - timedelta(days=40))),
+        User(id="agent-3", name="A3", role="agent", tier="free", subscription_status="trial", created_at=_at(TODAY - timedelta(days=40))),
+        User(id="vip-1", name="V1", role="vip", created_at=_at(TODAY)),
+        User(id="vip-2", name="V2", role="vip", created_at=_at(TODAY - timedelta(days=40))),
+        User(id="vip-3", name="V3", role="vip", created_at=_at(TODAY - timedelta(days=40))),
+    ])
+    pg_db.commit()
+    pg_db.add_all([
+        # vip-1: 오늘 포함 최근 30일 안에 2건 완료 → 활성 VIP 1명으로 집계
+        _quest("q1", "vip-1", 1, "completed", _at(TODAY)),
+        _quest("q2", "vip-1", 2, "completed", _at(TODAY - timedelta(days=29))),
+        # vip-2: 30일 전 완료 → 기간 밖
+        _quest("q3", "vip-2", 1, "completed", _at(TODAY - timedelta(days=30))),
+        _quest("q4", "vip-3"),
+    ])
+    pg_db.commit()
+    return pg_db
+
+
+def test_refresh_rebuilds_event_and_snapshot_rows(seeded):
+    # 훅으로 과다 집계된 값은 롤업이 원본 기준으로 덮어씀
+    record_event(seeded, SIGNUPS, "agent", amount=5, day=TODAY)
+    seeded.commit()
+
+    refresh_daily_metrics(seeded, today=TODAY)
+    seeded.commit()
+
+    rows = {
+        (r.metric_date, r.metric, r.dimension): r.value
+        for r in seeded.query(DailyMetric).filter(DailyMetric.metric.in_((SIGNUPS, QUESTS_COMPLETED)))
+    }
+    assert rows[(TODAY, SIGNUPS, "agent")] == 1
+    assert rows[(TODAY, SIGNUPS, "vip")] == 1
+    assert rows[(TODAY, QUESTS_COMPLETED, "")] == 1
+
+    snapshot = latest_snapshot(seeded)
+    assert snapshot[USERS_TOTAL] == {"agent": 3, "vip": 3}
+    assert snapshot[AGENTS_BY_STATUS] == {"active": 2, "trial": 1}
+    assert snapshot[ACTIVE_SUBSCRIPTIONS] == {"flow_one": 1, "flow_pro": 1}
+    assert snapshot[EXPECTED_REVENUE] == {"": 33000 + 55000}
+    assert snapshot[QUESTS_BY_STATUS] == {"completed": 3, "pending": 1}
+    assert snapshot[ACTIVE_VIPS] == {"": 1}
+
+
+def test_latest_snapshot_on_or_before_and_growth_rate(seeded):
+    month_ago = TODAY - timedelta(days=30)
+    refresh_daily_metrics(seeded, today=month_ago)
+    seeded.commit()
+    seeded.add(User(id="vip-4", name="V4", role="vip", created_at=_at(TODAY)))
+    seeded.commit()
+    refresh_daily_metrics(seeded, today=TODAY)
+    seeded.commit()
+
+    # q1/q2는 month_ago 시점에 아직 완료 전(미래) → 30일 전 스냅샷의 활성 VIP는 vip-2뿐
+    previous = latest_snapshot(seeded, on_or_before=month_ago)
+    assert previous[USERS_TOTAL] == {"agent": 3, "vip": 3}  # 스냅샷은 집계 시점의 전체 값
+    assert previous[ACTIVE_VIPS] == {"": 1}
+    assert latest_snapshot(seeded, on_or_before=month_ago - timedelta(days=1)) == {}
+
+    current = latest_snapshot(seeded)
+    assert current[USERS_TOTAL]["vip"] == 4
+    assert growth_rate(5, 4) == 25.0
+    assert growth_rate(3, 4) == -25.0
+    assert growth_rate(3, 0) == 0.0
+    assert growth_rate(3, None) == 0.0
+
+
+def test_full_stats_reports_active_vips(seeded):
+    refresh_daily_metrics(seeded)
+    seeded.commit()
+    app = FastAPI()
+    app.include_router(admin.router, prefix="/api/admin")
+
+    activity = TestClient(app).get("/api/admin/stats/full").json()["activity"]
+    # 전체 VIP 3명이 아니라 최근 30일 안에 퀘스트를 완료한 VIP 수
+    assert activity == {"quest_completion_rate": 75.0, "active_vips": 1}
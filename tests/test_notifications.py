@@ -0,0 +1,67 @@
+"""
+공지 읽음 상태 (app/services/notifications.py, PostgreSQL 전용)
+- 브로드캐스트 1행 + 워터마크 / 영수증 판정, 기존 받은 알림함(user_notifications) 행과의 호환
+"""
+from app.models import Notification, User, UserNotification
+from app.services.notifications import (
+    get_unread_notifications, mark_all_read, mark_read, materialize_inbox,
+)
+
+
+def _users(db):
+    db.add_all([
+        User(id="vip-1", name="VIP 1", role="vip"),
+        User(id="vip-2", name="VIP 2", role="vip"),
+        User(id="agent-1", name="에이전트", role="agent"),
+    ])
+    db.flush()
+
+
+def _notify(db, notification_id, target):
+    db.add(Notification(id=notification_id, title=notification_id, target=target))
+    db.flush()
+    return materialize_inbox(db, notification_id, target)
+
+
+def _inbox(db, user_id):
+    db.expire_all()
+    rows = db.query(UserNotification).filter(UserNotification.user_id == user_id)
+    return {r.notification_id: r.read_at is not None for r in rows}
+
+
+def test_materialize_inbox_creates_rows_for_target(pg_db):
+    _users(pg_db)
+    assert _notify(pg_db, "n-all", "all") == 3
+    assert _notify(pg_db, "n-vip", "vip") == 2
+    pg_db.commit()
+
+    assert _inbox(pg_db, "vip-1") == {"n-all": False, "n-vip": False}
+    assert _inbox(pg_db, "agent-1") == {"n-all": False}
+
+
+def test_inbox_rows_are_not_read_receipts(pg_db):
+    _users(pg_db)
+    _notify(pg_db, "n-1", "vip")
+    _notify(pg_db, "n-2", "vip")
+    pg_db.commit()
+
+    assert {n.id for n in get_unread_notifications(pg_db, "vip-1")} == {"n-1", "n-2"}
+
+    mark_read(pg_db, "vip-1", "n-1")
+    pg_db.commit()
+    assert [n.id for n in get_unread_notifications(pg_db, "vip-1")] == ["n-2"]
+    assert _inbox(pg_db, "vip-1") == {"n-1": True, "n-2": False}
+
+
+def test_mark_all_read_updates_inbox_rows(pg_db):
+    _users(pg_db)
+    _notify(pg_db, "n-1", "all")
+    _notify(pg_db, "n-2", "all")
+    pg_db.commit()
+
+    mark_all_read(pg_db, "vip-1")
+    pg_db.commit()
+
+    assert get_unread_notifications(pg_db, "vip-1") == []
+    assert _inbox(pg_db, "vip-1") == {"n-1": True, "n-2": True}
+    assert _inbox(pg_db, "vip-2") == {"n-1": False, "n-2": False}
@@ -0,0 +1,45 @@
+"""토스 결제 웹훅 (app/api/payment.toss_webhook, 결제 원장 payment_events — PostgreSQL 전용)"""
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+import pytest
+
+from app.api import payment
+from app.models import PaymentEvent, User
+
+
+def _done(order_id="order-1", agent_id="agent-1"):
+    data = {"status": "DONE", "paymentKey": f"pk-{order_id}", "totalAmount": 33000,
+            "metadata": {"agentId": agent_id, "tier": "flow_one", "billing_cycle": "monthly"}}
+    if order_id is not None:
+        data["orderId"] = order_id
+    return {"eventType": "PAYMENT_STATUS_CHANGED", "data": data}
+
+
+@pytest.fixture
+def client(pg_db):
+    pg_db.add(User(id="agent-1", name="에이전트", role="agent", subscription_status="trial"))
+    pg_db.commit()
+    app = FastAPI()
+    app.include_router(payment.router, prefix="/api/payment")
+    return TestClient(app)
+
+
+def test_done_event_activates_once(client, pg_db):
+    assert client.post("/api/payment/webhook/toss", json=_done()).json()["status"] == "success"
+    assert client.post("/api/payment/webhook/toss", json=_done()).json() == {
+        "status": "ok", "message": "Already processed",
+    }
+
+    pg_db.expire_all()
+    assert pg_db.query(PaymentEvent).count() == 1
+    assert pg_db.get(User, "agent-1").subscription_status == "active"
+
+
+def test_done_event_without_order_id_is_rejected(client, pg_db):
+    response = client.post("/api/payment/webhook/toss", json=_done(order_id=None))
+
+    assert response.status_code == 200
+    assert response.json() == {"status": "error", "message": "Missing orderId"}
+    pg_db.expire_all()
+    assert pg_db.query(PaymentEvent).count() == 0
+    assert pg_db.get(User, "agent-1").subscription_status == "trial"
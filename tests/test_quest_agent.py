@@ -0,0 +1,59 @@
+"""퀘스트 로컬 평가 (app/agents/quest_agent.QuestAgent.evaluate_locally — LLM 호출 없음)"""
+import pytest
+
+from app.agents.quest_agent import QuestAgent
+from app.services.quest_flow import QUEST_CATEGORIES
+
+CHECKLIST = ["질문1", "질문2", "질문3", "질문4", "질문5"]
+
+
+@pytest.fixture(scope="module")
+def agent():
+    return QuestAgent()
+
+
+@pytest.mark.parametrize("checked, min_checks, passed", [
+    ([0, 1], 3, False),
+    ([0, 1, 2], 3, True),
+    ([0, 1, 2, 3, 4], 3, True),
+    ([0, 1, 2, 3], 10, False),     # 기준이 문항 수보다 크면 전체 체크가 기준
+    ([0, 1, 2, 3, 4], 10, True),
+    ([], 0, False),                # 기준이 0 이하여도 최소 1개
+    ([3], 0, True),
+])
+def test_min_checks_threshold(agent, checked, min_checks, passed):
+    result = agent.evaluate_locally("김대표", "time_mastery", CHECKLIST, checked, min_checks)
+
+    assert (result["passed"], result["score"], result["total"]) == (passed, len(checked), 5)
+    assert result["nextStep"] == (QuestAgent.NEXT_STEP_MESSAGE if passed else "")
+    assert result["personalized"] is False
+
+
+def test_duplicate_indexes_count_once(agent):
+    result = agent.evaluate_locally("김대표", "time_mastery", CHECKLIST, [0, 0, 1, 1], 3)
+
+    assert (result["passed"], result["score"]) == (False, 2)
+    assert "2개" in result["message"]
+
+
+def test_every_category_has_message_bank():
+    assert set(QuestAgent.MESSAGE_BANK) == set(QUEST_CATEGORIES)
+
+
+@pytest.mark.parametrize("category", [*QUEST_CATEGORIES, "unknown"])
+@pytest.mark.parametrize("outcome", ["passed", "retry"])
+def test_every_message_template_renders(agent, category, outcome):
+    bank = QuestAgent.MESSAGE_BANK.get(category, QuestAgent.DEFAULT_MESSAGES)[outcome]
+    assert bank
+    for template in bank:
+        message = template.format(name="김대표", category="영역", checked=2, total=5, required=3)
+        assert "{" not in message and "김대표" in message
+
+    # evaluate_locally가 고른 문구도 같은 뱅크에서 치환됨
+    checked = [0, 1, 2] if outcome == "passed" else [0]
+    result = agent.evaluate_locally("김대표", category, CHECKLIST, checked, 3)
+    expected = [
+        t.format(name="김대표", category=agent._get_category_name(category), checked=len(checked), total=5, required=3)
+        for t in bank
+    ]
+    assert result["message"] in expected
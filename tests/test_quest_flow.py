@@ -0,0 +1,356 @@
+"""
+퀘스트 상태 머신 (app/services/quest_flow.py + app/api/quest.py, PostgreSQL 전용)
+- 동시 초기화, 평가 / 완료 / 다음 퀘스트 잠금 해제, 0016 중복 세트 정리
+- 체크리스트 미리 생성 (초기화 / 완료 직후 앞 PREFETCH_LOOKAHEAD개)
+- LLM 호출(agent.generate_questions / personalize_message)은 가짜 함수로 대체
+"""
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from alembic import command
+from alembic.config import Config
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+import pytest
+from sqlalchemy import text
+
+from app.api import quest as quest_api
+from app.database import SessionLocal
+from app.models import Notification, Quest, User
+from app.services.quest_flow import (
+    QuestStateError, apply_evaluation, apply_questions, attach_personalized_message, initialize_quests,
+    load_quest_context,
+)
+
+ROOT = Path(__file__).resolve().parents[1]
+CHECKLIST = ["질문1", "질문2", "질문3", "질문4", "질문5"]
+
+
+class FakeGenerator:
+    """agent.generate_questions 대체 (호출된 카테고리 기록)"""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, vip_name, category, score):
+        self.calls.append(category)
+        return {"intro": f"{category} 점검 #{len(self.calls)}", "subtitle": "", "checklist": list(CHECKLIST), "minChecks": 3}
+
+
+@pytest.fixture
+def vip(pg_db):
+    pg_db.add(User(id="agent-1", name="에이전트", role="agent"))
+    pg_db.flush()
+    pg_db.add(User(id="vip-1", name="김대표", role="vip", created_by="agent-1"))
+    pg_db.commit()
+    return "vip-1"
+
+
+@pytest.fixture
+def generator(monkeypatch):
+    fake = FakeGenerator()
+    monkeypatch.setattr(quest_api.agent, "generate_questions", fake)
+    monkeypatch.setattr(quest_api.settings, "quest_llm_commentary", False)
+    return fake
+
+
+@pytest.fixture
+def client(vip, generator):
+    app = FastAPI()
+    app.include_router(quest_api.router, prefix="/api/quests")
+    return TestClient(app)
+
+
+def _quests(db, vip_id="vip-1"):
+    db.expire_all()
+    return db.query(Quest).filter(Quest.vip_id == vip_id).order_by(Quest.quest_order).all()
+
+
+def _with_checklist(db, quest):
+    quest.ai_questions = {"intro": "", "checklist": list(CHECKLIST), "minChecks": 3}
+    db.commit()
+    return quest.id
+
+
+def test_concurrent_initialize_creates_one_set(pg_db, vip):
+    def run(_):
+        db = SessionLocal()
+        try:
+            created = initialize_quests(db, vip, "agent-1")
+            db.commit()
+            return created
+        finally:
+            db.close()
+
+    with ThreadPoolExecutor(8) as pool:
+        results = list(pool.map(run, range(8)))
+
+    quests = _quests(pg_db)
+    assert sum(results) == 6
+    assert [q.quest_order for q in quests] == [1, 2, 3, 4, 5, 6]
+    assert [q.is_locked for q in quests] == [False, True, True, True, True, True]
+    assert initialize_quests(pg_db, vip, "agent-1") == 0
+
+
+def test_passing_evaluation_completes_and_unlocks_next(client, pg_db, vip):
+    initialize_quests(pg_db, vip, "agent-1")
+    pg_db.commit()
+    first = _quests(pg_db)[0]
+    quest_id = _with_checklist(pg_db, first)
+
+    body = client.post(f"/api/quests/{quest_id}/evaluate", json={"checkedIndexes": [0, 2, 2, 4]}).json()
+    assert (body["passed"], body["score"], body["total"]) == (True, 3, 5)
+
+    first, second, third, *_ = _quests(pg_db)
+    assert (first.status, first.is_locked, first.user_answers, first.checked_count) == ("completed", False, [0, 2, 4], 3)
+    assert first.completed_at is not None
+    assert (second.is_locked, third.is_locked) == (False, True)
+    assert pg_db.query(Notification).count() == 1
+
+
+def test_failing_evaluation_keeps_quest_open(client, pg_db, vip):
+    initialize_quests(pg_db, vip, "agent-1")
+    pg_db.commit()
+    quest_id = _with_checklist(pg_db, _quests(pg_db)[0])
+
+    body = client.post(f"/api/quests/{quest_id}/evaluate", json={"checkedIndexes": [1]}).json()
+    assert (body["passed"], body["nextStep"]) == (False, "")
+
+    first, second, *_ = _quests(pg_db)
+    assert (first.status, first.user_answers, second.is_locked) == ("pending", [1], True)
+
+
+def test_reevaluating_completed_quest_returns_stored_evaluation(client, pg_db, vip):
+    initialize_quests(pg_db, vip, "agent-1")
+    pg_db.commit()
+    quest_id = _with_checklist(pg_db, _quests(pg_db)[0])
+    stored = client.post(f"/api/quests/{quest_id}/evaluate", json={"checkedIndexes": [0, 1, 2, 3]}).json()
+
+    again = client.post(f"/api/quests/{quest_id}/evaluate", json={"checkedIndexes": [0]}).json()
+
+    assert again == stored
+    first = _quests(pg_db)[0]
+    assert (first.user_answers, first.checked_count) == ([0, 1, 2, 3], 4)
+    assert pg_db.query(Notification).count() == 1  # 완료 알림 중복 없음
+
+
+def test_checklist_changed_during_evaluation_conflicts(pg_db, vip):
+    initialize_quests(pg_db, vip, "agent-1")
+    pg_db.commit()
+    quest_id = _with_checklist(pg_db, _quests(pg_db)[0])
+    context = load_quest_context(pg_db, quest_id)
+
+    # 평가 중에 다른 요청이 체크리스트를 다시 생성
+    apply_questions(pg_db, quest_id, {"checklist": ["새 질문1", "새 질문2", "새 질문3"], "minChecks": 2})
+    pg_db.commit()
+
+    with pytest.raises(QuestStateError) as exc:
+        apply_evaluation(pg_db, context, [0, 1, 2], {"passed": True, "message": ""})
+    assert exc.value.status_code == 409
+    pg_db.rollback()
+    assert _quests(pg_db)[0].status == "pending"
+
+
+def test_checklist_change_over_api_conflicts(client, pg_db, vip, monkeypatch):
+    initialize_quests(pg_db, vip, "agent-1")
+    pg_db.commit()
+    quest_id = _with_checklist(pg_db, _quests(pg_db)[0])
+
+    def evaluate_while_regenerated(*args, **kwargs):
+        db = SessionLocal()
+        try:
+            apply_questions(db, quest_id, {"checklist": ["새 질문"], "minChecks": 1})
+            db.commit()
+        finally:
+            db.close()
+        return {"passed": True, "score": 3, "total": 5, "message": "", "nextStep": "", "personalized": False}
+
+    monkeypatch.setattr(quest_api.agent, "evaluate_locally", evaluate_while_regenerated)
+    response = client.post(f"/api/quests/{quest_id}/evaluate", json={"checkedIndexes": [0, 1, 2]})
+    assert response.status_code == 409
+    assert _quests(pg_db)[0].status == "pending"
+
+
+@pytest.mark.parametrize("indexes", [[0, 5], [-1], [10]])
+def test_out_of_range_indexes_are_rejected(client, pg_db, vip, indexes):
+    initialize_quests(pg_db, vip, "agent-1")
+    pg_db.commit()
+    quest_id = _with_checklist(pg_db, _quests(pg_db)[0])
+
+    response = client.post(f"/api/quests/{quest_id}/evaluate", json={"checkedIndexes": indexes})
+    assert (response.status_code, response.json()["detail"]) == (400, "checkedIndexes out of range")
+    assert _quests(pg_db)[0].user_answers is None
+
+
+def test_evaluate_without_checklist_or_quest(client, pg_db, vip):
+    initialize_quests(pg_db, vip, "agent-1")
+    pg_db.commit()
+    quest_id = _quests(pg_db)[0].id
+
+    assert client.post(f"/api/quests/{quest_id}/evaluate", json={"checkedIndexes": [0]}).status_code == 400
+    assert client.post("/api/quests/missing/evaluate", json={"checkedIndexes": [0]}).status_code == 404
+
+
+def test_personalized_message_skips_resubmitted_answers(client, pg_db, vip):
+    initialize_quests(pg_db, vip, "agent-1")
+    pg_db.commit()
+    quest_id = _with_checklist(pg_db, _quests(pg_db)[0])
+    personalized = {"message": "맞춤 메시지", "nextStep": ""}
+
+    client.post(f"/api/quests/{quest_id}/evaluate", json={"checkedIndexes": [0, 1]})
+    # 첫 제출([0, 1])의 맞춤 메시지가 준비되기 전에 다시 제출
+    resubmitted = client.post(f"/api/quests/{quest_id}/evaluate", json={"checkedIndexes": [0, 1, 2]}).json()
+
+    assert attach_personalized_message(pg_db, quest_id, [0, 1], personalized) is False
+    pg_db.commit()
+    assert _quests(pg_db)[0].ai_evaluation == resubmitted
+
+    assert attach_personalized_message(pg_db, quest_id, [0, 1, 2], personalized) is True
+    pg_db.commit()
+    evaluation = _quests(pg_db)[0].ai_evaluation
+    assert (evaluation["message"], evaluation["personalized"], evaluation["passed"]) == ("맞춤 메시지", True, True)
+    # 이미 맞춤 메시지가 붙은 평가는 다시 덮지 않음
+    assert attach_personalized_message(pg_db, quest_id, [0, 1, 2], {"message": "두 번째"}) is False
+
+
+def test_personalized_message_attached_in_background(client, pg_db, vip, monkeypatch):
+    initialize_quests(pg_db, vip, "agent-1")
+    pg_db.commit()
+    quest_id = _with_checklist(pg_db, _quests(pg_db)[0])
+    monkeypatch.setattr(quest_api.settings, "quest_llm_commentary", True)
+    monkeypatch.setattr(
+        quest_api.agent, "personalize_message",
+        lambda name, category, checklist, checked, passed: {"message": f"{name}님 맞춤 {checked}", "nextStep": ""},
+    )
+
+    body = client.post(f"/api/quests/{quest_id}/evaluate", json={"checkedIndexes": [2, 0]}).json()
+
+    assert body["personalized"] is False  # 응답은 메시지 뱅크 문구
+    evaluation = _quests(pg_db)[0].ai_evaluation
+    assert (evaluation["message"], evaluation["personalized"]) == ("김대표님 맞춤 [0, 2]", True)
+
+
+# ── 체크리스트 미리 생성 ──────────────────────────────────────
+
+def test_init_prefetches_first_two_checklists(client, pg_db, generator):
+    assert client.get("/api/quests/init", params={"vip_id": "vip-1"}).json()["count"] == 6
+
+    quests = _quests(pg_db)
+    assert [bool(q.ai_questions) for q in quests] == [True, True, False, False, False, False]
+    assert generator.calls == [quests[0].category, quests[1].category]
+
+    # 이미 초기화됐으면 미리 생성도 다시 예약하지 않음
+    assert client.get("/api/quests/init", params={"vip_id": "vip-1"}).json() == {"message": "Quests already initialized"}
+    assert len(generator.calls) == 2
+
+
+def test_completion_prefetches_next_checklist(client, pg_db, generator):
+    client.get("/api/quests/init", params={"vip_id": "vip-1"})
+    first = _quests(pg_db)[0]
+
+    assert client.post(f"/api/quests/{first.id}/evaluate", json={"checkedIndexes": [0, 1, 2]}).json()["passed"]
+
+    quests = _quests(pg_db)
+    assert [bool(q.ai_questions) for q in quests] == [True, True, True, False, False, False]
+    assert generator.calls[2:] == [quests[2].category]
+
+    # 미통과면 미리 생성하지 않음
+    client.post(f"/api/quests/{quests[1].id}/evaluate", json={"checkedIndexes": [0]})
+    assert len(generator.calls) == 3
+
+
+def test_prefetch_keeps_checklist_generated_on_demand(client, pg_db, generator, monkeypatch):
+    initialize_quests(pg_db, "vip-1", "agent-1")
+    pg_db.commit()
+    first = _quests(pg_db)[0]
+    on_demand = {"intro": "직접 생성", "checklist": ["A", "B", "C"], "minChecks": 2}
+
+    def slow_prefetch(vip_name, category, score):
+        # 미리 생성이 LLM을 기다리는 사이 사용자가 generate-questions로 먼저 생성
+        if category == first.category:
+            db = SessionLocal()
+            try:
+                assert apply_questions(db, first.id, on_demand) is True
+                db.commit()
+            finally:
+                db.close()
+        return generator(vip_name, category, score)
+
+    monkeypatch.setattr(quest_api.agent, "generate_questions", slow_prefetch)
+    quest_api.prefetch_checklists("vip-1")
+
+    first, second, *_ = _quests(pg_db)
+    assert first.ai_questions == on_demand
+    assert second.ai_questions["checklist"] == CHECKLIST
+    assert apply_questions(pg_db, first.id, {"checklist": ["X"]}, overwrite=False) is False
+    pg_db.rollback()
+
+
+def test_generate_questions_returns_stored_checklist(client, pg_db, generator):
+    client.get("/api/quests/init", params={"vip_id": "vip-1"})
+    first, second, *_ = _quests(pg_db)
+    stored = first.ai_questions
+    calls = len(generator.calls)
+
+    assert client.post(f"/api/quests/{first.id}/generate-questions").json() == stored
+    assert len(generator.calls) == calls
+
+    regenerated = client.post(f"/api/quests/{first.id}/generate-questions", params={"regenerate": "true"}).json()
+    assert generator.calls[calls:] == [first.category]
+    assert regenerated != stored and regenerated["intro"] == f"{first.category} 점검 #{calls + 1}"
+    assert _quests(pg_db)[0].ai_questions == regenerated
+
+    # 잠긴 퀘스트는 생성 불가
+    assert client.post(f"/api/quests/{second.id}/generate-questions").status_code == 403
+
+
+# ── 0016 중복 세트 정리 ───────────────────────────────────────
+
+def _alembic_config():
+    config = Config(str(ROOT / "alembic.ini"))
+    config.set_main_option("script_location", str(ROOT / "alembic"))
+    return config
+
+
+def test_0016_dedup_keeps_unlocked_chain(pg_db, vip):
+    """동시 초기화로 섞인 두 세트: 1번은 A 세트에서 완료, 2번은 B 세트의 잠긴 행이 먼저 생성된 경우"""
+    pg_db.close()
+    command.downgrade(_alembic_config(), "0015")
+    try:
+        with SessionLocal() as db:
+            db.execute(text("""
+                INSERT INTO quests (id, vip_id, title, quest_order, is_locked, status, created_at, ai_questions) VALUES
+                ('b1', 'vip-1', 'q1', 1, false, 'pending',   now() - interval '2 hours', NULL),
+                ('b2', 'vip-1', 'q2', 2, true,  'pending',   now() - interval '2 hours', NULL),
+                ('b3', 'vip-1', 'q3', 3, true,  'pending',   now() - interval '2 hours', NULL),
+                ('a1', 'vip-1', 'q1', 1, false, 'completed', now() - interval '1 hour',  '{"checklist": ["x"]}'),
+                ('a2', 'vip-1', 'q2', 2, false, 'pending',   now() - interval '1 hour',  NULL),
+                ('a3', 'vip-1', 'q3', 3, true,  'pending',   now() - interval '1 hour',  '{"checklist": ["y"]}')
+            """))
+            db.commit()
+    finally:
+        command.upgrade(_alembic_config(), "head")
+
+    quests = _quests(pg_db)
+    # 1: 완료된 a1 / 2: 잠금 해제된 a2 / 3: 체크리스트가 있는 a3
+    assert [(q.id, q.is_locked) for q in quests] == [("a1", False), ("a2", False), ("a3", True)]
+
+
+def test_0016_unlocks_next_after_completed(pg_db, vip):
+    pg_db.close()
+    command.downgrade(_alembic_config(), "0015")
+    try:
+        with SessionLocal() as db:
+            db.execute(text("""
+                INSERT INTO quests (id, vip_id, title, quest_order, is_locked, status, created_at) VALUES
+                ('a1', 'vip-1', 'q1', 1, false, 'completed', now() - interval '1 hour'),
+                ('a2', 'vip-1', 'q2', 2, true,  'pending',   now() - interval '1 hour'),
+                ('b2', 'vip-1', 'q2', 2, true,  'pending',   now() - interval '2 hours'),
+                ('a3', 'vip-1', 'q3', 3, true,  'pending',   now() - interval '1 hour')
+            """))
+            db.commit()
+    finally:
+        command.upgrade(_alembic_config(), "head")
+
+    quests = _quests(pg_db)
+    assert [(q.id, q.is_locked) for q in quests] == [("a1", False), ("b2", False), ("a3", True)]
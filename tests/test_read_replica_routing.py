@@ -0,0 +1,80 @@
+"""
+읽기 복제본 라우팅 (app/database.get_read_db + main.replica_routing_middleware)
+- primary / replica를 SQLite 파일 2개로 대체, 각 DB의 marker 테이블 값으로 어느 쪽을 읽었는지 확인
+"""
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+import pytest
+from sqlalchemy import Column, MetaData, String, Table, create_engine, insert, select
+from sqlalchemy.orm import Session, sessionmaker
+
+from app import database
+from app.database import REPLICA_PIN_COOKIE, get_db, get_read_db
+from app.main import replica_routing_middleware
+
+marker = Table("marker", MetaData(), Column("name", String(20)))
+
+
+def _engine(path, name):
+    engine = create_engine(f"sqlite:///{path}")
+    marker.create(engine)
+    with engine.begin() as conn:
+        conn.execute(insert(marker).values(name=name))
+    return engine
+
+
+@pytest.fixture
+def engines(tmp_path, monkeypatch):
+    primary = _engine(tmp_path / "primary.db", "primary")
+    replica = _engine(tmp_path / "replica.db", "replica")
+    monkeypatch.setitem(database.SessionLocal.kw, "bind", primary)
+    return primary, replica
+
+
+def _use_replica(monkeypatch, replica):
+    monkeypatch.setattr(database, "replica_engine", replica)
+    monkeypatch.setattr(database, "ReadSessionLocal", sessionmaker(autocommit=False, autoflush=False, bind=replica))
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.middleware("http")(replica_routing_middleware)
+
+    @app.get("/read")
+    def read(db: Session = Depends(get_read_db)):
+        return {"source": db.execute(select(marker.c.name)).scalar()}
+
+    @app.post("/write")
+    def write(db: Session = Depends(get_db)):
+        db.execute(insert(marker).values(name="written"))
+        db.commit()
+        return {"ok": True}
+
+    # 고정 쿠키가 secure라서 https로 요청
+    return TestClient(app, base_url="https://testserver")
+
+
+def test_reads_primary_without_replica(engines, client):
+    assert client.get("/read").json() == {"source": "primary"}
+
+
+def test_reads_replica_when_configured(engines, monkeypatch, client):
+    _use_replica(monkeypatch, engines[1])
+    assert client.get("/read").json() == {"source": "replica"}
+    assert REPLICA_PIN_COOKIE not in client.cookies
+
+
+def test_write_pins_following_reads_to_primary(engines, monkeypatch, client):
+    _use_replica(monkeypatch, engines[1])
+    response = client.post("/write")
+    assert response.cookies.get(REPLICA_PIN_COOKIE) == "1"
+    assert client.get("/read").json() == {"source": "primary"}
+
+    client.cookies.clear()
+    assert client.get("/read").json() == {"source": "replica"}
+
+
+def test_falls_back_to_primary_when_replica_is_down(engines, tmp_path, monkeypatch, client):
+    _use_replica(monkeypatch, create_engine(f"sqlite:///{tmp_path / 'missing' / 'replica.db'}"))
+    assert client.get("/read").json() == {"source": "primary"}
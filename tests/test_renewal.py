@@ -0,0 +1,175 @@
+"""
+자동갱신 결제 엔진 (app/services/renewal.py) — 로컬 스텁 토스 서버 대상
+- 빌링키로 시나리오 선택: flaky(429 → 503 → 200) / duplicate(중복 orderId → 주문 조회 DONE)
+  declined(재시도 불가 오류) / down(계속 500) / slow(지연 응답, 동시 요청 수 확인)
+"""
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List
+import asyncio
+import json
+import threading
+import time
+
+import pytest
+
+from app.services import renewal
+from app.services.renewal import RenewalCharge, renewal_order_id
+
+PERIOD_END = datetime(2026, 10, 1)
+
+
+class StubToss:
+    def __init__(self):
+        self.requests: Dict[str, List[dict]] = {}
+        self.lookups: List[str] = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+
+    def charge(self, billing_key: str, body: dict):
+        with self.lock:
+            calls = self.requests.setdefault(billing_key, [])
+            calls.append(body)
+            n = len(calls)
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            if billing_key == "flaky":
+                return {1: (429, {"code": "TOO_MANY_REQUESTS"}), 2: (503, {"code": "UNAVAILABLE"})}.get(
+                    n, (200, {"paymentKey": "pk-flaky", "status": "DONE"})
+                )
+            if billing_key == "duplicate":
+                return 400, {"code": "DUPLICATED_ORDER_ID", "message": "이미 사용된 주문번호"}
+            if billing_key == "declined":
+                return 400, {"code": "REJECT_CARD_PAYMENT", "message": "한도 초과"}
+            if billing_key == "down":
+                return 500, {"code": "FAILED_INTERNAL_SYSTEM_PROCESSING"}
+            time.sleep(0.05)
+            return 200, {"paymentKey": f"pk-{body['orderId']}", "status": "DONE"}
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+
+
+@pytest.fixture
+def toss(monkeypatch):
+    stub = StubToss()
+
+    class Handler(BaseHTTPRequestHandler):
+        def _reply(self, status, payload):
+            data = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            self._reply(*stub.charge(self.path.rsplit("/", 1)[-1], body))
+
+        def do_GET(self):
+            order_id = self.path.rsplit("/", 1)[-1]
+            stub.lookups.append(order_id)
+            self._reply(200, {"orderId": order_id, "status": "DONE", "paymentKey": "pk-existing"})
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    monkeypatch.setenv("TOSS_SECRET_KEY", "test_sk")
+    monkeypatch.setattr(renewal.settings, "toss_api_base", f"http://127.0.0.1:{server.server_port}")
+    monkeypatch.setattr(renewal.settings, "renewal_max_retries", 3)
+    monkeypatch.setattr(renewal.settings, "renewal_backoff_seconds", 0.01)
+    monkeypatch.setattr(renewal.settings, "renewal_concurrency", 5)
+    yield stub
+    server.shutdown()
+    server.server_close()
+
+
+def _charge(billing_key: str, agent_id: str = "agent-1") -> RenewalCharge:
+    return RenewalCharge(
+        agent_id=agent_id,
+        email=f"{agent_id}@example.com",
+        billing_key=billing_key,
+        tier="flow_one",
+        billing_cycle="monthly",
+        amount=33000,
+        order_id=renewal_order_id(agent_id, PERIOD_END),
+        order_name="UNIFLOW flow_one (monthly) 자동갱신",
+        period_end=PERIOD_END,
+    )
+
+
+def test_retries_429_and_5xx_with_same_order_id(toss):
+    charge = _charge("flaky")
+    asyncio.run(renewal._charge_all([charge]))
+
+    assert charge.success and charge.payment_key == "pk-flaky"
+    assert [a["http_status"] for a in charge.attempts] == [429, 503, 200]
+    assert [a["status"] for a in charge.attempts] == ["failed", "failed", "success"]
+    assert {body["orderId"] for body in toss.requests["flaky"]} == {renewal_order_id("agent-1", PERIOD_END)}
+
+
+def test_duplicate_order_id_is_resolved_by_lookup(toss):
+    charge = _charge("duplicate")
+    asyncio.run(renewal._charge_all([charge]))
+
+    assert charge.success and charge.payment_key == "pk-existing"
+    assert len(charge.attempts) == 1
+    assert toss.lookups == [renewal_order_id("agent-1", PERIOD_END)]
+
+
+def test_non_retryable_error_is_not_retried(toss):
+    charge = _charge("declined")
+    asyncio.run(renewal._charge_all([charge]))
+
+    assert not charge.success
+    assert [(a["http_status"], a["error_code"]) for a in charge.attempts] == [(400, "REJECT_CARD_PAYMENT")]
+
+
+def test_gives_up_after_max_retries(toss):
+    charge = _charge("down")
+    asyncio.run(renewal._charge_all([charge]))
+
+    assert not charge.success
+    assert len(charge.attempts) == 4
+    assert len(toss.requests["down"]) == 4
+
+
+def test_concurrency_limit(toss):
+    charges = [_charge("slow", agent_id=f"agent-{i}") for i in range(20)]
+    asyncio.run(renewal._charge_all(charges))
+
+    assert all(c.success for c in charges)
+    assert 1 < toss.max_in_flight <= 5
+
+
+def test_run_auto_renewals_records_attempts_and_extends(toss, pg_db):
+    from app.models import PaymentEvent, RenewalAttempt, User
+
+    end = datetime.now().astimezone() - timedelta(hours=1)
+    pg_db.add(User(
+        id="agent-1", name="에이전트", email="agent-1@example.com", role="agent", tier="flow_one",
+        subscription_status="active", subscription_end_date=end, billing_key="flaky",
+    ))
+    pg_db.commit()
+
+    renewal.run_auto_renewals(["agent-1"])
+
+    pg_db.expire_all()
+    agent = pg_db.get(User, "agent-1")
+    attempts = pg_db.query(RenewalAttempt).order_by(RenewalAttempt.attempt).all()
+    assert [(a.attempt, a.http_status, a.status) for a in attempts] == [
+        (1, 429, "failed"), (2, 503, "failed"), (3, 200, "success"),
+    ]
+    assert {a.order_id for a in attempts} == {renewal_order_id("agent-1", end)}
+    assert pg_db.query(PaymentEvent).count() == 1
+    assert agent.subscription_status == "active" and agent.subscription_end_date > end
+
+    # 갱신된 에이전트는 다시 실행해도 결제 대상이 아님
+    renewal.run_auto_renewals(["agent-1"])
+    assert len(toss.requests["flaky"]) == 3
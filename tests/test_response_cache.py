@@ -0,0 +1,55 @@
+"""조회 API 응답 캐시 (app/services/cache.py) — 인프로세스 저장소 기준"""
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+import pytest
+
+from app.services import cache
+from app.services.cache import MemoryBackend, ResponseCache
+
+
+def _client(response_cache: ResponseCache, calls: list, ttl: int = 600):
+    app = FastAPI()
+
+    @app.get("/items")
+    def items(request: Request):
+        def build():
+            calls.append(1)
+            return {"version": len(calls)}
+        return response_cache.respond(request, build, ttl=ttl, tags=["items"])
+
+    return TestClient(app)
+
+
+@pytest.fixture
+def single_worker(monkeypatch):
+    monkeypatch.setattr(cache.settings, "redis_url", "")
+    monkeypatch.setattr(cache.settings, "response_cache_enabled", True)
+    monkeypatch.setattr(cache.settings, "web_concurrency", 1)
+
+
+def test_hit_etag_and_invalidate(single_worker):
+    response_cache, calls = ResponseCache(), []
+    client = _client(response_cache, calls)
+
+    first = client.get("/items")
+    assert client.get("/items").json() == {"version": 1}
+    assert client.get("/items", headers={"If-None-Match": first.headers["etag"]}).status_code == 304
+
+    response_cache.invalidate("items")
+    assert client.get("/items").json() == {"version": 2}
+
+
+def test_single_worker_keeps_requested_ttl(single_worker):
+    assert ResponseCache().max_ttl is None
+
+
+def test_multiple_workers_cap_memory_ttl(single_worker, monkeypatch):
+    monkeypatch.setattr(cache.settings, "web_concurrency", 4)
+    monkeypatch.setattr(cache.settings, "response_cache_local_ttl_seconds", 30)
+    response_cache = ResponseCache()
+    assert isinstance(response_cache.backend, MemoryBackend) and response_cache.max_ttl == 30
+
+    ttls = []
+    monkeypatch.setattr(response_cache.backend, "set", lambda key, value, ttl, tags: ttls.append(ttl))
+    _client(response_cache, [], ttl=600).get("/items")
+    assert ttls == [30]
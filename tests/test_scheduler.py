@@ -0,0 +1,140 @@
+"""
+인프로세스 작업 스케줄러 (app/services/scheduler.py, PostgreSQL 전용)
+- 인스턴스 2개(Scheduler 객체 2개)가 같은 슬롯을 한 번만 실행하는지 (job_runs 슬롯 선점 + advisory lock)
+- 수동 실행 API (POST /api/admin/jobs/{name}/run)
+"""
+from datetime import datetime, timezone
+import threading
+import time
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+import pytest
+from sqlalchemy import text
+
+from app.api import admin
+from app.database import engine
+from app.models import JobRun, User
+from app.services import scheduler as scheduler_module
+from app.services.scheduler import Scheduler, _lock_key
+
+SLOT = datetime(2026, 10, 1, 0, 0, tzinfo=timezone.utc)
+
+
+class Calls:
+    def __init__(self, delay: float = 0.0, fail: bool = False):
+        self.count = 0
+        self.delay = delay
+        self.fail = fail
+        self.lock = threading.Lock()
+
+    def __call__(self):
+        with self.lock:
+            self.count += 1
+        time.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("boom")
+
+
+def _runs(db, job_name="nightly"):
+    db.expire_all()
+    return db.query(JobRun).filter(JobRun.job_name == job_name).all()
+
+
+def _instances(calls):
+    """같은 작업을 등록한 두 인스턴스 (워커 / 레플리카 2개)"""
+    first, second = Scheduler(), Scheduler()
+    return first.register("nightly", calls, interval_seconds=3600), second.register("nightly", calls, interval_seconds=3600), first, second
+
+
+def test_slot_is_claimed_once_across_instances(pg_db):
+    calls = Calls()
+    job_a, job_b, a, b = _instances(calls)
+
+    assert a.run_job(job_a, SLOT) is not None
+    assert b.run_job(job_b, SLOT) is None  # 잠금은 풀렸지만 슬롯은 이미 처리됨
+
+    runs = _runs(pg_db)
+    assert calls.count == 1
+    assert [(r.status, r.trigger) for r in runs] == [("success", "schedule")]
+    assert runs[0].duration_ms is not None
+
+
+def test_concurrent_instances_run_slot_once(pg_db):
+    calls = Calls(delay=0.3)
+    job_a, job_b, a, b = _instances(calls)
+    results = []
+    threads = [
+        threading.Thread(target=lambda s=s, j=j: results.append(s.run_job(j, SLOT)))
+        for s, j in ((a, job_a), (b, job_b))
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert calls.count == 1
+    assert sorted(r is None for r in results) == [False, True]
+    assert len(_runs(pg_db)) == 1
+
+
+def test_advisory_lock_held_elsewhere_skips_run(pg_db):
+    calls = Calls()
+    job_a, _, a, _ = _instances(calls)
+    with engine.connect() as other:
+        assert other.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": _lock_key("nightly")}).scalar()
+        # 스케줄 실행은 기록 없이 건너뜀, 수동 실행은 skipped로 기록
+        assert a.run_job(job_a, SLOT) is None
+        assert a.run_job(job_a, datetime.now(timezone.utc), trigger="manual") is not None
+        other.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": _lock_key("nightly")})
+
+    assert calls.count == 0
+    assert [(r.status, r.trigger) for r in _runs(pg_db)] == [("skipped", "manual")]
+
+    # 잠금 해제 후에는 같은 슬롯을 정상 실행
+    assert a.run_job(job_a, SLOT) is not None
+    assert calls.count == 1
+
+
+def test_failed_job_records_error(pg_db):
+    calls = Calls(fail=True)
+    job_a, _, a, _ = _instances(calls)
+    a.run_job(job_a, SLOT)
+
+    (run,) = _runs(pg_db)
+    assert run.status == "failed" and "boom" in run.error
+
+
+@pytest.fixture
+def admin_client(pg_db, monkeypatch):
+    pg_db.add(User(id="admin-1", name="관리자", role="admin"))
+    pg_db.add(User(id="agent-1", name="에이전트", role="agent"))
+    pg_db.commit()
+    calls = Calls()
+    monkeypatch.setitem(scheduler_module.scheduler.jobs, "nightly", scheduler_module.Job("nightly", calls, interval_seconds=3600))
+
+    app = FastAPI()
+    app.include_router(admin.router, prefix="/api/admin")
+    return TestClient(app), calls
+
+
+def test_manual_trigger_endpoint(pg_db, admin_client):
+    client, calls = admin_client
+
+    assert client.post("/api/admin/jobs/nightly/run", json={"admin_id": "agent-1"}).status_code == 403
+    assert client.post("/api/admin/jobs/missing/run", json={"admin_id": "admin-1"}).status_code == 404
+
+    response = client.post("/api/admin/jobs/nightly/run", json={"admin_id": "admin-1"})
+    assert response.status_code == 202
+
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline:
+        runs = _runs(pg_db)
+        if runs and runs[0].status != "running":
+            break
+        time.sleep(0.05)
+    assert [(r.status, r.trigger) for r in runs] == [("success", "manual")]
+    assert calls.count == 1
+
+    history = client.get("/api/admin/jobs/runs", params={"job_name": "nightly"}).json()
+    assert [r["status"] for r in history] == ["success"]